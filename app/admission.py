@@ -0,0 +1,275 @@
+# app/admission.py
+"""
+Admission control for LLM and embedding calls.
+
+One controller per kind of work ("llm", "embeddings"), shared by the whole
+process. At most `limit` calls run at once; up to `queue_size` more wait, best
+priority first (interactive, then standard, then bulk; FIFO within a class).
+A caller that can't get in fails fast instead of piling up on the provider:
+
+    queue full         429  (a better-priority arrival sheds the newest
+                             lowest-priority waiter instead, which gets the 429)
+    waited too long    503  (ADMISSION_QUEUE_TIMEOUT_SECONDS)
+
+both as Overloaded, carrying a Retry-After estimate from the recent call
+duration and the backlog. Waiting holds a threadpool thread, which is why the
+queue is bounded: cheap endpoints (/health, /metrics, lookups) always find one.
+
+The priority class is request-scoped: endpoints declare it with
+`dependencies=[admission_priority("interactive")]`; background work sets it
+with `priority_scope("bulk")`. Unmarked work is "standard".
+"""
+import heapq
+import itertools
+import math
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from fastapi import Depends
+from langchain_core.embeddings import Embeddings
+
+from app.core.config import settings
+
+PRIORITIES = {"interactive": 0, "standard": 1, "bulk": 2}
+
+_priority: ContextVar[str] = ContextVar("admission_priority", default="standard")
+
+
+def admission_priority(name: str):
+    """
+    Route dependency setting the priority class of the request's LLM / embedding calls.
+    Async on purpose: it runs in the request's context, which sync endpoints inherit.
+    """
+    if name not in PRIORITIES:
+        raise ValueError(f"priority must be one of {list(PRIORITIES)}")
+
+    async def set_priority():
+        _priority.set(name)
+
+    return Depends(set_priority)
+
+
+@contextmanager
+def priority_scope(name: str):
+    token = _priority.set(name)
+    try:
+        yield
+    finally:
+        _priority.reset(token)
+
+
+def current_priority() -> str:
+    return _priority.get()
+
+
+class Overloaded(Exception):
+    def __init__(self, kind: str, status_code: int, retry_after: int, reason: str):
+        super().__init__(f"{kind} is overloaded: {reason}")
+        self.kind = kind
+        self.status_code = status_code
+        self.retry_after = retry_after
+        self.reason = reason
+
+
+class _Waiter:
+    __slots__ = ("rank", "seq", "event", "state")
+
+    def __init__(self, rank: int, seq: int):
+        self.rank = rank
+        self.seq = seq
+        self.event = threading.Event()
+        self.state = "waiting"   # -> admitted | shed | expired
+
+
+class AdmissionController:
+    def __init__(self, kind: str, limit: int, queue_size: int, timeout: float):
+        self.kind = kind
+        self.limit = max(1, limit)
+        self.queue_size = max(0, queue_size)
+        self.timeout = timeout
+
+        self._lock = threading.Lock()
+        self._heap: list[tuple[int, int, _Waiter]] = []   # expired / shed entries are skipped on pop
+        self._depth = [0] * len(PRIORITIES)               # live waiters per class
+        self._in_flight = 0
+        self._seq = itertools.count()
+        # smoothed duration of one call, for Retry-After
+        self._call_seconds: float | None = None
+
+        self.max_depth = 0
+        self.admitted = {p: 0 for p in PRIORITIES}
+        self.queued = {p: 0 for p in PRIORITIES}
+        self.rejected = {p: 0 for p in PRIORITIES}
+        self.shed = {p: 0 for p in PRIORITIES}
+        self.timed_out = {p: 0 for p in PRIORITIES}
+        self._wait_total = 0.0
+
+    # ---------- admission ----------
+
+    def _retry_after(self) -> int:
+        # caller holds the lock
+        if self._call_seconds is None:
+            return 1
+        backlog = sum(self._depth) + self._in_flight
+        return min(60, max(1, math.ceil(self._call_seconds * backlog / self.limit)))
+
+    def _lowest_waiter(self) -> _Waiter | None:
+        # newest waiter of the worst class; the queue is small, a scan is fine
+        live = [w for _, _, w in self._heap if w.state == "waiting"]
+        return max(live, key=lambda w: (w.rank, w.seq), default=None)
+
+    def acquire(self, priority: str | None = None):
+        name = priority or current_priority()
+        rank = PRIORITIES[name]
+        with self._lock:
+            if self._in_flight < self.limit and not sum(self._depth):
+                self._in_flight += 1
+                self.admitted[name] += 1
+                return
+
+            if sum(self._depth) >= self.queue_size:
+                victim = self._lowest_waiter()
+                if victim is None or victim.rank <= rank:
+                    self.rejected[name] += 1
+                    raise Overloaded(self.kind, 429, self._retry_after(), "queue full")
+                victim.state = "shed"
+                self._depth[victim.rank] -= 1
+                victim.event.set()
+
+            waiter = _Waiter(rank, next(self._seq))
+            heapq.heappush(self._heap, (rank, waiter.seq, waiter))
+            self._depth[rank] += 1
+            self.queued[name] += 1
+            self.max_depth = max(self.max_depth, sum(self._depth))
+
+        t0 = time.monotonic()
+        waiter.event.wait(self.timeout)
+        with self._lock:
+            self._wait_total += time.monotonic() - t0
+            if waiter.state == "admitted":
+                self.admitted[name] += 1
+                return
+            if waiter.state == "shed":
+                self.shed[name] += 1
+                raise Overloaded(self.kind, 429, self._retry_after(), "shed for higher-priority work")
+            waiter.state = "expired"
+            self._depth[rank] -= 1
+            self.timed_out[name] += 1
+            raise Overloaded(self.kind, 503, self._retry_after(), f"no slot within {self.timeout:g}s")
+
+    def release(self, seconds: float):
+        with self._lock:
+            self._call_seconds = seconds if self._call_seconds is None else 0.8 * self._call_seconds + 0.2 * seconds
+            while self._heap:
+                _, _, waiter = heapq.heappop(self._heap)
+                if waiter.state != "waiting":
+                    continue
+                # hand the slot straight over: in_flight stays the same
+                waiter.state = "admitted"
+                self._depth[waiter.rank] -= 1
+                waiter.event.set()
+                return
+            self._in_flight -= 1
+
+    @contextmanager
+    def slot(self, priority: str | None = None):
+        self.acquire(priority)
+        t0 = time.monotonic()
+        try:
+            yield
+        finally:
+            self.release(time.monotonic() - t0)
+
+    def stats(self) -> dict:
+        with self._lock:
+            waits = sum(self.queued.values())
+            return {
+                "limit": self.limit,
+                "queue_size": self.queue_size,
+                "in_flight": self._in_flight,
+                "queue_depth": {p: self._depth[r] for p, r in PRIORITIES.items()},
+                "max_queue_depth": self.max_depth,
+                "admitted": dict(self.admitted),
+                "queued": dict(self.queued),
+                "rejected_queue_full": dict(self.rejected),
+                "shed": dict(self.shed),
+                "timed_out": dict(self.timed_out),
+                "avg_wait_ms": round(self._wait_total / waits * 1000, 1) if waits else 0.0,
+                "avg_call_ms": round(self._call_seconds * 1000, 1) if self._call_seconds is not None else None,
+            }
+
+
+_controllers: dict[str, AdmissionController] = {}
+_controllers_lock = threading.Lock()
+
+
+def get_admission(kind: str) -> AdmissionController:
+    controller = _controllers.get(kind)
+    if controller is None:
+        with _controllers_lock:
+            controller = _controllers.get(kind)
+            if controller is None:
+                if kind == "llm":
+                    limit, queue_size = settings.LLM_MAX_CONCURRENCY, settings.LLM_QUEUE_SIZE
+                else:
+                    limit, queue_size = settings.EMBEDDING_MAX_CONCURRENCY, settings.EMBEDDING_QUEUE_SIZE
+                controller = _controllers[kind] = AdmissionController(
+                    kind, limit, queue_size, settings.ADMISSION_QUEUE_TIMEOUT_SECONDS
+                )
+    return controller
+
+
+def admission_stats() -> dict:
+    with _controllers_lock:
+        controllers = list(_controllers.values())
+    return {c.kind: c.stats() for c in controllers}
+
+
+class AdmittedLLM:
+    """
+    Chat model whose invoke() goes through the "llm" controller; anything else passes through.
+    """
+
+    def __init__(self, llm, controller: AdmissionController | None = None):
+        self.llm = llm
+        self.controller = controller or get_admission("llm")
+
+    def invoke(self, *args, **kwargs):
+        with self.controller.slot():
+            return self.llm.invoke(*args, **kwargs)
+
+    def __getattr__(self, name):
+        return getattr(self.llm, name)
+
+
+class AdmittedEmbeddings(Embeddings):
+    """
+    Embeddings whose calls go through the "embeddings" controller.
+    """
+
+    def __init__(self, embeddings, controller: AdmissionController | None = None):
+        self.inner = embeddings
+        self.controller = controller or get_admission("embeddings")
+
+    def embed_documents(self, texts: list[str], task_type: str | None = None, **kwargs) -> list[list[float]]:
+        # embed_queries() passes task_type only when the signature has it; forward it the same way
+        if task_type is not None and "task_type" in _parameters(self.inner.embed_documents):
+            kwargs["task_type"] = task_type
+        with self.controller.slot():
+            return self.inner.embed_documents(texts, **kwargs)
+
+    def embed_query(self, text: str, **kwargs) -> list[float]:
+        with self.controller.slot():
+            return self.inner.embed_query(text, **kwargs)
+
+
+def _parameters(fn) -> set:
+    import inspect
+
+    return set(inspect.signature(fn).parameters)
+
+
+def admit_llm(llm):
+    return AdmittedLLM(llm) if settings.ADMISSION_ENABLED else llm
@@ -0,0 +1,502 @@
+# app/benchmarks/load.py
+"""
+End-to-end load test: many concurrent virtual learners replaying a scenario
+against the whole app (threadpool, SQLite, Qdrant, LLM fan-out included).
+
+    python -m app.benchmarks.load run --concurrency 1,4,16 --duration 20
+    python -m app.benchmarks.load run --scenario my_scenario.http --llm-latency-ms 1500 --json
+    python -m app.benchmarks.load serve --port 8000 --llm-latency-ms 800     # simulated providers behind uvicorn
+    python -m app.benchmarks.load run --url http://localhost:8000 --concurrency 8,32
+
+By default the app runs in-process (httpx over ASGI, lifespan included) in a
+fresh working directory, with simulated LLM and embedding providers whose
+latency is configurable; --url drives a running server instead. Before the
+sweep, the --pdf files are ingested once (the repo's architecture PDF if none given).
+
+Scenarios use the api.http format: `###` blocks of a request line, headers, a
+blank line and a JSON body. `{{baseUrl}}` is dropped, `@name = value` lines
+define variables, and every top-level string/number field of a JSON response
+becomes a variable for the learner's next requests (`{{session_id}}`, `{{question}}`).
+`# @repeat N` inside a block sends it N times. Multipart blocks are skipped.
+Each learner replays the scenario from the top until the level's duration is up.
+"""
+import argparse
+import asyncio
+import json
+import math
+import os
+import random
+import re
+import tempfile
+import threading
+import time
+from contextlib import asynccontextmanager
+from pathlib import Path
+
+from app.benchmarks.retrieval import HashEmbeddings
+
+LEARNER_SCENARIO = """
+### Ask
+POST {{baseUrl}}/rag/ask
+Content-Type: application/json
+
+{"question": "What is this document about?"}
+
+### Quiz
+POST {{baseUrl}}/rag/quiz
+Content-Type: application/json
+
+{"k": 5, "num_questions": 3}
+
+### Session start
+POST {{baseUrl}}/rag/test-me/session/start
+Content-Type: application/json
+
+{}
+
+### Session question
+POST {{baseUrl}}/rag/test-me/session/question
+Content-Type: application/json
+
+{"session_id": "{{session_id}}", "k": 5}
+
+### Session answer
+POST {{baseUrl}}/rag/test-me/session/answer
+Content-Type: application/json
+
+{"session_id": "{{session_id}}", "question": "{{question}}", "user_answer": "I think it routes requests through FastAPI.", "k": 5}
+
+### Session question
+POST {{baseUrl}}/rag/test-me/session/question
+Content-Type: application/json
+
+{"session_id": "{{session_id}}", "k": 5}
+
+### Session answer
+POST {{baseUrl}}/rag/test-me/session/answer
+Content-Type: application/json
+
+{"session_id": "{{session_id}}", "question": "{{question}}", "user_answer": "Not sure.", "k": 5}
+
+### Session weak areas
+GET {{baseUrl}}/rag/test-me/session/{{session_id}}/weak-areas
+"""
+
+_VAR = re.compile(r"{{\s*([A-Za-z_][\w.-]*)\s*}}")
+
+
+# ---------- simulated providers ----------
+
+class _Reply:
+    __slots__ = ("content",)
+
+    def __init__(self, content: str):
+        self.content = content
+
+
+class SimulatedLLM:
+    """
+    Chat model stand-in: sleeps latency_ms (+/- jitter_ms) per call and answers
+    with text the endpoints can parse (grades for grader prompts). Thread-safe;
+    tracks calls and peak concurrency.
+    """
+
+    def __init__(self, latency_ms: float = 800, jitter_ms: float = 200, seed: int = 0):
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self.calls = 0
+        self.in_flight = 0
+        self.peak = 0
+
+    def invoke(self, prompt: str) -> _Reply:
+        with self._lock:
+            self.calls += 1
+            self.in_flight += 1
+            self.peak = max(self.peak, self.in_flight)
+            delay = max(0.0, self.latency_ms + self._rng.uniform(-self.jitter_ms, self.jitter_ms)) / 1000
+        try:
+            time.sleep(delay)
+        finally:
+            with self._lock:
+                self.in_flight -= 1
+        lowered = prompt.lower()
+        if "grade" in lowered:
+            return _Reply(self._rng.choice(["Correct.", "Partially correct.", "Incorrect."]) + " The context covers this.")
+        if "quiz" in lowered or "multiple" in lowered:
+            return _Reply("1. Which component routes requests?\nA) FastAPI\nB) Qdrant\nC) SQLite\nD) Gemini\nAnswer: A")
+        return _Reply("How does the backend route a request to the right pipeline?")
+
+    def stats(self) -> dict:
+        return {"calls": self.calls, "peak_concurrency": self.peak}
+
+
+class SimulatedEmbeddings(HashEmbeddings):
+    """
+    Deterministic embeddings with API-like latency: latency_ms per call plus
+    per_text_ms per embedded text.
+    """
+
+    def __init__(self, dim: int | None = None, latency_ms: float = 150, per_text_ms: float = 2):
+        super().__init__(dim)
+        self.latency_ms = latency_ms
+        self.per_text_ms = per_text_ms
+        self._lock = threading.Lock()
+
+    def _wait(self, n: int):
+        with self._lock:
+            self.calls += 1
+            self.texts += n
+        time.sleep((self.latency_ms + self.per_text_ms * n) / 1000)
+
+    def embed_documents(self, texts: list[str]) -> list[list[float]]:
+        self._wait(len(texts))
+        return [self.vector(t).tolist() for t in texts]
+
+    def embed_query(self, text: str) -> list[float]:
+        self._wait(1)
+        return self.vector(text).tolist()
+
+    def stats(self) -> dict:
+        return {"calls": self.calls, "texts": self.texts}
+
+
+def install_providers(llm_latency_ms: float, embed_latency_ms: float, seed: int = 0):
+    """
+    Point the app at simulated providers. Call before the app's Services are built.
+    """
+    from app.embeddings import gemini_embeddings
+
+    llm = SimulatedLLM(llm_latency_ms, jitter_ms=llm_latency_ms / 4, seed=seed)
+    embeddings = SimulatedEmbeddings(latency_ms=embed_latency_ms)
+    gemini_embeddings._embedding_model = embeddings
+    return llm, embeddings
+
+
+# ---------- scenarios ----------
+
+class Step:
+    __slots__ = ("name", "method", "path", "headers", "body", "repeat")
+
+    def __init__(self, name: str, method: str, path: str, headers: dict, body: str | None, repeat: int = 1):
+        self.name = name
+        self.method = method
+        self.path = path
+        self.headers = headers
+        self.body = body
+        self.repeat = repeat
+
+    def render(self, variables: dict) -> tuple[str, bytes | None]:
+        def sub(value, escape):
+            def repl(m):
+                v = variables.get(m.group(1))
+                if v is None:
+                    return m.group(0)
+                # substituted into JSON strings, so escape quotes and newlines
+                return json.dumps(v)[1:-1] if escape and isinstance(v, str) else str(v)
+            return _VAR.sub(repl, value)
+
+        body = sub(self.body, escape=True).encode() if self.body else None
+        return sub(self.path, escape=False), body
+
+
+def parse_http(text: str) -> list[Step]:
+    """
+    Steps from an api.http-style file (JSON and bodiless requests only).
+    """
+    variables, steps = {}, []
+    for block in re.split(r"^###", text, flags=re.M):
+        lines = block.splitlines()
+        name = lines[0].strip() if lines else ""
+        rest = lines[1:] if lines else []
+        repeat, request, headers, body_lines, in_body = 1, None, {}, [], False
+        for line in rest:
+            stripped = line.strip()
+            if request is None:
+                if not stripped:
+                    continue
+                m = re.match(r"@([\w.-]+)\s*=\s*(.*)$", stripped)
+                if m:
+                    variables[m.group(1)] = m.group(2).strip()
+                    continue
+                m = re.match(r"#\s*@repeat\s+(\d+)", stripped)
+                if m:
+                    repeat = int(m.group(1))
+                    continue
+                if stripped.startswith("#"):
+                    continue
+                request = stripped.split()
+                continue
+            if not in_body:
+                if not stripped:
+                    in_body = True
+                elif ":" in stripped:
+                    key, value = stripped.split(":", 1)
+                    headers[key.strip()] = value.strip()
+                continue
+            body_lines.append(line)
+        if request is None or len(request) < 2:
+            # header block of variables only, or an empty block
+            m = re.match(r"@([\w.-]+)\s*=\s*(.*)$", name)
+            if m:
+                variables[m.group(1)] = m.group(2).strip()
+            continue
+        if "multipart" in headers.get("Content-Type", ""):
+            print(f"[LoadTest] Skipping multipart step: {name}")
+            continue
+        path = re.sub(r"^{{\s*baseUrl\s*}}", "", request[1])
+        path = re.sub(r"^https?://[^/]+", "", path)
+        body = "\n".join(body_lines).strip() or None
+
+        # file-level constants are fixed now; response variables are filled in per learner
+        def constants(value):
+            return _VAR.sub(lambda m: str(variables.get(m.group(1), m.group(0))), value)
+
+        headers = {key: constants(value) for key, value in headers.items()}
+        steps.append(Step(
+            name or f"{request[0]} {path}", request[0].upper(), constants(path), headers,
+            constants(body) if body else None, repeat,
+        ))
+    return steps
+
+
+# ---------- runs ----------
+
+async def _request(client, step: Step, variables: dict, samples: list):
+    path, body = step.render(variables)
+    headers = dict(step.headers)
+    if body is not None:
+        headers.setdefault("Content-Type", "application/json")
+    t0 = time.perf_counter()
+    error = None
+    try:
+        response = await client.request(step.method, path, content=body, headers=headers)
+        status = response.status_code
+        if status >= 400:
+            error = f"HTTP {status}"
+        elif "json" in response.headers.get("content-type", ""):
+            data = response.json()
+            if isinstance(data, dict):
+                if data.get("error"):
+                    error = str(data["error"])[:80]
+                for key, value in data.items():
+                    if isinstance(value, (str, int, float)) and not isinstance(value, bool):
+                        variables[key] = value
+    except Exception as e:
+        status, error = None, type(e).__name__
+    samples.append((step.name, time.perf_counter() - t0, status, error))
+
+
+async def _learner(client, steps: list[Step], deadline: float, samples: list):
+    while time.perf_counter() < deadline:
+        variables = {}
+        for step in steps:
+            for _ in range(step.repeat):
+                if time.perf_counter() >= deadline:
+                    return
+                await _request(client, step, variables, samples)
+
+
+def _percentile(values: list[float], p: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, max(0, math.ceil(p / 100 * len(ordered)) - 1))]
+
+
+def summarize(samples: list, elapsed: float) -> dict:
+    def stats(rows):
+        ms = [s[1] * 1000 for s in rows]
+        errors = [s for s in rows if s[3] is not None]
+        return {
+            "requests": len(rows),
+            "errors": len(errors),
+            "error_rate": round(len(errors) / len(rows), 4) if rows else 0.0,
+            "p50_ms": round(_percentile(ms, 50), 1) if ms else None,
+            "p95_ms": round(_percentile(ms, 95), 1) if ms else None,
+            "p99_ms": round(_percentile(ms, 99), 1) if ms else None,
+            "max_ms": round(max(ms), 1) if ms else None,
+        }
+
+    by_step = {}
+    for s in samples:
+        by_step.setdefault(s[0], []).append(s)
+    error_kinds = {}
+    for s in samples:
+        if s[3] is not None:
+            error_kinds[s[3]] = error_kinds.get(s[3], 0) + 1
+    return {
+        **stats(samples),
+        "seconds": round(elapsed, 2),
+        "throughput_rps": round(len(samples) / elapsed, 2) if elapsed else 0.0,
+        "endpoints": {name: stats(rows) for name, rows in by_step.items()},
+        "error_kinds": dict(sorted(error_kinds.items(), key=lambda x: -x[1])[:10]),
+    }
+
+
+async def run_level(client, steps: list[Step], concurrency: int, duration: float) -> dict:
+    samples = []
+    t0 = time.perf_counter()
+    deadline = t0 + duration
+    await asyncio.gather(*(_learner(client, steps, deadline, samples) for _ in range(concurrency)))
+    # in-flight requests finish after the deadline, so measure to the last one
+    return {"concurrency": concurrency, **summarize(samples, time.perf_counter() - t0)}
+
+
+async def ingest(client, pdfs: list[str], workspace: str | None = None):
+    for path in pdfs:
+        data = {"workspace": workspace} if workspace else None
+        with open(path, "rb") as f:
+            response = await client.post(
+                "/ingest/pdf", files={"file": (Path(path).name, f.read(), "application/pdf")}, data=data
+            )
+        body = response.json() if "json" in response.headers.get("content-type", "") else {}
+        print(f"[LoadTest] Ingested {path}: {body.get('chunks_added', body.get('error', response.status_code))}")
+
+
+@asynccontextmanager
+async def inprocess_client(llm, timeout: float):
+    """
+    httpx client wired to the app over ASGI, with the lifespan running.
+    """
+    import httpx
+
+    from app.main import app
+    from app.services import Services
+
+    app.state.services = Services(llm_factory=lambda: llm)
+    async with app.router.lifespan_context(app):
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://loadtest", timeout=timeout) as client:
+            yield client
+
+
+@asynccontextmanager
+async def http_client(url: str, concurrency: int, timeout: float):
+    import httpx
+
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(base_url=url, timeout=timeout, limits=limits) as client:
+        yield client
+
+
+async def sweep(args, steps: list[Step]) -> dict:
+    levels = [int(x) for x in args.concurrency.split(",") if x.strip()]
+    providers = None
+    if args.url:
+        client_cm = http_client(args.url, max(levels), args.timeout)
+    else:
+        llm, embeddings = install_providers(args.llm_latency_ms, args.embed_latency_ms, args.seed)
+        providers = (llm, embeddings)
+        client_cm = inprocess_client(llm, args.timeout)
+
+    report = {"mode": "http" if args.url else "in-process", "scenario_steps": [s.name for s in steps], "levels": []}
+    async with client_cm as client:
+        if not args.no_ingest:
+            await ingest(client, args.pdf)
+        for level in levels:
+            before = (providers[0].calls, providers[1].calls) if providers else None
+            if providers:
+                providers[0].peak = 0
+            result = await run_level(client, steps, level, args.duration)
+            if providers:
+                result["llm_calls"] = providers[0].calls - before[0]
+                result["llm_peak_concurrency"] = providers[0].peak
+                result["embed_calls"] = providers[1].calls - before[1]
+            report["levels"].append(result)
+            print(f"[LoadTest] concurrency={level}: {result['requests']} requests, "
+                  f"{result['throughput_rps']} req/s, {result['error_rate']:.1%} errors")
+    return report
+
+
+def print_report(report: dict):
+    print(f"\nmode: {report['mode']}\n")
+    print(f"{'learners':>9}{'req/s':>9}{'requests':>10}{'errors':>9}{'p50_ms':>10}{'p95_ms':>10}{'p99_ms':>10}{'llm_peak':>10}")
+    for level in report["levels"]:
+        print(
+            f"{level['concurrency']:>9}{level['throughput_rps']:>9.2f}{level['requests']:>10}"
+            f"{level['error_rate']:>9.1%}{level['p50_ms'] or 0:>10.1f}{level['p95_ms'] or 0:>10.1f}"
+            f"{level['p99_ms'] or 0:>10.1f}{level.get('llm_peak_concurrency', '-'):>10}"
+        )
+    for level in report["levels"]:
+        print(f"\nlearners={level['concurrency']}")
+        print(f"  {'endpoint':<24}{'requests':>9}{'errors':>9}{'p50_ms':>10}{'p95_ms':>10}{'p99_ms':>10}{'max_ms':>10}")
+        for name, s in level["endpoints"].items():
+            print(
+                f"  {name[:24]:<24}{s['requests']:>9}{s['error_rate']:>9.1%}{s['p50_ms']:>10.1f}"
+                f"{s['p95_ms']:>10.1f}{s['p99_ms']:>10.1f}{s['max_ms']:>10.1f}"
+            )
+        for kind, count in level["error_kinds"].items():
+            print(f"  error x{count}: {kind}")
+
+
+def serve(args):
+    """
+    uvicorn with the simulated providers, for --url runs against a real server process.
+    """
+    import uvicorn
+
+    llm, _ = install_providers(args.llm_latency_ms, args.embed_latency_ms, args.seed)
+    from app.main import app
+    from app.services import Services
+
+    app.state.services = Services(llm_factory=lambda: llm)
+    uvicorn.run(app, host=args.host, port=args.port)
+
+
+def _isolate(workdir: str | None) -> str:
+    # the app keeps its SQLite file and local Qdrant under ./data
+    workdir = workdir or tempfile.mkdtemp(prefix="loadtest-")
+    os.makedirs(os.path.join(workdir, "data"), exist_ok=True)
+    os.chdir(workdir)
+    return workdir
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Concurrent end-to-end load test.")
+    sub = parser.add_subparsers(dest="command", required=True)
+    default_pdf = Path(__file__).resolve().parents[2] / "ai_learning_copilot_architecture.pdf"
+
+    def providers(p):
+        p.add_argument("--llm-latency-ms", type=float, default=800)
+        p.add_argument("--embed-latency-ms", type=float, default=150)
+        p.add_argument("--seed", type=int, default=0)
+        p.add_argument("--workdir", help="where ./data goes (default: a fresh temp directory)")
+
+    run = sub.add_parser("run", help="run a concurrency sweep")
+    run.add_argument("--url", help="drive a running server instead of the in-process app")
+    run.add_argument("--scenario", help="api.http-style scenario file (default: built-in learner loop)")
+    run.add_argument("--concurrency", default="1,4,16", help="comma-separated learner counts")
+    run.add_argument("--duration", type=float, default=20, help="seconds per concurrency level")
+    run.add_argument("--timeout", type=float, default=60, help="per-request timeout in seconds")
+    run.add_argument("--pdf", nargs="*", default=[str(default_pdf)] if default_pdf.exists() else [])
+    run.add_argument("--no-ingest", action="store_true", help="skip ingesting --pdf first")
+    run.add_argument("--json", action="store_true", help="print the report as JSON")
+    providers(run)
+
+    srv = sub.add_parser("serve", help="serve the app with simulated providers")
+    srv.add_argument("--host", default="127.0.0.1")
+    srv.add_argument("--port", type=int, default=8000)
+    providers(srv)
+
+    args = parser.parse_args()
+    args.pdf = [str(Path(p).resolve()) for p in getattr(args, "pdf", [])]
+    scenario = Path(args.scenario).resolve() if getattr(args, "scenario", None) else None
+    if args.command == "serve" or not args.url:
+        _isolate(args.workdir)
+
+    if args.command == "serve":
+        serve(args)
+        return
+
+    steps = parse_http(scenario.read_text(encoding="utf-8") if scenario else LEARNER_SCENARIO)
+    if not steps:
+        parser.error("the scenario has no runnable requests")
+    report = asyncio.run(sweep(args, steps))
+    if args.json:
+        print(json.dumps(report, indent=2))
+        return
+    print_report(report)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,369 @@
+# app/benchmarks/retrieval.py
+"""
+Offline retrieval evaluation: recall vs latency across search configurations.
+
+    python -m app.benchmarks.retrieval synth --files notes.pdf guide.md --queries 200 --out data/eval/notes.json
+    python -m app.benchmarks.retrieval synth --workspace default --queries 200 --out data/eval/default.json
+    python -m app.benchmarks.retrieval run --dataset data/eval/notes.json --k 5
+    python -m app.benchmarks.retrieval run --dataset data/eval/notes.json --configs data/eval/configs.json --json
+    python -m app.benchmarks.retrieval run --dataset data/eval/notes.json --backend numpy
+
+A dataset is one JSON file:
+
+    {
+      "corpus":  [{"id": "c1", "text": "...", "source": "guide.pdf"}, ...],
+      "queries": [{"id": "q1", "query": "...", "relevant": ["c1", "c7"], "sources": null}, ...]
+    }
+
+`relevant` may also map chunk ids to graded relevance ({"c1": 2, "c7": 1}) for nDCG.
+
+Each run embeds the corpus with deterministic hashing embeddings into an
+in-memory Qdrant collection, or a NumpyStore in a temporary directory with
+--backend numpy (no API key, no network), then runs every query through the
+store's search() once per configuration. A configuration is a
+search profile plus optional overrides of its fields, e.g.
+
+    [{"name": "balanced"}, {"name": "wide-mmr", "profile": "balanced", "candidate_min": 40, "mmr_lambda": 0.5}]
+
+Local Qdrant always searches exactly, so hnsw_ef / exact only change the
+numbers against a server. Comparing chunk sizes means one dataset per size
+(`synth --chunk-size`), since labels are chunk ids.
+"""
+import argparse
+import hashlib
+import json
+import math
+import random
+import re
+import statistics
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
+
+from app.core.config import settings
+from app.vectorstore.base import VECTOR_BACKENDS
+from app.vectorstore.search_profiles import SEARCH_PROFILES, get_search_profile
+
+_TOKEN = re.compile(r"[a-z0-9]+")
+_STOPWORDS = frozenset(
+    "a an and are as at be by can for from has have in into is it its of on or "
+    "that the their then there these this to was were which will with you your".split()
+)
+# SearchProfile fields a configuration may override
+_OVERRIDABLE = (
+    "candidate_min", "candidate_factor", "hnsw_ef", "exact",
+    "mmr", "rerank", "score_threshold", "mmr_lambda",
+)
+
+
+class HashEmbeddings(Embeddings):
+    """
+    Deterministic bag-of-words embeddings (signed feature hashing over words and
+    word bigrams, L2-normalised). Counts calls the way a billed API would.
+    """
+
+    def __init__(self, dim: int | None = None):
+        self.dim = dim or settings.QDRANT_VECTOR_SIZE
+        self.calls = 0
+        self.texts = 0
+
+    def vector(self, text: str) -> np.ndarray:
+        words = _TOKEN.findall(text.lower())
+        vec = np.zeros(self.dim, dtype=np.float32)
+        for feature in words + [f"{a} {b}" for a, b in zip(words, words[1:])]:
+            h = int.from_bytes(hashlib.blake2b(feature.encode(), digest_size=8).digest(), "little")
+            vec[h % self.dim] += 1.0 if (h >> 63) else -1.0
+        norm = float(np.linalg.norm(vec))
+        return vec / norm if norm else vec
+
+    def embed_documents(self, texts: list[str]) -> list[list[float]]:
+        self.calls += 1
+        self.texts += len(texts)
+        return [self.vector(t).tolist() for t in texts]
+
+    def embed_query(self, text: str) -> list[float]:
+        self.calls += 1
+        self.texts += 1
+        return self.vector(text).tolist()
+
+
+# ---------- datasets ----------
+
+def load_dataset(path: str) -> dict:
+    data = json.loads(Path(path).read_text(encoding="utf-8"))
+    ids = {c["id"] for c in data["corpus"]}
+    for i, q in enumerate(data["queries"]):
+        q.setdefault("id", f"q{i + 1}")
+        if isinstance(q["relevant"], list):
+            q["relevant"] = {cid: 1 for cid in q["relevant"]}
+        unknown = set(q["relevant"]) - ids
+        if unknown:
+            raise ValueError(f"{q['id']}: relevant chunk ids not in the corpus: {sorted(unknown)[:5]}")
+    return data
+
+
+def corpus_from_files(paths: list[str], chunk_size: int | None = None, chunk_overlap: int | None = None) -> list[dict]:
+    """
+    Chunk PDFs (page-aware, like ingestion) and text/markdown files into corpus entries.
+    """
+    from app.ingestion.chunking import ChunkProfile, get_chunking_engine
+
+    profile = ChunkProfile(
+        "pdf", "pages",
+        chunk_size or settings.CHUNK_SIZE_PDF,
+        settings.CHUNK_OVERLAP_PDF if chunk_overlap is None else chunk_overlap,
+    )
+    chunker = get_chunking_engine()
+    corpus = []
+    for path in paths:
+        if path.lower().endswith(".pdf"):
+            from langchain_community.document_loaders import PyPDFLoader
+
+            documents = PyPDFLoader(path).load()
+        else:
+            documents = [Document(page_content=Path(path).read_text(encoding="utf-8"), metadata={"page": 0})]
+        chunks, _ = chunker.split(documents, profile)
+        source = Path(path).name
+        for i, doc in enumerate(chunks):
+            corpus.append({"id": f"{source}#{i}", "text": doc.page_content, "source": source})
+    return corpus
+
+
+def corpus_from_workspace(workspace: str) -> list[dict]:
+    """
+    The chunks already stored for a workspace (read only; nothing is embedded).
+    """
+    from app.vectorstore.base import create_vector_store
+    from app.workspaces import collection_for
+
+    store = create_vector_store(collection_for(workspace), embeddings=HashEmbeddings())
+    corpus = []
+    for source in store.list_sources():
+        for i, doc in enumerate(store.get_chunks(source)):
+            corpus.append({
+                "id": doc.metadata.get("chunk_id") or f"{source}#{i}",
+                "text": doc.page_content,
+                "source": source,
+            })
+    return corpus
+
+
+def synthesize(corpus: list[dict], queries: int, seed: int = 0, filter_rate: float = 0.0) -> dict:
+    """
+    Synthetic labels: each query is a handful of content words sampled (in order,
+    with gaps) from one sentence of a random chunk. Relevant chunks are that one
+    plus any other chunk containing every one of the query's words (overlaps,
+    repeated passages). `filter_rate` of the queries are restricted to their source.
+    """
+    rng = random.Random(seed)
+    tokens = {c["id"]: set(_TOKEN.findall(c["text"].lower())) for c in corpus}
+    out = []
+    attempts = 0
+    while len(out) < queries and attempts < queries * 20:
+        attempts += 1
+        chunk = rng.choice(corpus)
+        sentences = [s for s in re.split(r"(?<=[.!?])\s+", chunk["text"]) if len(s.split()) >= 6]
+        if not sentences:
+            continue
+        words = [w for w in _TOKEN.findall(rng.choice(sentences).lower()) if w not in _STOPWORDS and len(w) > 2]
+        if len(words) < 4:
+            continue
+        n = min(len(words), rng.randint(4, 7))
+        picked = sorted(rng.sample(range(len(words)), n))
+        terms = [words[i] for i in picked]
+        relevant = [c["id"] for c in corpus if c["id"] == chunk["id"] or tokens[c["id"]] >= set(terms)]
+        out.append({
+            "id": f"q{len(out) + 1}",
+            "query": " ".join(terms),
+            "relevant": relevant,
+            "sources": [chunk["source"]] if rng.random() < filter_rate else None,
+        })
+    return {"corpus": corpus, "queries": out}
+
+
+# ---------- metrics ----------
+
+def recall_at_k(retrieved: list[str], relevant: dict) -> float:
+    return len(set(retrieved) & set(relevant)) / len(relevant) if relevant else 0.0
+
+
+def reciprocal_rank(retrieved: list[str], relevant: dict) -> float:
+    for rank, cid in enumerate(retrieved, start=1):
+        if cid in relevant:
+            return 1.0 / rank
+    return 0.0
+
+
+def ndcg_at_k(retrieved: list[str], relevant: dict, k: int) -> float:
+    dcg = sum(relevant.get(cid, 0) / math.log2(rank + 1) for rank, cid in enumerate(retrieved[:k], start=1))
+    ideal = sorted(relevant.values(), reverse=True)[:k]
+    idcg = sum(g / math.log2(rank + 1) for rank, g in enumerate(ideal, start=1))
+    return dcg / idcg if idcg else 0.0
+
+
+def diversity(vectors: list[np.ndarray]) -> float:
+    """
+    1 - mean pairwise cosine similarity of the retrieved chunks (vectors are unit length).
+    """
+    if len(vectors) < 2:
+        return 0.0
+    m = np.stack(vectors)
+    sims = m @ m.T
+    n = len(vectors)
+    return 1.0 - float((sims.sum() - np.trace(sims)) / (n * (n - 1)))
+
+
+def _percentile(values: list[float], p: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, max(0, math.ceil(p / 100 * len(ordered)) - 1))]
+
+
+# ---------- runs ----------
+
+def build_profile(config: dict):
+    profile = get_search_profile(config.get("profile") or config["name"])
+    for field in _OVERRIDABLE:
+        if field in config:
+            setattr(profile, field, config[field])
+    profile.name = config["name"]
+    return profile
+
+
+def build_store(corpus: list[dict], embeddings: HashEmbeddings, backend: str = "qdrant"):
+    if backend == "numpy":
+        from app.vectorstore.numpy_store import NumpyStore
+
+        store = NumpyStore(collection_name="retrieval_eval", embeddings=embeddings, root=tempfile.mkdtemp())
+    else:
+        from qdrant_client import QdrantClient
+
+        from app.vectorstore.qdrant_store import QdrantStore, collection_params
+
+        client = QdrantClient(":memory:")
+        client.create_collection(collection_name="retrieval_eval", **collection_params(embeddings.dim))
+        store = QdrantStore(collection_name="retrieval_eval", client=client, embeddings=embeddings)
+    store.add_texts(
+        texts=[c["text"] for c in corpus],
+        metadatas=[{"source": c["source"], "chunk_id": c["id"], **(c.get("metadata") or {})} for c in corpus],
+    )
+    return store
+
+
+def evaluate(store, embeddings: HashEmbeddings, dataset: dict, config: dict, k: int, vectors: dict) -> dict:
+    profile = build_profile(config)
+    k = config.get("k", k)
+    queries = dataset["queries"]
+
+    # untimed warm-up, so the first query doesn't pay for lazy imports
+    store.search(queries[0]["query"], k=k, sources=queries[0].get("sources"), profile=profile)
+
+    calls, texts = embeddings.calls, embeddings.texts
+    latencies, recalls, rrs, ndcgs, divs = [], [], [], [], []
+    for q in queries:
+        t0 = time.perf_counter()
+        docs = store.search(q["query"], k=k, sources=q.get("sources"), profile=profile)
+        latencies.append((time.perf_counter() - t0) * 1000)
+        retrieved = [d.metadata.get("chunk_id") for d in docs]
+        recalls.append(recall_at_k(retrieved, q["relevant"]))
+        rrs.append(reciprocal_rank(retrieved, q["relevant"]))
+        ndcgs.append(ndcg_at_k(retrieved, q["relevant"], k))
+        divs.append(diversity([vectors[cid] for cid in retrieved if cid in vectors]))
+
+    n = len(queries)
+    return {
+        "config": profile.name,
+        "k": k,
+        "queries": n,
+        "recall": round(statistics.fmean(recalls), 4),
+        "mrr": round(statistics.fmean(rrs), 4),
+        "ndcg": round(statistics.fmean(ndcgs), 4),
+        "diversity": round(statistics.fmean(divs), 4),
+        "p50_ms": round(_percentile(latencies, 50), 2),
+        "p95_ms": round(_percentile(latencies, 95), 2),
+        "embed_calls_per_query": round((embeddings.calls - calls) / n, 2),
+        "embedded_texts_per_query": round((embeddings.texts - texts) / n, 2),
+    }
+
+
+def run(dataset: dict, configs: list[dict], k: int = 5, dim: int | None = None, backend: str = "qdrant") -> list[dict]:
+    embeddings = HashEmbeddings(dim)
+    store = build_store(dataset["corpus"], embeddings, backend)
+    vectors = {c["id"]: embeddings.vector(c["text"]) for c in dataset["corpus"]}
+    return [evaluate(store, embeddings, dataset, config, k, vectors) for config in configs]
+
+
+def print_table(rows: list[dict]):
+    columns = [
+        ("config", "{:<16}", 16), ("recall", "{:>8.3f}", 8), ("mrr", "{:>8.3f}", 8),
+        ("ndcg", "{:>8.3f}", 8), ("diversity", "{:>10.3f}", 10), ("p50_ms", "{:>9.2f}", 9),
+        ("p95_ms", "{:>9.2f}", 9), ("embed_calls_per_query", "{:>13.2f}", 13),
+    ]
+    header = {"embed_calls_per_query": "embeds/query"}
+    print("".join(
+        f"{header.get(name, name):<{width}}" if i == 0 else f"{header.get(name, name):>{width}}"
+        for i, (name, _, width) in enumerate(columns)
+    ))
+    for row in rows:
+        print("".join(fmt.format(row[name]) for name, fmt, _ in columns))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline retrieval quality vs latency benchmark.")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    synth = sub.add_parser("synth", help="build a synthetic labeled dataset from a corpus")
+    corpus = synth.add_mutually_exclusive_group(required=True)
+    corpus.add_argument("--files", nargs="+", help="PDF / text / markdown files")
+    corpus.add_argument("--workspace", help="chunks already stored for this workspace")
+    synth.add_argument("--queries", type=int, default=200)
+    synth.add_argument("--seed", type=int, default=0)
+    synth.add_argument("--filter-rate", type=float, default=0.0, help="share of queries restricted to their source")
+    synth.add_argument("--chunk-size", type=int, help="with --files; default CHUNK_SIZE_PDF")
+    synth.add_argument("--chunk-overlap", type=int, help="with --files; default CHUNK_OVERLAP_PDF")
+    synth.add_argument("--out", required=True)
+
+    bench = sub.add_parser("run", help="evaluate search configurations on a dataset")
+    bench.add_argument("--dataset", required=True)
+    bench.add_argument("--configs", help="JSON list of configurations (default: every search profile)")
+    bench.add_argument("--k", type=int, default=5)
+    bench.add_argument("--dim", type=int, help="embedding size (default QDRANT_VECTOR_SIZE)")
+    bench.add_argument("--backend", choices=VECTOR_BACKENDS, default="qdrant", help="vector store to evaluate")
+    bench.add_argument("--json", action="store_true", help="print the report as JSON")
+
+    args = parser.parse_args()
+
+    if args.command == "synth":
+        if args.files:
+            items = corpus_from_files(args.files, args.chunk_size, args.chunk_overlap)
+        else:
+            items = corpus_from_workspace(args.workspace)
+        if not items:
+            parser.error("the corpus is empty")
+        data = synthesize(items, args.queries, args.seed, args.filter_rate)
+        Path(args.out).parent.mkdir(parents=True, exist_ok=True)
+        Path(args.out).write_text(json.dumps(data, indent=1), encoding="utf-8")
+        print(f"{len(data['corpus'])} chunks, {len(data['queries'])} queries -> {args.out}")
+        return
+
+    dataset = load_dataset(args.dataset)
+    if not dataset["queries"]:
+        parser.error("the dataset has no queries")
+    if args.configs:
+        configs = json.loads(Path(args.configs).read_text(encoding="utf-8"))
+    else:
+        configs = [{"name": name} for name in SEARCH_PROFILES]
+    rows = run(dataset, configs, k=args.k, dim=args.dim, backend=args.backend)
+
+    if args.json:
+        print(json.dumps(rows, indent=2))
+        return
+    print(f"{len(dataset['corpus'])} chunks, {len(dataset['queries'])} queries, k={args.k}, {args.backend}\n")
+    print_table(rows)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,114 @@
+# app/benchmarks/startup.py
+"""
+Cold-start benchmark: how long a fresh worker takes to import app.main,
+build the shared services (lifespan) and warm the default workspace.
+
+    python -m app.benchmarks.startup --runs 5
+    python -m app.benchmarks.startup --runs 5 --no-warm --top 15
+
+Every run is a new interpreter, so module caches don't flatter the numbers.
+Warm-up opens the local Qdrant directory, so stop the API first in embedded mode.
+"""
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+
+_RUN = """
+import json, time
+t0 = time.perf_counter()
+import app.main
+imported = time.perf_counter() - t0
+from app.services import Services
+svc = Services()
+if {warm}:
+    svc.warm_up()
+svc.close()
+print(json.dumps({{
+    "import_seconds": imported,
+    "init_seconds": svc.init_seconds,
+    "warm_seconds": svc.warm_seconds,
+    "warm_error": svc.warm_error,
+}}))
+"""
+
+
+def run_once(warm: bool = True) -> dict:
+    out = subprocess.run(
+        [sys.executable, "-c", _RUN.format(warm=warm)],
+        capture_output=True, text=True, check=True,
+    ).stdout
+    # app modules print progress; the result is the last line
+    return json.loads(out.strip().splitlines()[-1])
+
+
+def slowest_imports(module: str = "app.main", top: int = 10) -> list[tuple[str, float]]:
+    """
+    Cumulative import time per third-party package, from `python -X importtime`.
+    """
+    err = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True, text=True, check=True,
+    ).stderr
+    totals = {}
+    for line in err.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cumulative, name = (x.strip() for x in line[len("import time:"):].split("|"))
+        if not cumulative.isdigit():
+            continue
+        # only count a package where it is first imported (its outermost entry)
+        root = name.split(".")[0]
+        if root == module.split(".")[0]:
+            continue
+        totals[root] = max(totals.get(root, 0), int(cumulative))
+    ranked = sorted(totals.items(), key=lambda x: x[1], reverse=True)
+    return [(name, us / 1e6) for name, us in ranked[:top]]
+
+
+def summarize(runs: list[dict]) -> dict:
+    report = {}
+    for key in ("import_seconds", "init_seconds", "warm_seconds"):
+        values = [r[key] for r in runs if r.get(key) is not None]
+        if values:
+            report[key] = {
+                "median": round(statistics.median(values), 3),
+                "min": round(min(values), 3),
+                "max": round(max(values), 3),
+            }
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure app import and startup time.")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--no-warm", action="store_true", help="skip opening the default workspace")
+    parser.add_argument("--top", type=int, default=10, help="slowest imported packages to list")
+    parser.add_argument("--json", action="store_true", help="print the report as JSON")
+    args = parser.parse_args()
+
+    runs = [run_once(warm=not args.no_warm) for _ in range(args.runs)]
+    report = {
+        "runs": args.runs,
+        "startup": summarize(runs),
+        "warm_errors": sorted({r["warm_error"] for r in runs if r.get("warm_error")}),
+        "slowest_imports": slowest_imports(top=args.top),
+    }
+
+    if args.json:
+        print(json.dumps(report, indent=2))
+        return
+
+    print(f"{'phase':<16}{'median':>10}{'min':>10}{'max':>10}")
+    for phase, r in report["startup"].items():
+        print(f"{phase:<16}{r['median']:>10.3f}{r['min']:>10.3f}{r['max']:>10.3f}")
+    for err in report["warm_errors"]:
+        print(f"warm-up error: {err}")
+    print("\nslowest imports of app.main (cumulative seconds):")
+    for name, seconds in report["slowest_imports"]:
+        print(f"  {name:<32}{seconds:>8.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -7,4 +7,162 @@ load_dotenv()
 class Settings:
     GOOGLE_API_KEY: str = os.getenv("GOOGLE_API_KEY", "")
 
+    # Hot session cache in front of SQLite (write-behind). The cache is per process:
+    # turn it off when running several API workers against the same database.
+    SESSION_CACHE_ENABLED: bool = os.getenv("SESSION_CACHE_ENABLED", "true").lower() == "true"
+    SESSION_CACHE_SIZE: int = int(os.getenv("SESSION_CACHE_SIZE", "1024"))
+    # <= 0: write-through, no background flusher
+    SESSION_FLUSH_INTERVAL_SECONDS: float = float(os.getenv("SESSION_FLUSH_INTERVAL_SECONDS", "2.0"))
+    SESSION_FLUSH_BATCH_SIZE: int = int(os.getenv("SESSION_FLUSH_BATCH_SIZE", "100"))
+
+    # Speculative generation of the next session question
+    PREFETCH_ENABLED: bool = os.getenv("PREFETCH_ENABLED", "true").lower() == "true"
+    PREFETCH_MAX_OUTSTANDING: int = int(os.getenv("PREFETCH_MAX_OUTSTANDING", "4"))
+    PREFETCH_TTL_SECONDS: float = float(os.getenv("PREFETCH_TTL_SECONDS", "600"))
+    PREFETCH_WAIT_SECONDS: float = float(os.getenv("PREFETCH_WAIT_SECONDS", "10"))
+
+    # /rag/ask/batch: questions per request, and LLM calls in flight per request
+    RAG_BATCH_MAX_QUESTIONS: int = int(os.getenv("RAG_BATCH_MAX_QUESTIONS", "32"))
+    RAG_BATCH_CONCURRENCY: int = int(os.getenv("RAG_BATCH_CONCURRENCY", "4"))
+
+    # Admission control for LLM / embedding calls: at most *_MAX_CONCURRENCY in flight per
+    # kind and *_QUEUE_SIZE more waiting (interactive before standard before bulk), each for
+    # at most ADMISSION_QUEUE_TIMEOUT_SECONDS; beyond that requests fail fast with 429 / 503.
+    # Waiters hold a threadpool thread: keep the sums well under the 40 sync-endpoint threads.
+    ADMISSION_ENABLED: bool = os.getenv("ADMISSION_ENABLED", "true").lower() == "true"
+    LLM_MAX_CONCURRENCY: int = int(os.getenv("LLM_MAX_CONCURRENCY", "8"))
+    LLM_QUEUE_SIZE: int = int(os.getenv("LLM_QUEUE_SIZE", "12"))
+    EMBEDDING_MAX_CONCURRENCY: int = int(os.getenv("EMBEDDING_MAX_CONCURRENCY", "4"))
+    EMBEDDING_QUEUE_SIZE: int = int(os.getenv("EMBEDDING_QUEUE_SIZE", "8"))
+    ADMISSION_QUEUE_TIMEOUT_SECONDS: float = float(os.getenv("ADMISSION_QUEUE_TIMEOUT_SECONDS", "10"))
+
+    # Conversations (/rag/conversation/ask), kept in memory per process: turns kept and
+    # put in the prompt, chunks kept in the context window, and the mean similarity of a
+    # follow-up to its k best window chunks at or above which the window is reused
+    # instead of searching again
+    CONVERSATION_MAX_ACTIVE: int = int(os.getenv("CONVERSATION_MAX_ACTIVE", "1000"))
+    CONVERSATION_TTL_SECONDS: float = float(os.getenv("CONVERSATION_TTL_SECONDS", "3600"))
+    CONVERSATION_MAX_TURNS: int = int(os.getenv("CONVERSATION_MAX_TURNS", "20"))
+    CONVERSATION_HISTORY_TURNS: int = int(os.getenv("CONVERSATION_HISTORY_TURNS", "3"))
+    CONVERSATION_HISTORY_ANSWER_CHARS: int = int(os.getenv("CONVERSATION_HISTORY_ANSWER_CHARS", "600"))
+    CONVERSATION_WINDOW_CHUNKS: int = int(os.getenv("CONVERSATION_WINDOW_CHUNKS", "24"))
+    CONVERSATION_REUSE_MIN_SCORE: float = float(os.getenv("CONVERSATION_REUSE_MIN_SCORE", "0.7"))
+
+    # Search profiles (fast | balanced | exhaustive): the default for requests that
+    # don't pick one, and a leaner default for test-me session questions/answers
+    SEARCH_PROFILE: str = os.getenv("SEARCH_PROFILE", "balanced")
+    SEARCH_PROFILE_SESSION: str = os.getenv("SEARCH_PROFILE_SESSION", "fast")
+    SEARCH_FAST_HNSW_EF: int = int(os.getenv("SEARCH_FAST_HNSW_EF", "32"))
+    # 0 = the collection's ef
+    SEARCH_BALANCED_HNSW_EF: int = int(os.getenv("SEARCH_BALANCED_HNSW_EF", "0"))
+    # cosine score below which "fast" drops a hit (unset = keep everything)
+    SEARCH_FAST_MIN_SCORE: float | None = (
+        float(os.getenv("SEARCH_FAST_MIN_SCORE")) if os.getenv("SEARCH_FAST_MIN_SCORE") else None
+    )
+
+    # Focus-less summarize/quiz/question retrieval served from precomputed query
+    # vectors and top-N candidate sets per source filter (refreshed on add/delete)
+    MATERIALIZED_QUERIES_ENABLED: bool = os.getenv("MATERIALIZED_QUERIES_ENABLED", "true").lower() == "true"
+    MATERIALIZED_DEPTH: int = int(os.getenv("MATERIALIZED_DEPTH", "60"))
+    MATERIALIZED_MAX_FILTERS: int = int(os.getenv("MATERIALIZED_MAX_FILTERS", "128"))
+
+    # Whole-source summaries (/rag/summarize mode=full): map over groups of chunks,
+    # then reduce FAN_IN partial summaries at a time; partial summaries are cached
+    SUMMARY_GROUP_CHUNKS: int = int(os.getenv("SUMMARY_GROUP_CHUNKS", "4"))
+    SUMMARY_GROUP_MAX_CHARS: int = int(os.getenv("SUMMARY_GROUP_MAX_CHARS", "8000"))
+    SUMMARY_FAN_IN: int = int(os.getenv("SUMMARY_FAN_IN", "5"))
+    SUMMARY_CONCURRENCY: int = int(os.getenv("SUMMARY_CONCURRENCY", "4"))
+
+    # Structured quizzes (/rag/quiz format=structured): answer keys kept in memory
+    # for local grading; older quizzes are read back from the DB
+    QUIZ_CACHE_SIZE: int = int(os.getenv("QUIZ_CACHE_SIZE", "1024"))
+
+    # Pre-generated question bank (per source/topic/difficulty)
+    QUESTION_BANK_ENABLED: bool = os.getenv("QUESTION_BANK_ENABLED", "true").lower() == "true"
+    # build a source's bank right after ingesting it: 4 LLM calls per window,
+    # up to QUESTION_BANK_PER_TOPIC windows per topic. Off by default; POST /question-bank/build
+    QUESTION_BANK_AUTO_BUILD: bool = os.getenv("QUESTION_BANK_AUTO_BUILD", "false").lower() == "true"
+    QUESTION_BANK_PER_TOPIC: int = int(os.getenv("QUESTION_BANK_PER_TOPIC", "3"))
+    QUESTION_BANK_CHUNKS_PER_QUESTION: int = int(os.getenv("QUESTION_BANK_CHUNKS_PER_QUESTION", "3"))
+
+    # Chunking profiles per source type (sizes in characters; YouTube windows in seconds)
+    CHUNK_SIZE_PDF: int = int(os.getenv("CHUNK_SIZE_PDF", "1000"))
+    CHUNK_OVERLAP_PDF: int = int(os.getenv("CHUNK_OVERLAP_PDF", "150"))
+    CHUNK_SIZE_WEB: int = int(os.getenv("CHUNK_SIZE_WEB", "1000"))
+    CHUNK_OVERLAP_WEB: int = int(os.getenv("CHUNK_OVERLAP_WEB", "150"))
+    YOUTUBE_WINDOW_SECONDS: int = int(os.getenv("YOUTUBE_WINDOW_SECONDS", "60"))
+    YOUTUBE_WINDOW_OVERLAP_SECONDS: int = int(os.getenv("YOUTUBE_WINDOW_OVERLAP_SECONDS", "10"))
+    # inputs larger than this are split in a process pool (0 workers = cpu count - 1)
+    CHUNK_PARALLEL_MIN_CHARS: int = int(os.getenv("CHUNK_PARALLEL_MIN_CHARS", "200000"))
+    CHUNK_WORKERS: int = int(os.getenv("CHUNK_WORKERS", "0"))
+
+    # HTTP fetching for web ingestion (one pooled session per process)
+    WEB_USER_AGENT: str = os.getenv("WEB_USER_AGENT", "learning-copilot/0.1")
+    WEB_FETCH_TIMEOUT: float = float(os.getenv("WEB_FETCH_TIMEOUT", "20"))
+    WEB_POOL_SIZE: int = int(os.getenv("WEB_POOL_SIZE", "10"))
+
+    # YouTube transcripts (playlists are fetched concurrently, this many at a time)
+    YOUTUBE_LANGUAGES: list[str] = [l.strip() for l in os.getenv("YOUTUBE_LANGUAGES", "en").split(",") if l.strip()]
+    YOUTUBE_FETCH_WORKERS: int = int(os.getenv("YOUTUBE_FETCH_WORKERS", "4"))
+    YOUTUBE_MAX_VIDEOS: int = int(os.getenv("YOUTUBE_MAX_VIDEOS", "50"))
+
+    # Site crawler behind /ingest/crawl
+    CRAWL_MAX_PAGES: int = int(os.getenv("CRAWL_MAX_PAGES", "200"))
+    CRAWL_CONCURRENCY: int = int(os.getenv("CRAWL_CONCURRENCY", "8"))
+    CRAWL_PER_HOST_CONCURRENCY: int = int(os.getenv("CRAWL_PER_HOST_CONCURRENCY", "2"))
+    # minimum gap between two requests to the same host (robots.txt Crawl-delay wins if larger)
+    CRAWL_DELAY_SECONDS: float = float(os.getenv("CRAWL_DELAY_SECONDS", "0.5"))
+    CRAWL_RESPECT_ROBOTS: bool = os.getenv("CRAWL_RESPECT_ROBOTS", "true").lower() == "true"
+    # pages per split/embed/upsert batch
+    CRAWL_BATCH_PAGES: int = int(os.getenv("CRAWL_BATCH_PAGES", "16"))
+
+    # Near-duplicate chunk filter at ingest (64-bit SimHash; distances above 3 are
+    # not guaranteed to be found by the 4-band index)
+    DEDUP_ENABLED: bool = os.getenv("DEDUP_ENABLED", "true").lower() == "true"
+    DEDUP_MAX_HAMMING: int = int(os.getenv("DEDUP_MAX_HAMMING", "3"))
+    DEDUP_CROSS_SOURCE: bool = os.getenv("DEDUP_CROSS_SOURCE", "true").lower() == "true"
+
+    # Topic labels assigned to chunks at ingest
+    TOPICS_PER_SOURCE: int = int(os.getenv("TOPICS_PER_SOURCE", "8"))
+
+    # Workspace handles (one Qdrant collection each) kept warm in an LRU
+    WORKSPACE_CACHE_SIZE: int = int(os.getenv("WORKSPACE_CACHE_SIZE", "32"))
+    WORKSPACE_IDLE_SECONDS: float = float(os.getenv("WORKSPACE_IDLE_SECONDS", "1800"))
+
+    # Vector store backend: qdrant | numpy. numpy keeps one memory-mapped matrix per
+    # workspace under NUMPY_STORE_DIR (exact search; single process, like embedded Qdrant)
+    VECTOR_BACKEND: str = os.getenv("VECTOR_BACKEND", "qdrant").lower()
+    NUMPY_STORE_DIR: str = os.getenv("NUMPY_STORE_DIR", os.path.join("data", "vectors"))
+    # float32 | float16 (half the disk and page cache; scores are computed in float32)
+    NUMPY_STORE_DTYPE: str = os.getenv("NUMPY_STORE_DTYPE", "float32").lower()
+
+    # Qdrant connection. Empty QDRANT_URL = embedded local mode at QDRANT_PATH
+    # (single process only: it locks the directory).
+    QDRANT_URL: str = os.getenv("QDRANT_URL", "")
+    QDRANT_API_KEY: str = os.getenv("QDRANT_API_KEY", "")
+    QDRANT_PREFER_GRPC: bool = os.getenv("QDRANT_PREFER_GRPC", "false").lower() == "true"
+    QDRANT_GRPC_PORT: int = int(os.getenv("QDRANT_GRPC_PORT", "6334"))
+    QDRANT_TIMEOUT: int = int(os.getenv("QDRANT_TIMEOUT", "30"))
+    QDRANT_PATH: str = os.getenv("QDRANT_PATH", os.path.join("data", "qdrant"))
+
+    # Collection parameters used when a collection is created (server mode only)
+    QDRANT_VECTOR_SIZE: int = int(os.getenv("QDRANT_VECTOR_SIZE", "3072"))
+    QDRANT_HNSW_M: int = int(os.getenv("QDRANT_HNSW_M", "16"))
+    QDRANT_HNSW_EF_CONSTRUCT: int = int(os.getenv("QDRANT_HNSW_EF_CONSTRUCT", "100"))
+    QDRANT_VECTORS_ON_DISK: bool = os.getenv("QDRANT_VECTORS_ON_DISK", "false").lower() == "true"
+    QDRANT_PAYLOAD_ON_DISK: bool = os.getenv("QDRANT_PAYLOAD_ON_DISK", "false").lower() == "true"
+
+    # Snapshot bundles (python -m app.vectorstore.snapshot / /admin/snapshot/*)
+    SNAPSHOT_DIR: str = os.getenv("SNAPSHOT_DIR", os.path.join("data", "snapshots"))
+
+    # Shared secret for /admin/* endpoints (sent as X-Admin-Token). Empty = admin endpoints disabled.
+    ADMIN_TOKEN: str = os.getenv("ADMIN_TOKEN", "")
+
+    # On-demand profiling (/admin/profile/*). Off = no request middleware at all;
+    # on = CPU / memory / per-request profiles can be started by an admin
+    PROFILING_ENABLED: bool = os.getenv("PROFILING_ENABLED", "false").lower() == "true"
+    PROFILE_SAMPLE_INTERVAL_MS: float = float(os.getenv("PROFILE_SAMPLE_INTERVAL_MS", "10"))
+    PROFILE_MAX_SECONDS: float = float(os.getenv("PROFILE_MAX_SECONDS", "120"))
+    PROFILE_DEBUG_HEADER: str = os.getenv("PROFILE_DEBUG_HEADER", "X-Debug-Profile")
+
 settings = Settings()
\ No newline at end of file
@@ -0,0 +1,16 @@
+# app/core/security.py
+import hmac
+
+from app.core.config import settings
+
+
+def admin_token_valid(token: str | bytes | None) -> bool:
+    """
+    True if `token` is the configured ADMIN_TOKEN. Always False while ADMIN_TOKEN is unset.
+    Compared in constant time.
+    """
+    if not settings.ADMIN_TOKEN or not token:
+        return False
+    if isinstance(token, str):
+        token = token.encode()
+    return hmac.compare_digest(token, settings.ADMIN_TOKEN.encode())
@@ -1,19 +1,44 @@
+import inspect
 import os
 
-from langchain_google_genai import GoogleGenerativeAIEmbeddings
 from app.core.config import settings
 
+EMBEDDING_MODEL = "models/gemini-embedding-001"
+
 _embedding_model = None
+_admitted = None
 
 
 def get_embedding_model():
-    global _embedding_model
+    """
+    The shared embeddings client, behind the "embeddings" admission controller
+    when ADMISSION_ENABLED (also when a simulated model was installed in its place).
+    """
+    global _embedding_model, _admitted
     if _embedding_model is None:
         if not settings.GOOGLE_API_KEY:
             raise RuntimeError("GOOGLE_API_KEY is not set")
 
+        from langchain_google_genai import GoogleGenerativeAIEmbeddings
+
         _embedding_model = GoogleGenerativeAIEmbeddings(
-            model="models/gemini-embedding-001",
+            model=EMBEDDING_MODEL,
             api_key=settings.GOOGLE_API_KEY
         )
-    return _embedding_model
+    if not settings.ADMISSION_ENABLED:
+        return _embedding_model
+    if _admitted is None or _admitted.inner is not _embedding_model:
+        from app.admission import AdmittedEmbeddings
+
+        _admitted = AdmittedEmbeddings(_embedding_model)
+    return _admitted
+
+
+def embed_queries(embeddings, texts: list[str]) -> list[list[float]]:
+    """
+    Several queries in one batched request. embed_documents() defaults to the
+    document task type, so ask for the query one: the vectors then match embed_query().
+    """
+    if "task_type" in inspect.signature(embeddings.embed_documents).parameters:
+        return embeddings.embed_documents(texts, task_type="RETRIEVAL_QUERY")
+    return embeddings.embed_documents(texts)
@@ -0,0 +1,292 @@
+# app/ingestion/chunking.py
+"""
+Shared chunking for all ingestors, with one profile per source type:
+
+    pdf      page-aware: never spans two pages, `page` metadata kept per chunk
+    web      heading-aware: sections are merged up to chunk_size and split inside,
+             each chunk carries its heading path in metadata["section"]
+    youtube  time windows over transcript lines, with start/end seconds per chunk
+
+Large inputs are split across a process pool; every call reports chunk-size stats.
+"""
+import multiprocessing
+import os
+import statistics
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from langchain_core.documents import Document
+from langchain_text_splitters import RecursiveCharacterTextSplitter
+
+from app.core.config import settings
+
+_SEPARATORS = ["\n\n", "\n", ". ", " ", ""]
+
+
+class ChunkProfile:
+    """
+    How one source type is chunked. `chunk_size`/`chunk_overlap` are characters,
+    except for mode="time" where they are seconds of transcript.
+    """
+
+    def __init__(self, name: str, mode: str, chunk_size: int, chunk_overlap: int):
+        if mode not in ("pages", "sections", "time"):
+            raise ValueError(f"Unknown chunking mode: {mode}")
+        if chunk_overlap >= chunk_size:
+            raise ValueError(f"{name}: chunk_overlap must be smaller than chunk_size")
+        self.name = name
+        self.mode = mode
+        self.chunk_size = chunk_size
+        self.chunk_overlap = chunk_overlap
+
+    def as_args(self) -> tuple:
+        # what a pool worker needs to rebuild the profile
+        return (self.name, self.mode, self.chunk_size, self.chunk_overlap)
+
+
+def get_profile(source_type: str) -> ChunkProfile:
+    if source_type == "pdf":
+        return ChunkProfile("pdf", "pages", settings.CHUNK_SIZE_PDF, settings.CHUNK_OVERLAP_PDF)
+    if source_type == "web":
+        return ChunkProfile("web", "sections", settings.CHUNK_SIZE_WEB, settings.CHUNK_OVERLAP_WEB)
+    if source_type == "youtube":
+        return ChunkProfile(
+            "youtube", "time", settings.YOUTUBE_WINDOW_SECONDS, settings.YOUTUBE_WINDOW_OVERLAP_SECONDS
+        )
+    raise ValueError(f"No chunking profile for source type: {source_type}")
+
+
+# ---------- splitting (module-level so pool workers can run it) ----------
+
+def _splitter(profile: ChunkProfile) -> RecursiveCharacterTextSplitter:
+    return RecursiveCharacterTextSplitter(
+        chunk_size=profile.chunk_size,
+        chunk_overlap=profile.chunk_overlap,
+        separators=_SEPARATORS,
+    )
+
+
+def _split_pages(profile: ChunkProfile, units: list[tuple[str, dict]]) -> list[tuple[str, dict]]:
+    splitter = _splitter(profile)
+    out = []
+    for text, meta in units:
+        for piece in splitter.split_text(text):
+            out.append((piece, dict(meta)))
+    return out
+
+
+def _split_sections(profile: ChunkProfile, units: list[tuple[str, dict]]) -> list[tuple[str, dict]]:
+    """
+    Merge consecutive short sections under the same top-level heading (a heading
+    with one paragraph is common) until chunk_size, then split anything still too
+    long inside its section. metadata["heading"], when present, is repeated at the
+    top of every piece of a split section so each chunk says what it is about.
+    """
+    merged: list[tuple[str, dict]] = []
+    for text, meta in units:
+        meta = dict(meta)
+        heading = meta.pop("heading", None)
+        text = text.strip()
+        if heading:
+            text = f"{heading}\n\n{text}" if text else heading
+        if not text:
+            continue
+        if merged:
+            prev_text, prev_meta = merged[-1]
+            same_root = (
+                meta.get("section") and prev_meta.get("section")
+                and meta["section"].split(" > ")[0] == prev_meta["section"].split(" > ")[0]
+            )
+            if same_root and len(prev_text) + len(text) + 2 <= profile.chunk_size:
+                merged[-1] = (prev_text + "\n\n" + text, prev_meta)
+                continue
+        merged.append((text, {**meta, "_heading": heading}))
+
+    out = []
+    for text, meta in merged:
+        heading = meta.pop("_heading", None)
+        if len(text) <= profile.chunk_size:
+            out.append((text, meta))
+            continue
+        if heading:
+            body = text[len(heading):].lstrip()
+            prefix = heading + "\n\n"
+        else:
+            body, prefix = text, ""
+        splitter = RecursiveCharacterTextSplitter(
+            chunk_size=max(profile.chunk_size - len(prefix), profile.chunk_overlap + 1),
+            chunk_overlap=profile.chunk_overlap,
+            separators=_SEPARATORS,
+        )
+        out.extend((prefix + piece, dict(meta)) for piece in splitter.split_text(body))
+    return out
+
+
+def _split_time(profile: ChunkProfile, units: list[tuple[str, dict]]) -> list[tuple[str, dict]]:
+    """
+    units are transcript lines with metadata start/duration (seconds). Windows of
+    chunk_size seconds, each starting chunk_overlap seconds before the last ended.
+    """
+    lines = sorted(
+        ((text.strip(), float(meta.get("start", 0.0)), float(meta.get("duration", 0.0)), meta)
+         for text, meta in units if text.strip()),
+        key=lambda x: x[1],
+    )
+    out = []
+    i = 0
+    while i < len(lines):
+        window_start = lines[i][1]
+        window_end = window_start + profile.chunk_size
+        j = i
+        while j < len(lines) and lines[j][1] < window_end:
+            j += 1
+        window = lines[i:j]
+        base = {k: v for k, v in window[0][3].items() if k not in ("start", "duration")}
+        out.append((
+            " ".join(t for t, _, _, _ in window),
+            {
+                **base,
+                "start_seconds": round(window_start, 2),
+                "end_seconds": round(max(s + d for _, s, d, _ in window), 2),
+            },
+        ))
+        if j >= len(lines):
+            break
+        # next window starts `overlap` seconds before this one ended, but always moves forward
+        next_start = window_end - profile.chunk_overlap
+        k = i + 1
+        while k < j and lines[k][1] < next_start:
+            k += 1
+        i = k
+    return out
+
+
+_MODES = {"pages": _split_pages, "sections": _split_sections, "time": _split_time}
+
+
+def _split_units(profile_args: tuple, units: list[tuple[str, dict]]) -> list[tuple[str, dict]]:
+    profile = ChunkProfile(*profile_args)
+    return _MODES[profile.mode](profile, units)
+
+
+# ---------- stats ----------
+
+def chunk_stats(texts: list[str]) -> dict:
+    if not texts:
+        return {"chunks": 0}
+    sizes = sorted(len(t) for t in texts)
+    return {
+        "chunks": len(sizes),
+        "chars_total": sum(sizes),
+        "chars_min": sizes[0],
+        "chars_p50": sizes[len(sizes) // 2],
+        "chars_p95": sizes[min(len(sizes) - 1, int(len(sizes) * 0.95))],
+        "chars_max": sizes[-1],
+        "chars_mean": round(statistics.fmean(sizes), 1),
+    }
+
+
+# ---------- engine ----------
+
+class ChunkingEngine:
+    """
+    Splits Documents with a profile. Inputs over `parallel_min_chars` are cut
+    into batches and split in a process pool (spawned once, reused); smaller
+    ones are split inline, where pickling would cost more than it saves.
+    Time windows are never parallelised: they need the whole transcript in order.
+    """
+
+    def __init__(self, workers: int | None = None, parallel_min_chars: int | None = None):
+        self.workers = workers or settings.CHUNK_WORKERS or max(1, (os.cpu_count() or 2) - 1)
+        self.parallel_min_chars = parallel_min_chars or settings.CHUNK_PARALLEL_MIN_CHARS
+        self._pool: ProcessPoolExecutor | None = None
+        self._lock = threading.Lock()
+
+    def _get_pool(self) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._pool is None:
+                # spawn, not fork: the API process runs threads (flusher, prefetch)
+                self._pool = ProcessPoolExecutor(
+                    max_workers=self.workers, mp_context=multiprocessing.get_context("spawn")
+                )
+            return self._pool
+
+    def split(self, documents: list[Document], profile: ChunkProfile) -> tuple[list[Document], dict]:
+        """
+        Returns (chunks, stats). Chunk metadata is copied from the source Document.
+        """
+        t0 = time.perf_counter()
+        units = [(d.page_content, dict(d.metadata)) for d in documents]
+        total_chars = sum(len(t) for t, _ in units)
+
+        parallel = (
+            profile.mode != "time"
+            and self.workers > 1
+            and len(units) > 1
+            and total_chars >= self.parallel_min_chars
+        )
+        if parallel:
+            batches = self._batches(units, total_chars)
+            pool = self._get_pool()
+            pieces = []
+            for part in pool.map(_split_units, [profile.as_args()] * len(batches), batches):
+                pieces.extend(part)
+        else:
+            pieces = _split_units(profile.as_args(), units)
+
+        chunks = [Document(page_content=text, metadata=meta) for text, meta in pieces]
+        stats = {
+            "profile": profile.name,
+            "chunk_size": profile.chunk_size,
+            "chunk_overlap": profile.chunk_overlap,
+            "input_chars": total_chars,
+            "parallel": parallel,
+            "seconds": round(time.perf_counter() - t0, 3),
+            **chunk_stats([c.page_content for c in chunks]),
+        }
+        print(f"[Chunking] {profile.name}: {len(units)} units -> {len(chunks)} chunks "
+              f"in {stats['seconds']}s{' (parallel)' if parallel else ''}")
+        return chunks, stats
+
+    def _batches(self, units: list, total_chars: int) -> list[list]:
+        # contiguous batches of roughly equal size, a few per worker for balance.
+        # Sections are merged within a batch only, so order is preserved overall.
+        target = max(1, total_chars // (self.workers * 4))
+        batches, current, size = [], [], 0
+        for unit in units:
+            current.append(unit)
+            size += len(unit[0])
+            if size >= target:
+                batches.append(current)
+                current, size = [], 0
+        if current:
+            batches.append(current)
+        return batches
+
+    def close(self):
+        with self._lock:
+            if self._pool is not None:
+                self._pool.shutdown(wait=False, cancel_futures=True)
+                self._pool = None
+
+
+_engine: ChunkingEngine | None = None
+_engine_lock = threading.Lock()
+
+
+def get_chunking_engine() -> ChunkingEngine:
+    """
+    One engine (and so one process pool) per process, shared by every workspace.
+    """
+    global _engine
+    if _engine is None:
+        with _engine_lock:
+            if _engine is None:
+                _engine = ChunkingEngine()
+    return _engine
+
+
+def close_chunking_engine():
+    if _engine is not None:
+        _engine.close()
@@ -0,0 +1,84 @@
+# app/ingestion/crawl_jobs.py
+import threading
+import time
+import uuid
+from collections import OrderedDict
+
+
+class CrawlJob:
+    """
+    Progress of one /ingest/crawl request, readable while the crawl runs.
+    """
+
+    def __init__(self, url: str, workspace: str):
+        self.id = uuid.uuid4().hex
+        self.url = url
+        self.workspace = workspace
+        self.status = "running"
+        self.error: str | None = None
+        self.started_at = time.time()
+        self.finished_at: float | None = None
+        self.counts = {
+            "pages_ingested": 0,
+            "pages_unchanged": 0,
+            "pages_failed": 0,
+            "chunks_added": 0,
+            "duplicates_skipped": 0,
+        }
+        self.crawl_stats: dict = {}
+        self.crawl_errors: list[str] = []
+        self._errors: list[str] = []
+        self._lock = threading.Lock()
+
+    def add(self, **counts: int):
+        with self._lock:
+            for key, n in counts.items():
+                self.counts[key] += n
+
+    def note_error(self, message: str):
+        with self._lock:
+            if len(self._errors) < 20:
+                self._errors.append(message)
+
+    def finish(self, error: str | None = None):
+        self.error = error
+        self.status = "failed" if error else "done"
+        self.finished_at = time.time()
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            end = self.finished_at or time.time()
+            return {
+                "job_id": self.id,
+                "url": self.url,
+                "workspace": self.workspace,
+                "status": self.status,
+                "error": self.error,
+                "seconds": round(end - self.started_at, 2),
+                "crawl": dict(self.crawl_stats),
+                **self.counts,
+                "errors": list(self.crawl_errors) + list(self._errors),
+            }
+
+
+class CrawlJobs:
+    """
+    The most recent crawl jobs, for progress lookups (older ones are forgotten).
+    """
+
+    def __init__(self, capacity: int = 50):
+        self.capacity = capacity
+        self._jobs: OrderedDict[str, CrawlJob] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def create(self, url: str, workspace: str) -> CrawlJob:
+        job = CrawlJob(url, workspace)
+        with self._lock:
+            self._jobs[job.id] = job
+            while len(self._jobs) > self.capacity:
+                self._jobs.popitem(last=False)
+        return job
+
+    def get(self, job_id: str) -> CrawlJob | None:
+        with self._lock:
+            return self._jobs.get(job_id)
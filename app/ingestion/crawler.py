@@ -0,0 +1,379 @@
+# app/ingestion/crawler.py
+"""
+Async site crawler behind /ingest/crawl.
+
+Seeds come from a root page and/or a sitemap (sitemap indexes and .xml.gz are
+followed). Links are followed breadth-first inside a CrawlScope, every canonical
+URL is fetched at most once, and each host gets its own concurrency limit and
+minimum gap between requests (robots.txt rules and Crawl-delay are honoured).
+Pages are yielded as they arrive, so the caller ingests one batch while the
+next is still being fetched.
+"""
+import asyncio
+import gzip
+import re
+import time
+from urllib.parse import urldefrag, urljoin, urlsplit, urlunsplit
+from urllib.robotparser import RobotFileParser
+from xml.etree import ElementTree
+
+import httpx
+
+from app.core.config import settings
+from app.ingestion.crawl_jobs import CrawlJob
+from app.ingestion.web_ingestor import WebPage
+
+_HTML_TYPES = ("text/html", "application/xhtml+xml")
+_DEFAULT_PORTS = {"http": 80, "https": 443}
+# links that are never pages worth fetching
+_SKIP_EXTENSIONS = re.compile(
+    r"\.(png|jpe?g|gif|svg|webp|ico|css|js|mjs|map|pdf|zip|gz|tgz|tar|whl|exe|dmg|mp3|mp4|webm|woff2?|ttf)$",
+    re.IGNORECASE,
+)
+_MAX_SITEMAP_DEPTH = 2
+
+
+def canonical_url(url: str) -> str:
+    """
+    Normal form used for dedupe: lowercase scheme and host, no default port,
+    no fragment, no trailing slash (except the root). The query is kept.
+    """
+    url, _ = urldefrag(url.strip())
+    parts = urlsplit(url)
+    scheme = parts.scheme.lower()
+    host = (parts.hostname or "").lower()
+    if parts.port and parts.port != _DEFAULT_PORTS.get(scheme):
+        host = f"{host}:{parts.port}"
+    path = parts.path or "/"
+    if len(path) > 1:
+        path = path.rstrip("/") or "/"
+    return urlunsplit((scheme, host, path, parts.query, ""))
+
+
+class CrawlScope:
+    """
+    Which URLs a crawl may visit: http(s) on one of `domains` (subdomains
+    included), under one of `path_prefixes`, matching none of the `exclude` regexes.
+    """
+
+    def __init__(self, domains: list[str], path_prefixes: list[str] | None = None, exclude: list[str] | None = None):
+        self.domains = [d.lower().strip(".") for d in domains if d]
+        self.path_prefixes = path_prefixes or ["/"]
+        self.exclude = [re.compile(p) for p in (exclude or [])]
+
+    def allows(self, url: str) -> bool:
+        parts = urlsplit(url)
+        if parts.scheme not in ("http", "https"):
+            return False
+        host = (parts.hostname or "").lower()
+        if not any(host == d or host.endswith("." + d) for d in self.domains):
+            return False
+        path = parts.path or "/"
+        if _SKIP_EXTENSIONS.search(path):
+            return False
+        if not any(path.startswith(p) for p in self.path_prefixes):
+            return False
+        return not any(p.search(url) for p in self.exclude)
+
+
+class _Host:
+    def __init__(self, concurrency: int, delay: float):
+        self.slots = asyncio.Semaphore(concurrency)
+        self.lock = asyncio.Lock()
+        self.delay = delay
+        self.next_at = 0.0
+        self.robots: RobotFileParser | None = None
+        self.robots_lock = asyncio.Lock()
+
+
+def _parse_html(body: bytes):
+    from bs4 import BeautifulSoup
+
+    return BeautifulSoup(body, "html.parser")
+
+
+class SiteCrawler:
+    """
+    One crawl. Iterate `pages()` once; `stats` is updated live and can be read
+    from another thread for progress reporting.
+    """
+
+    def __init__(
+        self,
+        url: str | None = None,
+        *,
+        sitemap_url: str | None = None,
+        scope: CrawlScope | None = None,
+        max_pages: int | None = None,
+        max_depth: int = 3,
+        follow_links: bool = True,
+        concurrency: int | None = None,
+        per_host_concurrency: int | None = None,
+        delay_seconds: float | None = None,
+        respect_robots: bool | None = None,
+        transport: httpx.AsyncBaseTransport | None = None,
+    ):
+        if url and sitemap_url is None and re.search(r"\.xml(\.gz)?$", urlsplit(url).path):
+            url, sitemap_url = None, url
+        if not url and not sitemap_url:
+            raise ValueError("A root URL or a sitemap URL is required")
+        self.root_url = url
+        self.sitemap_url = sitemap_url
+        seed_host = urlsplit(url or sitemap_url).hostname
+        self.scope = scope or CrawlScope([seed_host])
+        self.max_pages = max_pages or settings.CRAWL_MAX_PAGES
+        self.max_depth = max_depth
+        self.follow_links = follow_links
+        self.concurrency = concurrency or settings.CRAWL_CONCURRENCY
+        self.per_host_concurrency = per_host_concurrency or settings.CRAWL_PER_HOST_CONCURRENCY
+        self.delay_seconds = settings.CRAWL_DELAY_SECONDS if delay_seconds is None else delay_seconds
+        self.respect_robots = settings.CRAWL_RESPECT_ROBOTS if respect_robots is None else respect_robots
+        self.user_agent = settings.WEB_USER_AGENT
+        self.transport = transport
+
+        self.stats = {
+            "queued": 0,
+            "fetched": 0,
+            "pages": 0,
+            "duplicates": 0,
+            "skipped": 0,
+            "errors": 0,
+        }
+        self.errors: list[str] = []
+        self._hosts: dict[str, _Host] = {}
+        self._seen: set[str] = set()      # canonical URLs queued or fetched
+        self._emitted: set[str] = set()   # canonical URLs handed out as pages
+        # bound the frontier: links beyond this many are not worth remembering
+        self._seen_limit = self.max_pages * 20
+        self._done = False
+
+    # ---------- frontier ----------
+
+    def _enqueue(self, url: str, depth: int):
+        key = canonical_url(url)
+        if self._done or key in self._seen or len(self._seen) >= self._seen_limit:
+            return
+        if not self.scope.allows(key):
+            return
+        self._seen.add(key)
+        self.stats["queued"] += 1
+        self._frontier.put_nowait((url, depth))
+
+    def _error(self, url: str, error):
+        self.stats["errors"] += 1
+        if len(self.errors) < 20:
+            self.errors.append(f"{url}: {error}")
+
+    # ---------- politeness ----------
+
+    def _host(self, url: str) -> _Host:
+        netloc = urlsplit(url).netloc.lower()
+        host = self._hosts.get(netloc)
+        if host is None:
+            host = self._hosts[netloc] = _Host(self.per_host_concurrency, self.delay_seconds)
+        return host
+
+    async def _robots(self, host: _Host, url: str) -> RobotFileParser:
+        async with host.robots_lock:
+            if host.robots is None:
+                parts = urlsplit(url)
+                parser = RobotFileParser()
+                try:
+                    resp = await self._client.get(f"{parts.scheme}://{parts.netloc}/robots.txt")
+                    parser.parse(resp.text.splitlines() if resp.status_code == 200 else [])
+                except httpx.HTTPError:
+                    parser.parse([])
+                delay = parser.crawl_delay(self.user_agent)
+                if delay:
+                    host.delay = max(host.delay, float(delay))
+                host.robots = parser
+        return host.robots
+
+    async def _get(self, url: str) -> httpx.Response | None:
+        """
+        GET under the host's concurrency limit and request gap. None if robots.txt disallows it.
+        """
+        host = self._host(url)
+        if self.respect_robots:
+            robots = await self._robots(host, url)
+            if not robots.can_fetch(self.user_agent, url):
+                self.stats["skipped"] += 1
+                return None
+        async with host.slots:
+            async with host.lock:
+                now = time.monotonic()
+                start = max(now, host.next_at)
+                host.next_at = start + host.delay
+            if start > now:
+                await asyncio.sleep(start - now)
+            self.stats["fetched"] += 1
+            return await self._client.get(url)
+
+    # ---------- sitemap ----------
+
+    async def _sitemap_urls(self, url: str, depth: int = 0) -> list[str]:
+        resp = await self._get(url)
+        if resp is None:
+            return []
+        if resp.status_code != 200:
+            self._error(url, f"HTTP {resp.status_code}")
+            return []
+        data = resp.content
+        if data[:2] == b"\x1f\x8b":
+            data = gzip.decompress(data)
+        try:
+            root = ElementTree.fromstring(data)
+        except ElementTree.ParseError as e:
+            self._error(url, f"invalid sitemap: {e}")
+            return []
+        # tags are namespaced ({http://www.sitemaps.org/...}loc)
+        locs = [el.text.strip() for el in root.iter() if el.tag.endswith("loc") and el.text]
+        if not root.tag.endswith("sitemapindex"):
+            return locs
+        if depth >= _MAX_SITEMAP_DEPTH:
+            return []
+        urls = []
+        for loc in locs:
+            urls.extend(await self._sitemap_urls(loc, depth + 1))
+        return urls
+
+    # ---------- crawl ----------
+
+    async def _visit(self, url: str, depth: int):
+        resp = await self._get(url)
+        if resp is None:
+            return
+        if resp.status_code != 200:
+            self._error(url, f"HTTP {resp.status_code}")
+            return
+
+        final = canonical_url(str(resp.url))
+        if final != canonical_url(url):
+            # redirected: the target may be out of scope or already queued
+            if not self.scope.allows(final):
+                self.stats["skipped"] += 1
+                return
+            if final in self._seen:
+                self.stats["duplicates"] += 1
+                return
+            self._seen.add(final)
+
+        content_type = resp.headers.get("content-type", "").split(";")[0].strip().lower()
+        if content_type not in _HTML_TYPES:
+            self.stats["skipped"] += 1
+            return
+
+        body = resp.content
+        soup = await asyncio.to_thread(_parse_html, body)
+
+        robots_meta = soup.find("meta", attrs={"name": "robots"})
+        directives = (robots_meta.get("content") or "").lower() if robots_meta else ""
+
+        if self.follow_links and depth < self.max_depth and "nofollow" not in directives:
+            for a in soup.find_all("a", href=True):
+                self._enqueue(urljoin(str(resp.url), a["href"]), depth + 1)
+
+        if self.respect_robots and "noindex" in directives:
+            self.stats["skipped"] += 1
+            return
+
+        # <link rel="canonical"> names the page's source id, when it stays in scope
+        source = final
+        link = soup.find("link", rel="canonical", href=True)
+        if link is not None:
+            declared = canonical_url(urljoin(str(resp.url), link["href"]))
+            if self.scope.allows(declared):
+                source = declared
+                self._seen.add(declared)
+        if source in self._emitted:
+            self.stats["duplicates"] += 1
+            return
+        if self._done:
+            return
+        self._emitted.add(source)
+        self.stats["pages"] += 1
+        if self.stats["pages"] >= self.max_pages:
+            self._done = True
+
+        await self._out.put(WebPage(
+            source, body, resp.headers.get("ETag"), resp.headers.get("Last-Modified"), soup=soup,
+        ))
+
+    async def _worker(self):
+        while True:
+            url, depth = await self._frontier.get()
+            try:
+                if not self._done:
+                    await self._visit(url, depth)
+            except httpx.HTTPError as e:
+                self._error(url, e.__class__.__name__)
+            except Exception as e:
+                self._error(url, e)
+            finally:
+                self._frontier.task_done()
+
+    async def _finish(self):
+        await self._frontier.join()
+        await self._out.put(None)
+
+    async def pages(self):
+        """
+        Async iterator of WebPage, in roughly breadth-first order, until the
+        frontier is exhausted or max_pages pages have been produced.
+        """
+        self._frontier: asyncio.Queue = asyncio.Queue()
+        # small buffer: fetching runs ahead of ingestion by a couple of batches at most
+        self._out: asyncio.Queue = asyncio.Queue(maxsize=self.concurrency * 2)
+
+        async with httpx.AsyncClient(
+            headers={"User-Agent": self.user_agent},
+            timeout=settings.WEB_FETCH_TIMEOUT,
+            follow_redirects=True,
+            limits=httpx.Limits(max_connections=self.concurrency),
+            transport=self.transport,
+        ) as client:
+            self._client = client
+            if self.sitemap_url:
+                for loc in await self._sitemap_urls(self.sitemap_url):
+                    self._enqueue(loc, 0)
+            if self.root_url:
+                self._enqueue(self.root_url, 0)
+
+            tasks = [asyncio.create_task(self._worker()) for _ in range(self.concurrency)]
+            tasks.append(asyncio.create_task(self._finish()))
+            try:
+                while True:
+                    page = await self._out.get()
+                    if page is None:
+                        break
+                    yield page
+            finally:
+                self._done = True
+                for task in tasks:
+                    task.cancel()
+                await asyncio.gather(*tasks, return_exceptions=True)
+
+
+async def run_crawl(crawler: SiteCrawler, job: CrawlJob, ingest_batch, batch_size: int):
+    """
+    Drive `crawler` to the end, handing pages to the blocking `ingest_batch`
+    (run in a thread) `batch_size` at a time. Fetching continues meanwhile.
+    """
+    job.crawl_stats = crawler.stats
+    job.crawl_errors = crawler.errors
+
+    async def flush(batch):
+        try:
+            await asyncio.to_thread(ingest_batch, batch)
+        except Exception as e:
+            job.add(pages_failed=len(batch))
+            job.note_error(f"batch of {len(batch)} pages: {e}")
+
+    batch = []
+    async for page in crawler.pages():
+        batch.append(page)
+        if len(batch) >= batch_size:
+            await flush(batch)
+            batch = []
+    if batch:
+        await flush(batch)
@@ -0,0 +1,68 @@
+# app/ingestion/dedup.py
+"""
+64-bit SimHash over word unigrams + bigrams. Near-identical texts (same
+boilerplate, overlap artefacts, a changed date in a footer) land within a few
+bits of each other; unrelated texts differ in ~32.
+"""
+import hashlib
+import re
+
+import numpy as np
+
+_WORD = re.compile(r"\w+")
+
+BANDS = 4
+_BAND_BITS = 64 // BANDS
+_BAND_MASK = (1 << _BAND_BITS) - 1
+
+
+def _features(text: str) -> dict[str, int]:
+    words = _WORD.findall(text.lower())
+    feats: dict[str, int] = {}
+    for w in words:
+        feats[w] = feats.get(w, 0) + 1
+    for a, b in zip(words, words[1:]):
+        key = f"{a} {b}"
+        feats[key] = feats.get(key, 0) + 1
+    return feats
+
+
+def simhash(text: str) -> int:
+    """
+    Unsigned 64-bit SimHash (0 for texts without words).
+    """
+    feats = _features(text)
+    if not feats:
+        return 0
+    hashes = np.array(
+        [int.from_bytes(hashlib.blake2b(f.encode(), digest_size=8).digest(), "little") for f in feats],
+        dtype=np.uint64,
+    )
+    weights = np.array(list(feats.values()), dtype=np.float64)
+    # (n, 64) bit matrix, bit i of every feature hash in column i
+    bits = np.unpackbits(hashes.view(np.uint8).reshape(-1, 8), axis=1, bitorder="little")
+    votes = (np.where(bits == 1, 1.0, -1.0) * weights[:, None]).sum(axis=0)
+    out = 0
+    for i in np.flatnonzero(votes > 0):
+        out |= 1 << int(i)
+    return out
+
+
+def hamming(a: int, b: int) -> int:
+    return (a ^ b).bit_count()
+
+
+def bands(h: int) -> list[tuple[int, int]]:
+    """
+    (band number, band value) keys. With 4 bands of 16 bits, two hashes within
+    3 bits of each other always share at least one band (pigeonhole).
+    """
+    return [(i, (h >> (i * _BAND_BITS)) & _BAND_MASK) for i in range(BANDS)]
+
+
+def to_signed(h: int) -> int:
+    return h - (1 << 64) if h >= (1 << 63) else h
+
+
+def to_unsigned(h: int) -> int:
+    return h + (1 << 64) if h < 0 else h
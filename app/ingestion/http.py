@@ -0,0 +1,28 @@
+# app/ingestion/http.py
+import threading
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from app.core.config import settings
+
+_session: requests.Session | None = None
+_session_lock = threading.Lock()
+
+
+def get_http_session() -> requests.Session:
+    """
+    One pooled session per process, so repeated fetches from the same host
+    reuse TCP/TLS connections instead of reconnecting per page.
+    """
+    global _session
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                session = requests.Session()
+                adapter = HTTPAdapter(pool_connections=settings.WEB_POOL_SIZE, pool_maxsize=settings.WEB_POOL_SIZE)
+                session.mount("http://", adapter)
+                session.mount("https://", adapter)
+                session.headers["User-Agent"] = settings.WEB_USER_AGENT
+                _session = session
+    return _session
@@ -1,52 +1,73 @@
 import tempfile
 import os
-from langchain_community.document_loaders import PyPDFLoader
-from langchain_text_splitters import RecursiveCharacterTextSplitter
+import uuid
+from typing import TYPE_CHECKING
 
-from app.vectorstore.qdrant_store import QdrantStore
+from app.core.config import settings
+from app.ingestion.chunking import get_chunking_engine, get_profile
+from app.ingestion.topics import tag_chunks
+from app.vectorstore.topic_index import TopicIndex
+
+if TYPE_CHECKING:
+    from app.vectorstore.dedup_index import DuplicateIndex
+    from app.vectorstore.base import VectorStore
 
 class PDFIngestor:
-    def __init__(self, vector_store: QdrantStore):
+    def __init__(
+        self,
+        vector_store: "VectorStore",
+        topic_index: TopicIndex | None = None,
+        dedup_index: "DuplicateIndex | None" = None,
+    ):
         self.vector_store = vector_store
-        self.splitter = RecursiveCharacterTextSplitter(
-            chunk_size=1000,
-            chunk_overlap=150,
-        )
+        self.topic_index = topic_index
+        self.dedup_index = dedup_index
+        self.chunker = get_chunking_engine()
+        self.profile = get_profile("pdf")
 
-    def ingest(self, file_bytes: bytes, filename: str) -> int:
+    def ingest(self, file_bytes: bytes, filename: str) -> dict:
         # 1. Save to temp file (PyPDFLoader needs a path)
         with tempfile.NamedTemporaryFile(delete=False, suffix=".pdf") as tmp:
             tmp.write(file_bytes)
             tmp_path = tmp.name
 
         try:
-            # 2. Load PDF
+            # 2. Load PDF (pypdf is only imported once a PDF actually arrives)
+            from langchain_community.document_loaders import PyPDFLoader
+
             loader = PyPDFLoader(tmp_path)
             documents = loader.load()
 
-            # 3. Split into chunks
-            chunks = self.splitter.split_documents(documents)
+            # 3. Split each page on its own, so every chunk has exactly one page
+            chunks, chunk_stats = self.chunker.split(documents, self.profile)
 
-            import uuid
+            # Drop near-duplicates (boilerplate, repeated segments) before anything is embedded
+            duplicates = {"within_source": 0, "cross_source": 0}
+            signatures = None
+            if self.dedup_index is not None:
+                chunks, signatures, duplicates = self.dedup_index.filter(filename, chunks)
 
             # 4. Add metadata (source, chunk_id, page)
             for doc in chunks:
                 doc.metadata["source"] = filename
                 doc.metadata["chunk_id"] = str(uuid.uuid4())
+                doc.metadata["page"] = doc.metadata.get("page")
 
-                # LangChain PyPDFLoader usually provides page in metadata
-                if "page" in doc.metadata:
-                    doc.metadata["page"] = doc.metadata.get("page")
-                else:
-                    doc.metadata["page"] = None
+            # 5. Tag each chunk with a topic so retrieval can filter by it
+            topic_counts = tag_chunks(chunks, settings.TOPICS_PER_SOURCE)
 
-            # 5. Store in vector DB
+            # 6. Store in vector DB
             texts = [doc.page_content for doc in chunks]
             metadatas = [doc.metadata for doc in chunks]
 
             self.vector_store.add_texts(texts=texts, metadatas=metadatas)
 
-            return len(chunks)
+            if self.topic_index is not None:
+                self.topic_index.record(filename, topic_counts)
+            if self.dedup_index is not None:
+                self.dedup_index.record(filename, [doc.metadata["chunk_id"] for doc in chunks], signatures)
+
+            return {"chunks": len(chunks), "chunk_stats": chunk_stats, "duplicates_skipped": duplicates}
         finally:
-            # 6. Cleanup temp file
+            # 7. Cleanup temp file
             os.remove(tmp_path)
@@ -0,0 +1,75 @@
+# app/ingestion/topics.py
+import math
+import re
+from collections import Counter
+
+_WORD = re.compile(r"[a-z][a-z0-9+#\-]{2,}")
+
+_STOPWORDS = {
+    "the", "and", "for", "are", "but", "not", "you", "your", "with", "this", "that",
+    "from", "they", "them", "their", "there", "have", "has", "had", "was", "were",
+    "will", "would", "can", "could", "should", "may", "might", "must", "also", "into",
+    "than", "then", "when", "where", "which", "while", "what", "who", "whom", "why",
+    "how", "all", "any", "each", "other", "some", "such", "only", "own", "same", "very",
+    "just", "about", "above", "after", "again", "against", "because", "been", "before",
+    "being", "below", "between", "both", "does", "doing", "down", "during", "few",
+    "further", "here", "its", "itself", "more", "most", "off", "once", "our", "out",
+    "over", "these", "those", "through", "too", "under", "until", "use", "used", "using",
+    "like", "one", "two", "get", "make", "many", "much", "well", "way", "see", "need",
+    "new", "now", "let", "yes", "yeah", "okay", "going", "know", "think", "thing",
+    "things", "really", "right", "want", "page", "http", "https", "www", "com",
+}
+
+
+def _terms(text: str) -> list[str]:
+    return [w for w in _WORD.findall(text.lower()) if w not in _STOPWORDS]
+
+
+def extract_topics(texts: list[str], max_topics: int = 8) -> list[str]:
+    """
+    Pick the terms that best characterise sections of a source: frequent overall,
+    but concentrated in some chunks rather than spread evenly (tf * idf).
+    No model calls; runs in milliseconds even for large documents.
+    """
+    n = len(texts)
+    if n == 0:
+        return []
+
+    tf = Counter()
+    df = Counter()
+    for text in texts:
+        terms = _terms(text)
+        tf.update(terms)
+        df.update(set(terms))
+
+    min_df = 2 if n >= 4 else 1
+    scored = [
+        (tf[t] * math.log(1 + n / df[t]), t)
+        for t in tf
+        if df[t] >= min_df
+    ]
+    scored.sort(reverse=True)
+    return [t for _, t in scored[:max_topics]]
+
+
+def assign_topics(texts: list[str], topics: list[str]) -> list[str]:
+    """
+    Label each chunk with the topic term it mentions most ("general" if none).
+    """
+    labels = []
+    for text in texts:
+        counts = Counter(t for t in _terms(text) if t in topics)
+        labels.append(counts.most_common(1)[0][0] if counts else "general")
+    return labels
+
+
+def tag_chunks(chunks, max_topics: int = 8) -> Counter:
+    """
+    Set metadata["topic"] on LangChain Documents in place.
+    Returns topic -> chunk count, for the topic index.
+    """
+    texts = [doc.page_content for doc in chunks]
+    labels = assign_topics(texts, extract_topics(texts, max_topics))
+    for doc, topic in zip(chunks, labels):
+        doc.metadata["topic"] = topic
+    return Counter(labels)
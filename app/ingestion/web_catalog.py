@@ -0,0 +1,87 @@
+# app/ingestion/web_catalog.py
+from datetime import datetime
+
+from sqlalchemy.orm import Session
+
+from app.db import SessionLocal
+from app.models import WebSourceModel
+
+
+class WebCatalog:
+    """
+    Per-URL fetch validators (ETag, Last-Modified, body hash) for one workspace.
+    An entry exists only while the URL's chunks are stored, so "not modified"
+    always means the stored chunks are still current.
+    """
+
+    def __init__(self, workspace: str = "default"):
+        self.workspace = workspace
+
+    def get(self, url: str) -> dict | None:
+        db: Session = SessionLocal()
+        try:
+            row = (
+                db.query(WebSourceModel)
+                .filter(WebSourceModel.workspace == self.workspace)
+                .filter(WebSourceModel.url == url)
+                .first()
+            )
+            if row is None:
+                return None
+            return {
+                "etag": row.etag,
+                "last_modified": row.last_modified,
+                "content_hash": row.content_hash,
+                "fetched_at": row.fetched_at,
+                "checked_at": row.checked_at,
+            }
+        finally:
+            db.close()
+
+    def put(self, url: str, etag: str | None, last_modified: str | None, content_hash: str):
+        now = datetime.utcnow()
+        db: Session = SessionLocal()
+        try:
+            row = (
+                db.query(WebSourceModel)
+                .filter(WebSourceModel.workspace == self.workspace)
+                .filter(WebSourceModel.url == url)
+                .first()
+            )
+            if row is None:
+                row = WebSourceModel(workspace=self.workspace, url=url)
+                db.add(row)
+            row.etag = etag
+            row.last_modified = last_modified
+            row.content_hash = content_hash
+            row.fetched_at = now
+            row.checked_at = now
+            db.commit()
+        finally:
+            db.close()
+
+    def touch(self, url: str):
+        db: Session = SessionLocal()
+        try:
+            (
+                db.query(WebSourceModel)
+                .filter(WebSourceModel.workspace == self.workspace)
+                .filter(WebSourceModel.url == url)
+                .update({WebSourceModel.checked_at: datetime.utcnow()})
+            )
+            db.commit()
+        finally:
+            db.close()
+
+    def remove(self, url: str):
+        db: Session = SessionLocal()
+        try:
+            (
+                db.query(WebSourceModel)
+                .filter(WebSourceModel.workspace == self.workspace)
+                .filter(WebSourceModel.url == url)
+                .delete()
+            )
+            db.commit()
+        finally:
+            db.close()
@@ -1,38 +1,188 @@
+import hashlib
+import re
 import uuid
-from langchain_community.document_loaders import WebBaseLoader
-from langchain_text_splitters import RecursiveCharacterTextSplitter
+from typing import TYPE_CHECKING, Callable
+
+from langchain_core.documents import Document
+
+from app.core.config import settings
+from app.ingestion.chunking import get_chunking_engine, get_profile
+from app.ingestion.http import get_http_session
+from app.ingestion.topics import tag_chunks
+from app.ingestion.web_catalog import WebCatalog
+from app.vectorstore.topic_index import TopicIndex
+
+if TYPE_CHECKING:
+    from app.vectorstore.dedup_index import DuplicateIndex
+    from app.vectorstore.base import VectorStore
+
+_HEADINGS = ["h1", "h2", "h3", "h4", "h5", "h6"]
+# private-use marker put in front of each heading before the HTML is flattened
+_MARK = "\ue000"
+_HEADING_LINE = re.compile(rf"^{_MARK}(\d){_MARK}(.*)$", re.MULTILINE)
+
+
+def html_sections(soup, metadata: dict) -> list[Document]:
+    """
+    Flatten a page into one Document per heading section, with the heading path
+    ("Tutorial > Path Parameters") in metadata["section"] and the section's own
+    heading in metadata["heading"] (the chunker puts it back into the text).
+    """
+    for tag in soup.find_all(_HEADINGS):
+        level = int(tag.name[1])
+        text = tag.get_text(" ", strip=True)
+        tag.replace_with(f"\n{_MARK}{level}{_MARK}{text}\n")
+
+    # <head> (title, scripts) is not content; the title goes into metadata instead
+    text = (soup.body or soup).get_text()
+    parts = _HEADING_LINE.split(text)
+    # parts = [preamble, level, heading, body, level, heading, body, ...]
+    sections = []
+    stack: list[tuple[int, str]] = []
+
+    def add(body: str, heading: str | None):
+        body = re.sub(r"\n\s*\n+", "\n\n", body).strip()
+        if body or heading:
+            path = " > ".join(h for _, h in stack) or None
+            sections.append(Document(
+                page_content=body,
+                metadata={**metadata, "section": path, "heading": heading},
+            ))
+
+    add(parts[0], None)
+    for i in range(1, len(parts), 3):
+        level, heading, body = int(parts[i]), parts[i + 1].strip(), parts[i + 2]
+        while stack and stack[-1][0] >= level:
+            stack.pop()
+        stack.append((level, heading))
+        add(body, heading)
+    return sections
+
+
+class WebPage:
+    """
+    One fetched page plus the validators needed to re-fetch it conditionally.
+    `soup` is set when the caller (the crawler) has already parsed the body.
+    """
+    __slots__ = ("url", "body", "etag", "last_modified", "content_hash", "soup")
+
+    def __init__(self, url: str, body: bytes, etag: str | None, last_modified: str | None, soup=None):
+        self.url = url
+        self.body = body
+        self.etag = etag
+        self.last_modified = last_modified
+        self.content_hash = hashlib.sha256(body).hexdigest()
+        self.soup = soup
 
-from app.vectorstore.qdrant_store import QdrantStore
 
 class WebIngestor:
-    def __init__(self, vector_store: QdrantStore):
+    def __init__(
+        self,
+        vector_store: "VectorStore",
+        topic_index: TopicIndex | None = None,
+        dedup_index: "DuplicateIndex | None" = None,
+        catalog: WebCatalog | None = None,
+    ):
         self.vector_store = vector_store
-        self.splitter = RecursiveCharacterTextSplitter(
-            chunk_size=1000,
-            chunk_overlap=150,
-        )
+        self.topic_index = topic_index
+        self.dedup_index = dedup_index
+        self.catalog = catalog
+        self.session = get_http_session()
+        self.chunker = get_chunking_engine()
+        self.profile = get_profile("web")
+
+    def fetch(self, url: str, conditional: bool = False) -> WebPage | None:
+        """
+        GET the page through the pooled session. With conditional=True and a
+        catalog entry, sends If-None-Match / If-Modified-Since and returns None
+        when the page is unchanged (304, or 200 with the same body hash).
+        """
+        known = self.catalog.get(url) if (conditional and self.catalog is not None) else None
+        headers = {}
+        if known:
+            if known["etag"]:
+                headers["If-None-Match"] = known["etag"]
+            if known["last_modified"]:
+                headers["If-Modified-Since"] = known["last_modified"]
+
+        resp = self.session.get(url, headers=headers, timeout=settings.WEB_FETCH_TIMEOUT)
+        if known and resp.status_code == 304:
+            self.catalog.touch(url)
+            return None
+        resp.raise_for_status()
+
+        page = WebPage(url, resp.content, resp.headers.get("ETag"), resp.headers.get("Last-Modified"))
+        if known and page.content_hash == known["content_hash"]:
+            # server ignores validators, but nothing changed
+            self.catalog.put(url, page.etag, page.last_modified, page.content_hash)
+            return None
+        return page
+
+    def ingest(self, url: str, page: WebPage | None = None, replace: Callable[[str], None] | None = None) -> dict:
+        if page is None:
+            page = self.fetch(url)
+        return self.ingest_pages([page], replace=replace)[0]
+
+    def ingest_pages(self, pages: list[WebPage], replace: Callable[[str], None] | None = None) -> list[dict]:
+        """
+        Split, dedupe and tag each page, then embed and upsert the whole batch
+        with one add_texts call. Returns one result per page, in order.
+
+        With `replace`, each page supersedes what is stored under its URL: the
+        batch is embedded first, then replace(url) drops the old chunks, then
+        the new ones are stored. A failed embedding call leaves the old ones as they were.
+        """
+        # 1. Parse pages (bs4 imported on first use)
+        from bs4 import BeautifulSoup
+
+        batch = self.dedup_index.batch() if self.dedup_index is not None else None
+        results, topic_counts, page_signatures, batch_chunks = [], [], [], []
+        for page in pages:
+            soup = page.soup if page.soup is not None else BeautifulSoup(page.body, "html.parser")
+            page.soup = None
+            title = soup.title.get_text(strip=True) if soup.title else None
+            documents = html_sections(soup, {"source": page.url, "title": title})
+
+            # 2. Split into chunks along heading boundaries
+            chunks, chunk_stats = self.chunker.split(documents, self.profile)
 
-    def ingest(self, url: str) -> int:
-        # 1. Load web page
-        loader = WebBaseLoader(url)
-        documents = loader.load()
+            # Drop near-duplicates (boilerplate, repeated segments) before anything is embedded.
+            # The batch index lets later pages of the batch see this one's chunks.
+            duplicates = {"within_source": 0, "cross_source": 0}
+            signatures = []
+            if self.dedup_index is not None:
+                chunks, signatures, duplicates = self.dedup_index.filter(
+                    page.url, chunks, replace=replace is not None, batch=batch
+                )
 
-        # 2. Split into chunks
-        chunks = self.splitter.split_documents(documents)
+            # 3. Add metadata
+            for doc in chunks:
+                doc.metadata["source"] = page.url
+                doc.metadata["chunk_id"] = str(uuid.uuid4())
 
-        # 3. Add metadata
-        for doc in chunks:
-            doc.metadata["source"] = url
-            doc.metadata["chunk_id"] = str(uuid.uuid4())
+            # 4. Tag each chunk with a topic so retrieval can filter by it
+            topic_counts.append(tag_chunks(chunks, settings.TOPICS_PER_SOURCE))
+            page_signatures.append(([doc.metadata["chunk_id"] for doc in chunks], signatures))
 
-            # Some loaders may include title or other info
-            if "title" in doc.metadata:
-                doc.metadata["title"] = doc.metadata.get("title")
+            batch_chunks.extend(chunks)
+            results.append({"chunks": len(chunks), "chunk_stats": chunk_stats, "duplicates_skipped": duplicates})
 
-        # 4. Store in vector DB
-        texts = [doc.page_content for doc in chunks]
-        metadatas = [doc.metadata for doc in chunks]
+        # 5. Embed the whole batch, then store it (embeddings are batched across pages)
+        texts = [doc.page_content for doc in batch_chunks]
+        metadatas = [doc.metadata for doc in batch_chunks]
+        vectors = self.vector_store.embeddings.embed_documents(texts) if texts else []
+        if replace is not None:
+            for page in pages:
+                replace(page.url)
+        self.vector_store.add_texts(texts=texts, metadatas=metadatas, vectors=vectors)
 
-        self.vector_store.add_texts(texts=texts, metadatas=metadatas)
+        for page, counts, (chunk_ids, signatures) in zip(pages, topic_counts, page_signatures):
+            if self.topic_index is not None:
+                self.topic_index.record(page.url, counts)
+            # signatures and validators are only recorded once the chunks are stored
+            if self.dedup_index is not None:
+                self.dedup_index.record(page.url, chunk_ids, signatures)
+            if self.catalog is not None:
+                self.catalog.put(page.url, page.etag, page.last_modified, page.content_hash)
 
-        return len(chunks)
+        return results
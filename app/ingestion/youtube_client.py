@@ -0,0 +1,100 @@
+# app/ingestion/youtube_client.py
+"""
+Transcript and playlist lookups for YouTubeIngestor. The ingestor only needs
+`transcript(video_id)` and `playlist_video_ids(url)`, so tests and offline
+runs can hand it any object with those two methods instead.
+"""
+import re
+import threading
+from urllib.parse import parse_qs, urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from app.core.config import settings
+
+_VIDEO_ID = re.compile(r"^[A-Za-z0-9_-]{11}$")
+_HOSTS = {"youtube.com", "www.youtube.com", "m.youtube.com", "music.youtube.com", "www.youtube-nocookie.com"}
+
+
+def video_id(url: str) -> str | None:
+    """
+    Video id from watch, youtu.be, shorts, embed and live URLs (None if not a video URL).
+    """
+    parts = urlsplit(url.strip())
+    host = (parts.hostname or "").lower()
+    candidate = None
+    if host == "youtu.be":
+        candidate = parts.path.lstrip("/").split("/")[0]
+    elif host in _HOSTS:
+        if parts.path.rstrip("/") == "/watch":
+            candidate = (parse_qs(parts.query).get("v") or [None])[0]
+        else:
+            segments = parts.path.strip("/").split("/")
+            if len(segments) >= 2 and segments[0] in ("shorts", "embed", "live", "v"):
+                candidate = segments[1]
+    return candidate if candidate and _VIDEO_ID.match(candidate) else None
+
+
+def playlist_id(url: str) -> str | None:
+    return (parse_qs(urlsplit(url.strip()).query).get("list") or [None])[0]
+
+
+def watch_url(vid: str) -> str:
+    return f"https://www.youtube.com/watch?v={vid}"
+
+
+def canonical_video_url(url: str) -> str:
+    """
+    The watch URL videos are stored under, so youtu.be / shorts / watch?v=...&t=
+    links to one video are one source. Non-video URLs come back stripped.
+    """
+    vid = video_id(url)
+    return watch_url(vid) if vid else url.strip()
+
+
+class YouTubeClient:
+    """
+    youtube-transcript-api for captions, pytube for playlist listing. One
+    pooled HTTP session is shared by every transcript fetch of this client.
+    """
+
+    def __init__(self, languages: list[str] | None = None):
+        self.languages = languages or settings.YOUTUBE_LANGUAGES
+        self._api = None
+        self._lock = threading.Lock()
+
+    def _transcript_api(self):
+        if self._api is None:
+            with self._lock:
+                if self._api is None:
+                    from youtube_transcript_api import YouTubeTranscriptApi
+
+                    session = requests.Session()
+                    size = max(settings.YOUTUBE_FETCH_WORKERS, 1)
+                    session.mount("https://", HTTPAdapter(pool_connections=size, pool_maxsize=size))
+                    self._api = YouTubeTranscriptApi(http_client=session)
+        return self._api
+
+    def transcript(self, vid: str) -> list[dict]:
+        """
+        Caption lines as {"text", "start", "duration"} (seconds); [] when the
+        video has no captions in the configured languages.
+        """
+        from youtube_transcript_api import NoTranscriptFound, TranscriptsDisabled
+
+        try:
+            fetched = self._transcript_api().fetch(vid, languages=self.languages)
+        except (NoTranscriptFound, TranscriptsDisabled):
+            return []
+        return [{"text": s.text, "start": s.start, "duration": s.duration} for s in fetched.snippets]
+
+    def playlist_video_ids(self, url: str) -> list[str]:
+        from pytube import Playlist
+
+        ids = []
+        for u in Playlist(url).video_urls:
+            vid = video_id(u)
+            if vid and vid not in ids:
+                ids.append(vid)
+        return ids
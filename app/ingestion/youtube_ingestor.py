@@ -1,42 +1,144 @@
 import uuid
-from langchain_community.document_loaders import YoutubeLoader
-from langchain_text_splitters import RecursiveCharacterTextSplitter
+from concurrent.futures import ThreadPoolExecutor
+from typing import TYPE_CHECKING, Callable
 
-from app.vectorstore.qdrant_store import QdrantStore
+from langchain_core.documents import Document
+
+from app.core.config import settings
+from app.ingestion.chunking import get_chunking_engine, get_profile
+from app.ingestion.topics import tag_chunks
+from app.ingestion.youtube_client import YouTubeClient, canonical_video_url, video_id
+from app.vectorstore.topic_index import TopicIndex
+
+if TYPE_CHECKING:
+    from app.vectorstore.dedup_index import DuplicateIndex
+    from app.vectorstore.base import VectorStore
 
 class YouTubeIngestor:
-    def __init__(self, vector_store: QdrantStore):
+    def __init__(
+        self,
+        vector_store: "VectorStore",
+        topic_index: TopicIndex | None = None,
+        dedup_index: "DuplicateIndex | None" = None,
+        client: YouTubeClient | None = None,
+    ):
         self.vector_store = vector_store
-        self.splitter = RecursiveCharacterTextSplitter(
-            chunk_size=1000,
-            chunk_overlap=150,
-        )
-
-    def ingest(self, url: str) -> int:
-        # 1. Load ONLY transcript (avoid pytube video info)
-        loader = YoutubeLoader.from_youtube_url(
-            url,
-            add_video_info=False  # ✅ IMPORTANT: avoids pytube metadata fetch
-        )
+        self.topic_index = topic_index
+        self.dedup_index = dedup_index
+        # anything with transcript(video_id) / playlist_video_ids(url)
+        self.client = client or YouTubeClient()
+        self.chunker = get_chunking_engine()
+        self.profile = get_profile("youtube")
 
-        documents = loader.load()
+    def ingest(self, url: str, replace: Callable[[str], None] | None = None) -> dict:
+        result = self.ingest_videos([url], replace=replace)
+        if result["failed"]:
+            raise ValueError(result["failed"][0]["error"])
+        return result["videos"][0]
 
-        if not documents:
+    def _transcript(self, url: str) -> list[Document]:
+        vid = video_id(url)
+        if vid is None:
+            raise ValueError(f"Could not determine the video ID for the URL: {url}")
+        lines = self.client.transcript(vid)
+        if not lines:
             raise ValueError("No transcript found for this video. It may not have captions.")
+        # one Document per caption line, so chunks follow the timing
+        return [
+            Document(page_content=line["text"], metadata={"start": line["start"], "duration": line["duration"], "video_id": vid})
+            for line in lines
+        ]
+
+    def fetch_transcripts(self, urls: list[str]) -> list[tuple[str, list[Document] | None, str | None]]:
+        """
+        Transcripts for every URL, fetched concurrently on a bounded pool.
+        Returns (source, documents, error) in input order, where source is the
+        canonical watch URL; one bad video doesn't fail the rest.
+        """
+        def fetch(url):
+            source = canonical_video_url(url)
+            try:
+                return source, self._transcript(url), None
+            except Exception as e:
+                return source, None, str(e)
+
+        workers = max(1, min(settings.YOUTUBE_FETCH_WORKERS, len(urls)))
+        if workers == 1:
+            return [fetch(u) for u in urls]
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="yt-transcript") as pool:
+            return list(pool.map(fetch, urls))
+
+    def ingest_videos(self, urls: list[str], replace: Callable[[str], None] | None = None) -> dict:
+        """
+        Ingest several videos, each stored under its URL as source.
+        """
+        # 1. Load transcripts only (no pytube video info)
+        return self.ingest_transcripts(self.fetch_transcripts(urls), replace=replace)
+
+    def ingest_transcripts(
+        self,
+        fetched: list[tuple[str, list[Document] | None, str | None]],
+        replace: Callable[[str], None] | None = None,
+    ) -> dict:
+        """
+        Chunk and store the output of fetch_transcripts(); all chunks are
+        embedded in one add_texts call. Failed fetches are reported, not raised.
+
+        With `replace`, each fetched video supersedes what is stored under its
+        URL: replace(url) runs once the batch is embedded, right before it is
+        stored, so a failed embedding call leaves the old chunks as they were.
+        """
+        batch = self.dedup_index.batch() if self.dedup_index is not None else None
+        videos, failed, topic_counts, video_signatures, batch_chunks = [], [], [], [], []
+        for url, documents, error in fetched:
+            if error is not None:
+                failed.append({"source": url, "error": error})
+                continue
+
+            # 2. Split into time windows on caption-line boundaries (start_seconds / end_seconds per chunk)
+            chunks, chunk_stats = self.chunker.split(documents, self.profile)
+
+            # Drop near-duplicates (boilerplate, repeated segments) before anything is embedded.
+            # The batch index lets later videos of the batch see this one's chunks.
+            duplicates = {"within_source": 0, "cross_source": 0}
+            signatures = []
+            if self.dedup_index is not None:
+                chunks, signatures, duplicates = self.dedup_index.filter(
+                    url, chunks, replace=replace is not None, batch=batch
+                )
+
+            # 3. Add metadata
+            for doc in chunks:
+                doc.metadata["source"] = url
+                doc.metadata["chunk_id"] = str(uuid.uuid4())
+                doc.metadata["type"] = "youtube"
 
-        # 2. Split into chunks
-        chunks = self.splitter.split_documents(documents)
+            # 4. Tag each chunk with a topic so retrieval can filter by it
+            topic_counts.append(tag_chunks(chunks, settings.TOPICS_PER_SOURCE))
+            video_signatures.append(([doc.metadata["chunk_id"] for doc in chunks], signatures))
 
-        # 3. Add metadata
-        for doc in chunks:
-            doc.metadata["source"] = url
-            doc.metadata["chunk_id"] = str(uuid.uuid4())
-            doc.metadata["type"] = "youtube"
+            batch_chunks.extend(chunks)
+            videos.append({
+                "source": url,
+                "chunks": len(chunks),
+                "chunk_stats": chunk_stats,
+                "duplicates_skipped": duplicates,
+            })
 
-        # 4. Store in vector DB
-        texts = [doc.page_content for doc in chunks]
-        metadatas = [doc.metadata for doc in chunks]
+        # 5. Embed the whole batch, then store it (embeddings are batched across videos)
+        texts = [doc.page_content for doc in batch_chunks]
+        metadatas = [doc.metadata for doc in batch_chunks]
+        vectors = self.vector_store.embeddings.embed_documents(texts) if texts else []
+        if replace is not None:
+            for video in videos:
+                replace(video["source"])
+        self.vector_store.add_texts(texts=texts, metadatas=metadatas, vectors=vectors)
 
-        self.vector_store.add_texts(texts=texts, metadatas=metadatas)
+        for video, counts, (chunk_ids, signatures) in zip(videos, topic_counts, video_signatures):
+            if self.topic_index is not None:
+                self.topic_index.record(video["source"], counts)
+            # signatures are only recorded once the chunks are stored
+            if self.dedup_index is not None:
+                self.dedup_index.record(video["source"], chunk_ids, signatures)
 
-        return len(chunks)
+        return {"videos": videos, "failed": failed, "chunks": len(batch_chunks)}
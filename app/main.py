@@ -1,60 +1,121 @@
-from fastapi import FastAPI
+import time
+
+# measured from the first line so the startup benchmark can report import cost
+_import_started = time.perf_counter()
+
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, Depends, Response
+from fastapi.responses import JSONResponse, PlainTextResponse, StreamingResponse
+from app.admission import Overloaded, admission_priority, admission_stats, priority_scope
 from app.core.config import settings
-from app.ingestion.web_ingestor import WebIngestor
-from app.ingestion.youtube_ingestor import YouTubeIngestor
-from app.llm.gemini import get_gemini_llm
-from app.rag.prompt import build_rag_prompt
-from app.rag.quiz_prompt import build_quiz_prompt
+from app.core.security import admin_token_valid
+from app.rag.citations import build_citation
+from app.rag.prompt import build_conversation_prompt, build_rag_prompt
+from app.rag.quiz_prompt import build_quiz_prompt, build_structured_quiz_prompt
 from app.rag.summarize_prompt import build_summarize_prompt
 from app.rag.test_prompt import build_test_question_prompt, build_test_grader_prompt
-from app.sessions.db_store import DBSessionStore
-from app.sessions.store import SessionStore
-from app.vectorstore.qdrant_store import QdrantStore
-from pydantic import BaseModel
-from fastapi import UploadFile, File
-from app.ingestion.pdf_ingestor import PDFIngestor
-from app.db import engine, Base
-from app import models
+from app.rag.question_bank import renumber_mcq
+from app.services import Services, get_services
+from app.vectorstore.search_profiles import SEARCH_PROFILE_PATTERN, get_search_profile
+from app.workspaces import DEFAULT_WORKSPACE, WORKSPACE_PATTERN
+from pydantic import BaseModel, Field
+from fastapi import UploadFile, File, Form, Query, Header, BackgroundTasks
+from datetime import datetime, timedelta
+import os
+import re
+
+
+class WorkspaceRequest(BaseModel):
+    workspace: str = Field(DEFAULT_WORKSPACE, pattern=WORKSPACE_PATTERN)
 
 
-class SearchRequest(BaseModel):
+class SearchRequest(WorkspaceRequest):
     query: str
+    sources: list[str] | None = None
+    # fast | balanced | exhaustive; SEARCH_PROFILE when omitted
+    search_profile: str | None = Field(None, pattern=SEARCH_PROFILE_PATTERN)
 
-class AskRequest(BaseModel):
+class AskRequest(WorkspaceRequest):
     question: str
     k: int = 5
     sources: list[str] | None = None
+    # fast | balanced | exhaustive; SEARCH_PROFILE when omitted
+    search_profile: str | None = Field(None, pattern=SEARCH_PROFILE_PATTERN)
+
 
+class AskBatchRequest(WorkspaceRequest):
+    questions: list[str] = Field(..., min_length=1, max_length=settings.RAG_BATCH_MAX_QUESTIONS)
+    k: int = 3
+    sources: list[str] | None = None
+    # fast | balanced | exhaustive; SEARCH_PROFILE when omitted
+    search_profile: str | None = Field(None, pattern=SEARCH_PROFILE_PATTERN)
 
-class SummarizeRequest(BaseModel):
+
+class ConversationAskRequest(WorkspaceRequest):
+    question: str
+    # omitted on the first turn: a new conversation is started
+    conversation_id: str | None = None
+    k: int = 3
+    # omitted on a follow-up: the conversation keeps its scope; [] searches every source.
+    # Changing sources mid-conversation clears its context window
+    sources: list[str] | None = None
+    # fast | balanced | exhaustive; SEARCH_PROFILE when omitted
+    search_profile: str | None = Field(None, pattern=SEARCH_PROFILE_PATTERN)
+
+
+class SummarizeRequest(WorkspaceRequest):
     focus: str | None = None
     k: int = 5
     sources: list[str] | None = None
+    # "top_k": summarize the k best chunks; "full": map-reduce over every chunk of `sources`
+    mode: str = Field("top_k", pattern="^(top_k|full)$")
+    # fast | balanced | exhaustive; SEARCH_PROFILE when omitted
+    search_profile: str | None = Field(None, pattern=SEARCH_PROFILE_PATTERN)
 
 
-class QuizRequest(BaseModel):
+class QuizRequest(WorkspaceRequest):
     focus: str | None = None
     k: int = 5
     num_questions: int = 5
     sources: list[str] | None = None
+    # "text": the quiz as free text; "structured": validated MCQs stored under a quiz_id,
+    # answered through /rag/quiz/{quiz_id}/answers
+    format: str = Field("text", pattern="^(text|structured)$")
+    # fast | balanced | exhaustive; SEARCH_PROFILE when omitted
+    search_profile: str | None = Field(None, pattern=SEARCH_PROFILE_PATTERN)
+
 
+class QuizAnswerRequest(BaseModel):
+    # question number -> chosen letter, e.g. {"1": "B", "2": "D"}
+    answers: dict[int, str]
+    # record the outcomes into this test session's stats and review schedule
+    session_id: str | None = None
 
-class TestQuestionRequest(BaseModel):
+
+class TestQuestionRequest(WorkspaceRequest):
     focus: str | None = None
     k: int = 5
+    sources: list[str] | None = None
+    # fast | balanced | exhaustive; SEARCH_PROFILE when omitted
+    search_profile: str | None = Field(None, pattern=SEARCH_PROFILE_PATTERN)
 
-class TestAnswerRequest(BaseModel):
+class TestAnswerRequest(WorkspaceRequest):
     question: str
     user_answer: str
     k: int = 5
+    sources: list[str] | None = None
+    # fast | balanced | exhaustive; SEARCH_PROFILE when omitted
+    search_profile: str | None = Field(None, pattern=SEARCH_PROFILE_PATTERN)
 
-class StartSessionRequest(BaseModel):
+class StartSessionRequest(WorkspaceRequest):
     focus: str | None = None
 
 class SessionQuestionRequest(BaseModel):
     session_id: str
     k: int = 5
     sources: list[str] | None = None
+    # fast | balanced | exhaustive; SEARCH_PROFILE_SESSION when omitted
+    search_profile: str | None = Field(None, pattern=SEARCH_PROFILE_PATTERN)
 
 
 class SessionAnswerRequest(BaseModel):
@@ -63,58 +124,148 @@ class SessionAnswerRequest(BaseModel):
     user_answer: str
     k: int = 5
     sources: list[str] | None = None
+    # fast | balanced | exhaustive; SEARCH_PROFILE_SESSION when omitted
+    search_profile: str | None = Field(None, pattern=SEARCH_PROFILE_PATTERN)
 
 
-class WebIngestRequest(BaseModel):
+class WebIngestRequest(WorkspaceRequest):
     url: str
 
-class YouTubeIngestRequest(BaseModel):
+class CrawlRequest(WorkspaceRequest):
+    # root page; a sitemap URL (.xml / .xml.gz) works here too
     url: str
+    sitemap_url: str | None = None
+    # defaults to the root URL's host (subdomains included)
+    allowed_domains: list[str] | None = None
+    path_prefixes: list[str] | None = None
+    exclude: list[str] | None = None   # regexes matched against the full URL
+    # capped at CRAWL_MAX_PAGES
+    max_pages: int | None = Field(None, ge=1)
+    max_depth: int = Field(3, ge=0)
+    follow_links: bool = True
+
+class YouTubeIngestRequest(WorkspaceRequest):
+    url: str
+
+class YouTubePlaylistIngestRequest(WorkspaceRequest):
+    # a playlist URL (.../playlist?list=... or a watch URL with list=), and/or single videos
+    url: str | None = None
+    urls: list[str] | None = None
+    # capped at YOUTUBE_MAX_VIDEOS
+    max_videos: int | None = Field(None, ge=1)
 
-class DeleteDocumentRequest(BaseModel):
+class DeleteDocumentRequest(WorkspaceRequest):
     source: str
 
-class ReindexRequest(BaseModel):
+class ReindexRequest(WorkspaceRequest):
     source: str
 
+class QuestionBankBuildRequest(WorkspaceRequest):
+    # None = rebuild the bank for every source
+    source: str | None = None
+
+class SnapshotExportRequest(WorkspaceRequest):
+    # bundle directory name under SNAPSHOT_DIR
+    name: str = Field(..., pattern=WORKSPACE_PATTERN)
+    quantization: str = "none"
 
+class SnapshotImportRequest(WorkspaceRequest):
+    name: str = Field(..., pattern=WORKSPACE_PATTERN)
+    recreate: bool = False
 
-app = FastAPI(title="AI Learning Copilot")
-# create one global store instance for now
-vector_store = QdrantStore()
+class CpuProfileRequest(BaseModel):
+    # stop after this many requests (needs the profiling middleware) ...
+    requests: int | None = Field(None, ge=1)
+    # ... or after this long; capped at PROFILE_MAX_SECONDS
+    seconds: float | None = Field(None, gt=0)
+    # "cpu": threads on CPU only; "wall": every busy thread, waits included
+    mode: str = Field("cpu", pattern="^(cpu|wall)$")
 
+class MemoryProfileRequest(BaseModel):
+    # traceback depth kept per allocation
+    frames: int = Field(10, ge=1, le=64)
 
-session_store = DBSessionStore()
 
 
-pdf_ingestor = PDFIngestor(vector_store)
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # tests may install their own Services before startup
+    if getattr(app.state, "services", None) is None:
+        app.state.services = Services()
+    services = app.state.services
+    services.start_warm_up()
+    yield
+    services.close()
+    app.state.services = None
 
-web_ingestor = WebIngestor(vector_store)
 
-youtube_ingestor = YouTubeIngestor(vector_store)
+app = FastAPI(title="AI Learning Copilot", lifespan=lifespan)
 
+if settings.PROFILING_ENABLED:
+    from app.profiling import ProfilingMiddleware
 
+    # counts requests for CPU profiles and samples requests sent with the debug header
+    app.add_middleware(ProfilingMiddleware)
 
-Base.metadata.create_all(bind=engine)
+
+@app.exception_handler(Overloaded)
+def overloaded(request, exc: Overloaded):
+    # queue full / shed -> 429, no slot before the deadline -> 503; either way, come back later
+    return JSONResponse(
+        status_code=exc.status_code,
+        content={"error": str(exc), "retry_after": exc.retry_after},
+        headers={"Retry-After": str(exc.retry_after)},
+    )
 
 
 @app.get("/health")
 def health_check():
+    # liveness: the process is up and serving; says nothing about dependencies
     return {
         "status": "ok",
         "has_google_api_key": bool(settings.GOOGLE_API_KEY)
     }
 
-@app.get("/llm/ping")
-def llm_ping():
-    llm = get_gemini_llm()
+@app.get("/health/ready")
+def readiness(response: Response, svc: Services = Depends(get_services)):
+    # readiness: DB initialised and the default collection opened by the warm-up
+    if not svc.ready:
+        response.status_code = 503
+    return {
+        "status": "ready" if svc.ready else "starting",
+        "startup": {"import_seconds": round(IMPORT_SECONDS, 3), **svc.startup_stats()},
+    }
+
+@app.get("/metrics")
+def metrics(svc: Services = Depends(get_services)):
+    return {
+        "startup": {"import_seconds": round(IMPORT_SECONDS, 3), **svc.startup_stats()},
+        "session_cache": svc.session_store.stats(),
+        "conversations": svc.conversations.stats(),
+        "admission": admission_stats(),
+        "prefetch": svc.question_prefetcher.stats(),
+        "review_prewarm": {"cached_questions": len(svc.review_questions)},
+        "workspaces": svc.workspaces.stats(),
+        "question_bank": {ws.id: ws.question_bank.stats() for ws in svc.workspaces.all()},
+        "dedup": {ws.id: ws.dedup_index.stats() for ws in svc.workspaces.all() if ws.dedup_index},
+        "materialized_queries": {ws.id: ws.default_retrieval.stats() for ws in svc.workspaces.all()},
+    }
+
+# probes the same admission path an interactive question takes
+@app.get("/llm/ping", dependencies=[admission_priority("interactive")])
+def llm_ping(svc: Services = Depends(get_services)):
+    llm = svc.llm()
     response = llm.invoke("Reply with exactly: 'Gemini is alive'")
     return {
         "response": response.content
     }
 
-@app.post("/vector/test-ingest")
-def test_ingest():
+@app.post("/vector/test-ingest", dependencies=[admission_priority("bulk")])
+def test_ingest(
+    workspace: str = Query(DEFAULT_WORKSPACE, pattern=WORKSPACE_PATTERN),
+    svc: Services = Depends(get_services),
+):
+    ws = svc.workspaces.get(workspace)
     texts = [
         "Kafka is a distributed event streaming platform used for high-performance data pipelines.",
         "Spring Boot is a Java framework used to build microservices quickly.",
@@ -127,21 +278,25 @@ def test_ingest():
         {"source": "sample", "topic": "fastapi"},
     ]
 
-    vector_store.add_texts(texts=texts, metadatas=metadatas)
+    ws.store.add_texts(texts=texts, metadatas=metadatas)
+    ws.topic_index.record("sample", {m["topic"]: 1 for m in metadatas})
 
-    count = vector_store.count()
+    count = ws.store.count()
 
     return {
         "status": "stored",
         "total_vectors": count
     }
 
-@app.post("/vector/test-search")
-def test_search(req: SearchRequest):
-    results = vector_store.search(query=req.query, k=3, sources=req.sources)
+@app.post("/vector/test-search", dependencies=[admission_priority("interactive")])
+def test_search(req: SearchRequest, svc: Services = Depends(get_services)):
+    ws = svc.workspaces.get(req.workspace)
+    profile = get_search_profile(req.search_profile)
+    results = ws.store.search(query=req.query, k=3, sources=req.sources, profile=profile)
 
     return {
         "query": req.query,
+        "search_profile": profile.name,
         "results": [
             {
                 "content": doc.page_content,
@@ -151,16 +306,19 @@ def test_search(req: SearchRequest):
         ]
     }
 
-@app.post("/rag/ask")
-def rag_ask(req: AskRequest):
+@app.post("/rag/ask", dependencies=[admission_priority("interactive")])
+def rag_ask(req: AskRequest, svc: Services = Depends(get_services)):
+    ws = svc.workspaces.get(req.workspace)
     # 1. Retrieve relevant docs
-    results = vector_store.search(query=req.question, k=3, sources=req.sources)
+    profile = get_search_profile(req.search_profile)
+    results = ws.store.search(query=req.question, k=3, sources=req.sources, profile=profile)
 
     if not results:
         return {
             "question": req.question,
             "answer": "I don't have any knowledge yet. Please ingest some documents first.",
-            "citations": []
+            "citations": [],
+            "search_profile": profile.name,
         }
 
     # 2. Extract text for context
@@ -170,54 +328,234 @@ def rag_ask(req: AskRequest):
     prompt = build_rag_prompt(context_chunks, req.question)
 
     # 4. Call Gemini
-    llm = get_gemini_llm()
+    llm = svc.llm()
     response = llm.invoke(prompt)
 
     # 5. Build structured citations
-    citations = []
-    for doc in results:
-        citations.append({
-            "chunk_id": doc.metadata.get("chunk_id"),
-            "source": doc.metadata.get("source"),
-            "page": doc.metadata.get("page"),
-        })
+    citations = [build_citation(doc) for doc in results]
 
     return {
         "question": req.question,
         "answer": response.content,
-        "citations": citations
+        "citations": citations,
+        "search_profile": profile.name,
+    }
+
+@app.post("/rag/ask/batch", dependencies=[admission_priority("bulk")])
+def rag_ask_batch(req: AskBatchRequest, svc: Services = Depends(get_services)):
+    """
+    Many questions over the same sources. Retrieval is shared (one embedding
+    call, one batched Qdrant query); answers stream back as NDJSON lines in
+    completion order, each tagged with the question's index.
+    """
+    import json
+    from concurrent.futures import ThreadPoolExecutor, as_completed
+
+    ws = svc.workspaces.get(req.workspace)
+    t0 = time.perf_counter()
+
+    # 1. Retrieve for all questions at once
+    profile = get_search_profile(req.search_profile)
+    batch_results = ws.store.search_batch(req.questions, k=req.k, sources=req.sources, profile=profile)
+    retrieved = sum(len(r) for r in batch_results)
+    unique = len({id(doc) for r in batch_results for doc in r})
+
+    def answer(i: int) -> dict:
+        question, results = req.questions[i], batch_results[i]
+        if not results:
+            return {
+                "index": i,
+                "question": question,
+                "answer": "I don't have any knowledge yet. Please ingest some documents first.",
+                "citations": [],
+            }
+        # 2. Build prompt and call Gemini
+        prompt = build_rag_prompt([doc.page_content for doc in results], question)
+        try:
+            # pool threads don't inherit the request's priority class
+            with priority_scope("bulk"):
+                response = svc.llm().invoke(prompt)
+        except Exception as e:
+            return {"index": i, "question": question, "error": str(e)}
+        return {
+            "index": i,
+            "question": question,
+            "answer": response.content,
+            "citations": [build_citation(doc) for doc in results],
+        }
+
+    def stream():
+        pool = ThreadPoolExecutor(
+            max_workers=min(settings.RAG_BATCH_CONCURRENCY, len(req.questions)),
+            thread_name_prefix="ask-batch",
+        )
+        try:
+            futures = [pool.submit(answer, i) for i in range(len(req.questions))]
+            for future in as_completed(futures):
+                yield json.dumps(future.result()) + "\n"
+        finally:
+            # client went away: don't start the questions still queued
+            pool.shutdown(wait=False, cancel_futures=True)
+        yield json.dumps({
+            "done": True,
+            "questions": len(req.questions),
+            "retrieved_chunks": retrieved,
+            "unique_chunks": unique,
+            "search_profile": profile.name,
+            "seconds": round(time.perf_counter() - t0, 3),
+        }) + "\n"
+
+    return StreamingResponse(stream(), media_type="application/x-ndjson")
+
+@app.post("/rag/conversation/ask", dependencies=[admission_priority("interactive")])
+def rag_conversation_ask(req: ConversationAskRequest, svc: Services = Depends(get_services)):
+    """
+    /rag/ask with memory. Follow-ups close to the chunks already retrieved in
+    the conversation are answered from them without a new search; a drifting
+    follow-up searches again and extends the conversation's context window.
+    """
+    from app.sessions.conversations import Turn
+
+    if req.conversation_id:
+        conversation = svc.conversations.get(req.conversation_id)
+        if conversation is None:
+            return {"error": "Invalid or expired conversation_id"}
+        if conversation.workspace != req.workspace:
+            return {"error": f"Conversation belongs to workspace '{conversation.workspace}'"}
+    else:
+        conversation = svc.conversations.create(req.workspace, req.sources)
+    ws = svc.workspaces.get(conversation.workspace)
+    profile = get_search_profile(req.search_profile)
+
+    # one turn at a time per conversation, so each sees the previous answer
+    with conversation.lock:
+        if req.sources is not None:
+            conversation.set_sources(req.sources)
+        results, retrieval, similarity = conversation.retrieve(ws.store, req.question, req.k, profile)
+
+        if not results:
+            return {
+                "conversation_id": conversation.id,
+                "question": req.question,
+                "answer": "I don't have any knowledge yet. Please ingest some documents first.",
+                "citations": [],
+                "retrieval": retrieval,
+                "search_profile": profile.name,
+            }
+
+        prompt = build_conversation_prompt(
+            [doc.page_content for doc in results],
+            conversation.history(settings.CONVERSATION_HISTORY_TURNS),
+            req.question,
+        )
+        response = svc.llm().invoke(prompt)
+
+        citations = [build_citation(doc) for doc in results]
+        svc.conversations.record(conversation, Turn(
+            req.question,
+            response.content,
+            [c["chunk_id"] for c in citations],
+            retrieval,
+            similarity,
+        ))
+        turn = conversation.turn_count
+
+    return {
+        "conversation_id": conversation.id,
+        "turn": turn,
+        "question": req.question,
+        "answer": response.content,
+        "citations": citations,
+        # "reuse": answered from the conversation's context window, no vector search
+        "retrieval": retrieval,
+        "window_similarity": similarity,
+        "search_profile": profile.name,
     }
 
-@app.post("/ingest/pdf")
-async def ingest_pdf(file: UploadFile = File(...)):
+@app.get("/rag/conversation/{conversation_id}")
+def get_conversation(conversation_id: str, svc: Services = Depends(get_services)):
+    conversation = svc.conversations.get(conversation_id)
+    if conversation is None:
+        return {"error": "Invalid or expired conversation_id"}
+    with conversation.lock:
+        return {
+            "conversation_id": conversation.id,
+            "workspace": conversation.workspace,
+            "sources": conversation.sources,
+            "turn_count": conversation.turn_count,
+            "turns": [t.to_dict() for t in conversation.turns],
+            "window_chunks": len(conversation.window),
+        }
+
+@app.delete("/rag/conversation/{conversation_id}")
+def delete_conversation(conversation_id: str, svc: Services = Depends(get_services)):
+    if not svc.conversations.delete(conversation_id):
+        return {"error": "Invalid or expired conversation_id"}
+    return {"status": "deleted", "conversation_id": conversation_id}
+
+@app.post("/ingest/pdf", dependencies=[admission_priority("bulk")])
+def ingest_pdf(
+    background_tasks: BackgroundTasks,
+    file: UploadFile = File(...),
+    workspace: str = Form(DEFAULT_WORKSPACE, pattern=WORKSPACE_PATTERN),
+    svc: Services = Depends(get_services),
+):
+    ws = svc.workspaces.get(workspace)
     if not file.filename.lower().endswith(".pdf"):
         return {"error": "Only PDF files are supported"}
 
-    file_bytes = await file.read()
+    # sync on purpose: opening the workspace, parsing, embedding and waiting for an
+    # admission slot all block, so the whole handler runs on a threadpool thread
+    file_bytes = file.file.read()
 
-    chunks_added = pdf_ingestor.ingest(file_bytes, file.filename)
+    result = ws.pdf_ingestor.ingest(file_bytes, file.filename)
+    _schedule_question_bank(background_tasks, ws, file.filename)
 
-    total_vectors = vector_store.count()
+    total_vectors = ws.store.count()
 
     return {
         "status": "success",
         "filename": file.filename,
-        "chunks_added": chunks_added,
+        "chunks_added": result["chunks"],
+        "chunk_stats": result["chunk_stats"],
+        "duplicates_skipped": result["duplicates_skipped"],
         "total_vectors": total_vectors,
     }
 
-@app.post("/rag/summarize")
-def rag_summarize(req: SummarizeRequest):
-    # 1. Retrieve relevant docs
-    # If focus is provided, use it as the retrieval query; otherwise use a generic query
-    query = req.focus if req.focus else "Summarize the main topics of the documents"
+def _default_search(ws, name: str, k: int, sources: list[str] | None, profile):
+    """
+    Retrieval for a request without a focus: served from the materialized default
+    query (no embedding call, no vector search) unless it can't be.
+    """
+    from app.vectorstore.materialized import DEFAULT_QUERIES
+
+    results = None
+    if settings.MATERIALIZED_QUERIES_ENABLED:
+        results = ws.default_retrieval.search(name, k, sources, profile)
+    if results is None:
+        results = ws.store.search(query=DEFAULT_QUERIES[name], k=k, sources=sources, profile=profile)
+    return results
+
+# summaries are bulk like quizzes; mode=full fans out one LLM call per window plus the reduce steps
+@app.post("/rag/summarize", dependencies=[admission_priority("bulk")])
+def rag_summarize(req: SummarizeRequest, svc: Services = Depends(get_services)):
+    ws = svc.workspaces.get(req.workspace)
+    if req.mode == "full":
+        return _summarize_sources(svc, ws, req)
 
-    results = vector_store.search(query=query, k=req.k, sources=req.sources)
+    # 1. Retrieve relevant docs
+    # If focus is provided, use it as the retrieval query; otherwise the materialized default query
+    profile = get_search_profile(req.search_profile)
+    if req.focus:
+        results = ws.store.search(query=req.focus, k=req.k, sources=req.sources, profile=profile)
+    else:
+        results = _default_search(ws, "summarize", req.k, req.sources, profile)
 
     if not results:
         return {
             "summary": "I don't have any knowledge yet. Please ingest some documents first.",
-            "citations": []
+            "citations": [],
+            "search_profile": profile.name,
         }
 
     # 2. Extract text for context
@@ -227,35 +565,72 @@ def rag_summarize(req: SummarizeRequest):
     prompt = build_summarize_prompt(context_chunks, req.focus)
 
     # 4. Call Gemini
-    llm = get_gemini_llm()
+    llm = svc.llm()
     response = llm.invoke(prompt)
 
     # 5. Build structured citations
-    citations = []
-    for doc in results:
-        citations.append({
-            "chunk_id": doc.metadata.get("chunk_id"),
-            "source": doc.metadata.get("source"),
-            "page": doc.metadata.get("page"),
-        })
+    citations = [build_citation(doc) for doc in results]
 
     return {
         "summary": response.content,
-        "citations": citations
+        "citations": citations,
+        "search_profile": profile.name,
+    }
+
+def _summarize_sources(svc: Services, ws, req: SummarizeRequest):
+    from app.rag.summary_tree import SourceSummarizer
+
+    if not req.sources:
+        return {"error": "mode=full needs the sources to summarize"}
+    docs_by_source = [ws.store.get_chunks(source) for source in req.sources]
+    if not any(docs_by_source):
+        return {
+            "summary": "I don't have any knowledge yet. Please ingest some documents first.",
+            "citations": []
+        }
+
+    try:
+        result = SourceSummarizer(svc.llm()).summarize([d for d in docs_by_source if d], req.focus)
+    except Overloaded:
+        raise
+    except Exception as e:
+        return {"error": str(e)}
+
+    return {
+        "summary": result["summary"],
+        "citations": [build_citation(doc) for docs in docs_by_source for doc in docs],
+        "stats": result["stats"],
     }
 
-@app.post("/rag/quiz")
-def rag_quiz(req: QuizRequest):
-    # 1. Choose retrieval query
-    query = req.focus if req.focus else "Generate a quiz from the main topics of the documents"
+@app.post("/rag/quiz", dependencies=[admission_priority("bulk")])
+def rag_quiz(req: QuizRequest, svc: Services = Depends(get_services)):
+    ws = svc.workspaces.get(req.workspace)
+    if req.format == "structured":
+        return _structured_quiz(svc, ws, req)
+    # 0. Serve from the question bank when it has enough questions
+    if settings.QUESTION_BANK_ENABLED:
+        banked = ws.question_bank.draw(
+            kind="mcq", topic=req.focus, sources=req.sources, limit=req.num_questions
+        )
+        if len(banked) == req.num_questions:
+            return {
+                "quiz": "\n\n".join(renumber_mcq(q["question"], i + 1) for i, q in enumerate(banked)),
+                "citations": [c for q in banked for c in q["citations"]],
+                "from_bank": True,
+            }
 
-    # 2. Retrieve relevant chunks
-    results = vector_store.search(query=query, k=req.k, sources=req.sources)
+    # 1-2. Retrieve relevant chunks (focus-less requests use the materialized default query)
+    profile = get_search_profile(req.search_profile)
+    if req.focus:
+        results = ws.store.search(query=req.focus, k=req.k, sources=req.sources, profile=profile)
+    else:
+        results = _default_search(ws, "quiz", req.k, req.sources, profile)
 
     if not results:
         return {
             "quiz": "I don't have any knowledge yet. Please ingest some documents first.",
-            "citations": []
+            "citations": [],
+            "search_profile": profile.name,
         }
 
     # 3. Build context
@@ -265,107 +640,265 @@ def rag_quiz(req: QuizRequest):
     prompt = build_quiz_prompt(context_chunks, req.focus, req.num_questions)
 
     # 5. Call Gemini
-    llm = get_gemini_llm()
+    llm = svc.llm()
     response = llm.invoke(prompt)
 
     # 6. Build structured citations
-    citations = []
-    for doc in results:
-        citations.append({
-            "chunk_id": doc.metadata.get("chunk_id"),
-            "source": doc.metadata.get("source"),
-            "page": doc.metadata.get("page"),
-        })
+    citations = [build_citation(doc) for doc in results]
 
     return {
         "quiz": response.content,
-        "citations": citations
+        "citations": citations,
+        "search_profile": profile.name,
+    }
+
+
+def _structured_quiz(svc: Services, ws, req: QuizRequest):
+    """
+    Validated MCQs stored under a quiz_id. The answer key stays server-side:
+    the response carries questions and options only.
+    """
+    from app.rag.quizzes import parse_mcq_text, parse_quiz
+
+    # 0. Banked MCQs when every one of them parses
+    if settings.QUESTION_BANK_ENABLED:
+        banked = ws.question_bank.draw(
+            kind="mcq", topic=req.focus, sources=req.sources, limit=req.num_questions
+        )
+        parsed = [parse_mcq_text(q["question"]) for q in banked]
+        if len(banked) == req.num_questions and all(parsed):
+            for q, item in zip(parsed, banked):
+                q.chunk_ids = item["chunk_ids"]
+                q.topic = item["topic"]
+            quiz = svc.quizzes.save(ws.id, req.focus, parsed)
+            return {
+                "quiz_id": quiz.id,
+                "questions": quiz.public(),
+                "citations": [c for item in banked for c in item["citations"]],
+                "from_bank": True,
+            }
+
+    # 1. Retrieve (focus-less requests use the materialized default query)
+    profile = get_search_profile(req.search_profile)
+    if req.focus:
+        results = ws.store.search(query=req.focus, k=req.k, sources=req.sources, profile=profile)
+    else:
+        results = _default_search(ws, "quiz", req.k, req.sources, profile)
+
+    if not results:
+        return {
+            "error": "I don't have any knowledge yet. Please ingest some documents first.",
+            "search_profile": profile.name,
+        }
+
+    # 2. Generate and validate
+    chunk_ids = [doc.metadata.get("chunk_id") for doc in results]
+    prompt = build_structured_quiz_prompt(
+        [(cid, doc.page_content) for cid, doc in zip(chunk_ids, results)], req.focus, req.num_questions
+    )
+    response = svc.llm().invoke(prompt)
+    questions, dropped = parse_quiz(response.content, chunk_ids)
+    if not questions:
+        return {"error": "The model did not return a valid quiz", "search_profile": profile.name}
+
+    # 3. Label each question with the topic of the first chunk it cites
+    topics = {doc.metadata.get("chunk_id"): doc.metadata.get("topic") for doc in results}
+    for q in questions[:req.num_questions]:
+        q.topic = req.focus or topics.get(q.chunk_ids[0]) or "general"
+    quiz = svc.quizzes.save(ws.id, req.focus, questions[:req.num_questions])
+
+    return {
+        "quiz_id": quiz.id,
+        "questions": quiz.public(),
+        "citations": [build_citation(doc) for doc in results],
+        "invalid_dropped": dropped,
+        "search_profile": profile.name,
     }
 
+@app.get("/rag/quiz/{quiz_id}")
+def get_quiz(quiz_id: str, svc: Services = Depends(get_services)):
+    quiz = svc.quizzes.get(quiz_id)
+    if quiz is None:
+        return {"error": "Invalid quiz_id"}
+    return {"quiz_id": quiz.id, "workspace": quiz.workspace, "focus": quiz.focus, "questions": quiz.public()}
+
+@app.post("/rag/quiz/{quiz_id}/answers")
+def submit_quiz_answers(quiz_id: str, req: QuizAnswerRequest, svc: Services = Depends(get_services)):
+    """
+    Grade MCQ answers against the stored key: no LLM call. With a session_id,
+    each outcome goes straight into the session stats and review schedule;
+    a quiz is recorded into a session once. Without one, grading has no side
+    effects and can be repeated.
+    """
+    from app.rag.quizzes import option_letter
+    from app.sessions.grading import Outcome
+
+    quiz = svc.quizzes.get(quiz_id)
+    if quiz is None:
+        return {"error": "Invalid quiz_id"}
+    unknown = [n for n in req.answers if not 1 <= n <= len(quiz.questions)]
+    if unknown:
+        return {"error": f"No question number(s) {unknown} in this quiz"}
+    if req.session_id:
+        session = svc.session_store.get(req.session_id)
+        if not session:
+            return {"error": "Invalid session_id"}
+        if session.workspace != quiz.workspace:
+            return {"error": f"Quiz belongs to workspace '{quiz.workspace}', session to '{session.workspace}'"}
+        if not svc.quizzes.claim_submission(quiz.id, req.session_id):
+            return {"error": "This quiz was already submitted for this session"}
+
+    results = []
+    for number, answer in sorted(req.answers.items()):
+        q = quiz.questions[number - 1]
+        outcome = q.grade(answer)
+        letter = option_letter(answer)
+        results.append({
+            "number": number,
+            "answer": letter,
+            "correct": q.correct,
+            "outcome": outcome,
+            "chunk_ids": q.chunk_ids,
+        })
+        if req.session_id:
+            topic = q.topic or "general"
+            grade = f"{outcome.value}: answered {letter or "no option"}, correct option {q.correct}"
+            svc.session_store.record_attempt(req.session_id, q.question, answer, grade, topic, outcome=outcome)
+            svc.session_store.update_review_schedule(req.session_id, topic, grade, outcome=outcome)
+
+    return {
+        "quiz_id": quiz.id,
+        "score": sum(1 for r in results if r["outcome"] == Outcome.CORRECT),
+        "answered": len(results),
+        "total": len(quiz.questions),
+        "results": results,
+        "session_summary": svc.session_store.summary(req.session_id) if req.session_id else None,
+    }
 
-@app.post("/rag/test-me/question")
-def test_me_question(req: TestQuestionRequest):
-    query = req.focus if req.focus else "Generate a challenging question from the documents"
+@app.post("/rag/test-me/question", dependencies=[admission_priority("interactive")])
+def test_me_question(req: TestQuestionRequest, svc: Services = Depends(get_services)):
+    ws = svc.workspaces.get(req.workspace)
+    if settings.QUESTION_BANK_ENABLED:
+        banked = ws.question_bank.draw(topic=req.focus, difficulty="medium", sources=req.sources)
+        if banked:
+            return {
+                "question": banked[0]["question"],
+                "citations": banked[0]["citations"],
+                "from_bank": True,
+            }
 
-    results = vector_store.search(query=query, k=req.k, sources=req.sources)
+    profile = get_search_profile(req.search_profile)
+    if req.focus:
+        results = ws.store.search(query=req.focus, k=req.k, sources=req.sources, profile=profile)
+    else:
+        results = _default_search(ws, "question", req.k, req.sources, profile)
 
     if not results:
         return {
             "question": "I don't have any knowledge yet. Please ingest some documents first.",
-            "citations": []
+            "citations": [],
+            "search_profile": profile.name,
         }
 
     context_chunks = [doc.page_content for doc in results]
 
-    prompt = build_test_question_prompt(context_chunks, req.focus)
+    prompt = build_test_question_prompt(context_chunks, req.focus, "medium")
 
-    llm = get_gemini_llm()
+    llm = svc.llm()
     response = llm.invoke(prompt)
 
-    citations = [
-        {
-            "chunk_id": doc.metadata.get("chunk_id"),
-            "source": doc.metadata.get("source"),
-            "page": doc.metadata.get("page"),
-        }
-        for doc in results
-    ]
+    citations = [build_citation(doc) for doc in results]
 
     return {
         "question": response.content.strip(),
-        "citations": citations
+        "citations": citations,
+        "search_profile": profile.name,
     }
 
-@app.post("/rag/test-me/answer")
-def test_me_answer(req: TestAnswerRequest):
+@app.post("/rag/test-me/answer", dependencies=[admission_priority("interactive")])
+def test_me_answer(req: TestAnswerRequest, svc: Services = Depends(get_services)):
+    ws = svc.workspaces.get(req.workspace)
     # Retrieve context again (simple stateless approach)
-    results = vector_store.search(query=req.question, k=req.k, sources=req.sources)
+    profile = get_search_profile(req.search_profile)
+    results = ws.store.search(query=req.question, k=req.k, sources=req.sources, profile=profile)
 
     if not results:
         return {
             "grade": "Unknown",
             "feedback": "No relevant context found to grade this answer.",
-            "citations": []
+            "citations": [],
+            "search_profile": profile.name,
         }
 
     context_chunks = [doc.page_content for doc in results]
 
     prompt = build_test_grader_prompt(context_chunks, req.question, req.user_answer)
 
-    llm = get_gemini_llm()
+    llm = svc.llm()
     response = llm.invoke(prompt)
 
-    citations = [
-        {
-            "chunk_id": doc.metadata.get("chunk_id"),
-            "source": doc.metadata.get("source"),
-            "page": doc.metadata.get("page"),
-        }
-        for doc in results
-    ]
+    citations = [build_citation(doc) for doc in results]
 
     return {
         "grade_and_feedback": response.content.strip(),
-        "citations": citations
+        "citations": citations,
+        "search_profile": profile.name,
     }
 
 @app.post("/rag/test-me/session/start")
-def start_test_session(req: StartSessionRequest):
-    s = session_store.create(req.focus)
-    return {"session_id": s.id, "focus": s.focus}
+def start_test_session(req: StartSessionRequest, svc: Services = Depends(get_services)):
+    s = svc.session_store.create(req.focus, req.workspace)
+    return {"session_id": s.id, "workspace": s.workspace, "focus": s.focus}
+
+
+def _banked_session_question(svc: Services, s, sources: list[str] | None):
+    ws = svc.workspaces.get(s.workspace)
+    asked = svc.session_store.asked_questions(s.id)
+
+    if s.focus:
+        difficulty = svc.session_store.topic_difficulty(s.id, s.focus)
+        banked = ws.question_bank.draw(topic=s.focus, difficulty=difficulty, sources=sources, exclude=asked)
+    else:
+        # any topic, at the difficulty this learner has reached on that topic
+        banked = [
+            q for q in ws.question_bank.draw(sources=sources, exclude=asked, limit=20)
+            if q["difficulty"] == svc.session_store.topic_difficulty(s.id, q["topic"])
+        ]
 
+    if not banked:
+        return None
+
+    q = banked[0]
+    return {
+        "question": q["question"],
+        "difficulty": q["difficulty"],
+        "citations": q["citations"],
+        "from_bank": True,
+    }
+
+
+def _session_profile(name: str | None):
+    return get_search_profile(name or settings.SEARCH_PROFILE_SESSION)
 
-@app.post("/rag/test-me/session/question")
-def session_question(req: SessionQuestionRequest):
-    s = session_store.get(req.session_id)
-    if not s:
-        return {"error": "Invalid session_id"}
 
-    query = s.focus if s.focus else "Generate a challenging question from the documents"
-    results = vector_store.search(query=query, k=req.k, sources=req.sources)
+def _session_question(svc: Services, s, k: int, sources: list[str] | None, profile):
+    ws = svc.workspaces.get(s.workspace)
+    if settings.QUESTION_BANK_ENABLED:
+        q = _banked_session_question(svc, s, sources)
+        if q:
+            return q
+
+    if s.focus:
+        # Narrow to the focus topic's chunks when the focus maps to a known topic
+        indexed_topic = ws.topic_index.resolve(s.focus)
+        results = ws.store.search(query=s.focus, k=k, sources=sources, topic=indexed_topic, profile=profile)
+        if not results and indexed_topic:
+            results = ws.store.search(query=s.focus, k=k, sources=sources, profile=profile)
+    else:
+        results = _default_search(ws, "question", k, sources, profile)
 
     if not results:
-        return {"question": "No knowledge yet.", "citations": []}
+        return None
 
     context_chunks = [doc.page_content for doc in results]
     # Determine topic
@@ -373,59 +906,107 @@ def session_question(req: SessionQuestionRequest):
 
 
     # Compute adaptive difficulty from past performance
-    difficulty = session_store.topic_difficulty(s.id, topic)
+    difficulty = svc.session_store.topic_difficulty(s.id, topic)
 
     prompt = build_test_question_prompt(context_chunks, s.focus, difficulty)
 
-    llm = get_gemini_llm()
+    llm = svc.llm()
     response = llm.invoke(prompt)
 
-    citations = [{"chunk_id": d.metadata.get("chunk_id"), "source": d.metadata.get("source"), "page": d.metadata.get("page")} for d in results]
+    citations = [build_citation(d) for d in results]
 
     return {
         "question": response.content.strip(),
         "difficulty": difficulty,
         "citations": citations,
-        "session_summary": session_store.summary(req.session_id),
+        "search_profile": profile.name,
     }
 
 
-@app.post("/rag/test-me/session/answer")
-def session_answer(req: SessionAnswerRequest):
-    s = session_store.get(req.session_id)
+def _prefetch_key(s, k: int, sources: list[str] | None, profile):
+    # a prefetched question is only valid for the same focus/sources/k/search profile
+    return (s.focus, tuple(sorted(sources)) if sources else None, k, profile.name)
+
+
+def _prefetch_session_question(svc: Services, s, k: int, sources: list[str] | None, profile):
+    # speculative: yields to anything a learner is actually waiting on
+    with priority_scope("bulk"):
+        return _session_question(svc, s, k, sources, profile)
+
+
+@app.post("/rag/test-me/session/question", dependencies=[admission_priority("interactive")])
+def session_question(req: SessionQuestionRequest, svc: Services = Depends(get_services)):
+    s = svc.session_store.get(req.session_id)
     if not s:
         return {"error": "Invalid session_id"}
 
-    results = vector_store.search(query=req.question, k=req.k, sources=req.sources)
+    profile = _session_profile(req.search_profile)
+    q = svc.question_prefetcher.take(s.id, _prefetch_key(s, req.k, req.sources, profile))
+    prefetched = q is not None
+    if q is None:
+        q = _session_question(svc, s, req.k, req.sources, profile)
+
+    if q is None:
+        return {"question": "No knowledge yet.", "citations": [], "search_profile": profile.name}
+
+    return {
+        **q,
+        "prefetched": prefetched,
+        "session_summary": svc.session_store.summary(req.session_id),
+    }
+
+
+@app.post("/rag/test-me/session/answer", dependencies=[admission_priority("interactive")])
+def session_answer(req: SessionAnswerRequest, svc: Services = Depends(get_services)):
+    s = svc.session_store.get(req.session_id)
+    if not s:
+        return {"error": "Invalid session_id"}
+    ws = svc.workspaces.get(s.workspace)
+
+    profile = _session_profile(req.search_profile)
+    results = ws.store.search(query=req.question, k=req.k, sources=req.sources, profile=profile)
     if not results:
-        return {"grade_and_feedback": "No context.", "citations": [], "session_summary": session_store.summary(req.session_id)}
+        return {
+            "grade_and_feedback": "No context.",
+            "citations": [],
+            "search_profile": profile.name,
+            "session_summary": svc.session_store.summary(req.session_id),
+        }
 
     context_chunks = [doc.page_content for doc in results]
     prompt = build_test_grader_prompt(context_chunks, req.question, req.user_answer)
 
-    llm = get_gemini_llm()
+    llm = svc.llm()
     response = llm.invoke(prompt)
     grade_text = response.content.strip()
 
     topic = s.focus or results[0].metadata.get("topic") or "general"
 
-    session_store.record_attempt(req.session_id, req.question, req.user_answer, grade_text, topic)
+    svc.session_store.record_attempt(req.session_id, req.question, req.user_answer, grade_text, topic)
 
     # Update spaced repetition schedule
-    session_store.update_review_schedule(req.session_id, topic, grade_text)
+    svc.session_store.update_review_schedule(req.session_id, topic, grade_text)
+
+    citations = [build_citation(d) for d in results]
 
-    citations = [{"chunk_id": d.metadata.get("chunk_id"), "source": d.metadata.get("source"), "page": d.metadata.get("page")} for d in results]
+    # The client asks for the next question right after this; start generating it
+    # now, with the difficulty that reflects the attempt just recorded.
+    if settings.PREFETCH_ENABLED:
+        svc.question_prefetcher.schedule(
+            s.id, _prefetch_key(s, req.k, req.sources, profile), _prefetch_session_question, svc, s, req.k, req.sources, profile
+        )
 
     return {
         "grade_and_feedback": grade_text,
         "citations": citations,
-        "session_summary": session_store.summary(req.session_id),
+        "search_profile": profile.name,
+        "session_summary": svc.session_store.summary(req.session_id),
     }
 
 
 @app.get("/rag/test-me/session/{session_id}/weak-areas")
-def session_weak_areas(session_id: str):
-    ranked = session_store.weak_areas(session_id)
+def session_weak_areas(session_id: str, svc: Services = Depends(get_services)):
+    ranked = svc.session_store.weak_areas(session_id)
     if ranked is None:
         return {"error": "Invalid session_id"}
 
@@ -442,56 +1023,264 @@ def session_weak_areas(session_id: str):
     ]
 
     return {
-        "session_summary": session_store.summary(session_id),
+        "session_summary": svc.session_store.summary(session_id),
         "ranked_weak_areas": ranked,
         "recommendations": recommendations,
     }
 
-@app.post("/ingest/web")
-def ingest_web(req: WebIngestRequest):
+def _schedule_question_bank(background_tasks: BackgroundTasks, ws, source: str):
+    if settings.QUESTION_BANK_ENABLED and settings.QUESTION_BANK_AUTO_BUILD:
+        background_tasks.add_task(ws.question_bank.build_for_source, source)
+
+
+@app.post("/question-bank/build", dependencies=[admission_priority("bulk")])
+def build_question_bank(req: QuestionBankBuildRequest, svc: Services = Depends(get_services)):
+    ws = svc.workspaces.get(req.workspace)
+    if req.source:
+        return {"status": "built", "questions": {req.source: ws.question_bank.build_for_source(req.source)}}
+    return {"status": "built", "questions": ws.question_bank.build_all()}
+
+
+@app.post("/ingest/web", dependencies=[admission_priority("bulk")])
+def ingest_web(
+    req: WebIngestRequest,
+    background_tasks: BackgroundTasks,
+    svc: Services = Depends(get_services),
+):
+    ws = svc.workspaces.get(req.workspace)
     url = req.url.strip()
     if not (url.startswith("http://") or url.startswith("https://")):
         return {"error": "Invalid URL. Must start with http:// or https://"}
 
-    chunks_added = web_ingestor.ingest(url)
+    result = ws.web_ingestor.ingest(url)
+    _schedule_question_bank(background_tasks, ws, url)
 
-    total_vectors = vector_store.count()
+    total_vectors = ws.store.count()
 
     return {
         "status": "success",
         "url": url,
-        "chunks_added": chunks_added,
+        "chunks_added": result["chunks"],
+        "chunk_stats": result["chunk_stats"],
+        "duplicates_skipped": result["duplicates_skipped"],
         "total_vectors": total_vectors,
     }
 
-@app.post("/ingest/youtube")
-def ingest_youtube(req: YouTubeIngestRequest):
+def _run_crawl_job(svc: Services, ws, job, crawler):
+    import asyncio
+    from app.ingestion.crawler import run_crawl
+
+    existing = set(ws.store.list_sources())
+    ingested = []
+
+    def ingest_batch(pages):
+        fresh, changed = [], set()
+        for page in pages:
+            known = ws.web_catalog.get(page.url)
+            if known and known["content_hash"] == page.content_hash:
+                ws.web_catalog.touch(page.url)
+                job.add(pages_unchanged=1)
+                continue
+            if known or page.url in existing:
+                changed.add(page.url)
+            fresh.append(page)
+        if not fresh:
+            return
+
+        def replace(url):
+            # runs once the batch is embedded: a failed batch keeps the old chunks
+            if url in changed:
+                ws.store.delete_by_source(url)
+                _forget_source(svc, ws, url)
+
+        for page, result in zip(fresh, ws.web_ingestor.ingest_pages(fresh, replace=replace)):
+            job.add(
+                pages_ingested=1,
+                chunks_added=result["chunks"],
+                duplicates_skipped=sum(result["duplicates_skipped"].values()),
+            )
+            ingested.append(page.url)
+
+    try:
+        asyncio.run(run_crawl(crawler, job, ingest_batch, settings.CRAWL_BATCH_PAGES))
+    except Exception as e:
+        print(f"[Crawl] {job.url} failed: {e}")
+        job.finish(error=str(e))
+        return
+    print(f"[Crawl] {job.url}: {job.counts['pages_ingested']} pages ingested, "
+          f"{job.counts['pages_unchanged']} unchanged")
+    job.finish()
+
+    if settings.QUESTION_BANK_ENABLED and settings.QUESTION_BANK_AUTO_BUILD:
+        for url in ingested:
+            ws.question_bank.build_for_source(url)
+
+
+@app.post("/ingest/crawl", dependencies=[admission_priority("bulk")])
+def ingest_crawl(
+    req: CrawlRequest,
+    background_tasks: BackgroundTasks,
+    svc: Services = Depends(get_services),
+):
+    from urllib.parse import urlsplit
+    from app.ingestion.crawler import CrawlScope, SiteCrawler
+
+    ws = svc.workspaces.get(req.workspace)
+    url = req.url.strip()
+    for u in (url, req.sitemap_url or url):
+        if not (u.startswith("http://") or u.startswith("https://")):
+            return {"error": "Invalid URL. Must start with http:// or https://"}
+
+    try:
+        scope = CrawlScope(
+            req.allowed_domains or [urlsplit(url).hostname],
+            path_prefixes=req.path_prefixes,
+            exclude=req.exclude,
+        )
+    except re.error as e:
+        return {"error": f"Invalid exclude pattern: {e}"}
+
+    crawler = SiteCrawler(
+        url,
+        sitemap_url=req.sitemap_url,
+        scope=scope,
+        max_pages=min(req.max_pages or settings.CRAWL_MAX_PAGES, settings.CRAWL_MAX_PAGES),
+        max_depth=req.max_depth,
+        follow_links=req.follow_links,
+    )
+    job = svc.crawl_jobs.create(url, ws.id)
+    # runs after the response is sent; poll /ingest/crawl/{job_id} for progress
+    background_tasks.add_task(_run_crawl_job, svc, ws, job, crawler)
+
+    return {"status": "started", "job_id": job.id, "url": url}
+
+@app.get("/ingest/crawl/{job_id}")
+def crawl_progress(job_id: str, svc: Services = Depends(get_services)):
+    job = svc.crawl_jobs.get(job_id)
+    if job is None:
+        return {"error": "Crawl job not found"}
+    return job.snapshot()
+
+@app.post("/ingest/youtube", dependencies=[admission_priority("bulk")])
+def ingest_youtube(
+    req: YouTubeIngestRequest,
+    background_tasks: BackgroundTasks,
+    svc: Services = Depends(get_services),
+):
+    ws = svc.workspaces.get(req.workspace)
     url = req.url.strip()
     if not (url.startswith("http://") or url.startswith("https://")):
         return {"error": "Invalid URL. Must start with http:// or https://"}
 
-    chunks_added = youtube_ingestor.ingest(url)
+    result = ws.youtube_ingestor.ingest(url)
+    _schedule_question_bank(background_tasks, ws, result["source"])
 
-    total_vectors = vector_store.count()
+    total_vectors = ws.store.count()
 
     return {
         "status": "success",
-        "url": url,
-        "chunks_added": chunks_added,
+        "url": result["source"],
+        "chunks_added": result["chunks"],
+        "chunk_stats": result["chunk_stats"],
+        "duplicates_skipped": result["duplicates_skipped"],
         "total_vectors": total_vectors,
     }
+@app.post("/ingest/youtube/playlist", dependencies=[admission_priority("bulk")])
+def ingest_youtube_playlist(
+    req: YouTubePlaylistIngestRequest,
+    background_tasks: BackgroundTasks,
+    svc: Services = Depends(get_services),
+):
+    from app.ingestion.youtube_client import canonical_video_url, playlist_id, watch_url
+
+    ws = svc.workspaces.get(req.workspace)
+    ingestor = ws.youtube_ingestor
+
+    urls = []
+    if req.url:
+        if not playlist_id(req.url):
+            return {"error": "Not a playlist URL (no list= parameter)"}
+        try:
+            urls.extend(watch_url(v) for v in ingestor.client.playlist_video_ids(req.url.strip()))
+        except Exception as e:
+            return {"error": f"Could not list playlist: {e}"}
+    for url in req.urls or []:
+        url = url.strip()
+        if not (url.startswith("http://") or url.startswith("https://")):
+            return {"error": f"Invalid URL: {url}. Must start with http:// or https://"}
+        urls.append(url)
+
+    # one entry per video, in playlist order, under the URL it is stored as
+    unique = list(dict.fromkeys(canonical_video_url(url) for url in urls))
+    limit = min(req.max_videos or settings.YOUTUBE_MAX_VIDEOS, settings.YOUTUBE_MAX_VIDEOS)
+    urls = unique[:limit]
+    if not urls:
+        return {"error": "No videos to ingest"}
+
+    fetched = ingestor.fetch_transcripts(urls)
+
+    # videos ingested before are replaced, but only once the new batch is embedded
+    existing = set(ws.store.list_sources())
+
+    def replace(source):
+        if source in existing:
+            ws.store.delete_by_source(source)
+            _forget_source(svc, ws, source)
+
+    result = ingestor.ingest_transcripts(fetched, replace=replace)
+    for video in result["videos"]:
+        _schedule_question_bank(background_tasks, ws, video["source"])
+
+    return {
+        "status": "success",
+        "videos": result["videos"],
+        "failed": result["failed"],
+        "chunks_added": result["chunks"],
+        "total_vectors": ws.store.count(),
+    }
+
 @app.get("/documents")
-def list_documents():
-    sources = vector_store.list_sources()
+def list_documents(
+    workspace: str = Query(DEFAULT_WORKSPACE, pattern=WORKSPACE_PATTERN),
+    svc: Services = Depends(get_services),
+):
+    ws = svc.workspaces.get(workspace)
+    sources = ws.store.list_sources()
     return {
         "count": len(sources),
         "sources": sources
     }
 
+@app.get("/topics")
+def list_topics(
+    workspace: str = Query(DEFAULT_WORKSPACE, pattern=WORKSPACE_PATTERN),
+    svc: Services = Depends(get_services),
+):
+    ws = svc.workspaces.get(workspace)
+    topics = ws.topic_index.topics()
+    return {
+        "count": len(topics),
+        "topics": [
+            {"topic": t, "sources": sorted(srcs), "chunks": sum(srcs.values())}
+            for t, srcs in sorted(topics.items())
+        ],
+    }
+
+def _forget_source(svc: Services, ws, source: str):
+    # prefetched and banked questions may cite chunks that no longer exist
+    svc.question_prefetcher.invalidate()
+    ws.question_bank.invalidate_source(source)
+    ws.topic_index.remove_source(source)
+    if ws.dedup_index is not None:
+        ws.dedup_index.remove_source(source)
+    ws.web_catalog.remove(source)
+
 @app.delete("/documents")
-def delete_document(req: DeleteDocumentRequest):
-    deleted = vector_store.delete_by_source(req.source)
-    total_vectors = vector_store.count()
+def delete_document(req: DeleteDocumentRequest, svc: Services = Depends(get_services)):
+    ws = svc.workspaces.get(req.workspace)
+    deleted = ws.store.delete_by_source(req.source)
+    _forget_source(svc, ws, req.source)
+    total_vectors = ws.store.count()
 
     return {
         "status": "deleted",
@@ -499,88 +1288,122 @@ def delete_document(req: DeleteDocumentRequest):
         "total_vectors": total_vectors
     }
 
-@app.post("/documents/reindex")
-def reindex_document(req: ReindexRequest):
+@app.post("/documents/reindex", dependencies=[admission_priority("bulk")])
+def reindex_document(
+    req: ReindexRequest,
+    background_tasks: BackgroundTasks,
+    svc: Services = Depends(get_services),
+):
+    ws = svc.workspaces.get(req.workspace)
     source = req.source
 
-    # 1. Delete existing
-    vector_store.delete_by_source(source)
+    is_url = source.startswith("http://") or source.startswith("https://")
+    is_youtube = is_url and ("youtube.com" in source or "youtu.be" in source)
+
+    # Web pages: conditional GET first; an unchanged page costs no deletes and no embeddings
+    page = None
+    if is_url and not is_youtube:
+        try:
+            page = ws.web_ingestor.fetch(source, conditional=True)
+        except Exception as e:
+            return {"error": str(e)}
+        if page is None:
+            return {
+                "status": "not_modified",
+                "source": source,
+                "type": "web",
+                "chunks_added": 0,
+                "total_vectors": ws.store.count()
+            }
+
+    def replace(stored):
+        # called once the new chunks are embedded: a failed re-ingest keeps the old ones
+        for old in {source, stored}:
+            ws.store.delete_by_source(old)
+            _forget_source(svc, ws, old)
 
-    # 2. Re-ingest based on type
     if source.lower().endswith(".pdf"):
+        ws.store.delete_by_source(source)
+        _forget_source(svc, ws, source)
         return {
             "status": "deleted",
             "message": "Please re-upload the PDF via /ingest/pdf to reindex it.",
             "source": source
         }
 
-    if source.startswith("http://") or source.startswith("https://"):
-        # Heuristic: try YouTube first, else web
+    # Re-ingest based on type
+    if is_url:
         try:
-            if "youtube.com" in source or "youtu.be" in source:
-                chunks = youtube_ingestor.ingest(source)
+            if is_youtube:
+                result = ws.youtube_ingestor.ingest(source, replace=replace)
                 kind = "youtube"
             else:
-                chunks = web_ingestor.ingest(source)
+                result = ws.web_ingestor.ingest(source, page, replace=replace)
                 kind = "web"
+        except Overloaded:
+            raise
         except Exception as e:
             return {"error": str(e)}
 
+        _schedule_question_bank(background_tasks, ws, source)
+
         return {
             "status": "reindexed",
             "source": source,
             "type": kind,
-            "chunks_added": chunks,
-            "total_vectors": vector_store.count()
+            "chunks_added": result["chunks"],
+            "chunk_stats": result["chunk_stats"],
+            "duplicates_skipped": result["duplicates_skipped"],
+            "total_vectors": ws.store.count()
         }
 
     return {"error": "Unknown source type"}
 
-@app.get("/rag/review/due")
-def review_due(session_id: str, k: int = 5):
-    s = session_store.get(session_id)
-    if not s:
-        return {"error": "Invalid session_id"}
-
-    due_topics = session_store.due_topics(session_id)
-
-    if not due_topics:
-        return {
-            "message": "Nothing due for review right now 🎉",
-            "due_topics": []
-        }
-
-    # Pick the most urgent topic (first one)
-    topic = due_topics[0]
+def _review_question(svc: Services, session_id: str, topic: str, k: int):
+    s = svc.session_store.get(session_id)
+    ws = svc.workspaces.get(s.workspace if s else DEFAULT_WORKSPACE)
+
+    if settings.QUESTION_BANK_ENABLED:
+        difficulty = svc.session_store.topic_difficulty(session_id, topic)
+        banked = ws.question_bank.draw(
+            topic=topic, difficulty=difficulty, exclude=svc.session_store.asked_questions(session_id)
+        )
+        if banked:
+            return {
+                "topic": topic,
+                "difficulty": difficulty,
+                "question": banked[0]["question"],
+                "citations": banked[0]["citations"],
+                "from_bank": True,
+            }
 
-    # Retrieve context only from that topic
-    results = vector_store.search(
-        query=f"Review {topic}",
-        k=k,
-        sources=None,  # or keep as-is; later we can map topic->sources
-    )
+    # Retrieve context only from that topic's chunks (and the sources covering it)
+    indexed_topic = ws.topic_index.resolve(topic)
+    results = []
+    if indexed_topic:
+        results = ws.store.search(
+            query=f"Review {topic}",
+            k=k,
+            sources=ws.topic_index.sources_for(indexed_topic),
+            topic=indexed_topic,
+        )
+    if not results:
+        results = ws.store.search(query=f"Review {topic}", k=k, sources=None)
 
     if not results:
-        return {"error": f"No content found for topic '{topic}'"}
+        return None
 
     context_chunks = [doc.page_content for doc in results]
 
     # Use adaptive difficulty for this topic
-    difficulty = session_store.topic_difficulty(session_id, topic)
+    difficulty = svc.session_store.topic_difficulty(session_id, topic)
 
     prompt = build_test_question_prompt(context_chunks, topic, difficulty)
 
-    llm = get_gemini_llm()
+    llm = svc.llm()
     response = llm.invoke(prompt)
 
-    citations = [
-        {
-            "chunk_id": d.metadata.get("chunk_id"),
-            "source": d.metadata.get("source"),
-            "page": d.metadata.get("page"),
-        }
-        for d in results
-    ]
+    citations = [build_citation(d) for d in results]
 
     return {
         "topic": topic,
@@ -590,8 +1413,289 @@ def review_due(session_id: str, k: int = 5):
     }
 
 
+def _prewarm_review_questions(svc: Services, items: list[tuple[str, str]], k: int):
+    with priority_scope("bulk"):
+        _prewarm_review_items(svc, items, k)
 
 
+def _prewarm_review_items(svc: Services, items: list[tuple[str, str]], k: int):
+    for session_id, topic in items:
+        if (session_id, topic) in svc.review_questions:
+            continue
+        try:
+            q = _review_question(svc, session_id, topic, k)
+        except Exception as e:
+            print(f"[review] Pre-warm failed for {session_id}/{topic}: {e}")
+            continue
+        if q:
+            svc.review_questions.put((session_id, topic), q)
+
+
+@app.get("/rag/review/due", dependencies=[admission_priority("interactive")])
+def review_due(session_id: str, k: int = 5, svc: Services = Depends(get_services)):
+    s = svc.session_store.get(session_id)
+    if not s:
+        return {"error": "Invalid session_id"}
+
+    due_topics = svc.session_store.due_topics(session_id)
+
+    if not due_topics:
+        return {
+            "message": "Nothing due for review right now 🎉",
+            "due_topics": []
+        }
+
+    # due_topics is urgency-ordered: most overdue first, then lowest ease
+    topic = due_topics[0]
+
+    q = svc.review_questions.pop((session_id, topic))
+    if q is None:
+        q = _review_question(svc, session_id, topic, k)
+    if q is None:
+        return {"error": f"No content found for topic '{topic}'"}
+
+    return {**q, "due_topics": due_topics}
+
+
+@app.get("/rag/review/due/batch", dependencies=[admission_priority("bulk")])
+def review_due_batch(
+    background_tasks: BackgroundTasks,
+    within_minutes: int = 60,
+    limit: int = 1000,
+    prewarm: bool = False,
+    k: int = 5,
+    svc: Services = Depends(get_services),
+):
+    """
+    Everything due now or within the next `within_minutes`, for all sessions,
+    computed in one SQL pass. With prewarm=true, questions for those items are
+    generated in the background so /rag/review/due can serve them instantly.
+    """
+    now = datetime.utcnow()
+    due = svc.session_store.due_schedule(now + timedelta(minutes=within_minutes), limit)
+
+    sessions = []
+    to_prewarm = []
+    for session_id, items in due.items():
+        sessions.append({
+            "session_id": session_id,
+            "items": [
+                {
+                    **item,
+                    "overdue_seconds": max(0, int((now - item["next_review_at"]).total_seconds())),
+                }
+                for item in items
+            ],
+        })
+        # only the head of each queue is what /rag/review/due will ask for
+        to_prewarm.append((session_id, items[0]["topic"]))
+
+    if prewarm and to_prewarm:
+        background_tasks.add_task(_prewarm_review_questions, svc, to_prewarm, k)
 
+    return {
+        "window_minutes": within_minutes,
+        "session_count": len(sessions),
+        "item_count": sum(len(x["items"]) for x in sessions),
+        "prewarm_scheduled": len(to_prewarm) if prewarm else 0,
+        "sessions": sessions,
+    }
 
 
+def _admin_denied(token: str | None):
+    if not settings.ADMIN_TOKEN:
+        return {"error": "Admin endpoints are disabled (set ADMIN_TOKEN)"}
+    if not admin_token_valid(token):
+        return {"error": "Invalid admin token"}
+    return None
+
+@app.post("/admin/snapshot/export")
+def snapshot_export(
+    req: SnapshotExportRequest,
+    x_admin_token: str | None = Header(None),
+    svc: Services = Depends(get_services),
+):
+    denied = _admin_denied(x_admin_token)
+    if denied:
+        return denied
+    from app.vectorstore.snapshot import QUANTIZATIONS, export_collection
+
+    if req.quantization not in QUANTIZATIONS:
+        return {"error": f"quantization must be one of {list(QUANTIZATIONS)}"}
+
+    ws = svc.workspaces.get(req.workspace)
+    if settings.VECTOR_BACKEND != "qdrant":
+        return {"error": "Snapshots are only supported with VECTOR_BACKEND=qdrant"}
+    if not ws.store.exists:
+        return {"error": f"Workspace '{req.workspace}' has no documents yet"}
+
+    out_dir = os.path.join(settings.SNAPSHOT_DIR, req.name)
+    try:
+        manifest = export_collection(ws.store.client, ws.store.collection_name, out_dir, req.quantization)
+    except Exception as e:
+        return {"error": str(e)}
+    return {"status": "exported", "path": out_dir, "manifest": manifest}
+
+@app.post("/admin/snapshot/import")
+def snapshot_import(
+    req: SnapshotImportRequest,
+    x_admin_token: str | None = Header(None),
+    svc: Services = Depends(get_services),
+):
+    denied = _admin_denied(x_admin_token)
+    if denied:
+        return denied
+
+    from app.vectorstore.snapshot import import_collection
+
+    if settings.VECTOR_BACKEND != "qdrant":
+        return {"error": "Snapshots are only supported with VECTOR_BACKEND=qdrant"}
+    bundle_dir = os.path.join(settings.SNAPSHOT_DIR, req.name)
+    if not os.path.isdir(bundle_dir):
+        return {"error": f"No snapshot named '{req.name}'"}
+
+    ws = svc.workspaces.get(req.workspace)
+    try:
+        result = import_collection(ws.store.client, bundle_dir, ws.store.collection_name, recreate=req.recreate)
+    except Exception as e:
+        return {"error": str(e)}
+
+    ws.store.reload()
+    # chunks changed wholesale: drop anything derived from the old ones
+    old_sources = {src for srcs in ws.topic_index.topics().values() for src in srcs}
+    for source in old_sources:
+        _forget_source(svc, ws, source)
+    for source, counts in result.pop("topics_by_source").items():
+        ws.topic_index.record(source, counts)
+        if ws.dedup_index is not None:
+            ws.dedup_index.index_chunks(source, ws.store.get_chunks(source))
+
+    return {"status": "imported", "total_vectors": ws.store.count(), **result}
+
+
+def _profiling_denied(token: str | None):
+    if not settings.PROFILING_ENABLED:
+        return {"error": "Profiling is disabled (set PROFILING_ENABLED=true)"}
+    return _admin_denied(token)
+
+
+def _profile_output(sampler, info: dict, format: str, match: str | None, top: int):
+    if format == "collapsed":
+        return PlainTextResponse(sampler.collapsed(match))
+    return {**info, "top_functions": sampler.top_functions(top)}
+
+@app.post("/admin/profile/cpu")
+def profile_cpu_start(req: CpuProfileRequest, x_admin_token: str | None = Header(None)):
+    denied = _profiling_denied(x_admin_token)
+    if denied:
+        return denied
+    from app.profiling import get_profiler
+
+    if req.requests is None and req.seconds is None:
+        return {"error": "Give the number of requests or seconds to profile"}
+    try:
+        window = get_profiler().start_cpu(req.requests, req.seconds, req.mode)
+    except ValueError as e:
+        return {"error": str(e)}
+    return window.snapshot()
+
+@app.post("/admin/profile/cpu/stop")
+def profile_cpu_stop(x_admin_token: str | None = Header(None)):
+    denied = _profiling_denied(x_admin_token)
+    if denied:
+        return denied
+    from app.profiling import get_profiler
+
+    window = get_profiler().stop_cpu()
+    if window is None:
+        return {"error": "No CPU profile has been started"}
+    return window.snapshot()
+
+@app.get("/admin/profile/cpu/{profile_id}")
+def profile_cpu_result(
+    profile_id: str,
+    format: str = Query("json", pattern="^(json|collapsed)$"),
+    match: str | None = None,
+    top: int = Query(20, ge=1, le=200),
+    x_admin_token: str | None = Header(None),
+):
+    denied = _profiling_denied(x_admin_token)
+    if denied:
+        return denied
+    from app.profiling import get_profiler
+
+    window = get_profiler().cpu_profile(profile_id)
+    if window is None:
+        return {"error": "Unknown profile_id"}
+    return _profile_output(window.sampler, window.snapshot(), format, match, top)
+
+@app.get("/admin/profile/requests/{profile_id}")
+def profile_request_result(
+    profile_id: str,
+    format: str = Query("json", pattern="^(json|collapsed)$"),
+    match: str | None = None,
+    top: int = Query(20, ge=1, le=200),
+    x_admin_token: str | None = Header(None),
+):
+    denied = _profiling_denied(x_admin_token)
+    if denied:
+        return denied
+    from app.profiling import get_profiler
+
+    sampler = get_profiler().request_profile(profile_id)
+    if sampler is None:
+        return {"error": "Unknown profile_id"}
+    info = {
+        "profile_id": profile_id,
+        "seconds": round(sampler.seconds, 3),
+        "samples": sampler.samples,
+        "stacks": len(sampler.counts),
+    }
+    return _profile_output(sampler, info, format, match, top)
+
+@app.post("/admin/profile/memory/start")
+def profile_memory_start(req: MemoryProfileRequest, x_admin_token: str | None = Header(None)):
+    denied = _profiling_denied(x_admin_token)
+    if denied:
+        return denied
+    from app.profiling import get_profiler
+
+    try:
+        return get_profiler().start_memory(req.frames)
+    except ValueError as e:
+        return {"error": str(e)}
+
+@app.get("/admin/profile/memory")
+def profile_memory(
+    top: int = Query(20, ge=1, le=200),
+    group_by: str = Query("lineno", pattern="^(lineno|filename|traceback)$"),
+    x_admin_token: str | None = Header(None),
+):
+    denied = _profiling_denied(x_admin_token)
+    if denied:
+        return denied
+    from app.profiling import get_profiler
+
+    try:
+        return get_profiler().memory_report(top, group_by)
+    except ValueError as e:
+        return {"error": str(e)}
+
+@app.post("/admin/profile/memory/stop")
+def profile_memory_stop(
+    top: int = Query(20, ge=1, le=200),
+    group_by: str = Query("lineno", pattern="^(lineno|filename|traceback)$"),
+    x_admin_token: str | None = Header(None),
+):
+    denied = _profiling_denied(x_admin_token)
+    if denied:
+        return denied
+    from app.profiling import get_profiler
+
+    try:
+        return get_profiler().stop_memory(top, group_by)
+    except ValueError as e:
+        return {"error": str(e)}
+
+
+IMPORT_SECONDS = time.perf_counter() - _import_started
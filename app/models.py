@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Text, ForeignKey
+from sqlalchemy import BigInteger, Column, Integer, LargeBinary, String, Text, ForeignKey, Index, inspect, text
 from sqlalchemy.orm import relationship
 from app.db import Base
 from sqlalchemy import DateTime, Float
@@ -15,10 +15,16 @@ class ReviewScheduleModel(Base):
     ease_factor = Column(Float, default=2.5)
     next_review_at = Column(DateTime, default=datetime.utcnow)
 
+    __table_args__ = (
+        # due-topic lookups filter on session_id and range-scan next_review_at
+        Index("ix_review_schedules_session_next_review", "session_id", "next_review_at"),
+    )
+
 class TestSessionModel(Base):
     __tablename__ = "test_sessions"
 
     id = Column(String, primary_key=True, index=True)
+    workspace = Column(String, default="default", server_default="default", index=True)
     focus = Column(String, nullable=True)
     total = Column(Integer, default=0)
     correct = Column(Integer, default=0)
@@ -36,6 +42,166 @@ class AttemptModel(Base):
     question = Column(Text)
     user_answer = Column(Text)
     grade = Column(String)
+    # Outcome value; NULL for attempts recorded before it was stored (parse `grade`)
+    outcome = Column(String, nullable=True)
     topic = Column(String)
 
     session = relationship("TestSessionModel", back_populates="attempts")
+
+
+class QuizModel(Base):
+    __tablename__ = "quizzes"
+
+    id = Column(String, primary_key=True, index=True)
+    workspace = Column(String, default="default", server_default="default")
+    focus = Column(String, nullable=True)
+    created_at = Column(DateTime, default=datetime.utcnow)
+
+    questions = relationship("QuizQuestionModel", back_populates="quiz", order_by="QuizQuestionModel.number")
+
+
+class QuizQuestionModel(Base):
+    __tablename__ = "quiz_questions"
+
+    id = Column(Integer, primary_key=True, index=True)
+    quiz_id = Column(String, ForeignKey("quizzes.id"), index=True)
+    number = Column(Integer)   # 1-based position in the quiz
+    question = Column(Text)
+    options = Column(Text)     # JSON list of option texts, lettered A, B, C, ...
+    correct = Column(String)   # letter of the correct option
+    chunk_ids = Column(Text)   # JSON list of chunk_ids the question was generated from
+    topic = Column(String)
+
+    quiz = relationship("QuizModel", back_populates="questions")
+
+
+class QuizSubmissionModel(Base):
+    # one graded submission per (quiz, test session): resubmitting would count the answers twice
+    __tablename__ = "quiz_submissions"
+
+    id = Column(Integer, primary_key=True, index=True)
+    quiz_id = Column(String, ForeignKey("quizzes.id"))
+    session_id = Column(String, ForeignKey("test_sessions.id"))
+    submitted_at = Column(DateTime, default=datetime.utcnow)
+
+    __table_args__ = (
+        Index("ix_quiz_submissions_quiz_session", "quiz_id", "session_id", unique=True),
+    )
+
+
+class QuestionBankModel(Base):
+    __tablename__ = "question_bank"
+
+    id = Column(Integer, primary_key=True, index=True)
+    workspace = Column(String, default="default", server_default="default")
+    source = Column(String, index=True)
+    topic = Column(String)
+    difficulty = Column(String)
+    # "question" (open-ended, test-me/session/review) or "mcq" (quiz item)
+    kind = Column(String, default="question")
+    question = Column(Text)
+    chunk_ids = Column(Text)   # JSON list of chunk_ids the question was generated from
+    citations = Column(Text)   # JSON list of {chunk_id, source, page}
+    created_at = Column(DateTime, default=datetime.utcnow)
+
+    __table_args__ = (
+        Index("ix_question_bank_lookup", "workspace", "kind", "topic", "difficulty"),
+    )
+
+
+class TopicSourceModel(Base):
+    __tablename__ = "topic_sources"
+
+    id = Column(Integer, primary_key=True, index=True)
+    workspace = Column(String, default="default", server_default="default", index=True)
+    topic = Column(String, index=True)
+    source = Column(String, index=True)
+    chunk_count = Column(Integer, default=0)
+
+
+class ChunkSignatureModel(Base):
+    __tablename__ = "chunk_signatures"
+
+    id = Column(Integer, primary_key=True, index=True)
+    workspace = Column(String, default="default", server_default="default")
+    source = Column(String)
+    chunk_id = Column(String)
+    # 64-bit SimHash of the chunk text, stored signed (SQLite INTEGER)
+    simhash = Column(BigInteger)
+
+    __table_args__ = (
+        Index("ix_chunk_signatures_ws_source", "workspace", "source"),
+    )
+
+
+class WebSourceModel(Base):
+    __tablename__ = "web_sources"
+
+    id = Column(Integer, primary_key=True, index=True)
+    workspace = Column(String, default="default", server_default="default")
+    url = Column(String)
+    # validators from the last full fetch, for conditional re-fetches
+    etag = Column(String, nullable=True)
+    last_modified = Column(String, nullable=True)
+    content_hash = Column(String)   # sha256 of the response body
+    fetched_at = Column(DateTime, default=datetime.utcnow)
+    checked_at = Column(DateTime, default=datetime.utcnow)
+
+    __table_args__ = (
+        Index("ix_web_sources_ws_url", "workspace", "url", unique=True),
+    )
+
+
+class SummaryCacheModel(Base):
+    __tablename__ = "summary_cache"
+
+    id = Column(Integer, primary_key=True, index=True)
+    # sha256 over the node's content: chunk texts for leaves, child keys for inner nodes
+    key = Column(String, unique=True, index=True)
+    level = Column(Integer, default=0)
+    summary = Column(Text)
+    created_at = Column(DateTime, default=datetime.utcnow)
+
+
+class QueryVectorModel(Base):
+    __tablename__ = "query_vectors"
+
+    id = Column(Integer, primary_key=True, index=True)
+    embedding_model = Column(String)
+    query = Column(Text)
+    vector = Column(LargeBinary)   # float32 bytes
+
+    __table_args__ = (
+        Index("ix_query_vectors_model_query", "embedding_model", "query", unique=True),
+    )
+
+
+def ensure_columns(bind):
+    """
+    create_all() never alters existing tables; add columns introduced since the
+    table was created (they all have server defaults, so old rows stay valid).
+    """
+    insp = inspect(bind)
+    existing_tables = set(insp.get_table_names())
+    with bind.begin() as conn:
+        for table in Base.metadata.sorted_tables:
+            if table.name not in existing_tables:
+                continue
+            have = {c["name"] for c in insp.get_columns(table.name)}
+            for col in table.columns:
+                if col.name in have:
+                    continue
+                ddl = f"ALTER TABLE {table.name} ADD COLUMN {col.name} {col.type.compile(bind.dialect)}"
+                if col.server_default is not None:
+                    ddl += f" DEFAULT '{col.server_default.arg}'"
+                conn.execute(text(ddl))
+
+
+def ensure_indexes(bind):
+    """
+    create_all() skips indexes on tables that already exist; add any that are missing.
+    """
+    for table in Base.metadata.sorted_tables:
+        for index in table.indexes:
+            index.create(bind=bind, checkfirst=True)
+
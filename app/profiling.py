@@ -0,0 +1,380 @@
+# app/profiling.py
+"""
+On-demand profiling of a running instance (admin endpoints under /admin/profile).
+
+    CPU      a sampler thread walks every thread's stack each PROFILE_SAMPLE_INTERVAL_MS
+             for the next N requests or S seconds; output is collapsed stacks
+             ("frame;frame;frame count"), ready for flamegraph.pl / speedscope.
+             mode="cpu" only counts threads that used CPU since the previous
+             tick; mode="wall" counts every busy stack (time spent waiting on
+             Qdrant, the LLM or SQLite shows up there). Parked threads (idle
+             pool workers, the event loop's select) are left out of both.
+    memory   tracemalloc between start and stop: top allocators now, and the
+             diff against the snapshot taken at start.
+    request  a request carrying PROFILE_DEBUG_HEADER and a valid X-Admin-Token
+             is sampled on its own; the response gets an X-Profile-Id header.
+             Only stacks running that request's endpoint are kept (concurrent
+             calls of the same endpoint end up in the same profile).
+
+Nothing runs unless asked: no sampler thread, no tracemalloc, and the request
+middleware is only installed when PROFILING_ENABLED is set. `match` filters the
+collapsed output to stacks containing a substring, e.g. "qdrant_store",
+"_mmr_select", "pdf_ingestor", "cached_store".
+"""
+import re
+import sys
+import threading
+import time
+import tracemalloc
+import uuid
+from collections import Counter, OrderedDict, deque
+
+from app.core.config import settings
+from app.core.security import admin_token_valid
+
+# leaf frames of threads parked with nothing to do (pool workers, the event loop)
+_IDLE_LEAVES = {
+    ("threading.py", "wait"),
+    ("threading.py", "_wait_for_tstate_lock"),
+    ("queue.py", "get"),
+    ("selectors.py", "select"),
+    ("thread.py", "_worker"),
+}
+
+
+def _frame_label(code, cache: dict) -> str:
+    label = cache.get(code)
+    if label is None:
+        filename = code.co_filename
+        # app frames relative to the package, libraries from site-packages / stdlib on
+        for marker in ("/site-packages/", "/app/", "/lib/python"):
+            if marker in filename:
+                filename = filename.split(marker, 1)[1]
+                if marker == "/app/":
+                    filename = "app/" + filename
+                break
+        label = cache[code] = f"{code.co_name} ({filename}:{code.co_firstlineno})"
+    return label
+
+
+def _thread_label(name: str) -> str:
+    # pool threads are numbered; fold them into one root per pool
+    return re.sub(r"[-_ ]?\d+(_\d+)?$", "", name) or "thread"
+
+
+class StackSampler:
+    """
+    Samples every thread's Python stack on its own thread until stop().
+    `keep(codes)` (leaf last) can drop stacks; `deadline` stops it by itself.
+    """
+
+    def __init__(self, interval: float, mode: str = "cpu", keep=None, deadline: float | None = None):
+        if mode not in ("cpu", "wall"):
+            raise ValueError(f"Unknown profiling mode: {mode}")
+        self.interval = interval
+        self.mode = mode
+        self.keep = keep
+        self.deadline = deadline
+        self.counts: Counter = Counter()
+        self.samples = 0
+        self.started_at = time.time()
+        self.seconds = 0.0
+        self._cpu: dict[int, float] = {}
+        self._labels: dict = {}
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="profiler", daemon=True)
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not threading.current_thread():
+            self._thread.join()
+
+    @property
+    def running(self) -> bool:
+        return self._thread.is_alive()
+
+    def _on_cpu(self, ident: int) -> bool:
+        try:
+            now = time.clock_gettime(time.pthread_getcpuclockid(ident))
+        except (AttributeError, OSError):
+            return True   # no per-thread CPU clocks here: count it
+        last = self._cpu.get(ident)
+        self._cpu[ident] = now
+        return last is not None and now > last
+
+    def _run(self):
+        t0 = time.perf_counter()
+        own = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            if self.deadline is not None and time.monotonic() >= self.deadline:
+                break
+            names = {t.ident: t.name for t in threading.enumerate()}
+            for ident, frame in sys._current_frames().items():
+                if ident == own:
+                    continue
+                if self.mode == "cpu" and not self._on_cpu(ident):
+                    continue
+                codes = []
+                while frame is not None:
+                    codes.append(frame.f_code)
+                    frame = frame.f_back
+                codes.reverse()
+                leaf = codes[-1]
+                if (leaf.co_filename.rsplit("/", 1)[-1], leaf.co_name) in _IDLE_LEAVES:
+                    continue
+                if self.keep is not None and not self.keep(codes):
+                    continue
+                self.counts[(_thread_label(names.get(ident, "thread")), tuple(codes))] += 1
+            self.samples += 1
+        self.seconds = time.perf_counter() - t0
+
+    def collapsed(self, match: str | None = None) -> str:
+        lines = []
+        for (thread, codes), count in self.counts.most_common():
+            stack = ";".join([thread] + [_frame_label(c, self._labels) for c in codes])
+            if match and match not in stack:
+                continue
+            lines.append(f"{stack} {count}")
+        return "\n".join(lines) + ("\n" if lines else "")
+
+    def top_functions(self, limit: int = 20) -> list[dict]:
+        """
+        Self and total sample counts per function, most self time first.
+        """
+        own, total = Counter(), Counter()
+        for (_, codes), count in self.counts.items():
+            own[codes[-1]] += count
+            for code in set(codes):
+                total[code] += count
+        all_samples = sum(self.counts.values()) or 1
+        return [
+            {
+                "function": _frame_label(code, self._labels),
+                "self": n,
+                "total": total[code],
+                "self_pct": round(100 * n / all_samples, 1),
+            }
+            for code, n in own.most_common(limit)
+        ]
+
+
+class CpuWindow:
+    """
+    One CPU profile: sampling until `requests` requests completed or `seconds` passed.
+    """
+
+    def __init__(self, sampler: StackSampler, requests: int | None, seconds: float):
+        self.id = uuid.uuid4().hex[:12]
+        self.sampler = sampler
+        self.requests = requests
+        self.seconds = seconds
+        self.requests_seen = 0
+
+    def snapshot(self) -> dict:
+        return {
+            "profile_id": self.id,
+            "status": "running" if self.sampler.running else "done",
+            "mode": self.sampler.mode,
+            "requests": self.requests,
+            "requests_seen": self.requests_seen,
+            "max_seconds": self.seconds,
+            "seconds": round(self.sampler.seconds, 3) if not self.sampler.running else None,
+            "samples": self.sampler.samples,
+            "stacks": len(self.sampler.counts),
+        }
+
+
+class Profiler:
+    """
+    Process-wide profiling state: at most one CPU window and one tracemalloc
+    window at a time, plus the last few finished/per-request profiles.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.window: CpuWindow | None = None
+        self.finished: deque[CpuWindow] = deque(maxlen=5)
+        self.requests: OrderedDict[str, StackSampler] = OrderedDict()
+        self._memory_baseline: tracemalloc.Snapshot | None = None
+        self._memory_started_by_us = False
+
+    # ---------- CPU ----------
+
+    def start_cpu(self, requests: int | None = None, seconds: float | None = None, mode: str = "cpu") -> CpuWindow:
+        seconds = min(seconds or settings.PROFILE_MAX_SECONDS, settings.PROFILE_MAX_SECONDS)
+        with self._lock:
+            if self.window is not None and self.window.sampler.running:
+                raise ValueError(f"CPU profile {self.window.id} is still running")
+            sampler = StackSampler(
+                settings.PROFILE_SAMPLE_INTERVAL_MS / 1000, mode, deadline=time.monotonic() + seconds
+            )
+            window = CpuWindow(sampler, requests, seconds)
+            if self.window is not None:
+                self.finished.append(self.window)
+            self.window = window
+        sampler.start()
+        return window
+
+    def stop_cpu(self) -> CpuWindow | None:
+        window = self.window
+        if window is not None:
+            window.sampler.stop()
+        return window
+
+    def cpu_profile(self, profile_id: str) -> CpuWindow | None:
+        for window in [self.window, *self.finished]:
+            if window is not None and window.id == profile_id:
+                return window
+        return None
+
+    def request_done(self):
+        window = self.window
+        if window is None or window.requests is None or not window.sampler.running:
+            return
+        with self._lock:
+            window.requests_seen += 1
+            done = window.requests_seen >= window.requests
+        if done:
+            window.sampler.stop()
+
+    # ---------- per request ----------
+
+    def start_request(self, scope: dict) -> tuple[str, StackSampler]:
+        def running_endpoint(codes):
+            # the router fills in scope["endpoint"] once the request is matched
+            endpoint = scope.get("endpoint")
+            code = getattr(endpoint, "__code__", None)
+            return code is not None and code in codes
+
+        # one request is short: sample it five times as often as a window
+        sampler = StackSampler(
+            settings.PROFILE_SAMPLE_INTERVAL_MS / 5000, "wall", keep=running_endpoint,
+            deadline=time.monotonic() + settings.PROFILE_MAX_SECONDS,
+        ).start()
+        profile_id = uuid.uuid4().hex[:12]
+        with self._lock:
+            self.requests[profile_id] = sampler
+            while len(self.requests) > 20:
+                self.requests.popitem(last=False)
+        return profile_id, sampler
+
+    def request_profile(self, profile_id: str) -> StackSampler | None:
+        return self.requests.get(profile_id)
+
+    # ---------- memory ----------
+
+    def start_memory(self, frames: int = 10) -> dict:
+        with self._lock:
+            if self._memory_baseline is not None:
+                raise ValueError("Memory profiling is already running")
+            if not tracemalloc.is_tracing():
+                tracemalloc.start(frames)
+                self._memory_started_by_us = True
+            self._memory_baseline = tracemalloc.take_snapshot()
+        return self.memory_stats()
+
+    def memory_report(self, top: int = 20, group_by: str = "lineno") -> dict:
+        baseline = self._memory_baseline
+        if baseline is None:
+            raise ValueError("Memory profiling is not running")
+        snapshot = tracemalloc.take_snapshot().filter_traces([
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+        ])
+
+        def where(stat):
+            return [f"{f.filename}:{f.lineno}" for f in stat.traceback]
+
+        return {
+            **self.memory_stats(),
+            "top": [
+                {"where": where(s), "size_kb": round(s.size / 1024, 1), "count": s.count}
+                for s in snapshot.statistics(group_by)[:top]
+            ],
+            "diff": [
+                {
+                    "where": where(s),
+                    "size_diff_kb": round(s.size_diff / 1024, 1),
+                    "size_kb": round(s.size / 1024, 1),
+                    "count_diff": s.count_diff,
+                }
+                for s in snapshot.compare_to(baseline, group_by)[:top]
+            ],
+        }
+
+    def stop_memory(self, top: int = 20, group_by: str = "lineno") -> dict:
+        report = self.memory_report(top, group_by)
+        with self._lock:
+            self._memory_baseline = None
+            if self._memory_started_by_us:
+                tracemalloc.stop()
+                self._memory_started_by_us = False
+        report["tracing"] = tracemalloc.is_tracing()
+        return report
+
+    def memory_stats(self) -> dict:
+        current, peak = tracemalloc.get_traced_memory() if tracemalloc.is_tracing() else (0, 0)
+        return {
+            "tracing": tracemalloc.is_tracing(),
+            "traced_kb": round(current / 1024, 1),
+            "peak_kb": round(peak / 1024, 1),
+        }
+
+
+_profiler: Profiler | None = None
+_profiler_lock = threading.Lock()
+
+
+def get_profiler() -> Profiler:
+    global _profiler
+    if _profiler is None:
+        with _profiler_lock:
+            if _profiler is None:
+                _profiler = Profiler()
+    return _profiler
+
+
+class ProfilingMiddleware:
+    """
+    Counts requests for a running CPU window and samples requests that carry
+    the debug header. Only installed when PROFILING_ENABLED is set.
+    """
+
+    def __init__(self, app):
+        self.app = app
+        self.profiler = get_profiler()
+        self.header = settings.PROFILE_DEBUG_HEADER.lower().encode()
+
+    def _debug_requested(self, scope) -> bool:
+        if not settings.ADMIN_TOKEN:
+            return False
+        headers = dict(scope.get("headers") or [])
+        return (
+            headers.get(self.header, b"") not in (b"", b"0", b"false")
+            and admin_token_valid(headers.get(b"x-admin-token"))
+        )
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["path"].startswith("/admin/profile"):
+            # the profiling endpoints themselves are neither counted nor sampled
+            return await self.app(scope, receive, send)
+
+        sampler = None
+        if self._debug_requested(scope):
+            profile_id, sampler = self.profiler.start_request(scope)
+
+            async def send_with_id(message):
+                if message["type"] == "http.response.start":
+                    message.setdefault("headers", [])
+                    message["headers"] = list(message["headers"]) + [(b"x-profile-id", profile_id.encode())]
+                await send(message)
+        try:
+            await self.app(scope, receive, send_with_id if sampler else send)
+        finally:
+            if sampler is not None:
+                sampler.stop()
+            self.profiler.request_done()
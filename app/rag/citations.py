@@ -0,0 +1,14 @@
+def build_citation(doc) -> dict:
+    """
+    Where a chunk came from: PDF chunks carry `page`, YouTube chunks carry the
+    start/end second of their transcript window so a citation can link to that moment.
+    """
+    citation = {
+        "chunk_id": doc.metadata.get("chunk_id"),
+        "source": doc.metadata.get("source"),
+        "page": doc.metadata.get("page"),
+    }
+    if doc.metadata.get("start_seconds") is not None:
+        citation["start_seconds"] = doc.metadata["start_seconds"]
+        citation["end_seconds"] = doc.metadata.get("end_seconds")
+    return citation
@@ -1,3 +1,6 @@
+from app.core.config import settings
+
+
 def build_rag_prompt(context_chunks: list[str], question: str) -> str:
     context_text = "\n\n".join(context_chunks)
 
@@ -14,3 +17,30 @@ Question:
 Answer:
 """
     return prompt.strip()
+
+
+def build_conversation_prompt(context_chunks: list[str], history: list[tuple[str, str]], question: str) -> str:
+    context_text = "\n\n".join(context_chunks)
+    # earlier answers are trimmed: they only need to resolve "that", "it", "the second one"
+    history_text = "\n\n".join(
+        f"User: {q}\nAssistant: {a[:settings.CONVERSATION_HISTORY_ANSWER_CHARS]}"
+        for q, a in history
+    ) or "(none)"
+
+    prompt = f"""
+You are a helpful assistant in an ongoing conversation. Answer the latest question using ONLY the context below;
+use the conversation so far to understand what the question refers to.
+If the answer is not in the context, say: "I don't know based on the provided content."
+
+Context:
+{context_text}
+
+Conversation so far:
+{history_text}
+
+Question:
+{question}
+
+Answer:
+"""
+    return prompt.strip()
@@ -0,0 +1,216 @@
+# app/rag/question_bank.py
+import json
+import re
+from typing import Callable
+
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.admission import priority_scope
+from app.db import SessionLocal
+from app.models import QuestionBankModel
+from app.rag.citations import build_citation
+from app.rag.quiz_prompt import build_quiz_prompt
+from app.rag.test_prompt import build_test_question_prompt
+
+DIFFICULTIES = ["easy", "medium", "hard"]
+
+_INSUFFICIENT = "i don't have enough information"
+
+
+class QuestionBank:
+    """
+    Questions generated ahead of time per (source, topic, difficulty), so question
+    endpoints can skip retrieval + generation. Built after ingestion or on demand;
+    a source's questions are dropped whenever its chunks are deleted or reindexed.
+    """
+
+    def __init__(
+        self,
+        vector_store,
+        llm: Callable,
+        workspace: str = "default",
+        per_topic: int | None = None,
+        chunks_per_question: int | None = None,
+    ):
+        self.vector_store = vector_store
+        # returns the shared, admission-controlled chat model (Services.llm)
+        self.llm = llm
+        self.workspace = workspace
+        self.per_topic = per_topic or settings.QUESTION_BANK_PER_TOPIC
+        self.chunks_per_question = chunks_per_question or settings.QUESTION_BANK_CHUNKS_PER_QUESTION
+
+    # ---------- building ----------
+
+    def _windows(self, docs: list) -> list[list]:
+        """
+        Up to `per_topic` windows of consecutive chunks, spread evenly over the topic.
+        """
+        size = self.chunks_per_question
+        starts = list(range(0, max(1, len(docs) - size + 1), size))
+        if len(starts) > self.per_topic:
+            step = len(starts) / self.per_topic
+            starts = [starts[int(i * step)] for i in range(self.per_topic)]
+        return [docs[s:s + size] for s in starts]
+
+    def build_for_source(self, source: str) -> int:
+        """
+        (Re)generate the bank for one source. Returns the number of questions stored.
+
+        Generation takes minutes; the old questions are replaced in one transaction
+        at the end, and only if the source wasn't deleted or re-ingested meanwhile
+        (the new ones would cite chunks that no longer exist).
+        """
+        # change log position the chunk snapshot below is valid for
+        seq, _ = self.vector_store.changes_since(0)
+        docs = self.vector_store.get_chunks(source)
+        if not docs:
+            self.invalidate_source(source)
+            return 0
+
+        by_topic = {}
+        for d in docs:
+            by_topic.setdefault(d.metadata.get("topic") or "general", []).append(d)
+
+        # background work: queued behind interactive and standard requests
+        llm = self.llm()
+        rows = []
+        with priority_scope("bulk"):
+            for topic, topic_docs in by_topic.items():
+                focus = None if topic == "general" else topic
+                for window in self._windows(topic_docs):
+                    context_chunks = [d.page_content for d in window]
+                    chunk_ids = [d.metadata.get("chunk_id") for d in window]
+                    citations = [build_citation(d) for d in window]
+
+                    prompts = [
+                        ("question", difficulty, build_test_question_prompt(context_chunks, focus, difficulty))
+                        for difficulty in DIFFICULTIES
+                    ]
+                    prompts.append(("mcq", "medium", build_quiz_prompt(context_chunks, focus, 1)))
+
+                    for kind, difficulty, prompt in prompts:
+                        try:
+                            text = llm.invoke(prompt).content.strip()
+                        except Exception as e:
+                            print(f"[QuestionBank] Generation failed for {source}/{topic}: {e}")
+                            continue
+                        if not text or _INSUFFICIENT in text.lower():
+                            continue
+                        rows.append(QuestionBankModel(
+                            workspace=self.workspace,
+                            source=source,
+                            topic=topic,
+                            difficulty=difficulty,
+                            kind=kind,
+                            question=text,
+                            chunk_ids=json.dumps(chunk_ids),
+                            citations=json.dumps(citations),
+                        ))
+
+        _, changes = self.vector_store.changes_since(seq)
+        if changes is None or any(op == "reset" or changed == source for op, changed in changes):
+            print(f"[QuestionBank] {source} changed during generation, discarding {len(rows)} questions")
+            return 0
+
+        db: Session = SessionLocal()
+        try:
+            self._delete_source(db, source)
+            db.add_all(rows)
+            db.commit()
+        finally:
+            db.close()
+
+        print(f"[QuestionBank] Stored {len(rows)} questions for {source}")
+        return len(rows)
+
+    def build_all(self) -> dict:
+        return {src: self.build_for_source(src) for src in self.vector_store.list_sources()}
+
+    # ---------- invalidation ----------
+
+    def _delete_source(self, db: Session, source: str) -> int:
+        return (
+            db.query(QuestionBankModel)
+            .filter(QuestionBankModel.workspace == self.workspace)
+            .filter(QuestionBankModel.source == source)
+            .delete()
+        )
+
+    def invalidate_source(self, source: str) -> int:
+        db: Session = SessionLocal()
+        try:
+            n = self._delete_source(db, source)
+            db.commit()
+            return n
+        finally:
+            db.close()
+
+    # ---------- serving ----------
+
+    def draw(
+        self,
+        kind: str = "question",
+        topic: str | None = None,
+        difficulty: str | None = None,
+        sources: list[str] | None = None,
+        exclude: set[str] | None = None,
+        limit: int = 1,
+    ) -> list[dict]:
+        """
+        Random unused questions matching the filters; [] when the bank is exhausted.
+        """
+        db: Session = SessionLocal()
+        try:
+            q = (
+                db.query(QuestionBankModel)
+                .filter(QuestionBankModel.workspace == self.workspace)
+                .filter(QuestionBankModel.kind == kind)
+            )
+            if topic:
+                q = q.filter(func.lower(QuestionBankModel.topic) == topic.lower())
+            if difficulty:
+                q = q.filter(QuestionBankModel.difficulty == difficulty)
+            if sources:
+                q = q.filter(QuestionBankModel.source.in_(sources))
+
+            # over-fetch a little so excluded questions don't starve the draw
+            fetch = limit + (len(exclude) if exclude else 0)
+            picked = []
+            for row in q.order_by(func.random()).limit(fetch).all():
+                if exclude and row.question in exclude:
+                    continue
+                picked.append({
+                    "id": row.id,
+                    "topic": row.topic,
+                    "difficulty": row.difficulty,
+                    "question": row.question,
+                    "chunk_ids": json.loads(row.chunk_ids or "[]"),
+                    "citations": json.loads(row.citations or "[]"),
+                })
+                if len(picked) >= limit:
+                    break
+            return picked
+        finally:
+            db.close()
+
+    def stats(self) -> dict:
+        db: Session = SessionLocal()
+        try:
+            rows = (
+                db.query(QuestionBankModel.kind, QuestionBankModel.difficulty, func.count())
+                .filter(QuestionBankModel.workspace == self.workspace)
+                .group_by(QuestionBankModel.kind, QuestionBankModel.difficulty)
+                .all()
+            )
+            return {f"{kind}:{difficulty}": n for kind, difficulty, n in rows}
+        finally:
+            db.close()
+
+
+def renumber_mcq(text: str, number: int) -> str:
+    """
+    Bank MCQs are generated one at a time as "1) ..."; renumber for a combined quiz.
+    """
+    return re.sub(r"^\s*\d+\)", f"{number})", text, count=1)
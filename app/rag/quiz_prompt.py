@@ -26,3 +26,31 @@ Correct: <letter>
 Quiz:
 """
     return prompt.strip()
+
+
+def build_structured_quiz_prompt(context_chunks: list[tuple[str, str]], focus: str | None, num_questions: int) -> str:
+    """
+    context_chunks: (chunk_id, text) pairs; the model cites the ids it used.
+    """
+    context_text = "\n\n".join(f"[{chunk_id}]\n{text}" for chunk_id, text in context_chunks)
+
+    focus_part = ""
+    if focus:
+        focus_part = f"\nFocus the quiz on: {focus}\n"
+
+    prompt = f"""
+You are a helpful tutor. Using ONLY the context below, generate {num_questions} multiple-choice questions.
+- Each question has exactly 4 options and exactly one correct option.
+- Cite the ids (in square brackets) of the context chunks each question is based on.
+- If the context is insufficient, return an empty list: []
+
+{focus_part}
+Context:
+{context_text}
+
+Return ONLY a JSON list, no prose and no code fences:
+[{{"question": "...", "options": ["...", "...", "...", "..."], "correct": "A", "chunk_ids": ["..."]}}]
+
+Quiz:
+"""
+    return prompt.strip()
@@ -0,0 +1,241 @@
+# app/rag/quizzes.py
+"""
+Structured quizzes: MCQs parsed from the model's JSON, validated, stored with a
+quiz id, and graded locally against the stored answer key (no LLM call).
+
+Answer keys of recent quizzes stay in an LRU (QUIZ_CACHE_SIZE), so grading a
+submission is a dict lookup and a letter comparison; older quizzes are read
+back from the DB once.
+"""
+import json
+import re
+import threading
+import uuid
+from collections import OrderedDict
+
+from pydantic import BaseModel, Field, ValidationError, field_validator, model_validator
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.db import SessionLocal
+from app.models import QuizModel, QuizQuestionModel, QuizSubmissionModel
+from app.sessions.grading import Outcome
+
+LETTERS = "ABCDEF"
+_LETTER = re.compile(r"\b([A-F])\b")
+
+
+def option_letter(text: str) -> str | None:
+    """
+    The option letter in "b", "B)", "(C)", "Answer: D": a standalone A-F, else None.
+    """
+    m = _LETTER.search(text.strip().upper())
+    return m.group(1) if m else None
+
+
+class QuizQuestion(BaseModel):
+    question: str = Field(..., min_length=1)
+    options: list[str] = Field(..., min_length=2, max_length=len(LETTERS))
+    correct: str
+    chunk_ids: list[str] = []
+    topic: str | None = None
+
+    @field_validator("options")
+    @classmethod
+    def _distinct_options(cls, options: list[str]) -> list[str]:
+        options = [o.strip() for o in options]
+        if not all(options):
+            raise ValueError("empty option")
+        if len({o.lower() for o in options}) != len(options):
+            raise ValueError("duplicate options")
+        return options
+
+    @field_validator("correct")
+    @classmethod
+    def _letter(cls, correct: str) -> str:
+        # tolerate "b", "B)", "Answer: B" from the model
+        letter = option_letter(correct)
+        if letter is None:
+            raise ValueError("correct must be an option letter")
+        return letter
+
+    @model_validator(mode="after")
+    def _correct_in_range(self):
+        if LETTERS.index(self.correct) >= len(self.options):
+            raise ValueError(f"correct option {self.correct} does not exist")
+        return self
+
+    def lettered(self) -> dict[str, str]:
+        return dict(zip(LETTERS, self.options))
+
+    def grade(self, answer: str) -> Outcome:
+        return Outcome.CORRECT if option_letter(answer) == self.correct else Outcome.INCORRECT
+
+
+class Quiz:
+    def __init__(self, quiz_id: str, workspace: str, focus: str | None, questions: list[QuizQuestion]):
+        self.id = quiz_id
+        self.workspace = workspace
+        self.focus = focus
+        self.questions = questions
+
+    def public(self) -> list[dict]:
+        """
+        The questions as shown to the learner: no answer key.
+        """
+        return [
+            {
+                "number": i,
+                "question": q.question,
+                "options": q.lettered(),
+                "chunk_ids": q.chunk_ids,
+                "topic": q.topic,
+            }
+            for i, q in enumerate(self.questions, start=1)
+        ]
+
+
+def parse_quiz(text: str, chunk_ids: list[str]) -> tuple[list[QuizQuestion], int]:
+    """
+    Validated questions from the model's JSON list, and how many items were dropped.
+    Cited ids outside `chunk_ids` are discarded; an item citing none is
+    attributed to every context chunk.
+    """
+    start, end = text.find("["), text.rfind("]")
+    if start < 0 or end < start:
+        return [], 0
+    try:
+        items = json.loads(text[start:end + 1])
+    except ValueError:
+        return [], 0
+    if not isinstance(items, list):
+        return [], 0
+
+    known = set(chunk_ids)
+    questions, dropped = [], 0
+    for item in items:
+        try:
+            q = QuizQuestion.model_validate(item)
+        except ValidationError:
+            dropped += 1
+            continue
+        q.chunk_ids = [c for c in q.chunk_ids if c in known] or list(chunk_ids)
+        questions.append(q)
+    return questions, dropped
+
+
+_MCQ_QUESTION = re.compile(r"^\s*(?:\d+\)|Q\d*[:.)])?\s*(.+?)\s*$")
+_MCQ_OPTION = re.compile(r"^\s*([A-F])[).:]\s*(.+?)\s*$")
+_MCQ_CORRECT = re.compile(r"^\s*Correct(?: answer)?\s*[:\-]\s*\(?([A-F])\b", re.IGNORECASE)
+
+
+def parse_mcq_text(text: str) -> QuizQuestion | None:
+    """
+    One text MCQ in the build_quiz_prompt format ("1) ...", "A) ...", "Correct: B"),
+    as question-bank items are stored; None if it doesn't parse or validate.
+    """
+    question, options, correct = None, [], None
+    for line in text.splitlines():
+        if not line.strip():
+            continue
+        m = _MCQ_CORRECT.match(line)
+        if m:
+            correct = m.group(1)
+            continue
+        m = _MCQ_OPTION.match(line)
+        if m and question is not None:
+            options.append(m.group(2))
+            continue
+        if question is None and not options:
+            question = _MCQ_QUESTION.match(line).group(1)
+    if question is None or correct is None:
+        return None
+    try:
+        return QuizQuestion(question=question, options=options, correct=correct)
+    except ValidationError:
+        return None
+
+
+class QuizStore:
+    """
+    Quizzes in the DB, with the most recent ones' answer keys kept in memory.
+    """
+
+    def __init__(self, capacity: int | None = None):
+        self.capacity = capacity or settings.QUIZ_CACHE_SIZE
+        self._cache: OrderedDict[str, Quiz] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _remember(self, quiz: Quiz):
+        with self._lock:
+            self._cache[quiz.id] = quiz
+            self._cache.move_to_end(quiz.id)
+            while len(self._cache) > self.capacity:
+                self._cache.popitem(last=False)
+
+    def save(self, workspace: str, focus: str | None, questions: list[QuizQuestion]) -> Quiz:
+        quiz = Quiz(str(uuid.uuid4()), workspace, focus, questions)
+        db: Session = SessionLocal()
+        try:
+            db.add(QuizModel(id=quiz.id, workspace=workspace, focus=focus))
+            db.add_all([
+                QuizQuestionModel(
+                    quiz_id=quiz.id,
+                    number=i,
+                    question=q.question,
+                    options=json.dumps(q.options),
+                    correct=q.correct,
+                    chunk_ids=json.dumps(q.chunk_ids),
+                    topic=q.topic,
+                )
+                for i, q in enumerate(questions, start=1)
+            ])
+            db.commit()
+        finally:
+            db.close()
+        self._remember(quiz)
+        return quiz
+
+    def get(self, quiz_id: str) -> Quiz | None:
+        with self._lock:
+            quiz = self._cache.get(quiz_id)
+            if quiz is not None:
+                self._cache.move_to_end(quiz_id)
+                return quiz
+
+        db: Session = SessionLocal()
+        try:
+            row = db.query(QuizModel).filter(QuizModel.id == quiz_id).first()
+            if row is None:
+                return None
+            questions = [
+                QuizQuestion(
+                    question=q.question,
+                    options=json.loads(q.options),
+                    correct=q.correct,
+                    chunk_ids=json.loads(q.chunk_ids or "[]"),
+                    topic=q.topic,
+                )
+                for q in row.questions
+            ]
+            quiz = Quiz(row.id, row.workspace, row.focus, questions)
+        finally:
+            db.close()
+        self._remember(quiz)
+        return quiz
+
+    def claim_submission(self, quiz_id: str, session_id: str) -> bool:
+        """
+        Record that `session_id` answered this quiz; False if it already had.
+        """
+        db: Session = SessionLocal()
+        try:
+            db.add(QuizSubmissionModel(quiz_id=quiz_id, session_id=session_id))
+            db.commit()
+            return True
+        except IntegrityError:
+            db.rollback()
+            return False
+        finally:
+            db.close()
@@ -16,3 +16,44 @@ Context:
 Summary:
 """
     return prompt.strip()
+
+
+def build_map_summary_prompt(context_chunks: list[str]) -> str:
+    context_text = "\n\n".join(context_chunks)
+
+    prompt = f"""
+You are a helpful assistant. Summarize the passage below in a few sentences.
+Keep every definition, key fact and step; drop examples and repetition.
+Use ONLY the passage.
+
+Passage:
+{context_text}
+
+Summary:
+"""
+    return prompt.strip()
+
+
+def build_reduce_summary_prompt(summaries: list[str], focus: str | None = None, final: bool = False) -> str:
+    summaries_text = "\n\n".join(f"- {s}" for s in summaries)
+
+    if final:
+        task = "Write a concise, well-structured summary of the whole material from the partial summaries below."
+    else:
+        task = "Merge the partial summaries below into one shorter summary that keeps every key point."
+
+    focus_part = ""
+    if focus and final:
+        focus_part = f"\nFocus the summary on: {focus}\n"
+
+    prompt = f"""
+You are a helpful assistant. {task}
+The partial summaries cover consecutive parts of the material, in order. Use ONLY them.
+
+{focus_part}
+Partial summaries:
+{summaries_text}
+
+Summary:
+"""
+    return prompt.strip()
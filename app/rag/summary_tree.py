@@ -0,0 +1,195 @@
+# app/rag/summary_tree.py
+"""
+Map-reduce summaries of whole sources.
+
+A source's chunks (in page / transcript order) are grouped into leaves, each
+leaf is summarized once (map), and the partial summaries are merged a few at a
+time, level by level, until one is left (reduce). Group boundaries are content
+defined: a group closes after a chunk whose hash lands on a boundary, so an
+edited or inserted chunk changes its own group and one node per level above it,
+not everything after it. Every node is cached under a hash of its content, so a
+repeated summary, or one after a partial reindex, only calls the LLM for the
+branches that changed.
+"""
+import hashlib
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.db import SessionLocal
+from app.models import SummaryCacheModel
+from app.rag.summarize_prompt import build_map_summary_prompt, build_reduce_summary_prompt
+
+# bump when the prompts change, so partial summaries from the old prompts are not reused
+PROMPT_VERSION = "1"
+
+
+def _hash(*parts: str) -> str:
+    h = hashlib.sha256(PROMPT_VERSION.encode())
+    for part in parts:
+        h.update(b"\x00")
+        h.update(part.encode("utf-8"))
+    return h.hexdigest()
+
+
+def _groups(keys: list[str], size: int, lengths: list[int] | None = None, max_chars: int | None = None) -> list[list[int]]:
+    """
+    Content-defined grouping of positions: a group closes after an item whose
+    key is a boundary (about 1 in `size`), at 2 * size items, or at max_chars.
+    """
+    groups, current, chars = [], [], 0
+    for i, key in enumerate(keys):
+        current.append(i)
+        chars += lengths[i] if lengths else 0
+        if (
+            int(key[:8], 16) % size == 0
+            or len(current) >= 2 * size
+            or (max_chars and chars >= max_chars)
+        ):
+            groups.append(current)
+            current, chars = [], 0
+    if current:
+        groups.append(current)
+    return groups
+
+
+class SummaryCache:
+    """
+    Partial summaries by content key. Content-addressed, so shared by every workspace.
+    """
+
+    def get_many(self, keys: list[str]) -> dict[str, str]:
+        if not keys:
+            return {}
+        db: Session = SessionLocal()
+        try:
+            rows = (
+                db.query(SummaryCacheModel.key, SummaryCacheModel.summary)
+                .filter(SummaryCacheModel.key.in_(keys))
+                .all()
+            )
+            return {key: summary for key, summary in rows}
+        finally:
+            db.close()
+
+    def put_many(self, rows: list[tuple[str, int, str]]):
+        if not rows:
+            return
+        db: Session = SessionLocal()
+        try:
+            db.bulk_insert_mappings(SummaryCacheModel, [
+                {"key": key, "level": level, "summary": summary} for key, level, summary in rows
+            ])
+            db.commit()
+        except IntegrityError:
+            # another request summarized some of the same nodes; keep theirs
+            db.rollback()
+            have = set(self.get_many([key for key, _, _ in rows]))
+            db.bulk_insert_mappings(SummaryCacheModel, [
+                {"key": key, "level": level, "summary": summary}
+                for key, level, summary in rows if key not in have
+            ])
+            db.commit()
+        finally:
+            db.close()
+
+
+class SourceSummarizer:
+    def __init__(
+        self,
+        llm,
+        cache: SummaryCache | None = None,
+        group_chunks: int | None = None,
+        group_max_chars: int | None = None,
+        fan_in: int | None = None,
+        concurrency: int | None = None,
+    ):
+        self.llm = llm
+        self.cache = cache or SummaryCache()
+        self.group_chunks = max(2, group_chunks or settings.SUMMARY_GROUP_CHUNKS)
+        self.group_max_chars = group_max_chars or settings.SUMMARY_GROUP_MAX_CHARS
+        self.fan_in = max(2, fan_in or settings.SUMMARY_FAN_IN)
+        self.concurrency = concurrency or settings.SUMMARY_CONCURRENCY
+
+    def _run(self, pool, nodes: list[tuple[str, list[str]]], level: int, build_prompt, stats: dict) -> list[str]:
+        """
+        Summaries for (key, texts) nodes: cached ones are read, the rest are
+        generated concurrently and cached (even if a sibling fails).
+        """
+        cached = self.cache.get_many([key for key, _ in nodes])
+        missing = [(key, texts) for key, texts in nodes if key not in cached]
+
+        def generate(node):
+            key, texts = node
+            try:
+                return key, self.llm.invoke(build_prompt(texts)).content.strip(), None
+            except Exception as e:
+                return key, None, e
+
+        done = list(pool.map(generate, missing))
+        fresh = {key: summary for key, summary, error in done if error is None}
+        self.cache.put_many([(key, level, summary) for key, summary in fresh.items()])
+
+        stats["llm_calls"] += len(missing)
+        stats["cached"] += len(nodes) - len(missing)
+        for _, _, error in done:
+            if error is not None:
+                raise error
+        return [cached[key] if key in cached else fresh[key] for key, _ in nodes]
+
+    def summarize(self, docs_by_source: list[list], focus: str | None = None) -> dict:
+        """
+        One summary over all the given sources (each an ordered list of chunks).
+        """
+        t0 = time.perf_counter()
+        stats = {"chunks": 0, "leaves": 0, "levels": 0, "llm_calls": 0, "cached": 0}
+
+        # leaves never span two sources
+        nodes = []
+        for docs in docs_by_source:
+            chunk_keys = [_hash(d.page_content) for d in docs]
+            lengths = [len(d.page_content) for d in docs]
+            for group in _groups(chunk_keys, self.group_chunks, lengths, self.group_max_chars):
+                nodes.append((
+                    _hash("leaf", *(chunk_keys[i] for i in group)),
+                    [docs[i].page_content for i in group],
+                ))
+            stats["chunks"] += len(docs)
+        stats["leaves"] = len(nodes)
+        if not nodes:
+            raise ValueError("Nothing to summarize")
+
+        with ThreadPoolExecutor(max_workers=self.concurrency, thread_name_prefix="summarize") as pool:
+            # map
+            summaries = self._run(pool, nodes, 0, build_map_summary_prompt, stats)
+            keys = [key for key, _ in nodes]
+            level = 1
+
+            # reduce until one final prompt can take the rest
+            while len(keys) > self.fan_in:
+                groups = _groups(keys, self.fan_in)
+                if len(groups) == len(keys):
+                    # every key was a boundary: fall back to fixed groups so the level shrinks
+                    groups = [list(range(i, min(i + self.fan_in, len(keys)))) for i in range(0, len(keys), self.fan_in)]
+                nodes = [
+                    (_hash("node", *(keys[i] for i in group)), [summaries[i] for i in group])
+                    for group in groups
+                ]
+                summaries = self._run(pool, nodes, level, build_reduce_summary_prompt, stats)
+                keys = [key for key, _ in nodes]
+                level += 1
+
+            # the focus only shapes the final merge, so partial summaries serve every focus
+            root = (_hash("root", focus or "", *keys), summaries)
+            summary = self._run(
+                pool, [root], level,
+                lambda texts: build_reduce_summary_prompt(texts, focus, final=True),
+                stats,
+            )[0]
+
+        stats["levels"] = level + 1
+        stats["seconds"] = round(time.perf_counter() - t0, 3)
+        return {"summary": summary, "stats": stats}
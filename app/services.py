@@ -0,0 +1,118 @@
+# app/services.py
+import threading
+import time
+
+from fastapi import Request
+
+from app.core.config import settings
+from app.ingestion.crawl_jobs import CrawlJobs
+from app.rag.quizzes import QuizStore
+from app.sessions.cached_store import CachedSessionStore
+from app.sessions.conversations import ConversationStore
+from app.sessions.db_store import DBSessionStore
+from app.sessions.prefetch import QuestionPrefetcher
+from app.sessions.question_cache import QuestionCache
+from app.workspaces import DEFAULT_WORKSPACE, WorkspaceRegistry
+
+
+class Services:
+    """
+    Everything the endpoints share, built once by the app lifespan (not at import
+    time) and handed to endpoints through the `get_services` dependency.
+
+    Construction is cheap: Qdrant collections, the LLM client and the loaders
+    are only touched on first use, or by warm_up() in the background.
+    """
+
+    def __init__(self, llm_factory=None):
+        t0 = time.perf_counter()
+        from app.db import engine, Base
+        from app import models  # noqa: F401  (registers the tables)
+        from app.models import ensure_columns, ensure_indexes
+
+        Base.metadata.create_all(bind=engine)
+        ensure_columns(engine)
+        ensure_indexes(engine)
+
+        # per-workspace vector store, ingestors, topic index and question bank
+        self.workspaces = WorkspaceRegistry(self.llm)
+        self.session_store = CachedSessionStore() if settings.SESSION_CACHE_ENABLED else DBSessionStore()
+        # review questions generated ahead of time by /rag/review/due/batch?prewarm=true
+        self.review_questions = QuestionCache(ttl_seconds=2 * 3600)
+        # speculative next question per session, filled by /rag/test-me/session/answer
+        self.question_prefetcher = QuestionPrefetcher()
+        # progress of /ingest/crawl jobs
+        self.crawl_jobs = CrawlJobs()
+        # structured quizzes and their answer keys (graded locally)
+        self.quizzes = QuizStore()
+        # multi-turn /rag/conversation/ask state (turns + context window per conversation)
+        self.conversations = ConversationStore()
+
+        self._llm_factory = llm_factory
+        self._llm = None
+        self._llm_lock = threading.Lock()
+
+        self.init_seconds = time.perf_counter() - t0
+        self.warm_seconds: float | None = None
+        self.warm_error: str | None = None
+        self._ready = threading.Event()
+
+    def llm(self):
+        """
+        Shared chat model, created on first use. The client is stateless per
+        call, so one instance serves every request.
+        """
+        if self._llm is None:
+            with self._llm_lock:
+                if self._llm is None:
+                    if self._llm_factory is None:
+                        from app.llm.gemini import get_gemini_llm
+                        self._llm_factory = get_gemini_llm
+                    from app.admission import admit_llm
+
+                    # every LLM call goes through the shared admission controller
+                    self._llm = admit_llm(self._llm_factory())
+        return self._llm
+
+    # ---------- readiness ----------
+
+    def warm_up(self):
+        """
+        Pay the heavy imports and open the default collection, so the first real
+        request doesn't. Runs in a background thread; readiness flips when done.
+        """
+        t0 = time.perf_counter()
+        try:
+            self.workspaces.get(DEFAULT_WORKSPACE)
+        except Exception as e:
+            self.warm_error = str(e)
+            print(f"[Services] Warm-up failed: {e}")
+        self.warm_seconds = time.perf_counter() - t0
+        self._ready.set()
+
+    def start_warm_up(self):
+        threading.Thread(target=self.warm_up, name="warm-up", daemon=True).start()
+
+    @property
+    def ready(self) -> bool:
+        return self._ready.is_set() and self.warm_error is None
+
+    def startup_stats(self) -> dict:
+        return {
+            "init_seconds": round(self.init_seconds, 3),
+            "warm_seconds": round(self.warm_seconds, 3) if self.warm_seconds is not None else None,
+            "ready": self.ready,
+            "warm_error": self.warm_error,
+        }
+
+    def close(self):
+        from app.ingestion.chunking import close_chunking_engine
+
+        close_chunking_engine()
+        self.question_prefetcher.close()
+        # write-behind: make sure buffered attempts/schedules reach the DB
+        self.session_store.close()
+
+
+def get_services(request: Request) -> Services:
+    return request.app.state.services
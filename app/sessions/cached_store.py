@@ -0,0 +1,359 @@
+# app/sessions/cached_store.py
+import threading
+from collections import OrderedDict
+from datetime import datetime
+from typing import Dict, List
+
+from app.core.config import settings
+from app.sessions.db_store import DBSessionStore
+from app.sessions.grading import Outcome, grade_outcome, difficulty_from_stats, next_schedule
+
+_OUTCOME_INDEX = {"correct": 0, "partial": 1, "incorrect": 2}
+
+
+class CachedSession:
+    """
+    Compact hot copy of one test session.
+    topic_stats: topic -> [correct, partial, incorrect]
+    schedules:   topic -> (interval_days, ease_factor, next_review_at)
+    """
+    __slots__ = (
+        "id", "workspace", "focus", "total", "correct", "partial", "incorrect",
+        "topic_stats", "schedules", "dirty_counters", "dirty_topics",
+    )
+
+    def __init__(self, id: str, focus: str | None, total: int = 0, correct: int = 0,
+                 partial: int = 0, incorrect: int = 0, workspace: str = "default"):
+        self.id = id
+        self.workspace = workspace
+        self.focus = focus
+        self.total = total
+        self.correct = correct
+        self.partial = partial
+        self.incorrect = incorrect
+        self.topic_stats: Dict[str, List[int]] = {}
+        self.schedules: Dict[str, tuple] = {}
+        self.dirty_counters = False
+        self.dirty_topics: set = set()
+
+    @classmethod
+    def from_snapshot(cls, snap: dict) -> "CachedSession":
+        s = cls(snap["id"], snap["focus"], snap["total"] or 0, snap["correct"] or 0,
+                snap["partial"] or 0, snap["incorrect"] or 0, snap["workspace"] or "default")
+        s.topic_stats = {
+            t: [c["correct"], c["partial"], c["incorrect"]]
+            for t, c in snap["topic_stats"].items()
+        }
+        s.schedules = dict(snap["schedules"])
+        return s
+
+    @property
+    def dirty(self) -> bool:
+        return self.dirty_counters or bool(self.dirty_topics)
+
+    def summary(self):
+        return {
+            "session_id": self.id,
+            "workspace": self.workspace,
+            "focus": self.focus,
+            "total": self.total,
+            "correct": self.correct,
+            "partial": self.partial,
+            "incorrect": self.incorrect,
+        }
+
+
+class CachedSessionStore:
+    """
+    Tiered session store: a bounded LRU of hot sessions in front of DBSessionStore.
+
+    Reads (summary, topic_difficulty, due_topics, weak_areas) are served from memory.
+    Attempts and schedule changes are buffered and written behind to SQLite in
+    batches, at most `flush_interval` seconds late (the durability window), or as
+    soon as `flush_batch_size` attempts are pending. `close()` flushes everything.
+    A `flush_interval` <= 0 means write-through: every write is flushed before returning.
+    """
+
+    def __init__(
+        self,
+        db_store: DBSessionStore | None = None,
+        capacity: int | None = None,
+        flush_interval: float | None = None,
+        flush_batch_size: int | None = None,
+    ):
+        self.db_store = db_store or DBSessionStore()
+        self.capacity = capacity or settings.SESSION_CACHE_SIZE
+        self.flush_interval = flush_interval if flush_interval is not None else settings.SESSION_FLUSH_INTERVAL_SECONDS
+        self.flush_batch_size = flush_batch_size or settings.SESSION_FLUSH_BATCH_SIZE
+
+        self._lock = threading.RLock()
+        self._flush_lock = threading.Lock()
+        self._sessions: "OrderedDict[str, CachedSession]" = OrderedDict()
+        self._pending_attempts: List[dict] = []
+        # sessions whose writes are being flushed right now; not evictable
+        self._in_flight: set = set()
+
+        self._stop = threading.Event()
+        self._wake = threading.Event()
+        self._flusher: threading.Thread | None = None
+        # no flusher to wake: writes are persisted synchronously instead
+        self.write_through = self.flush_interval <= 0
+        if not self.write_through:
+            self._flusher = threading.Thread(target=self._flush_loop, name="session-flusher", daemon=True)
+            self._flusher.start()
+
+    # ---------- cache management ----------
+
+    def _lookup(self, session_id: str) -> CachedSession | None:
+        with self._lock:
+            s = self._sessions.get(session_id)
+            if s is not None:
+                self._sessions.move_to_end(session_id)
+                return s
+
+        snap = self.db_store.load_snapshot(session_id)
+        if snap is None:
+            return None
+
+        self._make_room()
+        with self._lock:
+            # another thread may have loaded it meanwhile
+            s = self._sessions.get(session_id)
+            if s is None:
+                s = CachedSession.from_snapshot(snap)
+                self._insert(s)
+            return s
+
+    def _insert(self, s: CachedSession):
+        self._sessions[s.id] = s
+        self._sessions.move_to_end(s.id)
+        self._evict()
+
+    def _make_room(self):
+        """
+        Called before inserting, without the lock held. Dirty sessions can't be
+        evicted, so when the flusher falls behind, or keeps failing, a full cache
+        is flushed right here. A failing flush raises to the caller and nothing is
+        inserted: the cache stays bounded and the back-pressure reaches the request.
+        """
+        with self._lock:
+            self._evict()
+            if len(self._sessions) < self.capacity:
+                return
+        self.flush()
+
+    def _evict(self):
+        # Drop least recently used clean sessions. Dirty ones stay until flushed.
+        over = len(self._sessions) - self.capacity
+        if over <= 0:
+            return
+        for sid in list(self._sessions):
+            if over <= 0:
+                break
+            if not self._sessions[sid].dirty and sid not in self._in_flight:
+                del self._sessions[sid]
+                over -= 1
+        if over > 0:
+            self._wake.set()
+
+    def _pin(self, s: CachedSession) -> CachedSession:
+        # Caller holds the lock. Make sure we mutate the copy the cache owns,
+        # even if `s` was evicted between lookup and mutation.
+        current = self._sessions.get(s.id)
+        if current is None:
+            self._sessions[s.id] = s
+            return s
+        return current
+
+    # ---------- write-behind ----------
+
+    def _flush_loop(self):
+        while not self._stop.is_set():
+            self._wake.wait(self.flush_interval)
+            self._wake.clear()
+            try:
+                self.flush()
+            except Exception as e:
+                print(f"[CachedSessionStore] Flush failed, will retry: {e}")
+
+    def flush(self) -> int:
+        """
+        Write all pending attempts, counters and schedules in one transaction.
+        Returns the number of attempts written.
+        """
+        with self._flush_lock:
+            with self._lock:
+                attempts = self._pending_attempts
+                self._pending_attempts = []
+                counters = {}
+                schedules = {}
+                dirty_sessions = []
+                for s in self._sessions.values():
+                    if not s.dirty:
+                        continue
+                    dirty_sessions.append((s, s.dirty_counters, set(s.dirty_topics)))
+                    if s.dirty_counters:
+                        counters[s.id] = {
+                            "total": s.total,
+                            "correct": s.correct,
+                            "partial": s.partial,
+                            "incorrect": s.incorrect,
+                        }
+                    for t in s.dirty_topics:
+                        schedules[(s.id, t)] = s.schedules[t]
+                    s.dirty_counters = False
+                    s.dirty_topics = set()
+                    self._in_flight.add(s.id)
+
+            if not attempts and not counters and not schedules:
+                return 0
+
+            try:
+                self.db_store.apply_batch(attempts, counters, schedules)
+            except Exception:
+                # put everything back so the next flush retries it
+                with self._lock:
+                    self._pending_attempts = attempts + self._pending_attempts
+                    for s, dirty_counters, dirty_topics in dirty_sessions:
+                        s.dirty_counters = s.dirty_counters or dirty_counters
+                        s.dirty_topics |= dirty_topics
+                raise
+            finally:
+                with self._lock:
+                    self._in_flight.clear()
+
+        with self._lock:
+            self._evict()
+        return len(attempts)
+
+    def close(self):
+        self._stop.set()
+        self._wake.set()
+        if self._flusher is not None:
+            self._flusher.join(timeout=5)
+        self.flush()
+
+    # ---------- DBSessionStore interface ----------
+
+    def create(self, focus: str | None, workspace: str = "default"):
+        self._make_room()
+        row = self.db_store.create(focus, workspace)
+        s = CachedSession(row.id, row.focus, workspace=row.workspace)
+        with self._lock:
+            self._insert(s)
+        return s
+
+    def get(self, session_id: str):
+        return self._lookup(session_id)
+
+    def record_attempt(
+        self, session_id: str, question: str, user_answer: str, grade: str, topic: str,
+        outcome: Outcome | None = None,
+    ):
+        s = self._lookup(session_id)
+        if s is None:
+            return None
+
+        outcome = outcome or grade_outcome(grade)
+        with self._lock:
+            s = self._pin(s)
+            setattr(s, outcome, getattr(s, outcome) + 1)
+            s.total += 1
+            s.dirty_counters = True
+
+            stats = s.topic_stats.get(topic)
+            if stats is None:
+                stats = s.topic_stats[topic] = [0, 0, 0]
+            stats[_OUTCOME_INDEX[outcome]] += 1
+
+            self._pending_attempts.append({
+                "session_id": session_id,
+                "question": question,
+                "user_answer": user_answer,
+                "grade": grade,
+                "outcome": outcome.value,
+                "topic": topic,
+            })
+            if len(self._pending_attempts) >= self.flush_batch_size:
+                self._wake.set()
+        if self.write_through:
+            self.flush()
+        return s
+
+    def update_review_schedule(self, session_id: str, topic: str, grade: str, outcome: Outcome | None = None):
+        s = self._lookup(session_id)
+        if s is None:
+            return
+
+        with self._lock:
+            s = self._pin(s)
+            interval_days, ease_factor, _ = s.schedules.get(topic, (1, 2.5, None))
+            s.schedules[topic] = next_schedule(interval_days, ease_factor, outcome or grade_outcome(grade))
+            s.dirty_topics.add(topic)
+        if self.write_through:
+            self.flush()
+
+    def asked_questions(self, session_id: str) -> set[str]:
+        asked = self.db_store.asked_questions(session_id)
+        with self._lock:
+            asked.update(a["question"] for a in self._pending_attempts if a["session_id"] == session_id)
+        return asked
+
+    def summary(self, session_id: str):
+        s = self._lookup(session_id)
+        return s.summary() if s else None
+
+    def weak_areas(self, session_id: str):
+        s = self._lookup(session_id)
+        if s is None:
+            return None
+
+        ranked = []
+        for topic, (c, p, i) in s.topic_stats.items():
+            ranked.append({
+                "topic": topic,
+                "stats": {"correct": c, "partial": p, "incorrect": i},
+                "weakness_score": i + p,
+            })
+        ranked.sort(key=lambda x: x["weakness_score"], reverse=True)
+        return ranked
+
+    def topic_difficulty(self, session_id: str, topic: str | None):
+        if not topic:
+            return "medium"
+
+        s = self._lookup(session_id)
+        if s is None:
+            return "medium"
+
+        c, p, i = s.topic_stats.get(topic, (0, 0, 0))
+        return difficulty_from_stats(c, p, i)
+
+    def due_topics(self, session_id: str):
+        s = self._lookup(session_id)
+        if s is None:
+            return []
+
+        now = datetime.utcnow()
+        due = [
+            (due_at, ease_factor, t)
+            for t, (_, ease_factor, due_at) in s.schedules.items()
+            if due_at and due_at <= now
+        ]
+        # same urgency order as DBSessionStore.due_topics
+        due.sort()
+        return [t for _, _, t in due]
+
+    def due_schedule(self, until: datetime, limit: int | None = None):
+        # the cross-session pass runs in SQL, so land buffered schedule writes first
+        self.flush()
+        return self.db_store.due_schedule(until, limit)
+
+    def stats(self):
+        with self._lock:
+            return {
+                "cached_sessions": len(self._sessions),
+                "capacity": self.capacity,
+                "pending_attempts": len(self._pending_attempts),
+                "dirty_sessions": sum(1 for s in self._sessions.values() if s.dirty),
+            }
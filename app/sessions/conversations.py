@@ -0,0 +1,208 @@
+# app/sessions/conversations.py
+"""
+Server-side state for multi-turn /rag/conversation/ask.
+
+A conversation keeps its last CONVERSATION_MAX_TURNS turns (question, answer,
+chunk_ids) and a context window: the chunks retrieved so far, with their
+stored vectors, most recently used last, capped at CONVERSATION_WINDOW_CHUNKS.
+
+Each follow-up is embedded once and scored against the window. When the mean
+similarity of its k best window chunks reaches CONVERSATION_REUSE_MIN_SCORE,
+the answer context is picked from the window (MMR + rerank, no vector search).
+Otherwise the topic has drifted: one vector search runs, and its candidates
+are ranked together with the window chunks, so "and how does that compare to
+X?" can cite both the earlier chunks and the new ones. New chunks extend the
+window; chunks of deleted sources are dropped through the store's change log.
+
+In-memory and per process, like the session cache: bounded by
+CONVERSATION_MAX_ACTIVE (LRU) and CONVERSATION_TTL_SECONDS of inactivity.
+"""
+import threading
+import time
+import uuid
+from collections import OrderedDict, deque
+
+import numpy as np
+
+from app.core.config import settings
+
+
+class Turn:
+    __slots__ = ("question", "answer", "chunk_ids", "retrieval", "similarity")
+
+    def __init__(self, question: str, answer: str, chunk_ids: list[str], retrieval: str, similarity: float | None):
+        self.question = question
+        self.answer = answer
+        self.chunk_ids = chunk_ids
+        self.retrieval = retrieval   # "search" | "reuse"
+        self.similarity = similarity
+
+    def to_dict(self) -> dict:
+        return {
+            "question": self.question,
+            "answer": self.answer,
+            "chunk_ids": self.chunk_ids,
+            "retrieval": self.retrieval,
+            "similarity": self.similarity,
+        }
+
+
+class Conversation:
+    def __init__(self, conversation_id: str, workspace: str, sources: list[str] | None):
+        self.id = conversation_id
+        self.workspace = workspace
+        self.sources = sources
+        self.turns: deque[Turn] = deque(maxlen=settings.CONVERSATION_MAX_TURNS)
+        self.turn_count = 0   # turns ever recorded; `turns` only keeps the last few
+        # point id -> (unit vector, Document), least recently used first
+        self.window: OrderedDict = OrderedDict()
+        self.seq = 0   # store change log position the window is valid for
+        self.lock = threading.Lock()
+        self.last_used = time.monotonic()
+
+    def set_sources(self, sources: list[str]):
+        """
+        Re-scope the conversation; an empty list searches every source.
+        """
+        sources = sources or None
+        if sorted(sources or []) != sorted(self.sources or []):
+            self.sources = sources
+            self.window.clear()
+
+    def history(self, limit: int) -> list[tuple[str, str]]:
+        return [(t.question, t.answer) for t in list(self.turns)[-limit:]] if limit else []
+
+    def _sync(self, store):
+        seq, changes = store.changes_since(self.seq)
+        self.seq = seq
+        if changes is None or any(op == "reset" for op, _ in changes):
+            self.window.clear()
+            return
+        deleted = {source for op, source in changes if op == "delete"}
+        if deleted:
+            for key in [key for key, (_, doc) in self.window.items() if doc.metadata.get("source") in deleted]:
+                del self.window[key]
+
+    def _remember(self, candidates):
+        for point_id, _, vec, doc in candidates:
+            self.window[point_id] = (vec, doc)
+            self.window.move_to_end(point_id)
+        while len(self.window) > settings.CONVERSATION_WINDOW_CHUNKS:
+            self.window.popitem(last=False)
+
+    def retrieve(self, store, question: str, k: int, profile) -> tuple[list, str, float | None]:
+        """
+        (documents, "search" | "reuse", window similarity) for the next turn.
+        Call with self.lock held.
+        """
+        self._sync(store)
+        query_vec = np.asarray(store.embeddings.embed_query(question), dtype=np.float32)
+        norm = np.linalg.norm(query_vec)
+        unit = query_vec / norm if norm else query_vec
+
+        window = [(point_id, float(vec @ unit), vec, doc) for point_id, (vec, doc) in self.window.items()]
+        window.sort(key=lambda c: c[1], reverse=True)
+        similarity = round(float(np.mean([c[1] for c in window[:k]])), 4) if window else None
+
+        if similarity is not None and similarity >= settings.CONVERSATION_REUSE_MIN_SCORE:
+            retrieval = "reuse"
+            candidates = window
+        else:
+            retrieval = "search"
+            found = store.vector_candidates(query_vec.tolist(), profile.candidate_k(k), self.sources, profile)
+            fresh = [
+                (point_id, score, _unit(vec), doc)
+                for point_id, score, vec, doc in found
+                if point_id not in self.window
+            ]
+            candidates = sorted(fresh + window, key=lambda c: c[1], reverse=True)
+
+        candidates = candidates[:profile.candidate_k(k)]
+        if profile.score_threshold is not None:
+            candidates = [c for c in candidates if c[1] >= profile.score_threshold]
+        if not candidates:
+            return [], retrieval, similarity
+
+        docs = store.select(question, unit, [c[3] for c in candidates], [c[2] for c in candidates], k, profile)
+        used = {id(doc) for doc in docs}
+        self._remember([c for c in candidates if id(c[3]) in used])
+        return docs, retrieval, similarity
+
+
+def _unit(vec) -> np.ndarray:
+    v = np.asarray(vec, dtype=np.float32)
+    norm = np.linalg.norm(v)
+    return v / norm if norm else v
+
+
+class ConversationStore:
+    """
+    Bounded, thread-safe map of live conversations (LRU + idle TTL).
+    """
+
+    def __init__(self, max_active: int | None = None, ttl_seconds: float | None = None):
+        self.max_active = max_active or settings.CONVERSATION_MAX_ACTIVE
+        self.ttl_seconds = ttl_seconds or settings.CONVERSATION_TTL_SECONDS
+        self._items: OrderedDict[str, Conversation] = OrderedDict()
+        self._lock = threading.Lock()
+        self.turns = 0
+        self.searches = 0
+        self.reuses = 0
+        self.evicted = 0
+
+    def create(self, workspace: str, sources: list[str] | None) -> Conversation:
+        conversation = Conversation(str(uuid.uuid4()), workspace, sources)
+        with self._lock:
+            self._purge()
+            self._items[conversation.id] = conversation
+            while len(self._items) > self.max_active:
+                self._items.popitem(last=False)
+                self.evicted += 1
+        return conversation
+
+    def get(self, conversation_id: str) -> Conversation | None:
+        with self._lock:
+            conversation = self._items.get(conversation_id)
+            if conversation is None:
+                return None
+            if time.monotonic() - conversation.last_used > self.ttl_seconds:
+                del self._items[conversation_id]
+                self.evicted += 1
+                return None
+            conversation.last_used = time.monotonic()
+            self._items.move_to_end(conversation_id)
+            return conversation
+
+    def delete(self, conversation_id: str) -> bool:
+        with self._lock:
+            return self._items.pop(conversation_id, None) is not None
+
+    def record(self, conversation: Conversation, turn: Turn):
+        conversation.turns.append(turn)
+        conversation.turn_count += 1
+        with self._lock:
+            self.turns += 1
+            if turn.retrieval == "reuse":
+                self.reuses += 1
+            else:
+                self.searches += 1
+
+    def _purge(self):
+        now = time.monotonic()
+        # least recently used first: stop at the first live one
+        for conversation_id, conversation in list(self._items.items()):
+            if now - conversation.last_used <= self.ttl_seconds:
+                break
+            del self._items[conversation_id]
+            self.evicted += 1
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "active": len(self._items),
+                "turns": self.turns,
+                "searches": self.searches,
+                "reuses": self.reuses,
+                "reuse_rate": round(self.reuses / self.turns, 3) if self.turns else 0.0,
+                "evicted": self.evicted,
+            }
@@ -2,17 +2,18 @@ import uuid
 from sqlalchemy.orm import Session
 from app.db import SessionLocal
 from app.models import TestSessionModel, AttemptModel
-from datetime import datetime, timedelta
+from datetime import datetime
 from app.models import ReviewScheduleModel
+from app.sessions.grading import Outcome, attempt_outcome, grade_outcome, difficulty_from_stats, next_schedule
 
 
 class DBSessionStore:
-    def create(self, focus: str | None):
+    def create(self, focus: str | None, workspace: str = "default"):
         db: Session = SessionLocal()
         try:
             sid = str(uuid.uuid4())
             s = TestSessionModel(
-                id=sid, focus=focus, total=0, correct=0, partial=0, incorrect=0
+                id=sid, workspace=workspace, focus=focus, total=0, correct=0, partial=0, incorrect=0
             )
             db.add(s)
             db.commit()
@@ -28,20 +29,19 @@ class DBSessionStore:
         finally:
             db.close()
 
-    def record_attempt(self, session_id: str, question: str, user_answer: str, grade: str, topic: str):
+    def record_attempt(
+        self, session_id: str, question: str, user_answer: str, grade: str, topic: str,
+        outcome: Outcome | None = None,
+    ):
         db: Session = SessionLocal()
         try:
             s = db.query(TestSessionModel).filter(TestSessionModel.id == session_id).first()
             if not s:
                 return None
 
-            g = grade.lower()
-            if "correct" in g and "partial" not in g:
-                s.correct += 1
-            elif "partial" in g:
-                s.partial += 1
-            else:
-                s.incorrect += 1
+            # graded locally (quiz MCQs) = known outcome; LLM-graded = parse the grade text
+            outcome = outcome or grade_outcome(grade)
+            setattr(s, outcome, getattr(s, outcome) + 1)
             s.total += 1
 
             a = AttemptModel(
@@ -49,6 +49,7 @@ class DBSessionStore:
                 question=question,
                 user_answer=user_answer,
                 grade=grade,
+                outcome=outcome.value,
                 topic=topic,
             )
             db.add(a)
@@ -66,6 +67,7 @@ class DBSessionStore:
                 return None
             return {
                 "session_id": s.id,
+                "workspace": s.workspace,
                 "focus": s.focus,
                 "total": s.total,
                 "correct": s.correct,
@@ -84,13 +86,7 @@ class DBSessionStore:
                 t = a.topic or "general"
                 if t not in stats:
                     stats[t] = {"correct": 0, "partial": 0, "incorrect": 0}
-                g = a.grade.lower()
-                if "correct" in g and "partial" not in g:
-                    stats[t]["correct"] += 1
-                elif "partial" in g:
-                    stats[t]["partial"] += 1
-                else:
-                    stats[t]["incorrect"] += 1
+                stats[t][attempt_outcome(a.outcome, a.grade)] += 1
 
             ranked = []
             for topic, s in stats.items():
@@ -109,7 +105,6 @@ class DBSessionStore:
 
         db: Session = SessionLocal()
         try:
-            from app.models import AttemptModel
             attempts = (
                 db.query(AttemptModel)
                 .filter(AttemptModel.session_id == session_id)
@@ -117,33 +112,14 @@ class DBSessionStore:
                 .all()
             )
 
-            if not attempts:
-                return "medium"
-
-            correct = 0
-            partial = 0
-            incorrect = 0
-
+            counts = {"correct": 0, "partial": 0, "incorrect": 0}
             for a in attempts:
-                g = a.grade.lower()
-                if "correct" in g and "partial" not in g:
-                    correct += 1
-                elif "partial" in g:
-                    partial += 1
-                else:
-                    incorrect += 1
-
-            strength = correct - incorrect - 0.5 * partial
-
-            if strength <= -1:
-                return "easy"
-            elif strength >= 2:
-                return "hard"
-            else:
-                return "medium"
+                counts[attempt_outcome(a.outcome, a.grade)] += 1
+
+            return difficulty_from_stats(**counts)
         finally:
             db.close()
-    def update_review_schedule(self, session_id: str, topic: str, grade: str):
+    def update_review_schedule(self, session_id: str, topic: str, grade: str, outcome: Outcome | None = None):
         db: Session = SessionLocal()
         try:
             sched = (
@@ -165,21 +141,9 @@ class DBSessionStore:
                 db.commit()
                 db.refresh(sched)
 
-            g = grade.lower()
-
-            if "correct" in g and "partial" not in g:
-                # successful recall → increase interval
-                sched.interval_days = int(sched.interval_days * sched.ease_factor)
-                sched.ease_factor = min(sched.ease_factor + 0.1, 3.0)
-            elif "partial" in g:
-                # small progress
-                sched.interval_days = max(1, int(sched.interval_days * 1.2))
-            else:
-                # failed recall → reset
-                sched.interval_days = 1
-                sched.ease_factor = max(1.3, sched.ease_factor - 0.2)
-
-            sched.next_review_at = datetime.utcnow() + timedelta(days=sched.interval_days)
+            sched.interval_days, sched.ease_factor, sched.next_review_at = next_schedule(
+                sched.interval_days, sched.ease_factor, outcome or grade_outcome(grade)
+            )
 
             db.commit()
         finally:
@@ -189,13 +153,147 @@ class DBSessionStore:
         db: Session = SessionLocal()
         try:
             now = datetime.utcnow()
+            # most overdue first; among equally overdue, the hardest (lowest ease) first
             rows = (
-                db.query(ReviewScheduleModel)
+                db.query(ReviewScheduleModel.topic)
                 .filter(ReviewScheduleModel.session_id == session_id)
                 .filter(ReviewScheduleModel.next_review_at <= now)
+                .order_by(ReviewScheduleModel.next_review_at, ReviewScheduleModel.ease_factor)
                 .all()
             )
             return [r.topic for r in rows]
         finally:
             db.close()
 
+    def due_schedule(self, until: datetime, limit: int | None = None):
+        """
+        Review items due before `until` across ALL sessions, in one query.
+        Returns session_id -> [{topic, interval_days, ease_factor, next_review_at}],
+        each list in urgency order.
+        """
+        db: Session = SessionLocal()
+        try:
+            q = (
+                db.query(
+                    ReviewScheduleModel.session_id,
+                    ReviewScheduleModel.topic,
+                    ReviewScheduleModel.interval_days,
+                    ReviewScheduleModel.ease_factor,
+                    ReviewScheduleModel.next_review_at,
+                )
+                .filter(ReviewScheduleModel.next_review_at <= until)
+                .order_by(ReviewScheduleModel.next_review_at, ReviewScheduleModel.ease_factor)
+            )
+            if limit:
+                q = q.limit(limit)
+
+            due = {}
+            for sid, topic, interval_days, ease_factor, next_review_at in q.all():
+                due.setdefault(sid, []).append({
+                    "topic": topic,
+                    "interval_days": interval_days,
+                    "ease_factor": ease_factor,
+                    "next_review_at": next_review_at,
+                })
+            return due
+        finally:
+            db.close()
+
+
+    def asked_questions(self, session_id: str) -> set[str]:
+        db: Session = SessionLocal()
+        try:
+            rows = (
+                db.query(AttemptModel.question)
+                .filter(AttemptModel.session_id == session_id)
+                .all()
+            )
+            return {r.question for r in rows}
+        finally:
+            db.close()
+
+    def load_snapshot(self, session_id: str):
+        """
+        Everything the in-memory tier needs for one session, in one DB round trip.
+        Returns None if the session does not exist.
+        """
+        db: Session = SessionLocal()
+        try:
+            s = db.query(TestSessionModel).filter(TestSessionModel.id == session_id).first()
+            if not s:
+                return None
+
+            topic_stats = {}
+            for topic, grade, outcome in (
+                db.query(AttemptModel.topic, AttemptModel.grade, AttemptModel.outcome)
+                .filter(AttemptModel.session_id == session_id)
+                .all()
+            ):
+                t = topic or "general"
+                if t not in topic_stats:
+                    topic_stats[t] = {"correct": 0, "partial": 0, "incorrect": 0}
+                topic_stats[t][attempt_outcome(outcome, grade)] += 1
+
+            schedules = {
+                r.topic: (r.interval_days, r.ease_factor, r.next_review_at)
+                for r in db.query(ReviewScheduleModel)
+                .filter(ReviewScheduleModel.session_id == session_id)
+                .all()
+            }
+
+            return {
+                "id": s.id,
+                "workspace": s.workspace,
+                "focus": s.focus,
+                "total": s.total,
+                "correct": s.correct,
+                "partial": s.partial,
+                "incorrect": s.incorrect,
+                "topic_stats": topic_stats,
+                "schedules": schedules,
+            }
+        finally:
+            db.close()
+
+    def apply_batch(self, attempts: list[dict], counters: dict, schedules: dict):
+        """
+        Write-behind flush target.
+        attempts:  list of AttemptModel column dicts to insert
+        counters:  session_id -> {total, correct, partial, incorrect} (absolute values)
+        schedules: (session_id, topic) -> (interval_days, ease_factor, next_review_at)
+        """
+        db: Session = SessionLocal()
+        try:
+            if attempts:
+                db.bulk_insert_mappings(AttemptModel, attempts)
+
+            if counters:
+                db.bulk_update_mappings(
+                    TestSessionModel,
+                    [{"id": sid, **c} for sid, c in counters.items()],
+                )
+
+            if schedules:
+                existing = {}
+                for sid in {sid for sid, _ in schedules}:
+                    for r in db.query(ReviewScheduleModel).filter(ReviewScheduleModel.session_id == sid).all():
+                        existing[(r.session_id, r.topic)] = r
+
+                for (sid, topic), (interval_days, ease_factor, next_review_at) in schedules.items():
+                    sched = existing.get((sid, topic))
+                    if sched is None:
+                        sched = ReviewScheduleModel(session_id=sid, topic=topic)
+                        db.add(sched)
+                    sched.interval_days = interval_days
+                    sched.ease_factor = ease_factor
+                    sched.next_review_at = next_review_at
+
+            db.commit()
+        finally:
+            db.close()
+
+    def stats(self):
+        return {"cached_sessions": 0}
+
+    def close(self):
+        pass
@@ -0,0 +1,64 @@
+from datetime import datetime, timedelta
+from enum import StrEnum
+
+
+class Outcome(StrEnum):
+    CORRECT = "correct"
+    PARTIAL = "partial"
+    INCORRECT = "incorrect"
+
+
+def grade_outcome(grade: str) -> Outcome:
+    """
+    Map free-text grader output to one of: correct, partial, incorrect.
+    """
+    g = grade.lower()
+    if "incorrect" in g:
+        return Outcome.INCORRECT
+    if "partial" in g:
+        return Outcome.PARTIAL
+    if "correct" in g:
+        return Outcome.CORRECT
+    return Outcome.INCORRECT
+
+
+def attempt_outcome(outcome: str | None, grade: str | None) -> Outcome:
+    """
+    The recorded outcome of a stored attempt; attempts from before outcomes were
+    stored fall back to parsing the grade text.
+    """
+    return Outcome(outcome) if outcome else grade_outcome(grade or "")
+
+
+def difficulty_from_stats(correct: int, partial: int, incorrect: int) -> str:
+    if correct == 0 and partial == 0 and incorrect == 0:
+        return "medium"
+
+    strength = correct - incorrect - 0.5 * partial
+
+    if strength <= -1:
+        return "easy"
+    elif strength >= 2:
+        return "hard"
+    else:
+        return "medium"
+
+
+def next_schedule(interval_days: int, ease_factor: float, outcome: Outcome, now: datetime | None = None):
+    """
+    SM-2 style update. Returns (interval_days, ease_factor, next_review_at).
+    """
+    if outcome == "correct":
+        # successful recall → increase interval
+        interval_days = int(interval_days * ease_factor)
+        ease_factor = min(ease_factor + 0.1, 3.0)
+    elif outcome == "partial":
+        # small progress
+        interval_days = max(1, int(interval_days * 1.2))
+    else:
+        # failed recall → reset
+        interval_days = 1
+        ease_factor = max(1.3, ease_factor - 0.2)
+
+    now = now or datetime.utcnow()
+    return interval_days, ease_factor, now + timedelta(days=interval_days)
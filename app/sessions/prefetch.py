@@ -0,0 +1,167 @@
+# app/sessions/prefetch.py
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+
+from app.core.config import settings
+
+
+class _Slot:
+    __slots__ = ("key", "future", "created_at")
+
+    def __init__(self, key, future: Future):
+        self.key = key
+        self.future = future
+        self.created_at = time.monotonic()
+
+
+class QuestionPrefetcher:
+    """
+    One speculative "next question" slot per session.
+
+    schedule() starts generating in a background thread; take() hands the result
+    over if it was generated for the same key (focus, sources, k). A mismatched,
+    expired or replaced slot counts as a wasted generation. At most
+    `max_outstanding` generations run at once; beyond that, speculation is skipped.
+    Slots older than `ttl_seconds` are dropped by the next schedule(), so abandoned
+    sessions don't keep theirs forever.
+    """
+
+    def __init__(
+        self,
+        max_outstanding: int | None = None,
+        ttl_seconds: float | None = None,
+        wait_seconds: float | None = None,
+    ):
+        self.max_outstanding = max_outstanding or settings.PREFETCH_MAX_OUTSTANDING
+        self.ttl_seconds = ttl_seconds or settings.PREFETCH_TTL_SECONDS
+        # how long take() will wait for an in-flight generation before giving up
+        self.wait_seconds = wait_seconds if wait_seconds is not None else settings.PREFETCH_WAIT_SECONDS
+
+        self._executor = ThreadPoolExecutor(max_workers=self.max_outstanding, thread_name_prefix="prefetch")
+        self._slots: dict[str, _Slot] = {}
+        self._outstanding = 0
+        self._lock = threading.Lock()
+
+        self.scheduled = 0
+        self.skipped = 0
+        self.hits = 0
+        self.misses = 0
+        self.wasted = 0
+        self.failed = 0
+
+    def schedule(self, session_id: str, key, fn, *args) -> bool:
+        # the slot exists before the work starts, so take() can always find it
+        future = Future()
+        future.add_done_callback(self._done)
+        with self._lock:
+            # slots of abandoned sessions are never taken: drop them once expired
+            dropped = self._purge()
+            admitted = self._outstanding < self.max_outstanding
+            if admitted:
+                self._outstanding += 1
+                self.scheduled += 1
+                old = self._slots.pop(session_id, None)
+                if old is not None:
+                    self.wasted += 1
+                    dropped.append(old)
+                self._slots[session_id] = _Slot(key, future)
+            else:
+                self.skipped += 1
+
+        for slot in dropped:
+            slot.future.cancel()
+        if admitted:
+            self._executor.submit(self._run, future, fn, args)
+        return admitted
+
+    def _purge(self) -> list[_Slot]:
+        # caller holds the lock; slots are in creation order, so stop at the first live one
+        now = time.monotonic()
+        expired = []
+        for session_id, slot in list(self._slots.items()):
+            if now - slot.created_at <= self.ttl_seconds:
+                break
+            expired.append(self._slots.pop(session_id))
+        self.wasted += len(expired)
+        return expired
+
+    @staticmethod
+    def _run(future: Future, fn, args):
+        if not future.set_running_or_notify_cancel():
+            return
+        try:
+            future.set_result(fn(*args))
+        except BaseException as e:
+            future.set_exception(e)
+
+    def _done(self, future: Future):
+        with self._lock:
+            self._outstanding -= 1
+            if not future.cancelled() and future.exception() is not None:
+                self.failed += 1
+
+    def take(self, session_id: str, key):
+        """
+        Return the prefetched result for this session if it matches `key`, else None.
+        """
+        with self._lock:
+            slot = self._slots.pop(session_id, None)
+
+        if slot is None:
+            with self._lock:
+                self.misses += 1
+            return None
+
+        stale = slot.key != key or time.monotonic() - slot.created_at > self.ttl_seconds
+        result = None
+        if not stale:
+            try:
+                result = slot.future.result(timeout=self.wait_seconds)
+            except Exception:
+                result = None
+
+        with self._lock:
+            if result is None:
+                self.misses += 1
+                if stale or not slot.future.done():
+                    self.wasted += 1
+            else:
+                self.hits += 1
+        if result is None:
+            slot.future.cancel()
+        return result
+
+    def invalidate(self, session_id: str | None = None):
+        """
+        Drop one session's slot, or every slot (e.g. after the corpus changed).
+        """
+        with self._lock:
+            if session_id is None:
+                dropped = list(self._slots.values())
+                self._slots.clear()
+            else:
+                slot = self._slots.pop(session_id, None)
+                dropped = [slot] if slot else []
+            self.wasted += len(dropped)
+        for slot in dropped:
+            slot.future.cancel()
+
+    def stats(self):
+        with self._lock:
+            served = self.hits + self.misses
+            return {
+                "slots": len(self._slots),
+                "outstanding": self._outstanding,
+                "max_outstanding": self.max_outstanding,
+                "scheduled": self.scheduled,
+                "skipped": self.skipped,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / served, 3) if served else 0.0,
+                "wasted": self.wasted,
+                "failed": self.failed,
+            }
+
+    def close(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
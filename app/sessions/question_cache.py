@@ -0,0 +1,48 @@
+# app/sessions/question_cache.py
+import threading
+import time
+
+
+class QuestionCache:
+    """
+    Small thread-safe TTL cache for generated questions, keyed by (session_id, topic).
+    Entries are single-use: pop() removes them so a learner never sees the same one twice.
+    """
+
+    def __init__(self, ttl_seconds: float = 3600, max_entries: int = 10000):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._items: dict = {}
+        self._lock = threading.Lock()
+
+    def put(self, key, value: dict):
+        with self._lock:
+            if len(self._items) >= self.max_entries:
+                self._purge()
+            if len(self._items) >= self.max_entries:
+                # still full of live entries: drop the oldest
+                self._items.pop(next(iter(self._items)))
+            self._items[key] = (time.monotonic() + self.ttl_seconds, value)
+
+    def pop(self, key) -> dict | None:
+        with self._lock:
+            item = self._items.pop(key, None)
+        if item is None:
+            return None
+        expires_at, value = item
+        if expires_at < time.monotonic():
+            return None
+        return value
+
+    def __contains__(self, key) -> bool:
+        with self._lock:
+            item = self._items.get(key)
+        return item is not None and item[0] >= time.monotonic()
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    def _purge(self):
+        now = time.monotonic()
+        for key in [k for k, (exp, _) in self._items.items() if exp < now]:
+            del self._items[key]
@@ -0,0 +1,231 @@
+# app/vectorstore/base.py
+"""
+The vector-store interface the rest of the app codes against, and the factory
+picking a backend from VECTOR_BACKEND:
+
+    qdrant  QdrantStore: embedded local Qdrant, or a Qdrant server (QDRANT_URL)
+    numpy   NumpyStore: exact search over a memory-mapped matrix per workspace
+
+Backends implement storage and candidate retrieval; the MMR + light rerank
+selection, the change log read by the materialized default queries, and the
+chunk ordering are shared here.
+"""
+import threading
+from abc import ABC, abstractmethod
+from collections import deque
+
+import numpy as np
+from langchain_core.documents import Document
+
+from app.core.config import settings
+from app.vectorstore.search_profiles import SearchProfile, get_search_profile
+
+DEFAULT_COLLECTION = "learning_copilot"
+VECTOR_BACKENDS = ("qdrant", "numpy")
+
+
+def chunk_order(doc: Document):
+    # page order for PDFs, time order for transcripts
+    return doc.metadata.get("page") or doc.metadata.get("start_seconds") or 0
+
+
+class VectorStore(ABC):
+    def __init__(self, collection_name: str = DEFAULT_COLLECTION, embeddings=None):
+        self.collection_name = collection_name
+        if embeddings is None:
+            from app.embeddings.gemini_embeddings import get_embedding_model
+
+            embeddings = get_embedding_model()
+        # any LangChain Embeddings (the offline benchmarks pass deterministic ones)
+        self.embeddings = embeddings
+        # (seq, op, source) for every add/delete, read by the materialized default queries
+        self._changes: deque = deque(maxlen=256)
+        self._seq = 0
+        self._changes_lock = threading.Lock()
+
+    # ---------- the interface ----------
+
+    @property
+    @abstractmethod
+    def exists(self) -> bool:
+        """
+        False until the first ingest created the collection.
+        """
+
+    @abstractmethod
+    def add_texts(self, texts: list[str], metadatas: list[dict] | None = None, vectors: list | None = None):
+        """
+        Embed and store chunks (one embedding call); logs an "add" per source.
+        `vectors` are embed_documents(texts) computed by the caller, stored as given.
+        """
+
+    @abstractmethod
+    def search(
+        self,
+        query: str,
+        k: int = 5,
+        sources: list[str] | None = None,
+        topic: str | None = None,
+        profile: SearchProfile | None = None,
+    ) -> list[Document]:
+        """
+        The k chunks for a query, optionally limited to sources / a topic.
+        """
+
+    @abstractmethod
+    def delete_by_source(self, source: str) -> int:
+        """
+        Drop every chunk of a source; logs a "delete".
+        """
+
+    @abstractmethod
+    def list_sources(self) -> list[str]:
+        """
+        Sorted sources that have chunks stored.
+        """
+
+    @abstractmethod
+    def count(self) -> int:
+        """
+        Number of stored chunks.
+        """
+
+    @abstractmethod
+    def get_chunks(self, source: str) -> list[Document]:
+        """
+        All stored chunks of one source, in page (or transcript time) order.
+        """
+
+    @abstractmethod
+    def vector_candidates(
+        self,
+        vector: list[float],
+        limit: int,
+        sources: list[str] | None = None,
+        profile: SearchProfile | None = None,
+    ) -> list[tuple]:
+        """
+        (stable id, score, stored vector, Document) nearest to a precomputed query vector,
+        best first. A profile adds its vector-search parameters and score threshold.
+        """
+
+    def search_batch(
+        self,
+        queries: list[str],
+        k: int = 5,
+        sources: list[str] | None = None,
+        topic: str | None = None,
+        profile: SearchProfile | None = None,
+    ) -> list[list[Document]]:
+        """
+        search() for many queries; backends override it to batch the embedding call and the lookup.
+        """
+        return [self.search(q, k=k, sources=sources, topic=topic, profile=profile) for q in queries]
+
+    def reload(self):
+        """
+        Re-read the collection after it was replaced underneath us (snapshot import).
+        """
+        self._log_change("reset")
+
+    # ---------- change log ----------
+
+    def _log_change(self, op: str, source: str | None = None):
+        with self._changes_lock:
+            self._seq += 1
+            self._changes.append((self._seq, op, source))
+
+    def changes_since(self, seq: int) -> tuple[int, list[tuple[str, str | None]] | None]:
+        """
+        (latest seq, [(op, source), ...] logged after `seq`), or None for the
+        list when the log no longer reaches back that far.
+        """
+        with self._changes_lock:
+            if seq == self._seq:
+                return seq, []
+            if not self._changes or self._changes[0][0] > seq + 1:
+                return self._seq, None
+            return self._seq, [(op, source) for s, op, source in self._changes if s > seq]
+
+    # ---------- selection ----------
+
+    def select(
+        self,
+        query: str,
+        query_vec,
+        docs: list[Document],
+        doc_vecs,
+        k: int,
+        profile: SearchProfile | None = None,
+    ) -> list[Document]:
+        """
+        The MMR + light rerank steps of search(), on candidates (best first) whose
+        vectors are already known. A profile without MMR keeps the top k as ranked.
+        """
+        profile = profile or get_search_profile()
+        if profile.mmr:
+            selected = self._mmr_select(query_vec, doc_vecs, k=k, lambda_param=profile.mmr_lambda)
+            docs = [docs[i] for i in selected]
+        else:
+            docs = docs[:k]
+        return self._light_rerank(docs, query) if profile.rerank else docs
+
+    def _mmr_select(self, query_vec, doc_vecs, k: int, lambda_param: float = 0.5):
+        """
+        MMR: pick documents that are relevant to query and diverse among themselves.
+        Cosine similarities come from one normalised matrix; the running max
+        similarity to the selected set is updated with one product per pick.
+        """
+        if doc_vecs is None or len(doc_vecs) == 0:
+            return []
+
+        m = np.asarray(doc_vecs, dtype=np.float32)
+        norms = np.linalg.norm(m, axis=1)
+        norms[norms == 0] = np.inf   # zero vectors: similarity 0 to everything
+        unit = m / norms[:, None]
+        q = np.asarray(query_vec, dtype=np.float32)
+        q_norm = np.linalg.norm(q)
+        sim_to_query = unit @ (q / q_norm) if q_norm else np.zeros(len(m), dtype=np.float32)
+
+        # First pick: most similar to query
+        first = int(np.argmax(sim_to_query))
+        selected = [first]
+        remaining = np.ones(len(m), dtype=bool)
+        remaining[first] = False
+        sim_to_selected = unit @ unit[first]
+
+        while len(selected) < min(k, len(m)):
+            mmr = lambda_param * sim_to_query - (1 - lambda_param) * sim_to_selected
+            mmr[~remaining] = -np.inf
+            best = int(np.argmax(mmr))
+            selected.append(best)
+            remaining[best] = False
+            sim_to_selected = np.maximum(sim_to_selected, unit @ unit[best])
+
+        return selected
+
+    def _light_rerank(self, docs, query: str):
+        """
+        Simple lexical boost: prefer chunks that mention query terms more.
+        """
+        q_terms = [t.lower() for t in query.split() if t.strip()]
+
+        def score(doc):
+            text = doc.page_content.lower()
+            hits = sum(1 for t in q_terms if t in text)
+            return hits
+
+        return sorted(docs, key=score, reverse=True)
+
+
+def create_vector_store(collection_name: str = DEFAULT_COLLECTION, embeddings=None) -> VectorStore:
+    backend = settings.VECTOR_BACKEND
+    if backend == "qdrant":
+        from app.vectorstore.qdrant_store import QdrantStore
+
+        return QdrantStore(collection_name=collection_name, embeddings=embeddings)
+    if backend == "numpy":
+        from app.vectorstore.numpy_store import NumpyStore
+
+        return NumpyStore(collection_name=collection_name, embeddings=embeddings)
+    raise ValueError(f"VECTOR_BACKEND must be one of {VECTOR_BACKENDS}, not {backend!r}")
@@ -0,0 +1,196 @@
+# app/vectorstore/dedup_index.py
+import threading
+
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.db import SessionLocal
+from app.ingestion.dedup import bands, hamming, simhash, to_signed, to_unsigned
+from app.models import ChunkSignatureModel
+
+
+class DuplicateIndex:
+    """
+    SimHash signatures of every stored chunk in a workspace, persisted next to
+    the topic index and mirrored in memory as LSH bands for lookups.
+
+    Ingestors call filter() before embedding, so near-duplicates (boilerplate,
+    nav bars, sponsor reads, overlap artefacts) are never embedded or stored.
+    A chunk skipped as a cross-source duplicate is not restored if the source
+    that kept it is later deleted; reindex the other source to get it back.
+    """
+
+    def __init__(
+        self,
+        workspace: str = "default",
+        max_distance: int | None = None,
+        cross_source: bool | None = None,
+    ):
+        self.workspace = workspace
+        self.max_distance = max_distance if max_distance is not None else settings.DEDUP_MAX_HAMMING
+        self.cross_source = cross_source if cross_source is not None else settings.DEDUP_CROSS_SOURCE
+        self._lock = threading.Lock()
+        self._loaded = False
+        self._bands: dict[tuple[int, int], list[tuple[int, str]]] = {}
+        self._count = 0
+        self.skipped_within = 0
+        self.skipped_cross = 0
+
+    def _add(self, h: int, source: str):
+        for key in bands(h):
+            self._bands.setdefault(key, []).append((h, source))
+        self._count += 1
+
+    def _load(self):
+        if self._loaded:
+            return
+        db: Session = SessionLocal()
+        try:
+            rows = (
+                db.query(ChunkSignatureModel.simhash, ChunkSignatureModel.source)
+                .filter(ChunkSignatureModel.workspace == self.workspace)
+                .all()
+            )
+        finally:
+            db.close()
+        for h, source in rows:
+            self._add(to_unsigned(h), source)
+        self._loaded = True
+
+    def _match(self, h: int, source: str, skip_own: bool = False) -> str | None:
+        """
+        Source of a stored near-duplicate of `h`, if any (own source preferred).
+        skip_own ignores the source's own signatures (its chunks are being replaced).
+        """
+        found = None
+        for key in bands(h):
+            for other, other_source in self._bands.get(key, ()):
+                if hamming(h, other) > self.max_distance:
+                    continue
+                if other_source == source:
+                    if skip_own:
+                        continue
+                    return source
+                if self.cross_source:
+                    found = other_source
+        return found
+
+    def batch(self) -> "DuplicateIndex":
+        """
+        In-memory index for one ingest batch: pass it to filter() for every source of
+        the batch so later ones see the earlier ones' chunks before anything is recorded.
+        """
+        pending = DuplicateIndex(self.workspace, self.max_distance, self.cross_source)
+        pending._loaded = True
+        return pending
+
+    def filter(
+        self,
+        source: str,
+        chunks: list,
+        replace: bool = False,
+        batch: "DuplicateIndex | None" = None,
+    ) -> tuple[list, list[int], dict]:
+        """
+        Drop chunks that nearly duplicate a stored chunk or an earlier chunk of
+        this batch. Returns (kept chunks, their signatures, skipped counts).
+        With replace=True the source's stored chunks don't count: they are about
+        to be dropped in favour of these. Nothing is recorded; call record() once stored.
+        """
+        kept, signatures = [], []
+        within = cross = 0
+        with self._lock:
+            self._load()
+            pending = batch if batch is not None else DuplicateIndex(self.workspace, self.max_distance, cross_source=False)
+            pending._loaded = True
+            for doc in chunks:
+                h = simhash(doc.page_content)
+                if h == 0:
+                    kept.append(doc)
+                    signatures.append(h)
+                    continue
+                hit = self._match(h, source, skip_own=replace) or pending._match(h, source)
+                if hit == source:
+                    within += 1
+                    continue
+                if hit is not None:
+                    cross += 1
+                    continue
+                pending._add(h, source)
+                kept.append(doc)
+                signatures.append(h)
+            self.skipped_within += within
+            self.skipped_cross += cross
+
+        if within or cross:
+            print(f"[Dedup] {source}: skipped {within} within-source and {cross} cross-source near-duplicates")
+        return kept, signatures, {"within_source": within, "cross_source": cross}
+
+    def record(self, source: str, chunk_ids: list[str], signatures: list[int]):
+        """
+        Persist signatures for chunks that were actually stored.
+        """
+        db: Session = SessionLocal()
+        try:
+            db.bulk_insert_mappings(ChunkSignatureModel, [
+                {"workspace": self.workspace, "source": source, "chunk_id": cid, "simhash": to_signed(h)}
+                for cid, h in zip(chunk_ids, signatures)
+                if h
+            ])
+            db.commit()
+        finally:
+            db.close()
+
+        with self._lock:
+            if self._loaded:
+                for h in signatures:
+                    if h:
+                        self._add(h, source)
+
+    def index_chunks(self, source: str, docs: list):
+        """
+        Sign chunks that were stored without going through filter() (snapshot import).
+        """
+        self.record(
+            source,
+            [d.metadata.get("chunk_id") for d in docs],
+            [simhash(d.page_content) for d in docs],
+        )
+
+    def remove_source(self, source: str):
+        db: Session = SessionLocal()
+        try:
+            (
+                db.query(ChunkSignatureModel)
+                .filter(ChunkSignatureModel.workspace == self.workspace)
+                .filter(ChunkSignatureModel.source == source)
+                .delete()
+            )
+            db.commit()
+        finally:
+            db.close()
+
+        with self._lock:
+            if not self._loaded:
+                return
+            removed = 0
+            for key in list(self._bands):
+                entries = self._bands[key]
+                keep = [e for e in entries if e[1] != source]
+                removed += len(entries) - len(keep)
+                if keep:
+                    self._bands[key] = keep
+                else:
+                    del self._bands[key]
+            # every signature sits in one list per band
+            self._count -= removed // len(bands(0))
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "signatures": self._count if self._loaded else None,
+                "skipped_within_source": self.skipped_within,
+                "skipped_cross_source": self.skipped_cross,
+                "max_distance": self.max_distance,
+                "cross_source": self.cross_source,
+            }
@@ -0,0 +1,177 @@
+# app/vectorstore/materialized.py
+import threading
+from collections import OrderedDict
+
+import numpy as np
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.db import SessionLocal
+from app.embeddings.gemini_embeddings import EMBEDDING_MODEL
+from app.models import QueryVectorModel
+from app.vectorstore.search_profiles import SearchProfile, get_search_profile
+
+# retrieval queries used when summarize / quiz / test-me get no focus
+DEFAULT_QUERIES = {
+    "summarize": "Summarize the main topics of the documents",
+    "quiz": "Generate a quiz from the main topics of the documents",
+    "question": "Generate a challenging question from the documents",
+}
+
+_vectors: dict[str, list[float]] = {}
+_vectors_lock = threading.Lock()
+
+
+def query_vector(embeddings, query: str) -> list[float]:
+    """
+    Embedding of a constant query: memory, then the DB, then the embedding API (once, ever).
+    """
+    vec = _vectors.get(query)
+    if vec is not None:
+        return vec
+    with _vectors_lock:
+        if query in _vectors:
+            return _vectors[query]
+        db: Session = SessionLocal()
+        try:
+            row = (
+                db.query(QueryVectorModel)
+                .filter(QueryVectorModel.embedding_model == EMBEDDING_MODEL)
+                .filter(QueryVectorModel.query == query)
+                .first()
+            )
+            if row is not None:
+                vec = np.frombuffer(row.vector, dtype=np.float32).tolist()
+            else:
+                vec = embeddings.embed_query(query)
+                db.add(QueryVectorModel(
+                    embedding_model=EMBEDDING_MODEL,
+                    query=query,
+                    vector=np.asarray(vec, dtype=np.float32).tobytes(),
+                ))
+                try:
+                    db.commit()
+                except IntegrityError:
+                    # another process stored it first
+                    db.rollback()
+        finally:
+            db.close()
+        _vectors[query] = vec
+        return vec
+
+
+class _Entry:
+    """
+    Top-`depth` candidates of one default query under one source filter.
+    """
+    __slots__ = ("sources", "candidates", "stale")
+
+    def __init__(self, sources: frozenset | None, candidates: list[tuple]):
+        self.sources = sources
+        self.candidates = candidates   # (point id, score, vector, Document), best first
+        self.stale = False
+
+    def covers(self, source: str | None) -> bool:
+        return self.sources is None or source in self.sources
+
+
+class MaterializedQueries:
+    """
+    Materialized retrieval for the focus-less default queries of one workspace.
+
+    Query vectors are precomputed and persisted; for each (query, source filter)
+    seen, the top MATERIALIZED_DEPTH candidates (with their stored vectors) are
+    kept in memory, so a request runs only MMR + rerank: no embedding call, no
+    vector search. The store's change log is applied before serving: an added
+    source is searched on its own and merged in, a deleted source is dropped
+    (and the set refilled with one vector search if it ran short).
+    """
+
+    def __init__(self, store, depth: int | None = None, max_filters: int | None = None):
+        self.store = store
+        self.depth = depth or settings.MATERIALIZED_DEPTH
+        self.max_filters = max_filters or settings.MATERIALIZED_MAX_FILTERS
+        self._entries: OrderedDict[tuple[str, frozenset | None], _Entry] = OrderedDict()
+        self._seq = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.builds = 0
+        self.merges = 0
+
+    def _fetch(self, name: str, sources) -> list[tuple]:
+        vec = query_vector(self.store.embeddings, DEFAULT_QUERIES[name])
+        return self.store.vector_candidates(vec, self.depth, sorted(sources) if sources else None)
+
+    def _sync(self):
+        seq, changes = self.store.changes_since(self._seq)
+        self._seq = seq
+        if changes is None or any(op == "reset" for op, _ in changes):
+            self._entries.clear()
+            return
+        for op, source in changes:
+            for (name, _), entry in self._entries.items():
+                if not entry.covers(source):
+                    continue
+                if op == "delete":
+                    before = len(entry.candidates)
+                    entry.candidates = [c for c in entry.candidates if c[3].metadata.get("source") != source]
+                    # the next-best candidates behind the dropped ones are unknown
+                    if len(entry.candidates) < before:
+                        entry.stale = True
+                elif op == "add" and not entry.stale:
+                    have = {c[0] for c in entry.candidates}
+                    added = [c for c in self._fetch(name, [source]) if c[0] not in have]
+                    if added:
+                        merged = sorted(entry.candidates + added, key=lambda c: c[1], reverse=True)
+                        entry.candidates = merged[:self.depth]
+                        self.merges += 1
+
+    def search(self, name: str, k: int, sources: list[str] | None = None, profile: SearchProfile | None = None):
+        """
+        search() for a default query, or None when it can't be served from the
+        materialized candidates (collection missing, candidate set deeper than
+        MATERIALIZED_DEPTH, exact search asked for).
+        """
+        profile = profile or get_search_profile()
+        candidate_k = profile.candidate_k(k)
+        if not self.store.exists or candidate_k > self.depth or profile.exact:
+            return None
+
+        key = (name, frozenset(sources) if sources else None)
+        with self._lock:
+            self._sync()
+            entry = self._entries.get(key)
+            if entry is None or entry.stale:
+                entry = _Entry(key[1], self._fetch(name, key[1]))
+                self._entries[key] = entry
+                self.builds += 1
+                while len(self._entries) > self.max_filters:
+                    self._entries.popitem(last=False)
+            else:
+                self.hits += 1
+            self._entries.move_to_end(key)
+            candidates = entry.candidates[:candidate_k]
+
+        if profile.score_threshold is not None:
+            candidates = [c for c in candidates if c[1] >= profile.score_threshold]
+        if not candidates:
+            return []
+        query = DEFAULT_QUERIES[name]
+        return self.store.select(
+            query,
+            query_vector(self.store.embeddings, query),
+            [c[3] for c in candidates],
+            [c[2] for c in candidates],
+            k,
+            profile,
+        )
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "hits": self.hits,
+                "builds": self.builds,
+                "merges": self.merges,
+            }
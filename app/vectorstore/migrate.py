@@ -0,0 +1,135 @@
+# app/vectorstore/migrate.py
+"""
+Copy collections from the embedded local Qdrant directory into a Qdrant server.
+
+    python -m app.vectorstore.migrate --to-url http://localhost:6333
+    python -m app.vectorstore.migrate --from-path data/qdrant --to-url http://qdrant:6333 \
+        --api-key ... --prefer-grpc --collection learning_copilot --recreate
+
+Destination collections are created with the configured HNSW / on-disk
+parameters (see collection_params), not copied from the local collection.
+Point ids, vectors and payloads are preserved, so chunk_ids and filters keep working.
+"""
+import argparse
+import time
+
+from qdrant_client import QdrantClient
+from qdrant_client.http import models
+
+from app.core.config import settings
+from app.vectorstore.qdrant_store import DEFAULT_COLLECTION, INDEXED_PAYLOAD_FIELDS, collection_params
+
+
+def migrate_collection(
+    src: QdrantClient,
+    dst: QdrantClient,
+    collection_name: str,
+    batch_size: int = 256,
+    recreate: bool = False,
+) -> int:
+    """
+    Copy one collection. Returns the number of points written.
+    """
+    info = src.get_collection(collection_name)
+    vectors = info.config.params.vectors
+    vector_size = vectors.size if isinstance(vectors, models.VectorParams) else None
+
+    if dst.collection_exists(collection_name):
+        if not recreate:
+            raise RuntimeError(
+                f"Collection '{collection_name}' already exists on the destination (use --recreate)"
+            )
+        dst.delete_collection(collection_name)
+
+    dst.create_collection(collection_name=collection_name, **collection_params(vector_size))
+    for field in INDEXED_PAYLOAD_FIELDS:
+        dst.create_payload_index(
+            collection_name=collection_name,
+            field_name=field,
+            field_schema=models.PayloadSchemaType.KEYWORD,
+        )
+
+    copied = 0
+    offset = None
+    while True:
+        points, offset = src.scroll(
+            collection_name=collection_name,
+            with_payload=True,
+            with_vectors=True,
+            limit=batch_size,
+            offset=offset,
+        )
+        if points:
+            dst.upsert(
+                collection_name=collection_name,
+                points=[
+                    models.PointStruct(id=p.id, vector=p.vector, payload=p.payload)
+                    for p in points
+                ],
+                # updates apply in order, so waiting on the last batch waits for all
+                wait=offset is None,
+            )
+            copied += len(points)
+        if offset is None:
+            break
+
+    return copied
+
+
+def migrate(
+    src: QdrantClient,
+    dst: QdrantClient,
+    collection_names: list[str] | None = None,
+    batch_size: int = 256,
+    recreate: bool = False,
+) -> dict:
+    names = collection_names or [c.name for c in src.get_collections().collections]
+    report = {}
+    for name in names:
+        t0 = time.perf_counter()
+        copied = migrate_collection(src, dst, name, batch_size=batch_size, recreate=recreate)
+        report[name] = {
+            "copied": copied,
+            "source_count": src.count(name, exact=True).count,
+            "dest_count": dst.count(name, exact=True).count,
+            "seconds": round(time.perf_counter() - t0, 2),
+        }
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Copy local Qdrant collections into a Qdrant server.")
+    parser.add_argument("--from-path", default=settings.QDRANT_PATH, help="embedded Qdrant directory")
+    parser.add_argument("--to-url", default=settings.QDRANT_URL, help="destination server URL")
+    parser.add_argument("--api-key", default=settings.QDRANT_API_KEY or None)
+    parser.add_argument("--prefer-grpc", action="store_true", default=settings.QDRANT_PREFER_GRPC)
+    parser.add_argument("--grpc-port", type=int, default=settings.QDRANT_GRPC_PORT)
+    parser.add_argument(
+        "--collection", action="append", dest="collections",
+        help=f"collection to copy (repeatable; default: all, e.g. {DEFAULT_COLLECTION})",
+    )
+    parser.add_argument("--batch-size", type=int, default=256)
+    parser.add_argument("--recreate", action="store_true", help="drop destination collections that already exist")
+    args = parser.parse_args()
+
+    if not args.to_url:
+        parser.error("--to-url (or QDRANT_URL) is required")
+
+    src = QdrantClient(path=args.from_path)
+    dst = QdrantClient(
+        url=args.to_url,
+        api_key=args.api_key,
+        prefer_grpc=args.prefer_grpc,
+        grpc_port=args.grpc_port,
+        timeout=settings.QDRANT_TIMEOUT,
+    )
+
+    report = migrate(src, dst, args.collections, batch_size=args.batch_size, recreate=args.recreate)
+    for name, r in report.items():
+        status = "ok" if r["source_count"] == r["dest_count"] else "COUNT MISMATCH"
+        print(f"[migrate] {name}: {r['copied']} points in {r['seconds']}s "
+              f"(source={r['source_count']}, dest={r['dest_count']}) {status}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,443 @@
+# app/vectorstore/numpy_store.py
+"""
+VectorStore over a plain memory-mapped matrix (VECTOR_BACKEND=numpy).
+
+One directory per collection under NUMPY_STORE_DIR:
+
+    meta.json              {"dim", "dtype", "generation"}
+    vectors.<gen>.bin      normalized vectors, one row per chunk (float32 or float16),
+                           grown by doubling; rows past the payload are unused
+    payload.<gen>.jsonl    one {"id", "page_content", "metadata"} line per row, in row
+                           order, plus {"delete": source} tombstones
+
+Search is exact: one matrix-vector product over the candidate rows (in blocks,
+upcast to float32 when stored as float16) and argpartition for the top-k.
+Source / topic filters are row-index arrays kept per value, so a filtered
+search only touches the filtered rows. Deletes write a tombstone; once dead rows
+are a third of the matrix, both files are rewritten as the next generation and
+meta.json is switched over atomically.
+
+Single process, like embedded Qdrant: nothing coordinates two writers.
+"""
+import json
+import os
+import threading
+import uuid
+
+import numpy as np
+from langchain_core.documents import Document
+
+from app.core.config import settings
+from app.embeddings.gemini_embeddings import embed_queries
+from app.vectorstore.base import DEFAULT_COLLECTION, VectorStore, chunk_order
+from app.vectorstore.search_profiles import SearchProfile, get_search_profile
+
+DTYPES = ("float32", "float16")
+
+# rows scored per block: bounds the float32 copy made of float16 / filtered rows
+_BLOCK = 65536
+_MIN_CAPACITY = 1024
+
+
+def _normalize(vectors) -> np.ndarray:
+    m = np.asarray(vectors, dtype=np.float32)
+    norms = np.linalg.norm(m, axis=-1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return m / norms
+
+
+def _scores(matrix: np.ndarray, n: int, rows: np.ndarray | None, q: np.ndarray) -> np.ndarray:
+    """
+    matrix[rows] @ q in float32, for q of shape (dim,) or (dim, queries).
+    rows=None scores the first n rows.
+    """
+    total = n if rows is None else len(rows)
+    out = np.empty((total,) + q.shape[1:], dtype=np.float32)
+    for start in range(0, total, _BLOCK):
+        stop = min(start + _BLOCK, total)
+        block = matrix[start:stop] if rows is None else matrix[rows[start:stop]]
+        out[start:stop] = block.astype(np.float32, copy=False) @ q
+    return out
+
+
+def _top(scores: np.ndarray, limit: int, threshold: float | None = None) -> np.ndarray:
+    """
+    Positions of the `limit` best scores, best first.
+    """
+    limit = min(limit, len(scores))
+    if limit <= 0:
+        return np.empty(0, dtype=np.int64)
+    if limit < len(scores):
+        part = np.argpartition(-scores, limit - 1)[:limit]
+    else:
+        part = np.arange(len(scores))
+    order = part[np.argsort(-scores[part], kind="stable")]
+    if threshold is not None:
+        order = order[scores[order] >= threshold]
+    return order
+
+
+class NumpyStore(VectorStore):
+    def __init__(self, collection_name: str = DEFAULT_COLLECTION, embeddings=None, root: str | None = None):
+        super().__init__(collection_name, embeddings)
+        self.dir = os.path.join(root or settings.NUMPY_STORE_DIR, collection_name)
+        self._lock = threading.RLock()
+        self._open()
+
+    # ---------- files ----------
+
+    def _vectors_path(self, generation: int) -> str:
+        return os.path.join(self.dir, f"vectors.{generation}.bin")
+
+    def _payload_path(self, generation: int) -> str:
+        return os.path.join(self.dir, f"payload.{generation}.jsonl")
+
+    def _write_meta(self):
+        tmp = os.path.join(self.dir, "meta.json.tmp")
+        with open(tmp, "w") as f:
+            json.dump({"dim": self._dim, "dtype": self._dtype, "generation": self._generation}, f)
+        os.replace(tmp, os.path.join(self.dir, "meta.json"))
+
+    def _open(self):
+        self._dim: int | None = None
+        self._dtype = settings.NUMPY_STORE_DTYPE
+        if self._dtype not in DTYPES:
+            raise ValueError(f"NUMPY_STORE_DTYPE must be one of {DTYPES}, not {self._dtype!r}")
+        self._generation = 0
+        self._matrix: np.ndarray | None = None
+        self._ids: list[str] = []
+        self._texts: list[str] = []
+        self._metas: list[dict] = []
+        self._alive: np.ndarray | None = None   # None = every row alive
+        self._live_rows: np.ndarray | None = None
+        self._dead = 0
+        self._sources: dict[str, np.ndarray] = {}
+        self._topics: dict[str, np.ndarray] = {}
+
+        meta_path = os.path.join(self.dir, "meta.json")
+        if not os.path.exists(meta_path):
+            print(f"[NumpyStore] No existing collection '{self.collection_name}'. Will create on first ingest.")
+            return
+        with open(meta_path) as f:
+            meta = json.load(f)
+        # an existing collection keeps the dtype it was created with
+        self._dim, self._dtype, self._generation = meta["dim"], meta["dtype"], meta.get("generation", 0)
+
+        dead_rows = []
+        by_source: dict[str, list[int]] = {}
+        payload_path = self._payload_path(self._generation)
+        if os.path.exists(payload_path):
+            with open(payload_path) as f:
+                for line in f:
+                    try:
+                        record = json.loads(line)
+                    except ValueError:
+                        # torn last line from an interrupted append
+                        break
+                    if "delete" in record:
+                        dead_rows.extend(by_source.pop(record["delete"], []))
+                        continue
+                    row = len(self._ids)
+                    self._ids.append(record["id"])
+                    self._texts.append(record["page_content"])
+                    self._metas.append(record["metadata"])
+                    by_source.setdefault(record["metadata"].get("source"), []).append(row)
+
+        self._map(len(self._ids))
+        if dead_rows:
+            self._alive = np.ones(len(self._ids), dtype=bool)
+            self._alive[dead_rows] = False
+            self._dead = len(dead_rows)
+        self._reindex()
+        print(f"[NumpyStore] Attached to existing collection: {self.collection_name} ({self.count()} vectors)")
+
+    def _map(self, rows: int):
+        """
+        (Re)map the vectors file, growing it to hold at least `rows` rows.
+        """
+        path = self._vectors_path(self._generation)
+        itemsize = np.dtype(self._dtype).itemsize
+        size = os.path.getsize(path) if os.path.exists(path) else 0
+        capacity = size // (self._dim * itemsize)
+        if capacity < rows or capacity == 0:
+            capacity = max(rows, capacity * 2, _MIN_CAPACITY)
+            with open(path, "ab") as f:
+                f.truncate(capacity * self._dim * itemsize)
+        self._matrix = np.memmap(path, dtype=self._dtype, mode="r+", shape=(capacity, self._dim))
+
+    def _reindex(self):
+        """
+        Rebuild the per-source / per-topic row arrays from the live rows.
+        """
+        self._sources = {}
+        self._topics = {}
+        self._live_rows = None if self._alive is None else np.flatnonzero(self._alive[:len(self._ids)])
+        self._index_rows(range(len(self._ids)) if self._live_rows is None else self._live_rows)
+
+    # ---------- writes ----------
+
+    @property
+    def exists(self) -> bool:
+        return self._dim is not None
+
+    def add_texts(self, texts: list[str], metadatas: list[dict] | None = None, vectors: list | None = None):
+        if not texts:
+            # e.g. every chunk was a near-duplicate
+            return
+        metadatas = metadatas or [{} for _ in texts]
+        vectors = _normalize(vectors if vectors is not None else self.embeddings.embed_documents(texts))
+
+        with self._lock:
+            if self._dim is None:
+                os.makedirs(self.dir, exist_ok=True)
+                self._dim = vectors.shape[1]
+                self._write_meta()
+            elif vectors.shape[1] != self._dim:
+                raise ValueError(
+                    f"Embedding size {vectors.shape[1]} does not match collection "
+                    f"'{self.collection_name}' ({self._dim})"
+                )
+
+            start = len(self._ids)
+            stop = start + len(texts)
+            if self._matrix is None or self._matrix.shape[0] < stop:
+                self._map(stop)
+            # vectors first: rows past the last payload line are ignored on load
+            self._matrix[start:stop] = vectors
+            self._matrix.flush()
+
+            ids = [uuid.uuid4().hex for _ in texts]
+            with open(self._payload_path(self._generation), "a") as f:
+                for point_id, text, meta in zip(ids, texts, metadatas):
+                    f.write(json.dumps({"id": point_id, "page_content": text, "metadata": meta or {}}) + "\n")
+
+            self._ids.extend(ids)
+            self._texts.extend(texts)
+            self._metas.extend(meta or {} for meta in metadatas)
+            if self._alive is not None:
+                self._alive = np.concatenate([self._alive, np.ones(len(texts), dtype=bool)])
+            self._index_rows(range(start, stop))
+            added = dict.fromkeys(m.get("source") for m in self._metas[start:stop])
+
+        for source in added:
+            self._log_change("add", source)
+
+    def _index_rows(self, rows):
+        by_source: dict[str, list[int]] = {}
+        by_topic: dict[str, list[int]] = {}
+        for row in rows:
+            meta = self._metas[row]
+            by_source.setdefault(meta.get("source"), []).append(row)
+            if meta.get("topic"):
+                by_topic.setdefault(meta["topic"], []).append(row)
+        for index, new in ((self._sources, by_source), (self._topics, by_topic)):
+            for key, r in new.items():
+                arr = np.asarray(r, dtype=np.int64)
+                index[key] = np.concatenate([index[key], arr]) if key in index else arr
+        if self._live_rows is not None:
+            self._live_rows = np.flatnonzero(self._alive[:len(self._ids)])
+
+    def delete_by_source(self, source: str) -> int:
+        if not self.exists:
+            return 0
+
+        with self._lock:
+            rows = self._sources.pop(source, None)
+            if rows is not None:
+                with open(self._payload_path(self._generation), "a") as f:
+                    f.write(json.dumps({"delete": source}) + "\n")
+                if self._alive is None:
+                    self._alive = np.ones(len(self._ids), dtype=bool)
+                self._alive[rows] = False
+                self._dead += len(rows)
+                for topic, topic_rows in list(self._topics.items()):
+                    kept = np.setdiff1d(topic_rows, rows, assume_unique=True)
+                    if len(kept):
+                        self._topics[topic] = kept
+                    else:
+                        del self._topics[topic]
+                self._live_rows = np.flatnonzero(self._alive[:len(self._ids)])
+                if self._dead * 3 > len(self._ids):
+                    self._compact()
+        self._log_change("delete", source)
+
+        return 1
+
+    def _compact(self):
+        """
+        Rewrite live rows as the next generation, then switch meta.json over.
+        """
+        live = self._live_rows
+        generation = self._generation + 1
+        itemsize = np.dtype(self._dtype).itemsize
+        capacity = max(len(live), _MIN_CAPACITY)
+
+        vectors_path = self._vectors_path(generation)
+        with open(vectors_path, "wb") as f:
+            f.truncate(capacity * self._dim * itemsize)
+        matrix = np.memmap(vectors_path, dtype=self._dtype, mode="r+", shape=(capacity, self._dim))
+        for start in range(0, len(live), _BLOCK):
+            block = live[start:start + _BLOCK]
+            matrix[start:start + len(block)] = self._matrix[block]
+        matrix.flush()
+
+        ids = [self._ids[r] for r in live]
+        texts = [self._texts[r] for r in live]
+        metas = [self._metas[r] for r in live]
+        with open(self._payload_path(generation), "w") as f:
+            for point_id, text, meta in zip(ids, texts, metas):
+                f.write(json.dumps({"id": point_id, "page_content": text, "metadata": meta}) + "\n")
+
+        old = self._generation
+        self._generation = generation
+        self._write_meta()
+        for path in (self._vectors_path(old), self._payload_path(old)):
+            os.remove(path)
+
+        self._matrix = matrix
+        self._ids, self._texts, self._metas = ids, texts, metas
+        self._alive = None
+        self._dead = 0
+        self._reindex()
+        print(f"[NumpyStore] Compacted '{self.collection_name}' to {len(ids)} rows")
+
+    def reload(self):
+        """
+        Re-open from disk.
+        """
+        with self._lock:
+            self._open()
+        super().reload()
+
+    # ---------- reads ----------
+
+    def count(self) -> int:
+        return len(self._ids) - self._dead
+
+    def list_sources(self) -> list[str]:
+        return sorted(s for s in self._sources if s)
+
+    def _view(self, sources: list[str] | None = None, topic: str | None = None):
+        """
+        (matrix, rows, row count, payload) to score; rows=None means the first n rows.
+        Searches run on this snapshot outside the lock: adds only append, and
+        growing or compacting maps new files and swaps in new payload lists.
+        """
+        with self._lock:
+            n = len(self._ids)
+            rows = self._live_rows
+            if sources:
+                parts = [self._sources[s] for s in dict.fromkeys(sources) if s in self._sources]
+                rows = np.sort(np.concatenate(parts)) if parts else np.empty(0, dtype=np.int64)
+            if topic:
+                topic_rows = self._topics.get(topic, np.empty(0, dtype=np.int64))
+                rows = topic_rows if rows is None else np.intersect1d(rows, topic_rows, assume_unique=True)
+            return self._matrix, rows, n, (self._ids, self._texts, self._metas)
+
+    @staticmethod
+    def _document(payload, row: int) -> Document:
+        _, texts, metas = payload
+        return Document(page_content=texts[row], metadata=dict(metas[row]))
+
+    @staticmethod
+    def _candidates(matrix, rows, n, q, limit, threshold=None) -> tuple[np.ndarray, np.ndarray]:
+        """
+        (row indices, scores) of the best `limit` rows for one normalized query.
+        """
+        scores = _scores(matrix, n, rows, q)
+        best = _top(scores, limit, threshold)
+        return (best if rows is None else rows[best]), scores[best]
+
+    def search(
+        self,
+        query: str,
+        k: int = 5,
+        sources: list[str] | None = None,
+        topic: str | None = None,
+        profile: SearchProfile | None = None,
+    ):
+        if not self.exists:
+            return []
+        profile = profile or get_search_profile()
+
+        # 1) Exact top candidates (hnsw_ef / exact don't apply: every search is exact)
+        query_vec = _normalize(self.embeddings.embed_query(query))
+        matrix, rows, n, payload = self._view(sources, topic)
+        hits, _ = self._candidates(matrix, rows, n, query_vec, profile.candidate_k(k), profile.score_threshold)
+        if not len(hits):
+            return []
+
+        # 2-3) MMR selection + light rerank
+        docs = [self._document(payload, r) for r in hits]
+        return self.select(query, query_vec, docs, matrix[hits].astype(np.float32), k, profile)
+
+    def search_batch(
+        self,
+        queries: list[str],
+        k: int = 5,
+        sources: list[str] | None = None,
+        topic: str | None = None,
+        profile: SearchProfile | None = None,
+    ) -> list[list[Document]]:
+        """
+        search() for many queries at once: one embedding call and one
+        matrix-matrix product over the filtered rows.
+        A chunk retrieved by several queries is the same Document object in each list.
+        """
+        if not self.exists or not queries:
+            return [[] for _ in queries]
+
+        profile = profile or get_search_profile()
+        query_vecs = _normalize(embed_queries(self.embeddings, queries))
+        matrix, rows, n, payload = self._view(sources, topic)
+        all_scores = _scores(matrix, n, rows, query_vecs.T)
+
+        shared: dict[int, Document] = {}   # row -> Document, deduplicated across queries
+        results = []
+        for i, query in enumerate(queries):
+            scores = all_scores[:, i]
+            best = _top(scores, profile.candidate_k(k), profile.score_threshold)
+            hits = best if rows is None else rows[best]
+            if not len(hits):
+                results.append([])
+                continue
+            docs = []
+            for r in hits:
+                doc = shared.get(r)
+                if doc is None:
+                    doc = shared[r] = self._document(payload, r)
+                docs.append(doc)
+            results.append(self.select(query, query_vecs[i], docs, matrix[hits].astype(np.float32), k, profile))
+        return results
+
+    def vector_candidates(
+        self,
+        vector: list[float],
+        limit: int,
+        sources: list[str] | None = None,
+        profile: SearchProfile | None = None,
+    ) -> list[tuple]:
+        """
+        (point id, score, stored vector, Document) nearest to a precomputed query vector, best first.
+        """
+        if not self.exists:
+            return []
+        threshold = profile.score_threshold if profile else None
+        matrix, rows, n, payload = self._view(sources)
+        hits, scores = self._candidates(matrix, rows, n, _normalize(vector), limit, threshold)
+        vecs = matrix[hits].astype(np.float32)
+        return [
+            (payload[0][r], float(s), vec, self._document(payload, r))
+            for r, s, vec in zip(hits, scores, vecs)
+        ]
+
+    def get_chunks(self, source: str) -> list[Document]:
+        """
+        All stored chunks of one source, in page (or transcript time) order.
+        """
+        with self._lock:
+            rows = self._sources.get(source)
+            payload = (self._ids, self._texts, self._metas)
+            docs = [] if rows is None else [self._document(payload, r) for r in rows]
+        docs.sort(key=chunk_order)
+        return docs
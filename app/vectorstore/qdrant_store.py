@@ -2,27 +2,101 @@ import os
 
 from qdrant_client import QdrantClient
 from langchain_qdrant import QdrantVectorStore
-from app.embeddings.gemini_embeddings import get_embedding_model
+from app.core.config import settings
+from app.embeddings.gemini_embeddings import embed_queries
+from app.vectorstore.base import DEFAULT_COLLECTION, VectorStore, chunk_order
+from app.vectorstore.search_profiles import SearchProfile, get_search_profile
 from qdrant_client.http import models
 from qdrant_client.models import Filter, FieldCondition, MatchValue
-import math
-from typing import List
-
-
-class QdrantStore:
-    def __init__(self):
-        db_path = os.path.join(os.getcwd(), "data", "qdrant")
-        self.client = QdrantClient(path=db_path)
-        self.collection_name = "learning_copilot"
-        self.embeddings = get_embedding_model()
+from langchain_core.documents import Document
+import threading
+import uuid
+import warnings
+from contextlib import contextmanager
+
+# payload fields we filter on; indexed so server-mode Qdrant can pre-filter
+INDEXED_PAYLOAD_FIELDS = ["metadata.source", "metadata.topic"]
+
+_client: QdrantClient | None = None
+_client_lock = threading.Lock()
+
+
+@contextmanager
+def _exact_search_ok():
+    with warnings.catch_warnings():
+        # local mode always searches exactly; search profiles' hnsw_ef / exact only matter on a server
+        warnings.filterwarnings("ignore", message="Local mode performs exact", category=UserWarning)
+        yield
+
+
+def create_qdrant_client() -> QdrantClient:
+    if settings.QDRANT_URL:
+        return QdrantClient(
+            url=settings.QDRANT_URL,
+            api_key=settings.QDRANT_API_KEY or None,
+            prefer_grpc=settings.QDRANT_PREFER_GRPC,
+            grpc_port=settings.QDRANT_GRPC_PORT,
+            timeout=settings.QDRANT_TIMEOUT,
+        )
+    return QdrantClient(path=os.path.join(os.getcwd(), settings.QDRANT_PATH))
+
+
+def get_qdrant_client() -> QdrantClient:
+    """
+    One client per process. Embedded mode locks the data directory, so every
+    collection (workspace) has to go through the same client; in server mode
+    the client is thread-safe and pooled, so sharing it is what we want anyway.
+    """
+    global _client
+    if _client is None:
+        # the startup warm-up and the first request can get here together
+        with _client_lock:
+            if _client is None:
+                _client = create_qdrant_client()
+    return _client
+
+
+def collection_params(vector_size: int | None = None) -> dict:
+    """
+    create_collection() kwargs from settings. Local mode accepts and ignores
+    the HNSW / on-disk options.
+    """
+    return {
+        "vectors_config": models.VectorParams(
+            size=vector_size or settings.QDRANT_VECTOR_SIZE,
+            distance=models.Distance.COSINE,
+            on_disk=settings.QDRANT_VECTORS_ON_DISK,
+        ),
+        "hnsw_config": models.HnswConfigDiff(
+            m=settings.QDRANT_HNSW_M,
+            ef_construct=settings.QDRANT_HNSW_EF_CONSTRUCT,
+        ),
+        "on_disk_payload": settings.QDRANT_PAYLOAD_ON_DISK,
+    }
+
+
+class QdrantStore(VectorStore):
+    def __init__(
+        self,
+        collection_name: str = DEFAULT_COLLECTION,
+        client: QdrantClient | None = None,
+        embeddings=None,
+    ):
+        super().__init__(collection_name, embeddings)
+        self.client = client or get_qdrant_client()
 
         self.store: QdrantVectorStore | None = None
         self._attach_if_exists()
 
+    @property
+    def exists(self) -> bool:
+        return self.store is not None
+
     def _attach_if_exists(self):
         try:
             self.client.get_collection(self.collection_name)
             # If this does not throw, collection exists
+            self._ensure_payload_indexes()
             self.store = QdrantVectorStore(
                 client=self.client,
                 collection_name=self.collection_name,
@@ -31,24 +105,31 @@ class QdrantStore:
             print(f"[QdrantStore] Attached to existing collection: {self.collection_name}")
         except Exception:
             # Collection does not exist yet
-            print(f"[QdrantStore] No existing collection found. Will create on first ingest.")
+            print(f"[QdrantStore] No existing collection '{self.collection_name}'. Will create on first ingest.")
             self.store = None
 
+    def reload(self):
+        """
+        Re-attach after the collection was replaced underneath us (snapshot import).
+        """
+        self.store = None
+        self._attach_if_exists()
+        super().reload()
 
-
-    def add_texts(self, texts: list[str], metadatas: list[dict] | None = None):
+    def add_texts(self, texts: list[str], metadatas: list[dict] | None = None, vectors: list | None = None):
+        if not texts:
+            # e.g. every chunk was a near-duplicate
+            return
         if self.store is None:
             # 1. Ensure the collection exists in the local client
             if not self.client.collection_exists(self.collection_name):
                 self.client.create_collection(
                     collection_name=self.collection_name,
-                    # Adjust vectors_config based on your Gemini embedding dimensions
-                    # Typically 768 for models like text-embedding-004
-                    vectors_config=models.VectorParams(
-                        size=3072,
-                        distance=models.Distance.COSINE
-                    )
+                    # vector size must match the embedding model
+                    # (3072 for gemini-embedding-001)
+                    **collection_params(),
                 )
+                self._ensure_payload_indexes()
 
             # 2. Initialize the store linked to that collection
             self.store = QdrantVectorStore(
@@ -57,8 +138,38 @@ class QdrantStore:
                 embedding=self.embeddings
             )
 
-        # 3. Add the texts
-        self.store.add_texts(texts=texts, metadatas=metadatas)
+        # 3. Add the texts (already embedded: upsert the points the way langchain-qdrant lays them out)
+        if vectors is None:
+            self.store.add_texts(texts=texts, metadatas=metadatas)
+        else:
+            metadatas = metadatas or [{} for _ in texts]
+            for start in range(0, len(texts), 256):
+                stop = start + 256
+                self.client.upsert(
+                    collection_name=self.collection_name,
+                    points=models.Batch(
+                        ids=[uuid.uuid4().hex for _ in texts[start:stop]],
+                        vectors=[list(map(float, v)) for v in vectors[start:stop]],
+                        payloads=[
+                            {self.store.content_payload_key: text, self.store.metadata_payload_key: meta}
+                            for text, meta in zip(texts[start:stop], metadatas[start:stop])
+                        ],
+                    ),
+                    wait=True,
+                )
+        for source in dict.fromkeys((m or {}).get("source") for m in (metadatas or [])):
+            self._log_change("add", source)
+
+    def _ensure_payload_indexes(self):
+        with warnings.catch_warnings():
+            # local mode ignores payload indexes and warns about it
+            warnings.simplefilter("ignore")
+            for field in INDEXED_PAYLOAD_FIELDS:
+                self.client.create_payload_index(
+                    collection_name=self.collection_name,
+                    field_name=field,
+                    field_schema=models.PayloadSchemaType.KEYWORD,
+                )
 
     def count(self) -> int:
         try:
@@ -67,50 +178,143 @@ class QdrantStore:
         except Exception:
             return 0
 
-    def search(self, query: str, k: int = 5, sources: list[str] | None = None):
-        if self.store is None:
-            return []
-
-        # 1) Expand candidates (fetch more than needed)
-        candidate_k = max(20, k * 4)
-
-        # Use vector store to get initial candidates with scores
-        qdrant_filter = None
+    def _build_filter(self, sources: list[str] | None = None, topic: str | None = None):
+        must = []
+        if topic:
+            must.append(FieldCondition(key="metadata.topic", match=MatchValue(value=topic)))
         if sources:
-            conditions = [
+            must.append(Filter(should=[
                 FieldCondition(
                     key="metadata.source",
                     match=MatchValue(value=src),
                 )
                 for src in sources
-            ]
-            qdrant_filter = Filter(should=conditions)
-
-        results_with_scores = self.store.similarity_search_with_score(
-            query,
-            k=candidate_k,
-            filter=qdrant_filter,  # ✅ may be None or a real filter
+            ]))
+        return Filter(must=must) if must else None
+
+    @staticmethod
+    def _document(point) -> Document:
+        payload = point.payload or {}
+        return Document(
+            page_content=payload.get("page_content", ""),
+            metadata=payload.get("metadata") or {},
         )
 
-        if not results_with_scores:
+    def search(
+        self,
+        query: str,
+        k: int = 5,
+        sources: list[str] | None = None,
+        topic: str | None = None,
+        profile: SearchProfile | None = None,
+    ):
+        if self.store is None:
             return []
+        profile = profile or get_search_profile()
 
-        docs = [doc for doc, _ in results_with_scores]
-
-        # 2) Get embeddings for MMR
+        # 1) Expand candidates (fetch more than needed), with stored vectors when MMR needs them
         query_vec = self.embeddings.embed_query(query)
-        doc_vecs = [self.embeddings.embed_query(d.page_content) for d in docs]
+        with _exact_search_ok():
+            response = self.client.query_points(
+                collection_name=self.collection_name,
+                query=query_vec,
+                query_filter=self._build_filter(sources, topic),
+                search_params=profile.search_params(),
+                score_threshold=profile.score_threshold,
+                limit=profile.candidate_k(k),
+                with_payload=True,
+                with_vectors=profile.mmr,
+            )
+        points = response.points
+        if not points:
+            return []
 
-        # 3) MMR selection
-        selected_indices = self._mmr_select(query_vec, doc_vecs, k=k, lambda_param=0.6)
-        mmr_docs = [docs[i] for i in selected_indices]
+        # 2-3) MMR selection + light rerank
+        docs = [self._document(p) for p in points]
+        return self.select(query, query_vec, docs, [p.vector for p in points], k, profile)
+
+    def search_batch(
+        self,
+        queries: list[str],
+        k: int = 5,
+        sources: list[str] | None = None,
+        topic: str | None = None,
+        profile: SearchProfile | None = None,
+    ) -> list[list[Document]]:
+        """
+        search() for many queries at once: one embedding call for all queries,
+        one batched Qdrant query, and MMR on the stored vectors (no re-embedding).
+        A chunk retrieved by several queries is the same Document object in each list.
+        """
+        if self.store is None or not queries:
+            return [[] for _ in queries]
 
-        # 4) Light rerank for lexical relevance
-        reranked = self._light_rerank(mmr_docs, query)
+        profile = profile or get_search_profile()
+        qdrant_filter = self._build_filter(sources, topic)
+        query_vecs = embed_queries(self.embeddings, queries)
 
-        return reranked
+        with _exact_search_ok():
+            responses = self.client.query_batch_points(
+                collection_name=self.collection_name,
+                requests=[
+                    models.QueryRequest(
+                        query=vec,
+                        filter=qdrant_filter,
+                        params=profile.search_params(),
+                        score_threshold=profile.score_threshold,
+                        limit=profile.candidate_k(k),
+                        with_payload=True,
+                        with_vector=profile.mmr,
+                    )
+                    for vec in query_vecs
+                ],
+            )
+
+        shared: dict = {}   # point id -> Document, deduplicated across queries
+        results = []
+        for query, query_vec, response in zip(queries, query_vecs, responses):
+            points = response.points
+            if not points:
+                results.append([])
+                continue
+            docs = []
+            for p in points:
+                doc = shared.get(p.id)
+                if doc is None:
+                    doc = shared[p.id] = self._document(p)
+                docs.append(doc)
+            results.append(self.select(query, query_vec, docs, [p.vector for p in points], k, profile))
+        return results
+
+    def vector_candidates(
+        self,
+        vector: list[float],
+        limit: int,
+        sources: list[str] | None = None,
+        profile: SearchProfile | None = None,
+    ) -> list[tuple]:
+        """
+        (point id, score, stored vector, Document) nearest to a precomputed query vector, best first.
+        """
+        if self.store is None:
+            return []
+        with _exact_search_ok():
+            response = self.client.query_points(
+                collection_name=self.collection_name,
+                query=vector,
+                query_filter=self._build_filter(sources),
+                search_params=profile.search_params() if profile else None,
+                score_threshold=profile.score_threshold if profile else None,
+                limit=limit,
+                with_payload=True,
+                with_vectors=True,
+            )
+        return [(p.id, p.score, p.vector, self._document(p)) for p in response.points]
 
     def list_sources(self) -> list[str]:
+        if self.store is None:
+            return []
+
         sources = set()
         offset = None
 
@@ -132,7 +336,48 @@ class QdrantStore:
 
         return sorted(list(sources))
 
+    def get_chunks(self, source: str) -> list[Document]:
+        """
+        All stored chunks of one source, in page (or transcript time) order.
+        """
+        if self.store is None:
+            return []
+
+        flt = Filter(
+            must=[
+                FieldCondition(
+                    key="metadata.source",
+                    match=MatchValue(value=source),
+                )
+            ]
+        )
+
+        docs = []
+        offset = None
+        while True:
+            points, offset = self.client.scroll(
+                collection_name=self.collection_name,
+                scroll_filter=flt,
+                with_payload=True,
+                limit=256,
+                offset=offset,
+            )
+            for p in points:
+                payload = p.payload or {}
+                docs.append(Document(
+                    page_content=payload.get("page_content", ""),
+                    metadata=payload.get("metadata") or {},
+                ))
+            if offset is None:
+                break
+
+        docs.sort(key=chunk_order)
+        return docs
+
     def delete_by_source(self, source: str) -> int:
+        if self.store is None:
+            return 0
+
         flt = Filter(
             must=[
                 FieldCondition(
@@ -146,66 +391,6 @@ class QdrantStore:
             collection_name=self.collection_name,
             points_selector=flt,  # ✅ typed filter, not dict
         )
+        self._log_change("delete", source)
 
         return 1
-
-    def _cosine(self, a: List[float], b: List[float]) -> float:
-        # safety: if vectors are empty
-        if not a or not b:
-            return 0.0
-        dot = sum(x*y for x, y in zip(a, b))
-        na = math.sqrt(sum(x*x for x in a))
-        nb = math.sqrt(sum(x*x for x in b))
-        if na == 0 or nb == 0:
-            return 0.0
-        return dot / (na * nb)
-
-    def _mmr_select(self, query_vec, doc_vecs, k: int, lambda_param: float = 0.5):
-        """
-        MMR: pick documents that are relevant to query and diverse among themselves.
-        """
-        if not doc_vecs:
-            return []
-
-        selected = []
-        candidates = list(range(len(doc_vecs)))
-
-        # First pick: most similar to query
-        sims = [self._cosine(query_vec, v) for v in doc_vecs]
-        first = max(range(len(sims)), key=lambda i: sims[i])
-        selected.append(first)
-        candidates.remove(first)
-
-        while len(selected) < min(k, len(doc_vecs)) and candidates:
-            mmr_scores = []
-            for i in candidates:
-                sim_to_query = self._cosine(query_vec, doc_vecs[i])
-                sim_to_selected = max(
-                    self._cosine(doc_vecs[i], doc_vecs[j]) for j in selected
-                )
-                mmr = lambda_param * sim_to_query - (1 - lambda_param) * sim_to_selected
-                mmr_scores.append((mmr, i))
-
-            _, best = max(mmr_scores, key=lambda x: x[0])
-            selected.append(best)
-            candidates.remove(best)
-
-        return selected
-
-    def _light_rerank(self, docs, query: str):
-        """
-        Simple lexical boost: prefer chunks that mention query terms more.
-        """
-        q_terms = [t.lower() for t in query.split() if t.strip()]
-
-        def score(doc):
-            text = doc.page_content.lower()
-            hits = sum(1 for t in q_terms if t in text)
-            return hits
-
-        return sorted(docs, key=score, reverse=True)
-
-
-
-
-
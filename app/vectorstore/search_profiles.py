@@ -0,0 +1,71 @@
+# app/vectorstore/search_profiles.py
+"""
+Named trade-offs between retrieval quality and latency:
+
+    fast        top-k straight from the HNSW index with a small ef, no MMR or
+                rerank, optional score cutoff (interactive paths like session questions)
+    balanced    candidates = max(20, 4k), MMR + light rerank (the classic search())
+    exhaustive  exact (brute-force) search over a wide candidate set, MMR + rerank
+"""
+from app.core.config import settings
+
+SEARCH_PROFILES = ("fast", "balanced", "exhaustive")
+SEARCH_PROFILE_PATTERN = "^(" + "|".join(SEARCH_PROFILES) + ")$"
+
+
+class SearchProfile:
+    """
+    How VectorStore.search() retrieves: `candidate_min` / `candidate_factor`
+    size the candidate set, `hnsw_ef` / `exact` tune the vector search, and
+    `score_threshold` drops candidates scoring below it before MMR / rerank.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        candidate_min: int,
+        candidate_factor: int,
+        hnsw_ef: int | None = None,
+        exact: bool = False,
+        mmr: bool = True,
+        rerank: bool = True,
+        score_threshold: float | None = None,
+        mmr_lambda: float = 0.6,
+    ):
+        self.name = name
+        self.candidate_min = candidate_min
+        self.candidate_factor = candidate_factor
+        self.hnsw_ef = hnsw_ef
+        self.exact = exact
+        self.mmr = mmr
+        self.rerank = rerank
+        self.score_threshold = score_threshold
+        self.mmr_lambda = mmr_lambda
+
+    def candidate_k(self, k: int) -> int:
+        return max(self.candidate_min, k * self.candidate_factor, k)
+
+    def search_params(self):
+        if not self.exact and self.hnsw_ef is None:
+            return None   # collection defaults
+        from qdrant_client.http import models
+
+        return models.SearchParams(hnsw_ef=self.hnsw_ef, exact=self.exact)
+
+
+def get_search_profile(name: str | None = None) -> SearchProfile:
+    name = name or settings.SEARCH_PROFILE
+    if name == "fast":
+        return SearchProfile(
+            "fast", candidate_min=0, candidate_factor=1,
+            hnsw_ef=settings.SEARCH_FAST_HNSW_EF, mmr=False, rerank=False,
+            score_threshold=settings.SEARCH_FAST_MIN_SCORE,
+        )
+    if name == "balanced":
+        return SearchProfile(
+            "balanced", candidate_min=20, candidate_factor=4,
+            hnsw_ef=settings.SEARCH_BALANCED_HNSW_EF or None,
+        )
+    if name == "exhaustive":
+        return SearchProfile("exhaustive", candidate_min=50, candidate_factor=10, exact=True)
+    raise ValueError(f"Unknown search profile: {name}")
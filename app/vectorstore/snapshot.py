@@ -0,0 +1,279 @@
+# app/vectorstore/snapshot.py
+"""
+Compact, embedding-free backup/restore of a Qdrant collection.
+
+A bundle is a directory with:
+    manifest.json     collection, count, dim, dtype, embedding model, ...
+    vectors.npy       (count, dim) float32, or int8 when quantized (memory-mappable)
+    scales.npy        (count,) float32 per-row scale, int8 bundles only
+    payloads.json.gz  columnar payloads: {"id": [...], "page_content": [...], "metadata.<key>": [...]}
+
+    python -m app.vectorstore.snapshot export --workspace default --out data/snapshots/default
+    python -m app.vectorstore.snapshot import --in data/snapshots/default --workspace default --recreate
+"""
+import argparse
+import gzip
+import json
+import os
+import time
+import warnings
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+import numpy as np
+from qdrant_client import QdrantClient
+from qdrant_client.http import models
+
+from app.embeddings.gemini_embeddings import EMBEDDING_MODEL
+from app.vectorstore.qdrant_store import INDEXED_PAYLOAD_FIELDS, collection_params, get_qdrant_client
+
+FORMAT = "learning-copilot-snapshot"
+VERSION = 1
+QUANTIZATIONS = ("none", "int8")
+# parallel upserts on import (server mode; embedded mode always uses one)
+DEFAULT_IMPORT_WORKERS = 4
+
+
+def _is_local(client: QdrantClient) -> bool:
+    from qdrant_client.local.qdrant_local import QdrantLocal
+
+    return isinstance(getattr(client, "_client", None), QdrantLocal)
+
+
+def export_collection(
+    client: QdrantClient,
+    collection_name: str,
+    out_dir: str,
+    quantization: str = "none",
+    batch_size: int = 1024,
+) -> dict:
+    if quantization not in QUANTIZATIONS:
+        raise ValueError(f"quantization must be one of {QUANTIZATIONS}")
+
+    t0 = time.perf_counter()
+    info = client.get_collection(collection_name)
+    dim = info.config.params.vectors.size
+    count = client.count(collection_name, exact=True).count
+
+    os.makedirs(out_dir, exist_ok=True)
+    dtype = np.int8 if quantization == "int8" else np.float32
+    # written in place as we scroll, so the whole matrix never sits in memory
+    vectors = np.lib.format.open_memmap(
+        os.path.join(out_dir, "vectors.npy"), mode="w+", dtype=dtype, shape=(count, dim)
+    )
+    scales = np.ones(count, dtype=np.float32) if quantization == "int8" else None
+
+    columns = {"id": [], "page_content": []}
+    row = 0
+    offset = None
+    while True:
+        points, offset = client.scroll(
+            collection_name=collection_name,
+            with_payload=True,
+            with_vectors=True,
+            limit=batch_size,
+            offset=offset,
+        )
+        if points:
+            batch = np.asarray([p.vector for p in points], dtype=np.float32)
+            end = row + len(points)
+            if end > count:
+                raise RuntimeError("Collection grew during export; retry when ingestion is idle")
+            if quantization == "int8":
+                s = np.abs(batch).max(axis=1) / 127.0
+                s[s == 0] = 1.0
+                vectors[row:end] = np.round(batch / s[:, None]).astype(np.int8)
+                scales[row:end] = s
+            else:
+                vectors[row:end] = batch
+
+            for i, p in enumerate(points):
+                payload = p.payload or {}
+                columns["id"].append(p.id)
+                columns["page_content"].append(payload.get("page_content", ""))
+                for key, value in (payload.get("metadata") or {}).items():
+                    col = columns.setdefault(f"metadata.{key}", [None] * (row + i))
+                    col.append(value)
+                # keep every column the same length
+                for col in columns.values():
+                    if len(col) < row + i + 1:
+                        col.append(None)
+            row = end
+        if offset is None:
+            break
+
+    vectors.flush()
+    del vectors
+    if scales is not None:
+        np.save(os.path.join(out_dir, "scales.npy"), scales)
+
+    with gzip.open(os.path.join(out_dir, "payloads.json.gz"), "wt", encoding="utf-8") as f:
+        json.dump(columns, f, separators=(",", ":"))
+
+    manifest = {
+        "format": FORMAT,
+        "version": VERSION,
+        "collection": collection_name,
+        "count": row,
+        "dim": dim,
+        "dtype": np.dtype(dtype).name,
+        "quantization": quantization,
+        "distance": "cosine",
+        "embedding_model": EMBEDDING_MODEL,
+        "created_at": datetime.utcnow().isoformat() + "Z",
+        "seconds": round(time.perf_counter() - t0, 2),
+    }
+    with open(os.path.join(out_dir, "manifest.json"), "w") as f:
+        json.dump(manifest, f, indent=2)
+    return manifest
+
+
+def read_manifest(bundle_dir: str) -> dict:
+    with open(os.path.join(bundle_dir, "manifest.json")) as f:
+        manifest = json.load(f)
+    if manifest.get("format") != FORMAT or manifest.get("version") != VERSION:
+        raise ValueError(f"{bundle_dir} is not a v{VERSION} {FORMAT} bundle")
+    return manifest
+
+
+def _payload(columns: dict, i: int) -> dict:
+    metadata = {}
+    for name, col in columns.items():
+        if name.startswith("metadata.") and col[i] is not None:
+            metadata[name[len("metadata."):]] = col[i]
+    return {"page_content": columns["page_content"][i], "metadata": metadata}
+
+
+def import_collection(
+    client: QdrantClient,
+    bundle_dir: str,
+    collection_name: str,
+    recreate: bool = False,
+    batch_size: int = 2048,
+    workers: int | None = None,
+) -> dict:
+    """
+    Bulk-upsert a bundle into `collection_name`. Zero embedding calls.
+    Returns the manifest plus per-source topic counts (to rebuild the topic index).
+    Batches go up in parallel (`workers`, default 4) against a Qdrant server only.
+    """
+    t0 = time.perf_counter()
+    manifest = read_manifest(bundle_dir)
+    if manifest["embedding_model"] != EMBEDDING_MODEL:
+        raise ValueError(
+            f"Bundle was embedded with {manifest['embedding_model']}, "
+            f"this deployment uses {EMBEDDING_MODEL}"
+        )
+
+    vectors = np.load(os.path.join(bundle_dir, "vectors.npy"), mmap_mode="r")
+    scales = None
+    if manifest["quantization"] == "int8":
+        scales = np.load(os.path.join(bundle_dir, "scales.npy"), mmap_mode="r")
+    with gzip.open(os.path.join(bundle_dir, "payloads.json.gz"), "rt", encoding="utf-8") as f:
+        columns = json.load(f)
+
+    count = manifest["count"]
+    if vectors.shape != (count, manifest["dim"]) or len(columns["id"]) != count:
+        raise ValueError("Bundle is inconsistent: vector/payload counts do not match the manifest")
+
+    if client.collection_exists(collection_name):
+        if not recreate:
+            raise RuntimeError(f"Collection '{collection_name}' already exists (use recreate)")
+        client.delete_collection(collection_name)
+    client.create_collection(collection_name=collection_name, **collection_params(manifest["dim"]))
+    with warnings.catch_warnings():
+        # local mode ignores payload indexes and warns about it
+        warnings.simplefilter("ignore")
+        for field in INDEXED_PAYLOAD_FIELDS:
+            client.create_payload_index(
+                collection_name=collection_name,
+                field_name=field,
+                field_schema=models.PayloadSchemaType.KEYWORD,
+            )
+
+    def upsert(start: int):
+        end = min(start + batch_size, count)
+        batch = np.asarray(vectors[start:end], dtype=np.float32)
+        if scales is not None:
+            batch *= scales[start:end, None]
+        client.upsert(
+            collection_name=collection_name,
+            points=models.Batch(
+                ids=columns["id"][start:end],
+                vectors=batch.tolist(),
+                payloads=[_payload(columns, i) for i in range(start, end)],
+            ),
+            wait=True,
+        )
+        return end - start
+
+    if _is_local(client):
+        # embedded Qdrant shares one sqlite connection across threads: upserts must not overlap
+        workers = 1
+    with ThreadPoolExecutor(max_workers=workers or DEFAULT_IMPORT_WORKERS) as pool:
+        imported = sum(pool.map(upsert, range(0, count, batch_size)))
+
+    topics = {}
+    sources = columns.get("metadata.source", [None] * count)
+    topic_col = columns.get("metadata.topic", [None] * count)
+    for src, topic in zip(sources, topic_col):
+        if src:
+            by_topic = topics.setdefault(src, {})
+            by_topic[topic or "general"] = by_topic.get(topic or "general", 0) + 1
+
+    return {
+        **manifest,
+        "imported": imported,
+        "collection": collection_name,
+        "topics_by_source": topics,
+        "seconds": round(time.perf_counter() - t0, 2),
+    }
+
+
+def main():
+    from app.workspaces import DEFAULT_WORKSPACE, collection_for
+
+    parser = argparse.ArgumentParser(description="Export/import a vector store snapshot bundle.")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    exp = sub.add_parser("export")
+    exp.add_argument("--workspace", default=DEFAULT_WORKSPACE)
+    exp.add_argument("--out", required=True, help="bundle directory to write")
+    exp.add_argument("--quantize", choices=QUANTIZATIONS, default="none")
+
+    imp = sub.add_parser("import")
+    imp.add_argument("--workspace", default=DEFAULT_WORKSPACE)
+    imp.add_argument("--in", dest="bundle", required=True, help="bundle directory to read")
+    imp.add_argument("--recreate", action="store_true", help="replace the collection if it exists")
+    imp.add_argument("--batch-size", type=int, default=2048)
+    imp.add_argument(
+        "--workers", type=int, default=None,
+        help=f"parallel upserts against a Qdrant server (default {DEFAULT_IMPORT_WORKERS}; embedded mode uses 1)",
+    )
+
+    args = parser.parse_args()
+    client = get_qdrant_client()
+    collection = collection_for(args.workspace)
+
+    if args.command == "export":
+        m = export_collection(client, collection, args.out, quantization=args.quantize)
+        print(f"[snapshot] exported {m['count']} points ({m['dtype']}) to {args.out} in {m['seconds']}s")
+    else:
+        r = import_collection(
+            client, args.bundle, collection, recreate=args.recreate,
+            batch_size=args.batch_size, workers=args.workers,
+        )
+        # the CLI runs outside the API, so refresh the topic index here too
+        from app.db import engine, Base
+        from app.models import ensure_columns
+        from app.vectorstore.topic_index import TopicIndex
+        Base.metadata.create_all(bind=engine)
+        ensure_columns(engine)
+        index = TopicIndex(args.workspace)
+        for src, counts in r["topics_by_source"].items():
+            index.record(src, counts)
+        print(f"[snapshot] imported {r['imported']} points into {collection} in {r['seconds']}s")
+
+
+if __name__ == "__main__":
+    main()
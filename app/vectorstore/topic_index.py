@@ -0,0 +1,86 @@
+# app/vectorstore/topic_index.py
+import threading
+
+from sqlalchemy.orm import Session
+
+from app.db import SessionLocal
+from app.models import TopicSourceModel
+
+
+class TopicIndex:
+    """
+    topic -> sources map, persisted in SQLite and mirrored in memory.
+    Lets topic-driven retrieval (reviews, focused sessions) filter to the
+    sources and chunks that actually cover a topic.
+    """
+
+    def __init__(self, workspace: str = "default"):
+        self.workspace = workspace
+        self._lock = threading.Lock()
+        self._map: dict[str, dict[str, int]] | None = None
+
+    def _load(self) -> dict[str, dict[str, int]]:
+        if self._map is None:
+            db: Session = SessionLocal()
+            try:
+                m = {}
+                for r in db.query(TopicSourceModel).filter(TopicSourceModel.workspace == self.workspace).all():
+                    m.setdefault(r.topic, {})[r.source] = r.chunk_count
+                self._map = m
+            finally:
+                db.close()
+        return self._map
+
+    def record(self, source: str, topic_counts: dict[str, int]):
+        """
+        Replace the topics recorded for `source`.
+        """
+        db: Session = SessionLocal()
+        try:
+            (
+                db.query(TopicSourceModel)
+                .filter(TopicSourceModel.workspace == self.workspace)
+                .filter(TopicSourceModel.source == source)
+                .delete()
+            )
+            db.add_all([
+                TopicSourceModel(workspace=self.workspace, topic=topic, source=source, chunk_count=n)
+                for topic, n in topic_counts.items()
+            ])
+            db.commit()
+        finally:
+            db.close()
+
+        with self._lock:
+            m = self._load()
+            for sources in m.values():
+                sources.pop(source, None)
+            for topic, n in topic_counts.items():
+                m.setdefault(topic, {})[source] = n
+
+    def remove_source(self, source: str):
+        self.record(source, {})
+
+    def topics(self) -> dict[str, dict[str, int]]:
+        with self._lock:
+            return {t: dict(s) for t, s in self._load().items() if s}
+
+    def sources_for(self, topic: str) -> list[str]:
+        with self._lock:
+            return sorted(self._load().get(topic, {}))
+
+    def resolve(self, text: str | None) -> str | None:
+        """
+        Map a free-text focus ("kafka architecture") to a known topic ("kafka").
+        Exact match wins; otherwise the longest known topic mentioned in the text.
+        """
+        if not text:
+            return None
+        t = text.strip().lower()
+        with self._lock:
+            known = [k for k, s in self._load().items() if s and k != "general"]
+        if t in known:
+            return t
+        words = set(t.replace(",", " ").split())
+        matches = [k for k in known if k in words]
+        return max(matches, key=len) if matches else None
@@ -0,0 +1,120 @@
+# app/workspaces.py
+import re
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable
+
+from app.core.config import settings
+
+DEFAULT_WORKSPACE = "default"
+
+# used by request models too, so bad ids are rejected before any lookup
+WORKSPACE_PATTERN = r"^[A-Za-z0-9_-]{1,64}$"
+_WORKSPACE_RE = re.compile(WORKSPACE_PATTERN)
+
+
+def collection_for(workspace_id: str) -> str:
+    from app.vectorstore.base import DEFAULT_COLLECTION
+
+    # the default workspace keeps the original collection, so existing data stays put
+    if workspace_id == DEFAULT_WORKSPACE:
+        return DEFAULT_COLLECTION
+    return f"{DEFAULT_COLLECTION}__{workspace_id}"
+
+
+class Workspace:
+    """
+    Everything scoped to one workspace: its own vector collection (created on
+    first ingest), the ingestors writing into it, its topic index, near-duplicate
+    index, web fetch catalog, question bank and materialized default queries.
+    """
+
+    def __init__(self, workspace_id: str, llm: Callable):
+        # imported here: qdrant_client and the loaders are slow to import, and
+        # nothing needs them until the first workspace is used
+        from app.ingestion.pdf_ingestor import PDFIngestor
+        from app.ingestion.web_catalog import WebCatalog
+        from app.ingestion.web_ingestor import WebIngestor
+        from app.ingestion.youtube_ingestor import YouTubeIngestor
+        from app.rag.question_bank import QuestionBank
+        from app.vectorstore.dedup_index import DuplicateIndex
+        from app.vectorstore.materialized import MaterializedQueries
+        from app.vectorstore.base import create_vector_store
+        from app.vectorstore.topic_index import TopicIndex
+
+        self.id = workspace_id
+        self.store = create_vector_store(collection_for(workspace_id))
+        self.topic_index = TopicIndex(workspace_id)
+        self.dedup_index = DuplicateIndex(workspace_id) if settings.DEDUP_ENABLED else None
+        self.web_catalog = WebCatalog(workspace_id)
+        self.pdf_ingestor = PDFIngestor(self.store, self.topic_index, self.dedup_index)
+        self.web_ingestor = WebIngestor(self.store, self.topic_index, self.dedup_index, self.web_catalog)
+        self.youtube_ingestor = YouTubeIngestor(self.store, self.topic_index, self.dedup_index)
+        self.question_bank = QuestionBank(self.store, llm, workspace_id)
+        self.default_retrieval = MaterializedQueries(self.store)
+        self.last_used = time.monotonic()
+
+
+class WorkspaceRegistry:
+    """
+    Lazily built Workspace handles, kept in an LRU. Handles idle for longer than
+    `idle_seconds`, or beyond `capacity`, are dropped and rebuilt on next use.
+    """
+
+    def __init__(self, llm: Callable, capacity: int | None = None, idle_seconds: float | None = None):
+        # returns the shared chat model, for the workspaces' question banks
+        self.llm = llm
+        self.capacity = capacity or settings.WORKSPACE_CACHE_SIZE
+        self.idle_seconds = idle_seconds or settings.WORKSPACE_IDLE_SECONDS
+        self._items: "OrderedDict[str, Workspace]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.created = 0
+        self.evicted = 0
+
+    def get(self, workspace_id: str = DEFAULT_WORKSPACE) -> Workspace:
+        if not _WORKSPACE_RE.match(workspace_id):
+            raise ValueError(f"Invalid workspace id: {workspace_id!r}")
+
+        with self._lock:
+            ws = self._items.get(workspace_id)
+            if ws is not None:
+                self._items.move_to_end(workspace_id)
+                ws.last_used = time.monotonic()
+                return ws
+
+        # building attaches to Qdrant; keep it outside the lock
+        ws = Workspace(workspace_id, self.llm)
+
+        with self._lock:
+            existing = self._items.get(workspace_id)
+            if existing is not None:
+                return existing
+            self._items[workspace_id] = ws
+            self.created += 1
+            self._evict()
+            return ws
+
+    def _evict(self):
+        now = time.monotonic()
+        for wid in list(self._items):
+            ws = self._items[wid]
+            over = len(self._items) > self.capacity
+            idle = now - ws.last_used > self.idle_seconds
+            if not (over or idle):
+                break
+            del self._items[wid]
+            self.evicted += 1
+
+    def all(self) -> list[Workspace]:
+        with self._lock:
+            return list(self._items.values())
+
+    def stats(self):
+        with self._lock:
+            return {
+                "cached": list(self._items),
+                "capacity": self.capacity,
+                "created": self.created,
+                "evicted": self.evicted,
+            }
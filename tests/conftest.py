@@ -0,0 +1,83 @@
+# tests/conftest.py
+"""
+Shared fixtures: a local HTTP server standing in for the web, and a throwaway
+SQLite database in place of data/app.db. Nothing here needs network or API keys.
+"""
+import sys
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+
+class Site:
+    """
+    Routes: path -> (status, headers, body) or a callable(request) returning one.
+    Every request is recorded as a dict (method, path, headers) in `requests`.
+    """
+
+    def __init__(self):
+        self.routes: dict = {}
+        self.requests: list[dict] = []
+        self.base_url = ""
+
+    def url(self, path: str) -> str:
+        return self.base_url + path
+
+    def hits(self, path: str) -> int:
+        return sum(1 for r in self.requests if r["path"] == path)
+
+
+@pytest.fixture
+def site():
+    site = Site()
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            request = {"method": "GET", "path": self.path, "headers": dict(self.headers)}
+            site.requests.append(request)
+            route = site.routes.get(self.path)
+            if route is None:
+                status, headers, body = 404, {}, b"not found"
+            else:
+                status, headers, body = route(request) if callable(route) else route
+            if isinstance(body, str):
+                body = body.encode()
+            self.send_response(status)
+            for name, value in headers.items():
+                self.send_header(name, value)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    site.base_url = f"http://127.0.0.1:{server.server_address[1]}"
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield site
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def temp_db(tmp_path, monkeypatch):
+    """
+    A fresh SQLite file per test, patched into every loaded module that opened
+    sessions through app.db.SessionLocal.
+    """
+    # the models module registers every table on Base
+    from app.models import Base
+
+    engine = create_engine(f"sqlite:///{tmp_path / 'app.db'}", connect_args={"check_same_thread": False})
+    Base.metadata.create_all(bind=engine)
+    session_local = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+    for name, module in list(sys.modules.items()):
+        if (name == "app" or name.startswith("app.")) and hasattr(module, "SessionLocal"):
+            monkeypatch.setattr(module, "SessionLocal", session_local)
+    yield session_local
+    engine.dispose()
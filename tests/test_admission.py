@@ -0,0 +1,201 @@
+# tests/test_admission.py
+"""
+AdmissionController driven from threads: one slot, a tiny queue, short timeouts.
+"""
+import threading
+import time
+
+import pytest
+
+from app.admission import AdmissionController, Overloaded
+
+
+def controller(limit: int = 1, queue_size: int = 1, timeout: float = 2.0) -> AdmissionController:
+    return AdmissionController("llm", limit, queue_size, timeout)
+
+
+def queued(c: AdmissionController) -> int:
+    return sum(c.stats()["queue_depth"].values())
+
+
+def wait_for_queue(c: AdmissionController, depth: int):
+    deadline = time.monotonic() + 2
+    while queued(c) != depth:
+        assert time.monotonic() < deadline, f"queue never reached {depth}"
+        time.sleep(0.005)
+
+
+def spawn(c: AdmissionController, priority: str, log: list) -> threading.Thread:
+    def run():
+        try:
+            with c.slot(priority):
+                log.append(priority)
+        except Overloaded as e:
+            log.append((priority, e.status_code, e.reason))
+
+    thread = threading.Thread(target=run)
+    thread.start()
+    return thread
+
+
+def assert_idle(c: AdmissionController):
+    stats = c.stats()
+    assert stats["in_flight"] == 0
+    assert sum(stats["queue_depth"].values()) == 0
+
+
+def test_free_slot_is_taken_without_queueing():
+    c = controller()
+
+    with c.slot("standard"):
+        assert c.stats()["in_flight"] == 1
+
+    assert_idle(c)
+    assert c.stats()["queued"]["standard"] == 0
+
+
+def test_queue_full_is_429_and_the_waiter_gets_the_slot():
+    c = controller()
+    log = []
+    c.acquire("standard")
+    waiting = spawn(c, "standard", log)
+    wait_for_queue(c, 1)
+
+    with pytest.raises(Overloaded) as exc:
+        c.acquire("standard")
+    assert exc.value.status_code == 429
+    assert exc.value.reason == "queue full"
+
+    c.release(0.01)
+    waiting.join()
+    assert log == ["standard"]
+    assert c.stats()["rejected_queue_full"]["standard"] == 1
+    assert_idle(c)
+
+
+def test_better_priority_sheds_the_newest_lowest_waiter():
+    c = controller(queue_size=2)
+    log = []
+    c.acquire("standard")
+    older_bulk = spawn(c, "bulk", log)
+    wait_for_queue(c, 1)
+    newer_bulk = spawn(c, "bulk", log)
+    wait_for_queue(c, 2)
+
+    interactive = spawn(c, "interactive", log)
+    newer_bulk.join()
+    assert log == [("bulk", 429, "shed for higher-priority work")]
+
+    c.release(0.01)
+    interactive.join()
+    older_bulk.join()
+    assert log[1:] == ["interactive", "bulk"]
+    assert c.stats()["shed"]["bulk"] == 1
+    assert_idle(c)
+
+
+def test_equal_priority_is_rejected_rather_than_shedding():
+    c = controller()
+    log = []
+    c.acquire("standard")
+    waiting = spawn(c, "interactive", log)
+    wait_for_queue(c, 1)
+
+    with pytest.raises(Overloaded) as exc:
+        c.acquire("interactive")
+    assert exc.value.reason == "queue full"
+
+    c.release(0.01)
+    waiting.join()
+    assert log == ["interactive"]
+    assert_idle(c)
+
+
+def test_waiters_are_admitted_best_priority_first_fifo_within_a_class():
+    c = controller(queue_size=4)
+    log = []
+    c.acquire("standard")
+    threads = []
+    for priority in ["bulk", "standard", "interactive", "standard"]:
+        threads.append(spawn(c, priority, log))
+        wait_for_queue(c, len(threads))
+
+    c.release(0.01)
+    for thread in threads:
+        thread.join()
+
+    assert log == ["interactive", "standard", "standard", "bulk"]
+    assert_idle(c)
+
+
+def test_waiting_too_long_is_503():
+    c = controller(timeout=0.1)
+    c.acquire("standard")
+
+    with pytest.raises(Overloaded) as exc:
+        c.acquire("interactive")
+    assert exc.value.status_code == 503
+
+    assert c.stats()["timed_out"]["interactive"] == 1
+    assert queued(c) == 0
+    # the expired waiter is skipped: the slot is given back
+    c.release(0.01)
+    assert_idle(c)
+
+
+def test_slot_handed_over_as_the_wait_times_out_is_kept():
+    c = controller(timeout=0.1)
+    # re-entrant so release() can run while the waiter is blocked on the lock after its timeout
+    c._lock = threading.RLock()
+    log = []
+    c.acquire("standard")
+    waiting = spawn(c, "standard", log)
+    wait_for_queue(c, 1)
+
+    with c._lock:
+        time.sleep(0.3)
+        c.release(0.01)
+
+    waiting.join()
+    assert log == ["standard"]
+    assert c.stats()["timed_out"]["standard"] == 0
+    assert_idle(c)
+
+
+def test_queue_size_zero_rejects_whenever_busy():
+    c = controller(queue_size=0)
+    c.acquire("bulk")
+
+    for priority in ["bulk", "interactive"]:
+        with pytest.raises(Overloaded) as exc:
+            c.acquire(priority)
+        assert exc.value.status_code == 429
+
+    c.release(0.01)
+    assert_idle(c)
+
+
+def test_retry_after_is_bounded():
+    c = controller(queue_size=0)
+    c.acquire("standard")
+    with pytest.raises(Overloaded) as exc:
+        c.acquire("standard")
+    # no call duration measured yet
+    assert exc.value.retry_after == 1
+    c.release(1000.0)
+
+    c.acquire("standard")
+    with pytest.raises(Overloaded) as exc:
+        c.acquire("standard")
+    assert exc.value.retry_after == 60
+    c.release(0.001)
+
+    c = controller(queue_size=0)
+    with c.slot("standard"):
+        pass
+    c.acquire("standard")
+    with pytest.raises(Overloaded) as exc:
+        c.acquire("standard")
+    assert exc.value.retry_after == 1
+    c.release(0.01)
+    assert_idle(c)
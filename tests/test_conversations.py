@@ -0,0 +1,32 @@
+# tests/test_conversations.py
+from app.sessions.conversations import Conversation, ConversationStore, Turn
+
+
+def turn(question: str) -> Turn:
+    return Turn(question, "answer", [], "search", None)
+
+
+def test_turn_count_keeps_going_past_the_history_cap(monkeypatch):
+    from app.core.config import settings
+
+    monkeypatch.setattr(settings, "CONVERSATION_MAX_TURNS", 2)
+    store = ConversationStore(max_active=4, ttl_seconds=60)
+    conversation = store.create("default", None)
+
+    for i in range(5):
+        store.record(conversation, turn(f"q{i}"))
+
+    assert conversation.turn_count == 5
+    assert [t.question for t in conversation.turns] == ["q3", "q4"]
+
+
+def test_set_sources_clears_the_window_only_on_a_new_scope():
+    conversation = Conversation("c1", "default", ["a.pdf"])
+    conversation.window["p1"] = (None, None)
+
+    conversation.set_sources(["a.pdf"])
+    assert conversation.window
+
+    conversation.set_sources([])
+    assert conversation.sources is None
+    assert not conversation.window
@@ -0,0 +1,275 @@
+# tests/test_crawler.py
+import asyncio
+import gzip
+import threading
+import time
+
+import pytest
+
+from app.ingestion.crawl_jobs import CrawlJob
+from app.ingestion.crawler import CrawlScope, SiteCrawler, canonical_url, run_crawl
+from app.ingestion.web_ingestor import WebIngestor, WebPage
+
+HTML = {"Content-Type": "text/html; charset=utf-8"}
+
+
+def page(title: str, *links: str, head: str = "") -> str:
+    anchors = "".join(f'<a href="{href}">{href}</a>' for href in links)
+    return f"<html><head><title>{title}</title>{head}</head><body><h1>{title}</h1><p>{title} text.</p>{anchors}</body></html>"
+
+
+def crawl(site, path="/", **kwargs) -> tuple[list[WebPage], SiteCrawler]:
+    kwargs.setdefault("delay_seconds", 0)
+    kwargs.setdefault("concurrency", 4)
+    crawler = SiteCrawler(site.url(path), **kwargs)
+
+    async def collect():
+        return [p async for p in crawler.pages()]
+
+    return asyncio.run(collect()), crawler
+
+
+def paths(pages: list[WebPage]) -> set[str]:
+    return {p.url.split("://", 1)[1].split("/", 1)[1] for p in pages}
+
+
+# ---------- URL handling ----------
+
+def test_canonical_url():
+    assert canonical_url("HTTP://Example.COM:80/a/b/#frag") == "http://example.com/a/b"
+    assert canonical_url("https://example.com") == "https://example.com/"
+    assert canonical_url("https://example.com:8443/x?q=1") == "https://example.com:8443/x?q=1"
+
+
+def test_scope():
+    scope = CrawlScope(["example.com"], path_prefixes=["/docs"], exclude=[r"/docs/old/"])
+    assert scope.allows("https://example.com/docs/intro")
+    assert scope.allows("https://api.example.com/docs/intro")
+    assert not scope.allows("https://example.org/docs/intro")
+    assert not scope.allows("https://example.com/blog/post")
+    assert not scope.allows("https://example.com/docs/old/intro")
+    assert not scope.allows("https://example.com/docs/logo.png")
+    assert not scope.allows("mailto:someone@example.com")
+
+
+# ---------- crawling ----------
+
+def test_follows_links_and_dedupes_canonical_urls(site):
+    site.routes["/"] = (200, HTML, page("Home", "/a", "/a/", "/a#top", "/b", "https://elsewhere.invalid/x"))
+    site.routes["/a"] = (200, HTML, page("A", "/", "/b"))
+    site.routes["/b"] = (200, HTML, page("B", "/a"))
+
+    pages, crawler = crawl(site, respect_robots=False)
+
+    assert paths(pages) == {"", "a", "b"}
+    assert site.hits("/a") == 1
+    assert crawler.stats["pages"] == 3
+    assert all(p.soup is not None for p in pages)
+
+
+def test_max_pages_and_depth(site):
+    site.routes["/"] = (200, HTML, page("Home", "/1"))
+    for i in range(1, 6):
+        site.routes[f"/{i}"] = (200, HTML, page(str(i), f"/{i + 1}"))
+
+    pages, _ = crawl(site, respect_robots=False, max_pages=3)
+    assert len(pages) == 3
+
+    pages, _ = crawl(site, respect_robots=False, max_depth=2)
+    assert paths(pages) == {"", "1", "2"}
+
+
+def test_path_prefix_scope(site):
+    site.routes["/docs/"] = (200, HTML, page("Docs", "/docs/a", "/blog/b"))
+    site.routes["/docs/a"] = (200, HTML, page("A"))
+    site.routes["/blog/b"] = (200, HTML, page("B"))
+
+    scope = CrawlScope(["127.0.0.1"], path_prefixes=["/docs"])
+    pages, _ = crawl(site, "/docs/", scope=scope, respect_robots=False)
+
+    assert paths(pages) == {"docs", "docs/a"}
+    assert site.hits("/blog/b") == 0
+
+
+def test_errors_and_non_html_are_skipped(site):
+    site.routes["/"] = (200, HTML, page("Home", "/missing", "/data.json", "/broken"))
+    site.routes["/data.json"] = (200, {"Content-Type": "application/json"}, "{}")
+    site.routes["/broken"] = (500, {}, "boom")
+
+    pages, crawler = crawl(site, respect_robots=False)
+
+    assert paths(pages) == {""}
+    assert crawler.stats["errors"] == 2
+    assert crawler.stats["skipped"] == 1
+    assert any("HTTP 500" in e for e in crawler.errors)
+
+
+def test_rel_canonical_names_the_source(site):
+    site.routes["/"] = (200, HTML, page("Home", "/print/a"))
+    site.routes["/print/a"] = (200, HTML, page("A", head='<link rel="canonical" href="/a">'))
+
+    pages, _ = crawl(site, respect_robots=False)
+
+    assert paths(pages) == {"", "a"}
+
+
+# ---------- sitemaps ----------
+
+def urlset(site, *locs: str) -> str:
+    entries = "".join(f"<url><loc>{site.url(loc)}</loc></url>" for loc in locs)
+    return f'<?xml version="1.0"?><urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">{entries}</urlset>'
+
+
+def test_sitemap_index_and_gzip(site):
+    index = (
+        '<?xml version="1.0"?><sitemapindex xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">'
+        f"<sitemap><loc>{site.url('/s1.xml')}</loc></sitemap>"
+        f"<sitemap><loc>{site.url('/s2.xml.gz')}</loc></sitemap>"
+        "</sitemapindex>"
+    )
+    site.routes["/sitemap.xml"] = (200, {"Content-Type": "application/xml"}, index)
+    site.routes["/s1.xml"] = (200, {"Content-Type": "application/xml"}, urlset(site, "/a"))
+    site.routes["/s2.xml.gz"] = (200, {}, gzip.compress(urlset(site, "/b").encode()))
+    site.routes["/a"] = (200, HTML, page("A"))
+    site.routes["/b"] = (200, HTML, page("B"))
+
+    pages, _ = crawl(site, "/sitemap.xml", respect_robots=False, follow_links=False)
+
+    assert paths(pages) == {"a", "b"}
+
+
+# ---------- politeness ----------
+
+def test_robots_txt_disallow(site):
+    site.routes["/robots.txt"] = (200, {"Content-Type": "text/plain"}, "User-agent: *\nDisallow: /private\n")
+    site.routes["/"] = (200, HTML, page("Home", "/private/a", "/public"))
+    site.routes["/private/a"] = (200, HTML, page("Secret"))
+    site.routes["/public"] = (200, HTML, page("Public"))
+
+    pages, crawler = crawl(site)
+
+    assert paths(pages) == {"", "public"}
+    assert site.hits("/private/a") == 0
+    assert site.hits("/robots.txt") == 1
+    assert crawler.stats["skipped"] == 1
+
+
+def test_robots_crawl_delay_spaces_requests(site):
+    # robotparser only understands whole seconds
+    site.routes["/robots.txt"] = (200, {}, "User-agent: *\nCrawl-delay: 1\n")
+    site.routes["/"] = (200, HTML, page("Home", "/a", "/b"))
+    site.routes["/a"] = (200, HTML, page("A"))
+    site.routes["/b"] = (200, HTML, page("B"))
+
+    t0 = time.monotonic()
+    pages, _ = crawl(site)
+
+    assert len(pages) == 3
+    assert time.monotonic() - t0 >= 2
+
+
+def test_meta_robots_noindex_nofollow(site):
+    site.routes["/"] = (200, HTML, page("Home", "/hidden", "/nofollow"))
+    site.routes["/hidden"] = (200, HTML, page("Hidden", "/via-hidden", head='<meta name="robots" content="noindex">'))
+    site.routes["/via-hidden"] = (200, HTML, page("Via hidden"))
+    site.routes["/nofollow"] = (200, HTML, page("No follow", "/never", head='<meta name="robots" content="nofollow">'))
+    site.routes["/never"] = (200, HTML, page("Never"))
+
+    pages, _ = crawl(site)
+
+    # noindex pages aren't stored but their links are still followed
+    assert paths(pages) == {"", "via-hidden", "nofollow"}
+    assert site.hits("/never") == 0
+
+
+def test_per_host_concurrency_limit(site):
+    active, peak, lock = [0], [0], threading.Lock()
+
+    def slow(request):
+        with lock:
+            active[0] += 1
+            peak[0] = max(peak[0], active[0])
+        time.sleep(0.1)
+        with lock:
+            active[0] -= 1
+        return 200, HTML, page(request["path"])
+
+    links = [f"/p{i}" for i in range(8)]
+    site.routes["/"] = (200, HTML, page("Home", *links))
+    for link in links:
+        site.routes[link] = slow
+
+    pages, _ = crawl(site, respect_robots=False, concurrency=8, per_host_concurrency=2)
+
+    assert len(pages) == 9
+    assert peak[0] == 2
+
+
+# ---------- batching into ingestion ----------
+
+def test_run_crawl_batches_and_reports_failed_batches(site):
+    site.routes["/"] = (200, HTML, page("Home", *[f"/p{i}" for i in range(5)]))
+    for i in range(5):
+        site.routes[f"/p{i}"] = (200, HTML, page(f"P{i}"))
+
+    batches = []
+
+    def ingest_batch(pages):
+        batches.append(len(pages))
+        if len(batches) == 2:
+            raise RuntimeError("quota exceeded")
+
+    job = CrawlJob(site.url("/"), "test")
+    crawler = SiteCrawler(site.url("/"), delay_seconds=0, respect_robots=False)
+    asyncio.run(run_crawl(crawler, job, ingest_batch, batch_size=4))
+
+    assert batches == [4, 2]
+    assert job.counts["pages_failed"] == 2
+    assert "quota exceeded" in job.snapshot()["errors"][0]
+    assert job.snapshot()["crawl"]["pages"] == 6
+
+
+# ---------- replacing stored pages ----------
+
+class FakeEmbeddings:
+    def __init__(self, fail: bool = False):
+        self.fail = fail
+
+    def embed_documents(self, texts):
+        if self.fail:
+            raise RuntimeError("embedding quota exceeded")
+        return [[1.0, 0.0] for _ in texts]
+
+
+class FakeStore:
+    def __init__(self, events: list, fail: bool = False):
+        self.embeddings = FakeEmbeddings(fail)
+        self.events = events
+
+    def add_texts(self, texts, metadatas=None, vectors=None):
+        assert vectors is not None and len(vectors) == len(texts)
+        self.events.append(("add", sorted({m["source"] for m in metadatas})))
+
+
+def fetched_page(url: str) -> WebPage:
+    return WebPage(url, page("Fresh", "/x").encode(), '"v2"', None)
+
+
+def test_replace_runs_after_embedding_before_store():
+    events = []
+    ingestor = WebIngestor(FakeStore(events))
+
+    ingestor.ingest_pages([fetched_page("http://site/a"), fetched_page("http://site/b")],
+                          replace=lambda url: events.append(("replace", url)))
+
+    assert events == [("replace", "http://site/a"), ("replace", "http://site/b"), ("add", ["http://site/a", "http://site/b"])]
+
+
+def test_failed_embedding_keeps_old_chunks():
+    events = []
+    ingestor = WebIngestor(FakeStore(events, fail=True))
+
+    with pytest.raises(RuntimeError):
+        ingestor.ingest_pages([fetched_page("http://site/a")], replace=lambda url: events.append(("replace", url)))
+
+    assert events == []
@@ -0,0 +1,170 @@
+# tests/test_dedup.py
+import random
+
+import pytest
+from langchain_core.documents import Document
+
+from app.ingestion.dedup import bands, hamming, simhash, to_signed, to_unsigned
+from app.vectorstore import dedup_index
+from app.vectorstore.dedup_index import DuplicateIndex
+
+KAFKA = (
+    "Apache Kafka stores streams of records in topics. Each topic is split into partitions, "
+    "and every partition is an ordered, immutable log replicated across brokers."
+)
+SPRING = "Spring Boot auto-configures beans from the classpath and exposes actuator endpoints."
+
+# 64-bit base hash; each band is 16 bits
+BASE = 0x0123_4567_89AB_CDEF
+
+
+def chunks(*texts: str) -> list[Document]:
+    return [Document(t) for t in texts]
+
+
+@pytest.fixture
+def fixed_hashes(monkeypatch):
+    """Texts of the form "h:<int>" hash to that int, so distances are exact."""
+    real = dedup_index.simhash
+    monkeypatch.setattr(dedup_index, "simhash", lambda text: int(text[2:]) if text.startswith("h:") else real(text))
+
+
+def h(value: int) -> str:
+    return f"h:{value}"
+
+
+# ---------- simhash / bands ----------
+
+def test_simhash_is_deterministic_and_ignores_case():
+    assert simhash(KAFKA) == simhash(KAFKA)
+    assert simhash(KAFKA) == simhash(KAFKA.upper())
+    assert simhash("") == 0
+    assert simhash(" -- ... ") == 0
+    assert hamming(simhash(KAFKA), simhash(SPRING)) > 16
+
+
+def test_hashes_within_three_bits_share_a_band():
+    rng = random.Random(0)
+    for _ in range(500):
+        a = rng.getrandbits(64)
+        b = a
+        for bit in rng.sample(range(64), rng.randint(0, 3)):
+            b ^= 1 << bit
+        assert set(bands(a)) & set(bands(b))
+
+    # one flipped bit per band: nothing in common, the bound is tight
+    assert not set(bands(BASE)) & set(bands(BASE ^ (1 | 1 << 16 | 1 << 32 | 1 << 48)))
+
+
+def test_signed_round_trip_for_sqlite():
+    for value in (0, 1, (1 << 63) - 1, 1 << 63, (1 << 64) - 1):
+        signed = to_signed(value)
+        assert -(1 << 63) <= signed < (1 << 63)
+        assert to_unsigned(signed) == value
+
+
+# ---------- DuplicateIndex ----------
+
+def test_hamming_threshold(temp_db, fixed_hashes):
+    index = DuplicateIndex("ws", max_distance=3)
+    index.record("a.pdf", ["c0"], [BASE])
+
+    # three bits spread over three bands: found through the untouched band
+    near = BASE ^ (1 | 1 << 20 | 1 << 40)
+    # four bits inside one band: same other bands, but too far
+    far = BASE ^ 0b1111
+
+    kept, signatures, skipped = index.filter("b.pdf", chunks(h(near), h(far)))
+
+    assert [d.page_content for d in kept] == [h(far)]
+    assert signatures == [far]
+    assert skipped == {"within_source": 0, "cross_source": 1}
+
+
+def test_within_source_duplicates_in_one_document(temp_db):
+    index = DuplicateIndex("ws")
+
+    kept, _, skipped = index.filter("a.pdf", chunks(KAFKA, SPRING, KAFKA.upper()))
+
+    assert [d.page_content for d in kept] == [KAFKA, SPRING]
+    assert skipped == {"within_source": 1, "cross_source": 0}
+
+
+def test_cross_source_duplicates_can_be_kept(temp_db):
+    index = DuplicateIndex("ws")
+    kept, signatures, _ = index.filter("a.pdf", chunks(KAFKA))
+    index.record("a.pdf", ["c0"], signatures)
+
+    assert index.filter("b.pdf", chunks(KAFKA))[2] == {"within_source": 0, "cross_source": 1}
+
+    lenient = DuplicateIndex("ws", cross_source=False)
+    kept, _, skipped = lenient.filter("b.pdf", chunks(KAFKA))
+    assert len(kept) == 1
+    assert skipped == {"within_source": 0, "cross_source": 0}
+
+
+def test_replace_keeps_a_reingested_source(temp_db):
+    index = DuplicateIndex("ws")
+    index.record("b.pdf", ["b0"], [simhash(SPRING)])
+    docs = chunks(KAFKA, KAFKA, SPRING)
+    kept, signatures, _ = index.filter("a.pdf", docs[:1])
+    index.record("a.pdf", ["a0"], signatures)
+
+    # without replace every chunk matches what a.pdf already stored
+    assert index.filter("a.pdf", docs)[0] == []
+
+    kept, signatures, skipped = index.filter("a.pdf", docs, replace=True)
+
+    # its own stored chunks no longer count, but duplicates within the new
+    # version and of other sources are still dropped
+    assert [d.page_content for d in kept] == [KAFKA]
+    assert signatures == [simhash(KAFKA)]
+    assert skipped == {"within_source": 1, "cross_source": 1}
+
+
+def test_signatures_persist_per_workspace(temp_db):
+    index = DuplicateIndex("ws")
+    index.index_chunks("a.pdf", [Document(KAFKA, metadata={"chunk_id": "c0"})])
+
+    assert len(DuplicateIndex("ws").filter("b.pdf", chunks(KAFKA))[0]) == 0
+    assert len(DuplicateIndex("other").filter("b.pdf", chunks(KAFKA))[0]) == 1
+    assert DuplicateIndex("ws").stats()["signatures"] is None
+
+
+def test_remove_source_forgets_its_signatures(temp_db):
+    index = DuplicateIndex("ws")
+    index.filter("a.pdf", [])
+    index.record("a.pdf", ["c0", "c1"], [simhash(KAFKA), simhash(SPRING)])
+    index.record("b.pdf", ["c0"], [BASE])
+    assert index.stats()["signatures"] == 3
+
+    index.remove_source("a.pdf")
+
+    assert index.stats()["signatures"] == 1
+    assert len(index.filter("c.pdf", chunks(KAFKA))[0]) == 1
+    assert len(DuplicateIndex("ws").filter("c.pdf", chunks(KAFKA))[0]) == 1
+
+
+def test_batch_sees_earlier_sources_before_they_are_recorded(temp_db):
+    index = DuplicateIndex("ws")
+    batch = index.batch()
+
+    first, _, _ = index.filter("a.pdf", chunks(KAFKA), batch=batch)
+    second, _, skipped = index.filter("b.pdf", chunks(KAFKA, SPRING), batch=batch)
+
+    assert len(first) == 1
+    assert [d.page_content for d in second] == [SPRING]
+    assert skipped == {"within_source": 0, "cross_source": 1}
+    # nothing is recorded until record()
+    assert index.stats()["signatures"] == 0
+
+
+def test_texts_without_words_are_always_kept(temp_db):
+    index = DuplicateIndex("ws")
+
+    kept, signatures, _ = index.filter("a.pdf", chunks("---", "---", "..."))
+    index.record("a.pdf", ["c0", "c1", "c2"], signatures)
+
+    assert len(kept) == 3
+    assert signatures == [0, 0, 0]
+    assert index.stats()["signatures"] == 0
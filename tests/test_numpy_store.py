@@ -0,0 +1,146 @@
+# tests/test_numpy_store.py
+import numpy as np
+import pytest
+
+from app.core.config import settings
+from app.vectorstore.numpy_store import NumpyStore, _top
+
+# (text, source, topic, vector): unit vectors, so scores against e0 are the first coordinate
+CHUNKS = [
+    ("a1", "a.pdf", "kafka", [1.0, 0.0, 0.0, 0.0]),
+    ("a2", "a.pdf", "kafka", [0.8, 0.6, 0.0, 0.0]),
+    ("b1", "b.pdf", "spring", [0.0, 1.0, 0.0, 0.0]),
+    ("b2", "b.pdf", "kafka", [0.6, 0.8, 0.0, 0.0]),
+    ("c1", "c.pdf", "spring", [0.0, 0.0, 1.0, 0.0]),
+    ("c2", "c.pdf", None, [0.0, 0.0, 0.6, 0.8]),
+]
+
+
+class FakeEmbeddings:
+    """Query text is the vector itself, e.g. "1,0,0,0"."""
+
+    def embed_query(self, text: str) -> list[float]:
+        return [float(x) for x in text.split(",")]
+
+
+def open_store(root) -> NumpyStore:
+    return NumpyStore("test", embeddings=FakeEmbeddings(), root=str(root))
+
+
+def fill(store: NumpyStore, chunks=CHUNKS):
+    metas = []
+    for i, (_, source, topic, _) in enumerate(chunks):
+        meta = {"source": source, "page": i, "chunk_id": f"c{i}"}
+        if topic:
+            meta["topic"] = topic
+        metas.append(meta)
+    store.add_texts([c[0] for c in chunks], metas, vectors=[c[3] for c in chunks])
+
+
+def nearest(store: NumpyStore, vector, limit: int = 3, sources=None) -> list[tuple[str, float]]:
+    return [
+        (doc.page_content, round(score, 4))
+        for _, score, _, doc in store.vector_candidates(vector, limit, sources=sources)
+    ]
+
+
+def test_top_k_is_exact_and_best_first(tmp_path):
+    store = open_store(tmp_path)
+    fill(store)
+
+    assert nearest(store, [1, 0, 0, 0]) == [("a1", 1.0), ("a2", 0.8), ("b2", 0.6)]
+    # query vectors are normalized too
+    assert nearest(store, [0, 0, 5, 0], limit=2) == [("c1", 1.0), ("c2", 0.6)]
+    assert len(nearest(store, [1, 0, 0, 0], limit=50)) == len(CHUNKS)
+
+
+def test_source_and_topic_filters(tmp_path):
+    store = open_store(tmp_path)
+    fill(store)
+
+    assert nearest(store, [1, 0, 0, 0], sources=["b.pdf", "c.pdf"]) == [("b2", 0.6), ("b1", 0.0), ("c1", 0.0)]
+    assert nearest(store, [1, 0, 0, 0], sources=["missing.pdf"]) == []
+
+    found = store.search("0,1,0,0", k=5, topic="spring")
+    assert sorted(d.page_content for d in found) == ["b1", "c1"]
+    found = store.search("1,0,0,0", k=5, sources=["a.pdf", "b.pdf"], topic="kafka")
+    assert sorted(d.page_content for d in found) == ["a1", "a2", "b2"]
+
+
+def test_delete_by_source_survives_reopen(tmp_path):
+    store = open_store(tmp_path)
+    fill(store)
+
+    assert store.delete_by_source("a.pdf") == 1
+
+    for s in (store, open_store(tmp_path)):
+        assert s.count() == 4
+        assert s.list_sources() == ["b.pdf", "c.pdf"]
+        assert s.get_chunks("a.pdf") == []
+        assert nearest(s, [1, 0, 0, 0], limit=2) == [("b2", 0.6), ("b1", 0.0)]
+        assert [d.page_content for d in s.search("1,0,0,0", k=5, topic="kafka")] == ["b2"]
+
+
+def test_compaction_keeps_live_rows(tmp_path):
+    store = open_store(tmp_path)
+    fill(store)
+
+    store.delete_by_source("a.pdf")
+    assert store._generation == 0
+    # dead rows are now more than a third of the matrix
+    store.delete_by_source("b.pdf")
+    assert store._generation == 1
+    assert sorted(p.name for p in (tmp_path / "test").iterdir()) == ["meta.json", "payload.1.jsonl", "vectors.1.bin"]
+
+    for s in (store, open_store(tmp_path)):
+        assert s.count() == 2
+        assert nearest(s, [0, 0, 0, 1]) == [("c2", 0.8), ("c1", 0.0)]
+        assert [d.metadata["chunk_id"] for d in s.get_chunks("c.pdf")] == ["c4", "c5"]
+
+    # appends after compaction land in the new generation
+    fill(store, CHUNKS[:1])
+    assert nearest(open_store(tmp_path), [1, 0, 0, 0], limit=1) == [("a1", 1.0)]
+
+
+def test_growing_past_the_initial_capacity(tmp_path):
+    store = open_store(tmp_path)
+    rng = np.random.default_rng(0)
+    vectors = rng.normal(size=(1500, 4))
+    store.add_texts([f"t{i}" for i in range(1500)], [{"source": f"s{i % 2}.pdf"} for i in range(1500)], vectors=vectors)
+
+    reopened = open_store(tmp_path)
+    assert reopened.count() == 1500
+    best = vectors[1234] / np.linalg.norm(vectors[1234])
+    assert nearest(reopened, best, limit=1) == [("t1234", 1.0)]
+
+
+def test_float16_storage_scores_in_float32(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "NUMPY_STORE_DTYPE", "float16")
+    store = open_store(tmp_path)
+    fill(store)
+
+    assert store._matrix.dtype == np.float16
+    found = nearest(store, [1, 0, 0, 0])
+    assert [text for text, _ in found] == ["a1", "a2", "b2"]
+    np.testing.assert_allclose([score for _, score in found], [1.0, 0.8, 0.6], atol=1e-3)
+
+    # an existing collection keeps its dtype whatever the setting says now
+    monkeypatch.setattr(settings, "NUMPY_STORE_DTYPE", "float32")
+    assert open_store(tmp_path)._matrix.dtype == np.float16
+
+
+def test_unknown_dtype_is_rejected(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "NUMPY_STORE_DTYPE", "int8")
+    with pytest.raises(ValueError):
+        open_store(tmp_path)
+
+
+def test_top_is_stable_and_applies_the_threshold():
+    scores = np.array([0.5, 0.9, 0.5, 0.1, 0.5], dtype=np.float32)
+
+    # ties keep row order
+    assert _top(scores, 5).tolist() == [1, 0, 2, 4, 3]
+    assert _top(scores, 2).tolist()[0] == 1
+    assert _top(scores, 5, threshold=0.5).tolist() == [1, 0, 2, 4]
+    assert _top(scores, 0).tolist() == []
+    assert _top(scores[:0], 3).tolist() == []
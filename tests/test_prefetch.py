@@ -0,0 +1,59 @@
+# tests/test_prefetch.py
+import threading
+import time
+
+from app.sessions.prefetch import QuestionPrefetcher
+
+
+def test_take_returns_a_matching_result():
+    prefetcher = QuestionPrefetcher(max_outstanding=2, ttl_seconds=60, wait_seconds=2)
+
+    assert prefetcher.schedule("s1", ("kafka", None, 5), lambda: "next question")
+
+    assert prefetcher.take("s1", ("kafka", None, 5)) == "next question"
+    assert prefetcher.take("s1", ("kafka", None, 5)) is None
+    prefetcher.close()
+
+
+def test_mismatched_key_is_wasted():
+    prefetcher = QuestionPrefetcher(max_outstanding=2, ttl_seconds=60, wait_seconds=2)
+    prefetcher.schedule("s1", "kafka", lambda: "q")
+
+    assert prefetcher.take("s1", "spring") is None
+    assert prefetcher.stats()["wasted"] == 1
+    prefetcher.close()
+
+
+def test_abandoned_slots_are_purged_on_schedule():
+    prefetcher = QuestionPrefetcher(max_outstanding=2, ttl_seconds=0.1, wait_seconds=2)
+    for i in range(5):
+        prefetcher.schedule(f"abandoned-{i}", "k", lambda: "q")
+        # let the generation finish so the next one is admitted
+        deadline = time.monotonic() + 2
+        while prefetcher.stats()["outstanding"] and time.monotonic() < deadline:
+            time.sleep(0.005)
+    assert prefetcher.stats()["slots"] == 5
+
+    time.sleep(0.15)
+    prefetcher.schedule("live", "k", lambda: "q")
+
+    stats = prefetcher.stats()
+    assert stats["slots"] == 1
+    assert stats["wasted"] == 5
+    assert prefetcher.take("live", "k") == "q"
+    prefetcher.close()
+
+
+def test_skipped_when_too_many_outstanding():
+    prefetcher = QuestionPrefetcher(max_outstanding=1, ttl_seconds=60, wait_seconds=2)
+    release = threading.Event()
+
+    assert prefetcher.schedule("s1", "k", lambda: release.wait(2) and "q1")
+    assert not prefetcher.schedule("s2", "k", lambda: "q2")
+
+    release.set()
+    assert prefetcher.take("s1", "k") == "q1"
+    stats = prefetcher.stats()
+    assert stats["skipped"] == 1
+    assert stats["slots"] == 0
+    prefetcher.close()
@@ -0,0 +1,64 @@
+# tests/test_question_bank.py
+from langchain_core.documents import Document
+
+from app.rag.question_bank import QuestionBank
+
+
+class FakeStore:
+    def __init__(self, docs: list[Document]):
+        self.docs = docs
+        self.log: list[tuple[str, str]] = []
+
+    def changes_since(self, seq: int):
+        return len(self.log), self.log[seq:]
+
+    def get_chunks(self, source: str) -> list[Document]:
+        return [d for d in self.docs if d.metadata["source"] == source]
+
+
+class FakeLLM:
+    def __init__(self, on_call=None):
+        self.prompts = []
+        self.on_call = on_call
+
+    def invoke(self, prompt):
+        self.prompts.append(prompt)
+        if self.on_call:
+            self.on_call()
+
+        class Response:
+            content = "1) What moves data? A) broker B) disk C) cable D) cache Correct: A"
+
+        return Response()
+
+
+def docs(source: str = "a.pdf", count: int = 4) -> list[Document]:
+    return [
+        Document(f"kafka broker text {i}", metadata={"source": source, "topic": "kafka", "chunk_id": f"c{i}"})
+        for i in range(count)
+    ]
+
+
+def test_builds_with_the_injected_llm(temp_db):
+    llm = FakeLLM()
+    bank = QuestionBank(FakeStore(docs()), lambda: llm, per_topic=1, chunks_per_question=4)
+
+    stored = bank.build_for_source("a.pdf")
+
+    # three difficulties plus one MCQ per window
+    assert stored == 4
+    assert len(llm.prompts) == 4
+    assert bank.stats() == {"mcq:medium": 1, "question:easy": 1, "question:hard": 1, "question:medium": 1}
+
+
+def test_source_changed_during_generation_is_discarded(temp_db):
+    store = FakeStore(docs())
+    bank = QuestionBank(store, lambda: FakeLLM(), per_topic=1, chunks_per_question=4)
+    bank.build_for_source("a.pdf")
+
+    llm = FakeLLM(on_call=lambda: store.log.append(("delete", "a.pdf")))
+    bank.llm = lambda: llm
+
+    assert bank.build_for_source("a.pdf") == 0
+    # the earlier questions are kept
+    assert sum(bank.stats().values()) == 4
@@ -0,0 +1,59 @@
+# tests/test_quizzes.py
+import json
+
+import pytest
+from pydantic import ValidationError
+
+from app.rag.quizzes import QuizQuestion, QuizStore, option_letter, parse_quiz
+from app.sessions.grading import Outcome
+
+
+def mcq(correct: str) -> dict:
+    return {"question": "Which one?", "options": ["Alpha", "Beta", "Gamma", "Delta"], "correct": correct}
+
+
+@pytest.mark.parametrize("text, letter", [
+    ("b", "B"),
+    ("B)", "B"),
+    ("(c)", "C"),
+    ("D. Delta", "D"),
+    ("Answer: B", "B"),
+    ("correct option is c", "C"),
+    ("Beta", None),
+    ("", None),
+])
+def test_option_letter(text, letter):
+    assert option_letter(text) == letter
+
+
+def test_correct_letter_is_a_standalone_token():
+    # the first character of "Answer: C" is not the answer
+    assert QuizQuestion.model_validate(mcq("Answer: C")).correct == "C"
+    with pytest.raises(ValidationError):
+        QuizQuestion.model_validate(mcq("Beta"))
+    with pytest.raises(ValidationError):
+        QuizQuestion.model_validate(mcq("F"))
+
+
+def test_unparseable_items_are_dropped():
+    questions, dropped = parse_quiz(json.dumps([mcq("B"), mcq("the second one")]), ["c1"])
+
+    assert [q.correct for q in questions] == ["B"]
+    assert dropped == 1
+
+
+def test_grade_reads_the_letter_not_the_first_character():
+    q = QuizQuestion.model_validate(mcq("B"))
+
+    assert q.grade("Answer: B") == Outcome.CORRECT
+    assert q.grade("A") == Outcome.INCORRECT
+    assert q.grade("Beta") == Outcome.INCORRECT
+
+
+def test_a_quiz_is_submitted_once_per_session(temp_db):
+    store = QuizStore(capacity=4)
+    quiz = store.save("default", None, [QuizQuestion.model_validate(mcq("B"))])
+
+    assert store.claim_submission(quiz.id, "s1")
+    assert not store.claim_submission(quiz.id, "s1")
+    assert store.claim_submission(quiz.id, "s2")
@@ -0,0 +1,167 @@
+# tests/test_session_cache.py
+import time
+
+import pytest
+
+from app.models import AttemptModel, ReviewScheduleModel, TestSessionModel
+from app.sessions.cached_store import CachedSessionStore
+from app.sessions.db_store import DBSessionStore
+from app.sessions.grading import Outcome
+
+
+@pytest.fixture
+def make_store(temp_db):
+    stores = []
+
+    def make(**kwargs) -> CachedSessionStore:
+        store = CachedSessionStore(DBSessionStore(), **kwargs)
+        stores.append(store)
+        return store
+
+    yield make
+    for store in stores:
+        store._stop.set()
+        store._wake.set()
+
+
+def attempts(db_session) -> int:
+    db = db_session()
+    try:
+        return db.query(AttemptModel).count()
+    finally:
+        db.close()
+
+
+def session_row(db_session, session_id: str) -> TestSessionModel:
+    db = db_session()
+    try:
+        return db.query(TestSessionModel).filter(TestSessionModel.id == session_id).one()
+    finally:
+        db.close()
+
+
+def answer(store: CachedSessionStore, session_id: str, outcome: Outcome = Outcome.CORRECT):
+    store.record_attempt(session_id, "What is a broker?", "a server", f"{outcome.value}: ok", "kafka", outcome=outcome)
+
+
+def test_write_behind_buffers_until_flush(make_store, temp_db):
+    store = make_store(flush_interval=60, flush_batch_size=100)
+    s = store.create("kafka")
+
+    answer(store, s.id)
+    answer(store, s.id, Outcome.INCORRECT)
+    store.update_review_schedule(s.id, "kafka", "incorrect", outcome=Outcome.INCORRECT)
+
+    assert attempts(temp_db) == 0
+    assert store.summary(s.id)["total"] == 2
+    assert store.stats()["pending_attempts"] == 2
+
+    assert store.flush() == 2
+    assert attempts(temp_db) == 2
+    row = session_row(temp_db, s.id)
+    assert (row.total, row.correct, row.incorrect) == (2, 1, 1)
+    assert store.stats()["dirty_sessions"] == 0
+
+
+def test_full_batch_wakes_the_flusher(make_store, temp_db):
+    store = make_store(flush_interval=60, flush_batch_size=2)
+    s = store.create(None)
+
+    answer(store, s.id)
+    answer(store, s.id)
+
+    deadline = time.monotonic() + 2
+    while attempts(temp_db) < 2:
+        assert time.monotonic() < deadline, "flusher never ran"
+        time.sleep(0.01)
+
+
+def test_write_through_persists_before_returning(make_store, temp_db):
+    store = make_store(flush_interval=0)
+    s = store.create(None)
+
+    answer(store, s.id)
+    store.update_review_schedule(s.id, "kafka", "correct", outcome=Outcome.CORRECT)
+
+    assert store._flusher is None
+    assert attempts(temp_db) == 1
+    assert session_row(temp_db, s.id).total == 1
+    db = temp_db()
+    try:
+        assert db.query(ReviewScheduleModel).filter(ReviewScheduleModel.session_id == s.id).count() == 1
+    finally:
+        db.close()
+    assert store.stats()["pending_attempts"] == 0
+
+
+def test_failed_flush_requeues_everything(make_store, temp_db, monkeypatch):
+    store = make_store(flush_interval=60, flush_batch_size=100)
+    s = store.create(None)
+    answer(store, s.id)
+
+    def locked(*args):
+        raise RuntimeError("database is locked")
+
+    with monkeypatch.context() as m:
+        m.setattr(store.db_store, "apply_batch", locked)
+        with pytest.raises(RuntimeError):
+            store.flush()
+        answer(store, s.id)
+
+        assert store.stats()["pending_attempts"] == 2
+        assert store.stats()["dirty_sessions"] == 1
+
+    assert store.flush() == 2
+    assert attempts(temp_db) == 2
+    assert session_row(temp_db, s.id).total == 2
+
+
+def test_clean_sessions_are_evicted_lru_and_reloaded(make_store, temp_db):
+    store = make_store(capacity=2, flush_interval=60)
+    first, second = store.create(None), store.create(None)
+    answer(store, second.id)
+    # answering moves a session to the end: `second` is now least recently used
+    answer(store, first.id)
+    store.flush()
+
+    third = store.create(None)
+
+    assert list(store._sessions) == [first.id, third.id]
+    # reloaded from the DB with what was flushed, evicting `first`
+    assert store.summary(second.id)["total"] == 1
+    assert list(store._sessions) == [third.id, second.id]
+
+
+def test_full_cache_of_dirty_sessions_flushes_on_insert(make_store, temp_db):
+    store = make_store(capacity=2, flush_interval=60, flush_batch_size=100)
+    first, second = store.create(None), store.create(None)
+    answer(store, first.id)
+    answer(store, second.id)
+
+    store.create(None)
+
+    # nothing was evictable, so the insert flushed first
+    assert attempts(temp_db) == 2
+    assert store.stats()["cached_sessions"] == 2
+
+
+def test_failing_flush_pushes_back_instead_of_growing(make_store, temp_db, monkeypatch):
+    store = make_store(capacity=2, flush_interval=60, flush_batch_size=100)
+    first, second = store.create(None), store.create(None)
+    answer(store, first.id)
+    answer(store, second.id)
+
+    def locked(*args):
+        raise RuntimeError("database is locked")
+
+    with monkeypatch.context() as m:
+        m.setattr(store.db_store, "apply_batch", locked)
+        for _ in range(3):
+            with pytest.raises(RuntimeError):
+                store.create(None)
+        assert store.stats()["cached_sessions"] == 2
+        assert store.stats()["pending_attempts"] == 2
+
+    store.create(None)
+    assert attempts(temp_db) == 2
+    assert store.stats()["cached_sessions"] == 2
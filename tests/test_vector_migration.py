@@ -0,0 +1,182 @@
+# tests/test_vector_migration.py
+"""
+migrate (embedded -> server) and snapshot export -> import, checked point by point:
+ids, payloads and vectors must survive the trip. The embedded-to-embedded cases
+always run; the server cases need a Qdrant at QDRANT_URL and are skipped without one.
+"""
+import os
+import uuid
+
+import numpy as np
+import pytest
+from qdrant_client import QdrantClient
+from qdrant_client.http import models
+
+from app.vectorstore.migrate import migrate
+from app.vectorstore.qdrant_store import collection_params
+from app.vectorstore.snapshot import export_collection, import_collection
+
+DIM = 8
+COUNT = 600   # more than one scroll / upsert batch
+
+
+def points(count: int = COUNT) -> list[models.PointStruct]:
+    rng = np.random.default_rng(0)
+    vectors = rng.normal(size=(count, DIM)).astype(np.float32)
+    # cosine collections store unit vectors
+    vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+    result = []
+    for i, vec in enumerate(vectors):
+        metadata = {"source": f"doc{i % 3}.pdf", "page": i // 10, "chunk_id": f"c{i}"}
+        if i % 5:
+            # some chunks carry no topic: the columnar snapshot must not invent one
+            metadata["topic"] = f"topic{i % 4}"
+        result.append(models.PointStruct(
+            id=str(uuid.UUID(int=i + 1)),
+            vector=vec.tolist(),
+            payload={"page_content": f"chunk {i} text", "metadata": metadata},
+        ))
+    return result
+
+
+def fill(client: QdrantClient, name: str) -> dict:
+    client.create_collection(collection_name=name, **collection_params(DIM))
+    batch = points()
+    client.upsert(collection_name=name, points=batch, wait=True)
+    return {str(p.id): (p.vector, p.payload) for p in batch}
+
+
+def dump(client: QdrantClient, name: str) -> dict:
+    found, offset = {}, None
+    while True:
+        batch, offset = client.scroll(name, with_payload=True, with_vectors=True, limit=256, offset=offset)
+        found.update({str(p.id): (p.vector, p.payload) for p in batch})
+        if offset is None:
+            return found
+
+
+def assert_same(expected: dict, actual: dict, atol: float = 1e-6):
+    assert set(actual) == set(expected)
+    for point_id, (vector, payload) in expected.items():
+        assert actual[point_id][1] == payload
+        np.testing.assert_allclose(actual[point_id][0], vector, atol=atol)
+
+
+@pytest.fixture
+def embedded(tmp_path):
+    clients = []
+
+    def open_client(name: str) -> QdrantClient:
+        client = QdrantClient(path=str(tmp_path / name))
+        clients.append(client)
+        return client
+
+    yield open_client
+    for client in clients:
+        client.close()
+
+
+@pytest.fixture
+def server():
+    from app.core.config import settings
+
+    url = os.getenv("QDRANT_URL") or settings.QDRANT_URL
+    if not url:
+        pytest.skip("QDRANT_URL is not set")
+    client = QdrantClient(url=url, api_key=settings.QDRANT_API_KEY or None, timeout=5)
+    try:
+        client.get_collections()
+    except Exception as e:
+        pytest.skip(f"no Qdrant server at {url}: {e}")
+    names = []
+
+    def collection(prefix: str) -> str:
+        names.append(f"{prefix}_{uuid.uuid4().hex[:8]}")
+        return names[-1]
+
+    yield client, collection
+    for name in names:
+        client.delete_collection(name)
+    client.close()
+
+
+# ---------- embedded -> embedded ----------
+
+def test_migrate_between_embedded_directories(embedded):
+    src, dst = embedded("src"), embedded("dst")
+    expected = fill(src, "learning_copilot")
+
+    report = migrate(src, dst, batch_size=256)
+
+    assert report["learning_copilot"]["copied"] == COUNT
+    assert report["learning_copilot"]["dest_count"] == COUNT
+    assert_same(expected, dump(dst, "learning_copilot"))
+
+
+def test_migrate_refuses_an_existing_destination_unless_recreate(embedded):
+    src, dst = embedded("src"), embedded("dst")
+    expected = fill(src, "learning_copilot")
+    migrate(src, dst)
+
+    with pytest.raises(RuntimeError, match="already exists"):
+        migrate(src, dst)
+
+    report = migrate(src, dst, recreate=True)
+    assert report["learning_copilot"]["dest_count"] == COUNT
+    assert_same(expected, dump(dst, "learning_copilot"))
+
+
+def test_snapshot_round_trip_between_embedded_directories(embedded, tmp_path):
+    src, dst = embedded("src"), embedded("dst")
+    expected = fill(src, "learning_copilot")
+
+    manifest = export_collection(src, "learning_copilot", str(tmp_path / "bundle"), batch_size=256)
+    result = import_collection(dst, str(tmp_path / "bundle"), "restored", batch_size=256)
+
+    assert manifest["count"] == COUNT
+    assert result["imported"] == COUNT
+    assert_same(expected, dump(dst, "restored"))
+    assert sum(result["topics_by_source"]["doc0.pdf"].values()) == COUNT // 3
+
+
+def test_int8_snapshot_stays_close(embedded, tmp_path):
+    src, dst = embedded("src"), embedded("dst")
+    expected = fill(src, "learning_copilot")
+
+    export_collection(src, "learning_copilot", str(tmp_path / "bundle"), quantization="int8")
+    import_collection(dst, str(tmp_path / "bundle"), "restored")
+
+    assert_same(expected, dump(dst, "restored"), atol=0.01)
+
+
+# ---------- against a Qdrant server ----------
+
+def test_migrate_embedded_to_server(embedded, server):
+    client, collection = server
+    src = embedded("src")
+    name = collection("test_migrate")
+    expected = fill(src, name)
+
+    report = migrate(src, client, [name], batch_size=256)
+
+    assert report[name]["dest_count"] == COUNT
+    assert_same(expected, dump(client, name))
+
+
+def test_snapshot_export_embedded_import_server(embedded, server, tmp_path):
+    client, collection = server
+    src = embedded("src")
+    expected = fill(src, "learning_copilot")
+
+    export_collection(src, "learning_copilot", str(tmp_path / "bundle"))
+    name = collection("test_snapshot")
+    result = import_collection(client, str(tmp_path / "bundle"), name, batch_size=128, workers=4)
+
+    assert result["imported"] == COUNT
+    assert_same(expected, dump(client, name))
+
+    # and back out of the server
+    export_collection(client, name, str(tmp_path / "again"))
+    back = embedded("back")
+    import_collection(back, str(tmp_path / "again"), "learning_copilot")
+    assert_same(expected, dump(back, "learning_copilot"))
@@ -0,0 +1,108 @@
+# tests/test_web_fetch.py
+import pytest
+
+from app.core.config import settings
+from app.ingestion.web_catalog import WebCatalog
+from app.ingestion.web_ingestor import WebIngestor
+
+PAGE = "<html><head><title>Guide</title></head><body><h1>Intro</h1><p>Hello.</p></body></html>"
+
+
+@pytest.fixture
+def ingestor(temp_db):
+    # fetch() never touches the vector store
+    return WebIngestor(vector_store=None, catalog=WebCatalog("test"))
+
+
+def with_etag(etag: str, body: str = PAGE):
+    def route(request):
+        if request["headers"].get("If-None-Match") == etag:
+            return 304, {"ETag": etag}, b""
+        return 200, {"ETag": etag, "Content-Type": "text/html"}, body
+    return route
+
+
+def remember(ingestor, page):
+    ingestor.catalog.put(page.url, page.etag, page.last_modified, page.content_hash)
+
+
+def test_plain_fetch_records_validators(site, ingestor):
+    site.routes["/a"] = (200, {"ETag": '"v1"', "Last-Modified": "Mon, 05 Jan 2026 10:00:00 GMT"}, PAGE)
+
+    page = ingestor.fetch(site.url("/a"))
+
+    assert page.body == PAGE.encode()
+    assert page.etag == '"v1"'
+    assert page.last_modified == "Mon, 05 Jan 2026 10:00:00 GMT"
+    assert len(page.content_hash) == 64
+
+
+def test_pooled_session_sends_configured_user_agent(site, ingestor):
+    site.routes["/a"] = (200, {}, PAGE)
+
+    ingestor.fetch(site.url("/a"))
+
+    assert site.requests[0]["headers"]["User-Agent"] == settings.WEB_USER_AGENT
+
+
+def test_conditional_fetch_304_is_not_modified(site, ingestor):
+    site.routes["/a"] = with_etag('"v1"')
+    remember(ingestor, ingestor.fetch(site.url("/a")))
+
+    assert ingestor.fetch(site.url("/a"), conditional=True) is None
+    assert site.requests[-1]["headers"]["If-None-Match"] == '"v1"'
+    assert ingestor.catalog.get(site.url("/a"))["checked_at"] is not None
+
+
+def test_conditional_fetch_sends_if_modified_since(site, ingestor):
+    stamp = "Mon, 05 Jan 2026 10:00:00 GMT"
+
+    def route(request):
+        if request["headers"].get("If-Modified-Since") == stamp:
+            return 304, {}, b""
+        return 200, {"Last-Modified": stamp}, PAGE
+
+    site.routes["/a"] = route
+    remember(ingestor, ingestor.fetch(site.url("/a")))
+
+    assert ingestor.fetch(site.url("/a"), conditional=True) is None
+    assert "If-None-Match" not in site.requests[-1]["headers"]
+
+
+def test_validator_less_server_falls_back_to_body_hash(site, ingestor):
+    site.routes["/a"] = (200, {}, PAGE)
+    remember(ingestor, ingestor.fetch(site.url("/a")))
+
+    assert ingestor.fetch(site.url("/a"), conditional=True) is None
+
+    site.routes["/a"] = (200, {}, PAGE.replace("Hello.", "Hello again."))
+    page = ingestor.fetch(site.url("/a"), conditional=True)
+    assert page is not None
+    assert b"Hello again." in page.body
+
+
+def test_changed_etag_returns_new_page(site, ingestor):
+    site.routes["/a"] = with_etag('"v1"')
+    remember(ingestor, ingestor.fetch(site.url("/a")))
+
+    site.routes["/a"] = with_etag('"v2"', PAGE.replace("Hello.", "Changed."))
+    page = ingestor.fetch(site.url("/a"), conditional=True)
+
+    assert page is not None
+    assert page.etag == '"v2"'
+
+
+def test_unknown_url_is_fetched_unconditionally(site, ingestor):
+    site.routes["/a"] = with_etag('"v1"')
+
+    page = ingestor.fetch(site.url("/a"), conditional=True)
+
+    assert page is not None
+    assert "If-None-Match" not in site.requests[-1]["headers"]
+
+
+def test_http_error_raises(site, ingestor):
+    site.routes["/gone"] = (500, {}, "boom")
+
+    with pytest.raises(Exception):
+        ingestor.fetch(site.url("/gone"))
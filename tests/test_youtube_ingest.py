@@ -0,0 +1,209 @@
+# tests/test_youtube_ingest.py
+"""
+YouTubeIngestor with a fake transcript client and a fake store: no network, no API keys.
+"""
+import threading
+import time
+
+import pytest
+
+from app.ingestion.youtube_client import canonical_video_url, video_id
+from app.ingestion.youtube_ingestor import YouTubeIngestor
+from app.rag.citations import build_citation
+from app.vectorstore.dedup_index import DuplicateIndex
+
+WORDS = ["broker", "partition", "offset", "replica", "leader", "consumer", "producer", "topic"]
+
+
+def caption_lines(vid: str, seconds: int = 150, step: int = 5) -> list[dict]:
+    # distinct text per line so nothing is dropped as a near-duplicate
+    return [
+        {"text": f"{vid} line {i}: the {WORDS[i % len(WORDS)]} {i * 7919 % 1000} moves {WORDS[(i * 3) % len(WORDS)]} data", "start": float(i * step), "duration": float(step)}
+        for i in range(seconds // step)
+    ]
+
+
+class FakeYouTubeClient:
+    def __init__(self, transcripts: dict, delay: float = 0.0):
+        self.transcripts = transcripts
+        self.delay = delay
+        self.active = 0
+        self.peak = 0
+        self._lock = threading.Lock()
+
+    def transcript(self, vid: str) -> list[dict]:
+        with self._lock:
+            self.active += 1
+            self.peak = max(self.peak, self.active)
+        try:
+            time.sleep(self.delay)
+            found = self.transcripts.get(vid)
+            if isinstance(found, Exception):
+                raise found
+            return found or []
+        finally:
+            with self._lock:
+                self.active -= 1
+
+    def playlist_video_ids(self, url: str) -> list[str]:
+        return list(self.transcripts)
+
+
+class FakeEmbeddings:
+    def __init__(self, fail: bool = False):
+        self.fail = fail
+        self.calls = []
+
+    def embed_documents(self, texts):
+        self.calls.append(len(texts))
+        if self.fail:
+            raise RuntimeError("embedding quota exceeded")
+        return [[float(len(t)), 1.0] for t in texts]
+
+
+class FakeStore:
+    def __init__(self, fail: bool = False):
+        self.embeddings = FakeEmbeddings(fail)
+        self.added: list[tuple[list[str], list[dict]]] = []
+        self.events: list[tuple] = []
+
+    def add_texts(self, texts, metadatas=None, vectors=None):
+        assert vectors is not None and len(vectors) == len(texts)
+        self.added.append((texts, metadatas))
+        self.events.append(("add", sorted({m["source"] for m in metadatas})))
+
+
+A, B, C = "aaaaaaaaaaa", "bbbbbbbbbbb", "ccccccccccc"
+
+
+def url(vid: str) -> str:
+    return f"https://www.youtube.com/watch?v={vid}"
+
+
+def test_canonical_video_url():
+    assert canonical_video_url(f"https://youtu.be/{A}?t=42") == url(A)
+    assert canonical_video_url(f"https://www.youtube.com/watch?v={A}&list=PL1&t=3s") == url(A)
+    assert canonical_video_url(f"https://m.youtube.com/shorts/{A}") == url(A)
+    assert canonical_video_url(" https://example.com/video ") == "https://example.com/video"
+    assert video_id(canonical_video_url(f"https://youtu.be/{A}")) == A
+
+
+def test_sources_are_canonical_watch_urls():
+    ingestor = YouTubeIngestor(FakeStore(), client=FakeYouTubeClient({A: caption_lines(A)}))
+
+    fetched = ingestor.fetch_transcripts([f"https://youtu.be/{A}"])
+
+    assert fetched[0][0] == url(A)
+
+
+def test_per_video_failures_do_not_fail_the_batch():
+    client = FakeYouTubeClient({A: caption_lines(A), B: [], C: RuntimeError("video unavailable")})
+    store = FakeStore()
+    ingestor = YouTubeIngestor(store, client=client)
+
+    result = ingestor.ingest_videos([url(A), url(B), url(C), "https://example.com/not-a-video"])
+
+    assert [v["source"] for v in result["videos"]] == [url(A)]
+    failed = {f["source"]: f["error"] for f in result["failed"]}
+    assert set(failed) == {url(B), url(C), "https://example.com/not-a-video"}
+    assert "No transcript" in failed[url(B)]
+    assert "video unavailable" in failed[url(C)]
+    assert "video ID" in failed["https://example.com/not-a-video"]
+
+
+def test_single_video_failure_raises():
+    ingestor = YouTubeIngestor(FakeStore(), client=FakeYouTubeClient({A: []}))
+
+    with pytest.raises(ValueError, match="No transcript"):
+        ingestor.ingest(url(A))
+
+
+def test_playlist_is_embedded_and_stored_in_one_batch():
+    client = FakeYouTubeClient({A: caption_lines(A), B: caption_lines(B), C: caption_lines(C)})
+    store = FakeStore()
+    ingestor = YouTubeIngestor(store, client=client)
+
+    result = ingestor.ingest_videos([url(v) for v in client.playlist_video_ids("playlist")])
+
+    assert len(result["videos"]) == 3
+    assert store.embeddings.calls == [result["chunks"]]
+    assert len(store.added) == 1
+    assert store.events == [("add", [url(A), url(B), url(C)])]
+
+
+def test_transcripts_fetched_concurrently_on_a_bounded_pool(monkeypatch):
+    from app.core.config import settings
+
+    monkeypatch.setattr(settings, "YOUTUBE_FETCH_WORKERS", 2)
+    vids = [f"{i:0>11}" for i in range(6)]
+    client = FakeYouTubeClient({v: caption_lines(v, seconds=20) for v in vids}, delay=0.1)
+    ingestor = YouTubeIngestor(FakeStore(), client=client)
+
+    fetched = ingestor.fetch_transcripts([url(v) for v in vids])
+
+    assert [f[0] for f in fetched] == [url(v) for v in vids]
+    assert client.peak == 2
+
+
+def test_chunks_carry_start_and_end_seconds():
+    store = FakeStore()
+    ingestor = YouTubeIngestor(store, client=FakeYouTubeClient({A: caption_lines(A, seconds=150)}))
+
+    ingestor.ingest(url(A))
+
+    texts, metadatas = store.added[0]
+    windows = [(m["start_seconds"], m["end_seconds"]) for m in metadatas]
+    assert windows[0][0] == 0
+    assert windows[-1][1] == 150
+    for start, end in windows:
+        # windows open and close on caption-line boundaries
+        assert start % 5 == 0 and end % 5 == 0
+        assert 0 < end - start <= 60 + 5
+    assert [s for s, _ in windows] == sorted(s for s, _ in windows)
+    assert all(m["type"] == "youtube" and m["source"] == url(A) for m in metadatas)
+
+    class Doc:
+        metadata = metadatas[1]
+
+    citation = build_citation(Doc)
+    assert citation["start_seconds"] == windows[1][0]
+    assert citation["end_seconds"] == windows[1][1]
+
+
+def test_replace_runs_after_embedding_and_skips_failed_videos():
+    events = []
+    store = FakeStore()
+    store.events = events
+    client = FakeYouTubeClient({A: caption_lines(A), B: RuntimeError("gone")})
+    ingestor = YouTubeIngestor(store, client=client)
+
+    ingestor.ingest_transcripts(ingestor.fetch_transcripts([url(A), url(B)]), replace=lambda s: events.append(("replace", s)))
+
+    assert events == [("replace", url(A)), ("add", [url(A)])]
+
+
+def test_failed_embedding_keeps_old_chunks():
+    events = []
+    store = FakeStore(fail=True)
+    ingestor = YouTubeIngestor(store, client=FakeYouTubeClient({A: caption_lines(A)}))
+
+    with pytest.raises(RuntimeError):
+        ingestor.ingest_transcripts(ingestor.fetch_transcripts([url(A)]), replace=lambda s: events.append(s))
+
+    assert events == []
+    assert store.added == []
+
+
+def test_replaced_video_is_not_deduped_against_its_old_chunks(temp_db):
+    dedup = DuplicateIndex("test")
+    ingestor = YouTubeIngestor(FakeStore(), dedup_index=dedup, client=FakeYouTubeClient({A: caption_lines(A)}))
+
+    first = ingestor.ingest(url(A))
+    # re-ingesting without replacing: every chunk is a near-duplicate of the stored ones
+    again = ingestor.ingest(url(A))
+    replaced = ingestor.ingest_transcripts(ingestor.fetch_transcripts([url(A)]), replace=dedup.remove_source)
+
+    assert first["chunks"] > 0
+    assert again["chunks"] == 0
+    assert replaced["videos"][0]["chunks"] == first["chunks"]
+    assert dedup.stats()["signatures"] == first["chunks"]